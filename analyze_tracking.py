@@ -2,95 +2,317 @@
 """
 Simple Event Analytics Script
 Analiza los logs del servidor para extraer métricas de tracking
+
+Si existe el almacén columnar (TRACKING_SINK=columnar o `tracking_stats.py
+import`), el informe se calcula desde ahí; los logs son el respaldo para
+despliegues antiguos.
+
+El parser de logs es streaming: lee línea a línea con generadores y una regex
+precompilada, agrega en contadores incrementales (memoria constante respecto al
+tamaño del log), acepta logs rotados .gz, procesa varios ficheros en paralelo
+(un proceso por fichero) y guarda un checkpoint con el offset en bytes de cada
+fichero y los agregados acumulados, así que re-ejecutarlo solo lee lo nuevo.
+Cada fichero se identifica por el hash de su cabecera, no por su ruta: tras un
+logrotate, server.log.1.gz continúa donde se quedó server.log.
+
+    python analyze_tracking.py                                # server.log / app.log / logs/server.log
+    python analyze_tracking.py logs/server.log logs/server.log.*.gz --workers 4
+    python analyze_tracking.py server.log --reset             # ignora el checkpoint
 """
+import argparse
+import gzip
+import hashlib
+import json
+import os
 import re
 from collections import Counter
-from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Formato esperado:
+# INFO - EVENT_TRACK | install_extension_click | page=landing | ip=127.0.0*** | ua=... | referrer=direct
+# Con LOG_FORMAT=json (por defecto en prod) la misma cadena va en el campo "msg".
+EVENT_PATTERN = re.compile(
+    r"EVENT_TRACK \| (\w+) \| page=([^\s|]+) \| ip=([\w\.:*]+) \| ua=(.+?) \| referrer=(.+?)$"
+)
+EVENT_MARKER = "EVENT_TRACK"
+DEFAULT_CHECKPOINT = ".analyze_tracking.checkpoint.json"
+# Bytes iniciales (descomprimidos) que identifican un fichero en el checkpoint
+HEAD_BYTES = 1024
+
+
+@dataclass
+class EventStats:
+    """Agregados incrementales: el tamaño depende de la cardinalidad, no del número de eventos."""
+
+    total: int = 0
+    types: Counter = field(default_factory=Counter)
+    pages: Counter = field(default_factory=Counter)
+    referrers: Counter = field(default_factory=Counter)
+    ips: set = field(default_factory=set)  # IPs ya enmascaradas (prefijo + ***)
+
+    def add(self, event_type: str, page: str, ip: str, referrer: str) -> None:
+        self.total += 1
+        self.types[event_type] += 1
+        self.pages[page] += 1
+        self.referrers[referrer] += 1
+        self.ips.add(ip)
+
+    def merge(self, other: "EventStats") -> "EventStats":
+        self.total += other.total
+        self.types.update(other.types)
+        self.pages.update(other.pages)
+        self.referrers.update(other.referrers)
+        self.ips.update(other.ips)
+        return self
 
+    def to_dict(self) -> dict:
+        return {
+            "total": self.total,
+            "types": dict(self.types),
+            "pages": dict(self.pages),
+            "referrers": dict(self.referrers),
+            "ips": sorted(self.ips),
+        }
 
-def parse_log_file(log_file: str = "server.log"):
+    @classmethod
+    def from_dict(cls, data: dict) -> "EventStats":
+        return cls(
+            total=data.get("total", 0),
+            types=Counter(data.get("types", {})),
+            pages=Counter(data.get("pages", {})),
+            referrers=Counter(data.get("referrers", {})),
+            ips=set(data.get("ips", [])),
+        )
+
+
+def _is_gzip(path: str) -> bool:
+    return path.endswith(".gz")
+
+
+def iter_lines(log_file: str, offset: int = 0) -> Iterator[Tuple[str, int]]:
     """
-    Parsea el archivo de log del servidor y extrae eventos de tracking
-    
-    Formato esperado:
-    INFO - EVENT_TRACK | install_extension_click | page=landing | ip=127.0.0*** | ua=... | referrer=direct
+    Genera (línea, offset tras la línea). En ficheros planos una última línea
+    sin salto de línea (aún escribiéndose) no se emite ni avanza el offset.
     """
-    events = []
-    pattern = r"EVENT_TRACK \| (\w+) \| page=(\w+) \| ip=([\w\.:*]+) \| ua=(.+?) \| referrer=(.+?)$"
-    
-    log_path = Path(log_file)
-    if not log_path.exists():
-        print(f"⚠️  Log file not found: {log_file}")
-        print("ℹ️  Events are currently only logged to stdout/console")
-        return events
-    
-    with open(log_path, 'r') as f:
-        for line in f:
-            match = re.search(pattern, line)
-            if match:
-                event_type, page, ip, ua, referrer = match.groups()
-                events.append({
-                    'type': event_type,
-                    'page': page,
-                    'ip': ip,
-                    'user_agent': ua.strip(),
-                    'referrer': referrer.strip()
-                })
-    
-    return events
-
-
-def analyze_events(events: list):
+    opener = gzip.open if _is_gzip(log_file) else open
+    with opener(log_file, "rb") as f:
+        if offset:
+            f.seek(offset)
+        position = offset
+        for raw in f:
+            if not raw.endswith(b"\n") and not _is_gzip(log_file):
+                break
+            position += len(raw)
+            yield raw.decode("utf-8", errors="replace").rstrip("\r\n"), position
+
+
+def _message(line: str) -> str:
+    """Devuelve el campo msg de una línea JSON (JSONFormatter); la línea tal cual si es texto."""
+    if not line.startswith("{"):
+        return line
+    try:
+        msg = json.loads(line).get("msg")
+    except (ValueError, AttributeError):
+        return line
+    return msg if isinstance(msg, str) else line
+
+
+def iter_events(lines: Iterator[str]) -> Iterator[Tuple[str, str, str, str, str]]:
+    """Genera (type, page, ip, user_agent, referrer) por cada línea EVENT_TRACK."""
+    search = EVENT_PATTERN.search
+    for line in lines:
+        if EVENT_MARKER not in line:  # descarte barato antes de la regex
+            continue
+        match = search(_message(line))
+        if match:
+            event_type, page, ip, ua, referrer = match.groups()
+            yield event_type, page, ip, ua.strip(), referrer.strip()
+
+
+def parse_log_file(log_file: str = "server.log", offset: int = 0) -> Tuple[EventStats, int]:
+    """
+    Parsea el fichero desde `offset` y devuelve (agregados, offset final).
+    """
+    stats = EventStats()
+    end = offset
+    lines = iter_lines(log_file, offset)
+
+    def text_only() -> Iterator[str]:
+        nonlocal end
+        for line, end in lines:
+            yield line
+
+    for event_type, page, ip, _ua, referrer in iter_events(text_only()):
+        stats.add(event_type, page, ip, referrer)
+    return stats, end
+
+
+def _parse_job(job: Tuple[str, int]) -> Tuple[str, dict, int]:
+    log_file, offset = job
+    stats, end = parse_log_file(log_file, offset)
+    return log_file, stats.to_dict(), end
+
+
+def load_checkpoint(path: Optional[str]) -> dict:
+    if not path or not Path(path).exists():
+        return {"files": {}, "stats": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(path: str, checkpoint: dict) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp, path)
+
+
+def _read_head(log_file: str, length: int = HEAD_BYTES) -> bytes:
+    """Primeros `length` bytes (descomprimidos si es .gz) del fichero."""
+    opener = gzip.open if _is_gzip(log_file) else open
+    with opener(log_file, "rb") as f:
+        return f.read(length)
+
+
+def _head_id(head: bytes) -> str:
+    return hashlib.sha1(head).hexdigest()
+
+
+def _find_previous(log_file: str, head: bytes, files: Dict[str, dict]) -> Optional[str]:
+    """
+    Clave del checkpoint que corresponde a este fichero. La identidad es el hash
+    de su cabecera, no la ruta, así que una copia rotada o comprimida
+    (server.log -> server.log.1.gz) se reconoce y continúa desde su offset.
+    """
+    best, best_len = None, 0
+    for key, entry in files.items():
+        length = entry.get("head_len")
+        if length is None:
+            # Checkpoint anterior (clave = ruta): solo vale para el mismo fichero
+            if key == log_file and entry.get("inode") == os.stat(log_file).st_ino:
+                return key
+            continue
+        if best_len < length <= len(head) and _head_id(head[:length]) == key:
+            best, best_len = key, length
+    return best
+
+
+def _start_offset(log_file: str, previous: Optional[dict]) -> Optional[int]:
+    """Offset desde el que leer, o None si el fichero no ha cambiado."""
+    if not previous:
+        return 0
+    st = os.stat(log_file)
+    if previous.get("inode") == st.st_ino and previous.get("size") == st.st_size:
+        return None
+    if "head_len" not in previous and _is_gzip(log_file):
+        return 0  # checkpoint anterior: el .gz se leía entero
+    if not _is_gzip(log_file) and st.st_size < previous.get("offset", 0):
+        return 0  # truncado / reemplazado: empezar de nuevo
+    return previous.get("offset", 0)
+
+
+def parse_logs(
+    log_files: Sequence[str],
+    checkpoint_path: Optional[str] = DEFAULT_CHECKPOINT,
+    workers: Optional[int] = None,
+) -> EventStats:
+    """
+    Agrega todos los ficheros (en paralelo si hay varios) continuando desde el
+    checkpoint; devuelve los agregados acumulados de todas las ejecuciones.
+    """
+    checkpoint = load_checkpoint(checkpoint_path)
+    files: Dict[str, dict] = checkpoint.setdefault("files", {})
+    stats = EventStats.from_dict(checkpoint.get("stats", {}))
+
+    jobs: List[Tuple[str, int]] = []
+    previous_keys: Dict[str, str] = {}
+    for log_file in log_files:
+        key = _find_previous(log_file, _read_head(log_file), files)
+        if key is not None:
+            if key in previous_keys.values():
+                continue  # otra copia del mismo log en esta ejecución
+            previous_keys[log_file] = key
+        offset = _start_offset(log_file, files.get(key) if key else None)
+        if offset is not None:
+            jobs.append((log_file, offset))
+
+    if len(jobs) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(jobs))) as pool:
+            results = list(pool.map(_parse_job, jobs))
+    else:
+        results = [_parse_job(job) for job in jobs]
+
+    for log_file, partial, end in results:
+        stats.merge(EventStats.from_dict(partial))
+        if log_file in previous_keys:
+            files.pop(previous_keys[log_file])  # la cabecera crece hasta HEAD_BYTES
+        head = _read_head(log_file, min(HEAD_BYTES, end))
+        if head:
+            st = os.stat(log_file)
+            files[_head_id(head)] = {
+                "path": log_file,
+                "inode": st.st_ino,
+                "size": st.st_size,
+                "offset": end,
+                "head_len": len(head),
+            }
+
+    if checkpoint_path:
+        checkpoint["stats"] = stats.to_dict()
+        save_checkpoint(checkpoint_path, checkpoint)
+    return stats
+
+
+def analyze_events(stats: EventStats):
     """Genera estadísticas de los eventos"""
-    if not events:
+    if not stats.total:
         print("📊 No events found in logs\n")
         return
-    
+
     print("=" * 70)
     print("📊 LINKEDIN LEAD CHECKER - EVENT ANALYTICS")
     print("=" * 70)
     print()
-    
+
     # Conteo total
-    print(f"📈 Total Events: {len(events)}")
+    total = stats.total
+    print(f"📈 Total Events: {total}")
     print()
-    
+
     # Eventos por tipo
-    event_types = Counter(e['type'] for e in events)
     print("🎯 Events by Type:")
-    for event_type, count in event_types.most_common():
-        percentage = (count / len(events)) * 100
+    for event_type, count in stats.types.most_common():
+        percentage = (count / total) * 100
         print(f"   • {event_type}: {count} ({percentage:.1f}%)")
     print()
-    
+
     # Eventos por página
-    pages = Counter(e['page'] for e in events)
     print("📄 Events by Page:")
-    for page, count in pages.most_common():
-        percentage = (count / len(events)) * 100
+    for page, count in stats.pages.most_common():
+        percentage = (count / total) * 100
         print(f"   • {page}: {count} ({percentage:.1f}%)")
     print()
-    
+
     # Referrers
-    referrers = Counter(e['referrer'] for e in events)
     print("🔗 Top Referrers:")
-    for referrer, count in referrers.most_common(10):
-        percentage = (count / len(events)) * 100
+    for referrer, count in stats.referrers.most_common(10):
+        percentage = (count / total) * 100
         display_ref = referrer if referrer != 'direct' else '(direct)'
         print(f"   • {display_ref}: {count} ({percentage:.1f}%)")
     print()
-    
+
     # IPs únicas (aproximado, ya que están enmascaradas)
-    unique_ips = len(set(e['ip'] for e in events))
-    print(f"🌐 Unique IPs (approx): {unique_ips}")
+    print(f"🌐 Unique IPs (approx): {len(stats.ips)}")
     print()
-    
+
     # Métricas de conversión
     print("💡 Conversion Metrics:")
-    install_clicks = sum(1 for e in events if e['type'] == 'install_extension_click')
-    waitlist_joins = sum(1 for e in events if e['type'] == 'waitlist_join')
-    
+    install_clicks = stats.types.get('install_extension_click', 0)
+    waitlist_joins = stats.types.get('waitlist_join', 0)
+
     if install_clicks > 0:
         conversion_rate = (waitlist_joins / install_clicks) * 100
         print(f"   • Install Clicks: {install_clicks}")
@@ -98,48 +320,65 @@ def analyze_events(events: list):
         print(f"   • Conversion Rate: {conversion_rate:.1f}%")
     else:
         print("   • Not enough data yet")
-    
+
     print()
     print("=" * 70)
 
 
 def main():
     """Función principal"""
+    parser = argparse.ArgumentParser(description="Tracking event analytics")
+    parser.add_argument("logs", nargs="*", help="Log files (plain or .gz); default: search known locations")
+    parser.add_argument("--workers", type=int, help="Parallel processes (default: one per file, up to CPU count)")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Offsets + running totals file")
+    parser.add_argument("--no-checkpoint", action="store_true", help="Parse everything, don't save progress")
+    parser.add_argument("--reset", action="store_true", help="Discard the checkpoint before parsing")
+    args = parser.parse_args()
+
     print()
+    store = os.getenv("TRACKING_EVENTS_DIR", "tracking_events")
+    if not args.logs and Path(store).is_dir() and any(Path(store).glob("segment-*.npz")):
+        from tracking_stats import load_store, print_summary
+
+        print(f"✅ Found columnar event store: {store}")
+        print()
+        print_summary(load_store(store), top=10)
+        return
+
     print("🔍 Searching for event logs...")
     print()
-    
+
     # Intentar diferentes ubicaciones de logs
-    possible_logs = [
+    possible_logs = args.logs or [
         "server.log",
         "app.log",
         "logs/server.log",
-        "data/events.jsonl"  # Si implementas el guardado en JSON
     ]
-    
-    events = []
-    for log_file in possible_logs:
-        if Path(log_file).exists():
-            print(f"✅ Found: {log_file}")
-            events = parse_log_file(log_file)
-            break
-    else:
+
+    log_files = [log_file for log_file in possible_logs if Path(log_file).exists()]
+    if not log_files:
         print("⚠️  No log files found")
         print()
         print("💡 Current Implementation:")
-        print("   Events are logged to stdout/console only")
+        print("   Events are buffered and written by TRACKING_SINK (db, file, columnar, log)")
         print()
-        print("   To capture events permanently:")
-        print("   1. Run backend with output redirect:")
+        print("   To analyze the legacy EVENT_TRACK log lines:")
+        print("   1. Run backend with TRACKING_SINK=log and output redirect:")
         print("      python start_server.py > server.log 2>&1")
         print()
-        print("   2. Or implement file logging in events.py")
-        print("      (See TRACKING_IMPLEMENTATION.md for examples)")
+        print("   2. Or use the columnar store: python tracking_stats.py report")
         print()
         return
-    
+    for log_file in log_files:
+        print(f"✅ Found: {log_file}")
+
+    checkpoint = None if args.no_checkpoint else args.checkpoint
+    if args.reset and checkpoint and Path(checkpoint).exists():
+        Path(checkpoint).unlink()
+
+    stats = parse_logs(log_files, checkpoint_path=checkpoint, workers=args.workers)
     print()
-    analyze_events(events)
+    analyze_events(stats)
 
 
 if __name__ == "__main__":
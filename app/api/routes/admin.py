@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse
+
+from app.core.dependencies import require_admin
+from app.core.event_buffer import get_event_buffer
+from app.core.profiling import get_profile_path, list_profiles
+from app.core.stripe_events import list_stripe_events, requeue_stripe_event
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+@router.get("/profiles", summary="List recent request profiles", include_in_schema=False)
+def get_profiles(limit: int = Query(default=50, ge=1, le=500)):
+    """Most recent request profiles (newest first) written by the profiling middleware."""
+    return {"profiles": list_profiles(limit)}
+
+
+@router.get("/profiles/{request_id}", summary="Download a request profile", include_in_schema=False)
+def download_profile(request_id: str):
+    """Collapsed-stack profile for one X-Request-ID (load into speedscope or flamegraph.pl)."""
+    path = get_profile_path(request_id)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=path.name)
+
+
+@router.get("/events/stats", summary="Tracking event buffer stats", include_in_schema=False)
+def get_event_stats():
+    """Accepted/dropped/flushed counts, buffer depth and batch insert throughput."""
+    return get_event_buffer().snapshot()
+
+
+@router.get("/stripe-events", summary="List stored Stripe webhook events", include_in_schema=False)
+def get_stripe_events(status_filter: str | None = Query(default=None, alias="status"), limit: int = Query(default=50, ge=1, le=500)):
+    """Most recent webhook events; ?status=dead lists the dead-letter queue."""
+    return {"events": list_stripe_events(status_filter, limit)}
+
+
+@router.post("/stripe-events/{event_id}/retry", summary="Requeue a Stripe webhook event", include_in_schema=False)
+def retry_stripe_event(event_id: str):
+    """Send a dead or failed event back to the worker pool with a fresh attempt budget."""
+    if not requeue_stripe_event(event_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No dead or failed event with this id")
+    return {"status": "queued", "event_id": event_id}
@@ -1,22 +1,37 @@
+import json
 import logging
-from typing import Tuple
+import shutil
+import tempfile
+import time
+from typing import IO, Iterator, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.core.analysis_cache import build_profile_hash, cache_analysis, get_cached_analysis
+from app.core.ai_costs import track_ai_cost
+from app.core.analysis_cache import (
+    build_profile_hash,
+    cache_analyses,
+    cache_analysis,
+    get_cached_analysis,
+    local_response_type,
+    get_cached_hashes,
+)
 from app.core.config import get_settings
-from app.core.db import get_db
+from app.core.db import get_db, get_session_factory, read_session
 from app.core.dependencies import get_current_user
+from app.core.metrics import LEAD_IMPORT_ROWS, record_preview, track_stage
 from app.core.usage import (
     BudgetStatus,
+    check_plan_limit,
     check_usage_limit,
     evaluate_budget_status,
     get_usage_stats,
     record_usage,
 )
 from app.models.user import User
-from app.schemas.ai_responses import DimensionScores, FitScoringResult, ICPConfig
+from app.schemas.ai_responses import DecisionResult, DimensionScores, FitScoringResult, ICPConfig
 from app.schemas.analyze import (
     AnalyzeProfileRequest,
     AnalyzeProfileResponse,
@@ -25,8 +40,11 @@ from app.schemas.analyze import (
     AnalyzeLinkedInResponse,
     AnalyzeLinkedInUI,
     AnalyzeStableResponse,
+    BatchScoreRequest,
+    BatchScoreResponse,
 )
-from app.services import get_ai_service, run_fit, run_decision
+from app.services import get_ai_service, local_decision, prescore_fit, run_fit, run_decision
+from app.services.lead_import import ImportChunk, ImportTotals, detect_format, iter_chunks
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/analyze", tags=["analyze"])
@@ -201,8 +219,10 @@ def _serve_cached_profile(db: Session, profile_hash: str) -> AnalyzeProfileRespo
     return AnalyzeProfileResponse(**cached)
 
 
-def _serve_cached_linkedin(db: Session, profile_hash: str) -> AnalyzeLinkedInResponse | None:
-    cached = get_cached_analysis(db, profile_hash, "linkedin")
+def _serve_cached_linkedin(
+    db: Session, profile_hash: str, response_type: str = "linkedin", user_id: int | None = None
+) -> AnalyzeLinkedInResponse | None:
+    cached = get_cached_analysis(db, profile_hash, response_type, user_id)
     if not cached:
         return None
     logger.info("Serving cached LinkedIn analysis (hash=%s)", profile_hash)
@@ -211,6 +231,38 @@ def _serve_cached_linkedin(db: Session, profile_hash: str) -> AnalyzeLinkedInRes
     return AnalyzeLinkedInResponse(**cached)
 
 
+def _qualify(profile: dict, icp_config: ICPConfig) -> Tuple[FitScoringResult, DecisionResult]:
+    """Local ICP pre-score for clear accepts/rejects; only ambiguous profiles reach OpenAI."""
+    with track_stage("prescore"):
+        fit = prescore_fit(profile, icp_config)
+    if fit is not None:
+        logger.info("PRESCORE_SHORT_CIRCUIT: overall_score=%.1f (no OpenAI call)", fit.overall_score)
+        return fit, local_decision(fit)
+    fit = run_fit(profile, icp_config)
+    return fit, run_decision(fit, profile)
+
+
+def _linkedin_response(fit: FitScoringResult, decision: DecisionResult, plan: str) -> AnalyzeLinkedInResponse:
+    ui = AnalyzeLinkedInUI(
+        should_contact=decision.should_contact,
+        priority=decision.priority,
+        score=decision.score,
+        reasoning=decision.reasoning,
+        key_points=decision.key_points,
+        suggested_approach=decision.suggested_approach,
+        red_flags=decision.red_flags,
+        next_steps=decision.next_steps,
+    )
+    return AnalyzeLinkedInResponse(
+        qualification=fit,
+        ui=ui,
+        plan=plan,
+        preview=False,
+        message=PRO_COPY,
+        cache_hit=False,
+    )
+
+
 def _free_tier_profile_response(profile_data: dict, user: User, db: Session, preview_reason: str | None = None) -> AnalyzeProfileResponse:
     """Generate free tier response without consuming AI credits."""
     import random
@@ -336,6 +388,7 @@ def analyze_linkedin_with_mode(
         profile.setdefault("profile_url", request.profile_url)
 
     if request.mode == "preview":
+        record_preview("analyze", "requested")
         return _preview_stable_response(profile, current_user)
 
     settings = get_settings()
@@ -385,7 +438,8 @@ def analyze_linkedin_with_mode(
             detail="You've reached your monthly AI analysis limit.",
         )
 
-    check_usage_limit(current_user, db)
+    with track_stage("usage_check"):
+        check_usage_limit(current_user, db)
 
     if current_user.icp_config_json:
         icp_config = ICPConfig(**current_user.icp_config_json)
@@ -409,8 +463,8 @@ def analyze_linkedin_with_mode(
     )
 
     try:
-        fit = run_fit(profile, icp_config)
-        decision = run_decision(fit, profile)
+        with track_ai_cost() as ai_cost:
+            fit, decision = _qualify(profile, icp_config)
     except RuntimeError as e:
         logger.error("OpenAI API error for user_id=%d: %s", current_user.id, str(e))
         raise HTTPException(
@@ -435,7 +489,8 @@ def analyze_linkedin_with_mode(
             detail="An unexpected error occurred. Please try again.",
         )
 
-    record_usage(current_user, db, cost_usd=settings.ai_cost_per_analysis_usd)
+    with track_stage("record_usage"):
+        record_usage(current_user, db, ai_cost=ai_cost, cost_usd=0.0 if fit.scored_locally else None)
     updated_usage = get_usage_stats(current_user, db)
 
     insights = list(decision.key_points or [])
@@ -481,7 +536,8 @@ def analyze_profile(
             detail=FREE_COPY,
         )
 
-    budget_status = evaluate_budget_status(db)
+    with track_stage("budget_evaluation"), read_session(db) as read_db:
+        budget_status = evaluate_budget_status(read_db)
     preview_mode, preview_reason = _determine_preview(current_user, budget_status, db)
     profile_data = request.linkedin_profile_data or {}
 
@@ -508,15 +564,18 @@ def analyze_profile(
                 current_user.plan,
                 preview_reason,
             )
+        record_preview("profile", preview_reason)
         return _free_tier_profile_response(profile_data, current_user, db, preview_reason)
 
     profile_hash = build_profile_hash(profile_data)
-    cached_response = _serve_cached_profile(db, profile_hash)
+    with track_stage("cache_lookup"), read_session(db) as read_db:
+        cached_response = _serve_cached_profile(read_db, profile_hash)
     if cached_response:
         return cached_response
 
     # Rate limit and plan cap
-    check_usage_limit(current_user, db)
+    with track_stage("usage_check"):
+        check_usage_limit(current_user, db)
 
     # CRITICAL SAFETY CHECK: Double-verify before OpenAI call
     settings = get_settings()
@@ -558,10 +617,11 @@ def analyze_profile(
 
     try:
         ai_service = get_ai_service()
-        decision = ai_service.analyze_profile(
-            profile_data=profile_data,
-            icp_config=icp_config,
-        )
+        with track_ai_cost() as ai_cost:
+            decision = ai_service.analyze_profile(
+                profile_data=profile_data,
+                icp_config=icp_config,
+            )
     except RuntimeError as e:
         logger.error("OpenAI API error for user_id=%d: %s", current_user.id, str(e))
         raise HTTPException(
@@ -587,7 +647,8 @@ def analyze_profile(
         )
 
     # Record usage event AFTER successful analysis
-    record_usage(current_user, db, cost_usd=settings.ai_cost_per_analysis_usd)
+    with track_stage("record_usage"):
+        record_usage(current_user, db, ai_cost=ai_cost)
     logger.info("Analysis successful for user_id=%d, decision=%s", current_user.id, decision.should_contact)
 
     usage_stats = get_usage_stats(current_user, db)
@@ -600,13 +661,14 @@ def analyze_profile(
         message=PRO_COPY,
     )
 
-    cache_analysis(
-        db,
-        profile_hash=profile_hash,
-        response_type="profile",
-        payload=response.model_dump(),
-        user_id=current_user.id,
-    )
+    with track_stage("cache_analysis"):
+        cache_analysis(
+            db,
+            profile_hash=profile_hash,
+            response_type="profile",
+            payload=response.model_dump(),
+            user_id=current_user.id,
+        )
 
     return response
 
@@ -627,7 +689,8 @@ def analyze_linkedin(
             detail="Analysis service temporarily disabled. Please try again later.",
         )
 
-    budget_status = evaluate_budget_status(db)
+    with track_stage("budget_evaluation"), read_session(db) as read_db:
+        budget_status = evaluate_budget_status(read_db)
     preview_mode, preview_reason = _determine_preview(current_user, budget_status, db)
     profile = request.profile_extract or {}
 
@@ -664,15 +727,37 @@ def analyze_linkedin(
                 preview_reason,
             )
             preview_message = NO_BUDGET_COPY if preview_reason == "no_budget" else FREE_COPY
+        record_preview("linkedin", preview_reason)
         return _preview_linkedin_response(profile, current_user, preview_message, preview_reason)
 
+    # Load ICP from user or default
+    if current_user.icp_config_json:
+        icp_config = ICPConfig(**current_user.icp_config_json)
+    else:
+        icp_config = ICPConfig(
+            target_industries=None,
+            target_seniority=None,
+            company_size_min=0,
+            company_size_max=1_000_000,
+            required_skills=[],
+            min_years_experience=0,
+            target_locations=None,
+            exclude_keywords=None,
+        )
+
+    # Shared OpenAI verdicts, then this user's local verdicts for this ICP
     profile_hash = build_profile_hash(profile)
-    cached_response = _serve_cached_linkedin(db, profile_hash)
+    local_type = local_response_type(icp_config.model_dump())
+    with track_stage("cache_lookup"), read_session(db) as read_db:
+        cached_response = _serve_cached_linkedin(read_db, profile_hash) or _serve_cached_linkedin(
+            read_db, profile_hash, local_type, current_user.id
+        )
     if cached_response:
         return cached_response
 
     # Rate limit and plan cap
-    check_usage_limit(current_user, db)
+    with track_stage("usage_check"):
+        check_usage_limit(current_user, db)
 
     # CRITICAL SAFETY CHECK: Double-verify before OpenAI call
     settings = get_settings()
@@ -700,21 +785,6 @@ def analyze_linkedin(
             detail=f"You've reached your monthly limit ({usage_stats['limit']} analyses/month). Your limit will reset on the 1st of next month.",
         )
 
-    # Load ICP from user or default
-    if current_user.icp_config_json:
-        icp_config = ICPConfig(**current_user.icp_config_json)
-    else:
-        icp_config = ICPConfig(
-            target_industries=None,
-            target_seniority=None,
-            company_size_min=0,
-            company_size_max=1_000_000,
-            required_skills=[],
-            min_years_experience=0,
-            target_locations=None,
-            exclude_keywords=None,
-        )
-
     logger.info(
         "AI_CALL_APPROVED: Starting LinkedIn analysis (user_id=%d, plan=%s, remaining=%d)",
         current_user.id,
@@ -723,8 +793,8 @@ def analyze_linkedin(
     )
 
     try:
-        fit = run_fit(profile, icp_config)
-        decision = run_decision(fit, profile)
+        with track_ai_cost() as ai_cost:
+            fit, decision = _qualify(profile, icp_config)
     except RuntimeError as e:
         logger.error("OpenAI API error for user_id=%d: %s", current_user.id, str(e))
         raise HTTPException(
@@ -750,39 +820,205 @@ def analyze_linkedin(
         )
 
     # Record successful usage only after valid response
-    record_usage(current_user, db, cost_usd=settings.ai_cost_per_analysis_usd)
+    with track_stage("record_usage"):
+        record_usage(current_user, db, ai_cost=ai_cost, cost_usd=0.0 if fit.scored_locally else None)
     logger.info(
         "LinkedIn analysis successful for user_id=%d, decision=%s",
         current_user.id,
         decision.should_contact,
     )
 
-    ui = AnalyzeLinkedInUI(
-        should_contact=decision.should_contact,
-        priority=decision.priority,
-        score=decision.score,
-        reasoning=decision.reasoning,
-        key_points=decision.key_points,
-        suggested_approach=decision.suggested_approach,
-        red_flags=decision.red_flags,
-        next_steps=decision.next_steps,
-    )
+    response = _linkedin_response(fit, decision, current_user.plan)
 
-    response = AnalyzeLinkedInResponse(
-        qualification=fit,
-        ui=ui,
-        plan=current_user.plan,
-        preview=False,
-        message=PRO_COPY,
-        cache_hit=False,
-    )
+    # Local verdicts depend on this user's ICP: never serve them to others
+    with track_stage("cache_analysis"):
+        cache_analysis(
+            db,
+            profile_hash=profile_hash,
+            response_type=local_type if fit.scored_locally else "linkedin",
+            payload=response.model_dump(),
+            user_id=current_user.id,
+        )
+
+    return response
+
+
+@router.post("/batch-score", response_model=BatchScoreResponse, summary="Score many profiles against one ICP")
+def batch_score(
+    request: BatchScoreRequest,
+    current_user: User = Depends(get_current_user),
+):
+    """Rank profile extracts with the local ICP rules (vectorized, no OpenAI call, no usage recorded)."""
+    settings = get_settings()
+    if len(request.profiles) > settings.batch_score_max_profiles:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.batch_score_max_profiles} profiles per request.",
+        )
+
+    from app.services.batch_score import ProfileMatrix, score_matrix  # numpy stays out of startup
 
-    cache_analysis(
-        db,
-        profile_hash=profile_hash,
-        response_type="linkedin",
-        payload=response.model_dump(),
-        user_id=current_user.id,
+    if request.icp is not None:
+        icp_config = request.icp
+    elif current_user.icp_config_json:
+        icp_config = ICPConfig(**current_user.icp_config_json)
+    else:
+        icp_config = ICPConfig()
+
+    started = time.perf_counter()
+    with track_stage("batch_build"):
+        matrix = ProfileMatrix.build(request.profiles)
+    with track_stage("batch_score"):
+        scores = score_matrix(matrix, icp_config)
+        top = scores.top(request.top_k)
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    logger.info(
+        "BATCH_SCORE: %d profiles scored locally in %.1f ms (user_id=%d)",
+        len(matrix),
+        elapsed_ms,
+        current_user.id,
     )
+    return BatchScoreResponse(total=len(matrix), outcomes=scores.outcome_counts(), top=top, elapsed_ms=elapsed_ms)
+
+
+def _import_chunk(db: Session, chunk: ImportChunk, user_id: int, plan: str, icp_config: ICPConfig) -> Tuple[dict, list]:
+    """
+    Skip profiles with a fresh analysis (shared, or imported by this user for
+    this ICP), cache clear local accepts/rejects for this user and ICP only.
+    Returns the counts and the ambiguous profiles (profile_url, else headline):
+    those are not queued and must be resubmitted to /analyze/linkedin.
+    """
+    response_type = local_response_type(icp_config.model_dump())
+    hashes = [profile_hash for profile_hash, _ in chunk.profiles]
+    with read_session(db) as read_db:
+        cached = get_cached_hashes(read_db, hashes, "linkedin")
+        cached |= get_cached_hashes(read_db, [h for h in hashes if h not in cached], response_type, user_id=user_id)
+    scored = []
+    pending = []
+    for profile_hash, profile in chunk.profiles:
+        if profile_hash in cached:
+            continue
+        fit = prescore_fit(profile, icp_config)
+        if fit is None:
+            pending.append(profile.get("profile_url") or profile.get("headline"))  # needs the OpenAI pass
+            continue
+        scored.append((profile_hash, _linkedin_response(fit, local_decision(fit), plan).model_dump()))
+    cache_analyses(db, scored, response_type=response_type, user_id=user_id)
+    return {"cached": len(cached), "scored": len(scored), "pending": len(pending)}, pending
+
+
+def _import_progress(stream: IO[bytes], fmt: str, user_id: int, plan: str, icp_config: ICPConfig) -> Iterator[str]:
+    """
+    NDJSON lines: one "progress" record per chunk (with its pending_profiles),
+    then a "summary" (or an "error"). Takes ownership of `stream` and closes
+    it when done.
+    """
+    settings = get_settings()
+    totals = ImportTotals()
+    counts = {"cached": 0, "scored": 0, "pending": 0}
+    db = get_session_factory()()
+    try:
+        chunks = iter_chunks(
+            stream,
+            fmt,
+            chunk_rows=settings.lead_import_chunk_rows,
+            max_rows=settings.lead_import_max_rows,
+            totals=totals,
+        )
+        for chunk in chunks:
+            with track_stage("import_chunk"):
+                result, pending = _import_chunk(db, chunk, user_id, plan, icp_config)
+            LEAD_IMPORT_ROWS.labels(result="invalid").inc(chunk.invalid)
+            LEAD_IMPORT_ROWS.labels(result="duplicate").inc(chunk.duplicates)
+            for name, count in result.items():
+                counts[name] += count
+                LEAD_IMPORT_ROWS.labels(result=name).inc(count)
+            yield json.dumps({
+                "type": "progress",
+                "chunk": chunk.number,
+                "rows": chunk.rows,
+                "invalid": chunk.invalid,
+                "duplicates": chunk.duplicates,
+                **result,
+                "pending_profiles": pending,
+                "rows_total": totals.rows,
+            }) + "\n"
+        logger.info(
+            "LEAD_IMPORT: %d rows (invalid=%d, duplicates=%d, cached=%d, scored=%d, pending=%d) (user_id=%d)",
+            totals.rows, totals.invalid, totals.duplicates, counts["cached"], counts["scored"], counts["pending"], user_id,
+        )
+        yield json.dumps({
+            "type": "summary",
+            "rows": totals.rows,
+            "invalid": totals.invalid,
+            "duplicates": totals.duplicates,
+            **counts,
+            "errors": totals.errors,
+            "message": (
+                f"{counts['pending']} profiles need a full analysis and were not queued: "
+                "resubmit the pending_profiles to /analyze/linkedin."
+                if counts["pending"] else None
+            ),
+        }) + "\n"
+    except Exception:
+        db.rollback()
+        logger.error("Lead import failed after %d rows (user_id=%d)", totals.rows, user_id, exc_info=True)
+        yield json.dumps({"type": "error", "rows": totals.rows, "detail": "Import failed; rows so far were saved."}) + "\n"
+    finally:
+        db.close()
+        stream.close()
+
+
+@router.post("/import", summary="Import a CSV/JSONL lead list")
+def import_leads(
+    file: UploadFile = File(..., description="CSV with a header row, or JSONL with one profile extract per line"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Stream an uploaded lead list through the analysis pipeline in chunks:
+    normalize, dedupe by profile hash, skip cached profiles and cache clear
+    local accepts/rejects for this user and ICP. Responds with NDJSON
+    progress, one line per chunk. Profiles the local rules can't decide are
+    listed as pending_profiles and are NOT queued: resubmit them to
+    /analyze/linkedin for the OpenAI pass. Gated like /analyze/linkedin (paid
+    plans only, rate limit and monthly cap) but, making no OpenAI call, the
+    import doesn't start the rate-limit window.
+    """
+    settings = get_settings()
 
-    return response
+    if settings.disable_all_analyses:
+        logger.warning("KILL SWITCH TRIGGERED: All analyses disabled (user_id=%d)", current_user.id)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Analysis service temporarily disabled. Please try again later.",
+        )
+
+    if current_user.plan == "free" and settings.disable_free_plan:
+        logger.warning("Free plan disabled via kill switch (user_id=%d)", current_user.id)
+        raise HTTPException(
+            status_code=status.HTTP_402_PAYMENT_REQUIRED,
+            detail=FREE_COPY,
+        )
+
+    fmt = detect_format(file.filename, file.content_type)
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Upload a .csv or .jsonl file.",
+        )
+
+    # Plan check (free -> 402), rate limit and monthly cap; no last_analysis_at pre-mark
+    with track_stage("usage_check"):
+        check_plan_limit(current_user, db)
+
+    icp_config = ICPConfig(**current_user.icp_config_json) if current_user.icp_config_json else ICPConfig()
+    # FastAPI < 0.118 closes the UploadFile once the handler returns, before the
+    # response body is streamed; the generator reads (and closes) its own copy.
+    upload = tempfile.TemporaryFile()
+    shutil.copyfileobj(file.file, upload)
+    upload.seek(0)
+    return StreamingResponse(
+        _import_progress(upload, fmt, current_user.id, current_user.plan, icp_config),
+        media_type="application/x-ndjson",
+    )
@@ -4,16 +4,19 @@ POST /billing/checkout - Create Stripe checkout session
 POST /webhook/stripe - Handle Stripe webhook events
 """
 
+import json
 import logging
+from anyio import to_thread
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-import stripe
 
 from app.core.db import get_db
-from app.core.dependencies import get_current_user
+from app.core.dependencies import get_current_reader_async, get_current_user
 from app.core.config import get_settings
-from app.core.stripe_service import StripeService
+from app.core.stripe_events import HANDLERS as STRIPE_EVENT_HANDLERS
+from app.core.stripe_events import notify_stripe_event_worker, persist_stripe_event
+from app.core.stripe_service import StripeService, load_stripe
 from app.models.user import User
 
 logger = logging.getLogger(__name__)
@@ -51,6 +54,7 @@ def get_stripe_service() -> StripeService:
         starter_price_id=settings.stripe_price_starter_id,
         pro_price_id=settings.stripe_price_pro_id,
         team_price_id=settings.stripe_price_team_id,
+        api_base=settings.stripe_api_base,
     )
 
 
@@ -144,6 +148,7 @@ def create_checkout_session(
             detail=f"Invalid plan '{plan}'. Must be one of: {', '.join(ALLOWED_PLANS)}"
         )
 
+    stripe = load_stripe()
     try:
         # VALIDATION 5: StripeService validates price_id whitelist
         # This ensures only configured price_ids from .env are used
@@ -224,21 +229,23 @@ def create_checkout_session(
 @router.post(
     "/webhook/stripe",
     summary="Stripe webhook endpoint",
-    description="Handles Stripe events (checkout.session.completed, customer.subscription.deleted)",
+    description="Verifies and queues Stripe events (checkout.session.completed, customer.subscription.*)",
     responses={
-        200: {"description": "Webhook processed"},
+        200: {"description": "Webhook accepted (queued or duplicate)"},
         400: {"description": "Invalid signature"},
     },
 )
 async def handle_stripe_webhook(
     request: Request,
-    db: Session = Depends(get_db),
     stripe_service: StripeService = Depends(get_stripe_service),
 ):
     """
     Handle Stripe webhook events.
     
-    Verifies webhook signature using HMAC-SHA256.
+    Verifies webhook signature using HMAC-SHA256, stores the event in the
+    stripe_events table and acknowledges immediately. The handlers (DB writes,
+    Stripe API calls) run in the background worker pool of
+    app.core.stripe_events, in order per customer, with retries.
     
     Supported Events:
     - checkout.session.completed: User completed payment, activate subscription
@@ -246,7 +253,8 @@ async def handle_stripe_webhook(
     - customer.subscription.deleted: Subscription canceled, revert to free
     - customer.subscription.updated: Subscription modified (plan changes, etc.)
     
-    All handlers implement idempotency to prevent duplicate processing.
+    Idempotency: the Stripe event id is the table's primary key, so a
+    redelivered event is acknowledged without being processed again.
     """
     # Get raw body and signature header
     body = await request.body()
@@ -259,86 +267,17 @@ async def handle_stripe_webhook(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing signature")
 
     try:
-        event = stripe_service.verify_webhook_signature(body, signature)
+        stripe_service.verify_webhook_signature(body, signature)
     except Exception as e:
         logger.warning("WEBHOOK_SIGNATURE_INVALID | request_id=%s | error=%s", request_id, str(e))
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid signature")
 
-    # Handle specific events
+    # Work on the verified raw JSON: recent SDKs return StripeObjects without dict methods
+    event = json.loads(body)
     event_type = event.get("type")
-    event_data = event.get("data", {}).get("object", {})
     event_id = event.get("id", "unknown")
-    
-    logger.info(
-        "WEBHOOK_RECEIVED | request_id=%s | event_type=%s | event_id=%s",
-        request_id,
-        event_type,
-        event_id
-    )
 
-    if event_type == "checkout.session.completed":
-        result = stripe_service.handle_checkout_completed(event_data, db)
-        if result:
-            logger.info(
-                "WEBHOOK_PROCESSED | request_id=%s | event_type=%s | event_id=%s | user_id=%s | status=success",
-                request_id,
-                event_type,
-                event_id,
-                result.id
-            )
-        else:
-            logger.warning(
-                "WEBHOOK_PROCESSED | request_id=%s | event_type=%s | event_id=%s | status=failed",
-                request_id,
-                event_type,
-                event_id
-            )
-        return {"status": "ok", "event": event_type}
-
-    elif event_type == "customer.subscription.created":
-        result = stripe_service.handle_subscription_created(event_data, db)
-        if result:
-            logger.info(
-                "WEBHOOK_PROCESSED | request_id=%s | event_type=%s | event_id=%s | user_id=%s | status=success",
-                request_id,
-                event_type,
-                event_id,
-                result.id
-            )
-        else:
-            logger.warning(
-                "WEBHOOK_PROCESSED | request_id=%s | event_type=%s | event_id=%s | status=failed",
-                request_id,
-                event_type,
-                event_id
-            )
-        return {"status": "ok", "event": event_type}
-
-    elif event_type == "customer.subscription.deleted":
-        result = stripe_service.handle_subscription_deleted(event_data, db)
-        if result:
-            logger.info(
-                "WEBHOOK_PROCESSED | request_id=%s | event_type=%s | event_id=%s | user_id=%s | status=success",
-                request_id,
-                event_type,
-                event_id,
-                result.id
-            )
-        return {"status": "ok", "event": event_type}
-    
-    elif event_type == "customer.subscription.updated":
-        result = stripe_service.handle_subscription_updated(event_data, db)
-        if result:
-            logger.info(
-                "WEBHOOK_PROCESSED | request_id=%s | event_type=%s | event_id=%s | user_id=%s | status=success",
-                request_id,
-                event_type,
-                event_id,
-                result.id
-            )
-        return {"status": "ok", "event": event_type}
-
-    else:
+    if event_type not in STRIPE_EVENT_HANDLERS:
         # Acknowledge but ignore other event types
         logger.info(
             "WEBHOOK_IGNORED | request_id=%s | event_type=%s | event_id=%s | reason=not_handled",
@@ -348,6 +287,19 @@ async def handle_stripe_webhook(
         )
         return {"status": "ok", "event": event_type}
 
+    # The insert is blocking DB I/O: keep it off the event loop
+    stored = await to_thread.run_sync(persist_stripe_event, event, body)
+    if stored:
+        notify_stripe_event_worker()
+    logger.info(
+        "WEBHOOK_RECEIVED | request_id=%s | event_type=%s | event_id=%s | %s",
+        request_id,
+        event_type,
+        event_id,
+        "queued" if stored else "duplicate"
+    )
+    return {"status": "ok", "event": event_type, "queued": stored}
+
 
 @router.get(
     "/status",
@@ -355,10 +307,9 @@ async def handle_stripe_webhook(
     summary="Get user billing status and usage limits",
     description="Returns current plan, usage, limits, and whether user can perform AI analyses"
 )
-def get_billing_status(
+async def get_billing_status(
     http_request: Request,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_reader_async),
 ) -> BillingStatusResponse:
     """
     Get comprehensive billing status for current user.
@@ -3,12 +3,14 @@ Simple event tracking endpoint - privacy-respecting, no cookies.
 Only tracks user intent signals (button clicks).
 """
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Literal
 
 from fastapi import APIRouter, Request
 from pydantic import BaseModel
 
+from app.core.event_buffer import get_event_buffer
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/events", tags=["events"])
@@ -25,24 +27,26 @@ class TrackEvent(BaseModel):
 async def track_event(event_data: TrackEvent, request: Request):
     """
     Track user intent signals.
-    No cookies, no persistent tracking, just server-side logs.
+    No cookies, no persistent tracking: events are buffered in memory and
+    written in batches (see app.core.event_buffer), so this stays O(1) under
+    traffic spikes.
     """
     # Get minimal, non-invasive context
     client_ip = request.client.host if request.client else "unknown"
     user_agent = request.headers.get("user-agent", "unknown")
-    
-    # Log to server (you can later send this to a database or analytics service)
-    logger.info(
-        "EVENT_TRACK | %s | page=%s | ip=%s | ua=%s | referrer=%s",
-        event_data.event,
-        event_data.page,
-        client_ip[:8] + "***",  # Partially mask IP for privacy
-        user_agent[:50],  # Truncate user agent
-        event_data.referrer or "direct"
-    )
-    
+    created_at = datetime.now(timezone.utc)
+
+    accepted = get_event_buffer().offer({
+        "event": event_data.event,
+        "page": event_data.page[:100],
+        "referrer": event_data.referrer[:255] if event_data.referrer else None,
+        "ip_prefix": client_ip[:8] + "***",  # Partially mask IP for privacy
+        "user_agent": user_agent[:50],  # Truncate user agent
+        "created_at": created_at,
+    })
+
     return {
-        "status": "tracked",
+        "status": "tracked" if accepted else "dropped",
         "event": event_data.event,
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": created_at.isoformat()
     }
@@ -1,6 +1,8 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 
 from app.core.config import get_settings
+from app.core.warmup import get_readiness
 
 router = APIRouter(prefix="/health", tags=["health"])
 
@@ -25,3 +27,15 @@ def healthcheck():
         "soft_launch_mode": settings.soft_launch_mode,
         "daily_registration_limit": settings.daily_registration_limit if settings.soft_launch_mode else None
     }
+
+
+@router.get("/ready", summary="Readiness check")
+def readiness():
+    """
+    Readiness probe: 200 once the startup warmup (prompts, AI client, DB pool)
+    has completed, 503 before that or if a warmup step failed.
+
+    Use /health for liveness; this endpoint is for routing traffic.
+    """
+    state = get_readiness()
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=state)
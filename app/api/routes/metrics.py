@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Header, HTTPException, Response, status
+
+from app.core.config import get_settings
+from app.core.metrics import render_latest
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", summary="Prometheus metrics", include_in_schema=False)
+def metrics(authorization: str | None = Header(default=None)):
+    """
+    Prometheus scrape endpoint.
+
+    If METRICS_TOKEN is set, requires `Authorization: Bearer <token>`.
+    Disabled entirely with METRICS_ENABLED=false.
+    """
+    settings = get_settings()
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if settings.metrics_token and authorization != f"Bearer {settings.metrics_token}":
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+
+    payload, content_type = render_latest()
+    return Response(content=payload, media_type=content_type)
@@ -1,9 +1,14 @@
-from fastapi import APIRouter, Depends
+from typing import Iterator, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.db import get_db
-from app.core.dependencies import get_current_user
-from app.core.usage import get_usage_stats
+from app.core.analysis_history import csv_lines, decode_cursor, history_page, iter_history, ndjson_lines
+from app.core.db import get_db, get_session_factory, read_session
+from app.core.dependencies import get_async_read_db, get_current_reader_async, get_current_user
+from app.core.usage import get_usage_stats_async
 from app.models.user import User
 from app.schemas.ai_responses import ICPConfig
 
@@ -11,12 +16,15 @@ router = APIRouter(prefix="/user", tags=["user"])
 
 
 @router.get("", summary="Get current user profile")
-def get_me(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_me(
+    current_user: User = Depends(get_current_reader_async),
+    db: AsyncSession = Depends(get_async_read_db),
+):
     """Protected endpoint that returns the current authenticated user."""
     from app.core.config import get_settings
     settings = get_settings()
     
-    usage_stats = get_usage_stats(current_user, db)
+    usage_stats = await get_usage_stats_async(current_user, db)
     
     # Get monthly limit based on plan
     plan_limits = {
@@ -43,9 +51,64 @@ def get_me(current_user: User = Depends(get_current_user), db: Session = Depends
 
 
 @router.get("/me/usage", summary="Get current user usage statistics")
-def get_my_usage(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_my_usage(
+    current_user: User = Depends(get_current_reader_async),
+    db: AsyncSession = Depends(get_async_read_db),
+):
     """Get detailed usage statistics for the current user."""
-    return get_usage_stats(current_user, db)
+    return await get_usage_stats_async(current_user, db)
+
+
+def _export_lines(export_format: str, user_id: int, filters: dict) -> Iterator[str]:
+    """Stream the export from its own session: the request's session closes when the handler returns."""
+    primary = get_session_factory()()
+    try:
+        with read_session(primary, user_id) as db:
+            rows = iter_history(db, user_id, **filters)
+            yield from (csv_lines(rows) if export_format == "csv" else ndjson_lines(rows))
+    finally:
+        primary.close()
+
+
+@router.get("/analyses", summary="List or export the current user's past analyses")
+def list_my_analyses(
+    format: Literal["json", "ndjson", "csv"] = Query("json", description="json: one page; ndjson/csv: streamed export"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    min_score: Optional[float] = Query(None, ge=0, le=100),
+    max_score: Optional[float] = Query(None, ge=0, le=100),
+    priority: Optional[list[Literal["high", "medium", "low"]]] = Query(None),
+    response_type: Optional[Literal["linkedin", "profile"]] = Query(None),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Newest first, keyset-paginated on (created_at, id). Exports start at
+    `cursor` (if given), ignore `limit` and run in constant memory.
+    """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
+    filters = {
+        "after": after,
+        "min_score": min_score,
+        "max_score": max_score,
+        "priorities": priority,
+        "response_type": response_type,
+    }
+
+    if format != "json":
+        media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+        return StreamingResponse(
+            _export_lines(format, current_user.id, filters),
+            media_type=media_type,
+            headers={"Content-Disposition": f'attachment; filename="analyses.{format}"'},
+        )
+
+    with read_session(db, current_user.id) as read_db:
+        items, next_cursor = history_page(read_db, current_user.id, limit=limit, **filters)
+    return {"items": items, "next_cursor": next_cursor}
 
 
 @router.put("/icp", summary="Update user's ICP configuration")
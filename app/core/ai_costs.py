@@ -0,0 +1,150 @@
+"""
+OpenAI token and cost accounting.
+
+`_run_chat_json` reports the `usage` block of every completion here. Costs are
+computed from MODEL_PRICES and collected into the active AICostLedger (one per
+analysis, opened by the route with `track_ai_cost()`), which the route then
+persists on the UsageEvent. Per-stage spend is exported as Prometheus counters
+(stage = the enclosing `track_stage` name, e.g. run_fit / run_decision).
+"""
+
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Dict, Iterator, Optional
+
+from app.core.metrics import OPENAI_COST_USD, OPENAI_TOKENS, current_stage
+
+logger = logging.getLogger(__name__)
+
+_PER_MILLION = Decimal(1_000_000)
+
+
+@dataclass(frozen=True)
+class ModelPrice:
+    """USD per 1M tokens."""
+
+    input: Decimal
+    cached_input: Decimal
+    output: Decimal
+
+
+# Keep in sync with https://openai.com/api/pricing (prefix match, longest first).
+MODEL_PRICES: Dict[str, ModelPrice] = {
+    "gpt-4o-mini": ModelPrice(Decimal("0.15"), Decimal("0.075"), Decimal("0.60")),
+    "gpt-4o": ModelPrice(Decimal("2.50"), Decimal("1.25"), Decimal("10.00")),
+    "gpt-4.1-nano": ModelPrice(Decimal("0.10"), Decimal("0.025"), Decimal("0.40")),
+    "gpt-4.1-mini": ModelPrice(Decimal("0.40"), Decimal("0.10"), Decimal("1.60")),
+    "gpt-4.1": ModelPrice(Decimal("2.00"), Decimal("0.50"), Decimal("8.00")),
+}
+DEFAULT_MODEL = "gpt-4o-mini"
+
+
+def get_model_price(model: str) -> ModelPrice:
+    """Resolve a (possibly dated, e.g. gpt-4o-mini-2024-07-18) model name to its price."""
+    for name in sorted(MODEL_PRICES, key=len, reverse=True):
+        if model == name or model.startswith(f"{name}-"):
+            return MODEL_PRICES[name]
+    logger.warning("AI_COST_UNKNOWN_MODEL | model=%s | pricing as %s", model, DEFAULT_MODEL)
+    return MODEL_PRICES[DEFAULT_MODEL]
+
+
+@dataclass
+class TokenUsage:
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cost_usd: Decimal = Decimal("0")
+
+    def add(self, other: "TokenUsage") -> None:
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.cached_tokens += other.cached_tokens
+        self.cost_usd += other.cost_usd
+
+
+def _get(obj: Any, name: str) -> Any:
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def usage_from_completion(usage: Any, model: str) -> TokenUsage:
+    """
+    Convert a completion `usage` block (SDK object or dict) into tokens and cost.
+
+    Cached prompt tokens (usage.prompt_tokens_details.cached_tokens) are part of
+    prompt_tokens but billed at the cached-input rate.
+    """
+    prompt_tokens = int(_get(usage, "prompt_tokens") or 0)
+    completion_tokens = int(_get(usage, "completion_tokens") or 0)
+    cached_tokens = int(_get(_get(usage, "prompt_tokens_details"), "cached_tokens") or 0)
+    cached_tokens = min(cached_tokens, prompt_tokens)
+
+    price = get_model_price(model)
+    cost = (
+        Decimal(prompt_tokens - cached_tokens) * price.input
+        + Decimal(cached_tokens) * price.cached_input
+        + Decimal(completion_tokens) * price.output
+    ) / _PER_MILLION
+    return TokenUsage(prompt_tokens, completion_tokens, cached_tokens, cost)
+
+
+@dataclass
+class AICostLedger:
+    """Token usage and cost of one analysis, broken down by stage."""
+
+    model: Optional[str] = None
+    calls: int = 0
+    total: TokenUsage = field(default_factory=TokenUsage)
+    stages: Dict[str, TokenUsage] = field(default_factory=dict)
+
+    def add(self, stage: str, model: str, usage: TokenUsage) -> None:
+        self.model = model
+        self.calls += 1
+        self.total.add(usage)
+        self.stages.setdefault(stage, TokenUsage()).add(usage)
+
+    def cost_or(self, fallback_usd: float) -> float:
+        """Actual cost if any completion reported usage, else the flat estimate (mock mode)."""
+        return float(self.total.cost_usd) if self.calls else fallback_usd
+
+    def summary(self) -> str:
+        return " ".join(
+            f"{stage}=${usage.cost_usd:.6f}({usage.prompt_tokens}+{usage.completion_tokens}t)"
+            for stage, usage in self.stages.items()
+        )
+
+
+_current_ledger: ContextVar[Optional[AICostLedger]] = ContextVar("ai_cost_ledger", default=None)
+
+
+@contextmanager
+def track_ai_cost() -> Iterator[AICostLedger]:
+    """Collect the cost of every completion made inside the block."""
+    ledger = AICostLedger()
+    token = _current_ledger.set(ledger)
+    try:
+        yield ledger
+    finally:
+        _current_ledger.reset(token)
+
+
+def record_completion_usage(usage: Any, model: str) -> TokenUsage:
+    """Account one completion: Prometheus counters plus the active ledger (if any)."""
+    tokens = usage_from_completion(usage, model)
+    stage = current_stage() or "unknown"
+
+    OPENAI_TOKENS.labels(model=model, stage=stage, kind="prompt").inc(tokens.prompt_tokens - tokens.cached_tokens)
+    OPENAI_TOKENS.labels(model=model, stage=stage, kind="cached").inc(tokens.cached_tokens)
+    OPENAI_TOKENS.labels(model=model, stage=stage, kind="completion").inc(tokens.completion_tokens)
+    OPENAI_COST_USD.labels(model=model, stage=stage).inc(float(tokens.cost_usd))
+
+    ledger = _current_ledger.get()
+    if ledger is not None:
+        ledger.add(stage, model, tokens)
+    return tokens
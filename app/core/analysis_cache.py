@@ -2,18 +2,26 @@ import hashlib
 import json
 import logging
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
 
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.core.metrics import CACHE_LOOKUPS
 from app.models.analysis_cache import AnalysisCache
+from app.schemas.ai_responses import score_priority
 
 logger = logging.getLogger(__name__)
 
 CACHE_TTL = timedelta(hours=24)
+# response_type prefix of verdicts scored locally against one user's ICP
+# (prescore, lead import); they're never stored under the shared "linkedin" type.
+LOCAL_RESPONSE_PREFIX = "local:"
 
 
-def _extract_experience_titles(profile_data: dict) -> list[str]:
+def extract_experience_titles(profile_data: dict) -> list[str]:
+    """Job titles from a profile's experience / positions / experience_titles list, in order."""
     titles: list[str] = []
     experience = (
         profile_data.get("experience")
@@ -47,54 +55,162 @@ def build_profile_hash(profile_data: dict) -> str:
         or ""
     )
     headline = profile_data.get("headline") or profile_data.get("title") or profile_data.get("bio") or ""
-    titles = _extract_experience_titles(profile_data)
+    titles = extract_experience_titles(profile_data)
     normalized = "|".join(
         [str(profile_url).strip(), str(headline).strip(), "|".join([t.strip() for t in titles])]
     )
     return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
 
 
-def get_cached_analysis(db: Session, profile_hash: str, response_type: str) -> Optional[Dict[str, Any]]:
-    """Return cached analysis payload if younger than CACHE_TTL."""
+def analysis_score_priority(payload: Any) -> Tuple[Optional[float], Optional[str]]:
+    """Score and priority of a cached linkedin/profile payload (priority from the score when absent)."""
+    if not isinstance(payload, dict):
+        return None, None
+    ui = payload.get("ui") or {}
+    qualification = payload.get("qualification") or {}
+    score = ui.get("score", qualification.get("overall_score", payload.get("score")))
+    try:
+        score = float(score)
+    except (TypeError, ValueError):
+        return None, None
+    priority = ui.get("priority") or score_priority(score)
+    return score, priority
+
+
+def local_response_type(icp_config: dict) -> str:
+    """response_type for verdicts scored locally against this ICP (LOCAL_RESPONSE_PREFIX + fingerprint)."""
+    canonical = json.dumps(icp_config, sort_keys=True, default=str)
+    return LOCAL_RESPONSE_PREFIX + hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def _cache_lookup_query(profile_hash: str, response_type: str, user_id: int | None = None):
     cutoff = datetime.now(timezone.utc) - CACHE_TTL
-    entry = (
-        db.query(AnalysisCache)
-        .filter(
-            AnalysisCache.profile_hash == profile_hash,
-            AnalysisCache.response_type == response_type,
-            AnalysisCache.created_at >= cutoff,
-        )
-        .order_by(AnalysisCache.created_at.desc())
-        .first()
+    query = select(AnalysisCache).where(
+        AnalysisCache.profile_hash == profile_hash,
+        AnalysisCache.response_type == response_type,
+        AnalysisCache.created_at >= cutoff,
     )
+    if user_id is not None:
+        query = query.where(AnalysisCache.user_id == user_id)
+    return query.order_by(AnalysisCache.created_at.desc()).limit(1)
+
+
+def _lookup_result(entry: Optional[AnalysisCache], profile_hash: str, response_type: str) -> Optional[Dict[str, Any]]:
     if entry:
+        CACHE_LOOKUPS.labels(response_type=response_type, result="hit").inc()
         logger.info("Cache hit for profile_hash=%s (type=%s)", profile_hash, response_type)
         return entry.dump_response()
+    CACHE_LOOKUPS.labels(response_type=response_type, result="miss").inc()
     return None
 
 
-def cache_analysis(
+def get_cached_analysis(
+    db: Session, profile_hash: str, response_type: str, user_id: int | None = None
+) -> Optional[Dict[str, Any]]:
+    """Return cached analysis payload if younger than CACHE_TTL; only that user's when `user_id` is given."""
+    entry = db.execute(_cache_lookup_query(profile_hash, response_type, user_id)).scalars().first()
+    return _lookup_result(entry, profile_hash, response_type)
+
+
+async def get_cached_analysis_async(
+    db: AsyncSession, profile_hash: str, response_type: str, user_id: int | None = None
+) -> Optional[Dict[str, Any]]:
+    """Async version of get_cached_analysis."""
+    entry = (await db.execute(_cache_lookup_query(profile_hash, response_type, user_id))).scalars().first()
+    return _lookup_result(entry, profile_hash, response_type)
+
+
+def get_cached_hashes(
     db: Session,
-    *,
-    profile_hash: str,
+    profile_hashes: Iterable[str],
     response_type: str,
-    payload: Any,
-    user_id: int | None,
-) -> Dict[str, Any]:
-    """Persist analysis response for reuse within CACHE_TTL."""
+    user_id: int | None = None,
+) -> Set[str]:
+    """
+    Which of `profile_hashes` have a cached analysis younger than CACHE_TTL
+    (one query per batch); only that user's entries when `user_id` is given.
+    """
+    hashes = list(set(profile_hashes))
+    if not hashes:
+        return set()
+    cutoff = datetime.now(timezone.utc) - CACHE_TTL
+    query = select(AnalysisCache.profile_hash).where(
+        AnalysisCache.profile_hash.in_(hashes),
+        AnalysisCache.response_type == response_type,
+        AnalysisCache.created_at >= cutoff,
+    )
+    if user_id is not None:
+        query = query.where(AnalysisCache.user_id == user_id)
+    found = set(db.execute(query.distinct()).scalars())
+    CACHE_LOOKUPS.labels(response_type=response_type, result="hit").inc(len(found))
+    CACHE_LOOKUPS.labels(response_type=response_type, result="miss").inc(len(hashes) - len(found))
+    return found
+
+
+def _cache_entry(*, profile_hash: str, response_type: str, payload: Any, user_id: int | None) -> AnalysisCache:
     if not isinstance(payload, dict):
         try:
             payload = payload.model_dump()
         except Exception:
             payload = json.loads(json.dumps(payload, default=str))
 
-    entry = AnalysisCache(
+    score, priority = analysis_score_priority(payload)
+    return AnalysisCache(
         profile_hash=profile_hash,
         response_type=response_type,
         response_json=payload,
         user_id=user_id,
+        score=score,
+        priority=priority,
     )
+
+
+def cache_analysis(
+    db: Session,
+    *,
+    profile_hash: str,
+    response_type: str,
+    payload: Any,
+    user_id: int | None,
+) -> Dict[str, Any]:
+    """Persist analysis response for reuse within CACHE_TTL."""
+    entry = _cache_entry(profile_hash=profile_hash, response_type=response_type, payload=payload, user_id=user_id)
     db.add(entry)
     db.commit()
     logger.info("Cached analysis for profile_hash=%s (type=%s)", profile_hash, response_type)
     return entry.dump_response()
+
+
+async def cache_analysis_async(
+    db: AsyncSession,
+    *,
+    profile_hash: str,
+    response_type: str,
+    payload: Any,
+    user_id: int | None,
+) -> Dict[str, Any]:
+    """Async version of cache_analysis."""
+    entry = _cache_entry(profile_hash=profile_hash, response_type=response_type, payload=payload, user_id=user_id)
+    db.add(entry)
+    await db.commit()
+    logger.info("Cached analysis for profile_hash=%s (type=%s)", profile_hash, response_type)
+    return entry.dump_response()
+
+
+def cache_analyses(
+    db: Session,
+    items: Iterable[Tuple[str, Any]],
+    *,
+    response_type: str,
+    user_id: int | None,
+) -> int:
+    """Persist many (profile_hash, payload) analyses in one commit; returns how many were written."""
+    entries = [
+        _cache_entry(profile_hash=profile_hash, response_type=response_type, payload=payload, user_id=user_id)
+        for profile_hash, payload in items
+    ]
+    if entries:
+        db.add_all(entries)
+        db.commit()
+        logger.info("Cached %d analyses (type=%s)", len(entries), response_type)
+    return len(entries)
@@ -0,0 +1,162 @@
+"""
+A user's past analyses (analysis_cache rows carrying their user_id).
+
+Pages are keyset-paginated on (user_id, created_at, id), newest first, and
+served by ix_analysis_cache_user_created_id: the cursor is the last row's
+(created_at, id), so page N costs the same as page 1. Cursors always carry
+microseconds, and migration 10 gives legacy SQLite rows the same precision,
+so both sides of the comparison have one format. Exports stream the same
+query with yield_per (a server-side cursor on Postgres) and encode rows in
+batches, so memory stays constant whatever the history size.
+"""
+
+import base64
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import or_, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.core.analysis_cache import LOCAL_RESPONSE_PREFIX
+from app.models.analysis_cache import AnalysisCache
+
+EXPORT_BATCH_ROWS = 1000
+CSV_COLUMNS = (
+    "id", "created_at", "response_type", "profile_hash", "score", "priority", "should_contact", "reasoning",
+)
+
+_COLUMNS = (
+    AnalysisCache.id,
+    AnalysisCache.created_at,
+    AnalysisCache.response_type,
+    AnalysisCache.profile_hash,
+    AnalysisCache.score,
+    AnalysisCache.priority,
+    AnalysisCache.response_json,
+)
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = f"{created_at.isoformat(timespec='microseconds')}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """(created_at, id) from an opaque cursor; ValueError when it's malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("invalid cursor") from exc
+
+
+def history_query(
+    user_id: int,
+    *,
+    after: Optional[Tuple[datetime, int]] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    priorities: Optional[Sequence[str]] = None,
+    response_type: Optional[str] = None,
+):
+    """Rows of one user's history, newest first, strictly older than the `after` cursor."""
+    query = (
+        select(*_COLUMNS)
+        .where(AnalysisCache.user_id == user_id)
+        .order_by(AnalysisCache.created_at.desc(), AnalysisCache.id.desc())
+    )
+    if after is not None:
+        query = query.where(tuple_(AnalysisCache.created_at, AnalysisCache.id) < tuple_(*after))
+    if min_score is not None:
+        query = query.where(AnalysisCache.score >= min_score)
+    if max_score is not None:
+        query = query.where(AnalysisCache.score <= max_score)
+    if priorities:
+        query = query.where(AnalysisCache.priority.in_(list(priorities)))
+    if response_type == "linkedin":  # locally scored verdicts are LinkedIn analyses too
+        query = query.where(or_(
+            AnalysisCache.response_type == "linkedin",
+            AnalysisCache.response_type.startswith(LOCAL_RESPONSE_PREFIX),
+        ))
+    elif response_type:
+        query = query.where(AnalysisCache.response_type == response_type)
+    return query
+
+
+def _payload(value: Any) -> Dict[str, Any]:
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return {}
+    return dict(value or {})
+
+
+def history_item(row) -> Dict[str, Any]:
+    payload = _payload(row.response_json)
+    ui = payload.get("ui") or {}
+    return {
+        "id": row.id,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "response_type": row.response_type,
+        "profile_hash": row.profile_hash,
+        "score": row.score,
+        "priority": row.priority,
+        "should_contact": ui.get("should_contact", payload.get("should_contact")),
+        "reasoning": ui.get("reasoning", payload.get("reasoning")),
+        "analysis": payload,
+    }
+
+
+def history_page(db: Session, user_id: int, *, limit: int, **filters) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of history items plus the cursor of the next page (None on the last page)."""
+    rows = db.execute(history_query(user_id, **filters).limit(limit + 1)).all()
+    next_cursor = encode_cursor(rows[limit - 1].created_at, rows[limit - 1].id) if len(rows) > limit else None
+    return [history_item(row) for row in rows[:limit]], next_cursor
+
+
+def iter_history(db: Session, user_id: int, **filters) -> Iterator[Any]:
+    """Every matching row, fetched EXPORT_BATCH_ROWS at a time from a server-side cursor."""
+    result = db.execute(
+        history_query(user_id, **filters).execution_options(stream_results=True, yield_per=EXPORT_BATCH_ROWS)
+    )
+    try:
+        for partition in result.partitions():
+            yield from partition
+    finally:
+        result.close()
+
+
+def _batched(rows: Iterable[Any]) -> Iterator[List[Any]]:
+    batch: List[Any] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= EXPORT_BATCH_ROWS:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def ndjson_lines(rows: Iterable[Any]) -> Iterator[str]:
+    for batch in _batched(rows):
+        yield "".join(json.dumps(history_item(row), default=str) + "\n" for row in batch)
+
+
+def csv_lines(rows: Iterable[Any]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for batch in _batched(rows):
+        for row in batch:
+            item = history_item(row)
+            writer.writerow([item[column] for column in CSV_COLUMNS])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.getvalue():
+        yield buffer.getvalue()  # header only, when nothing matched
@@ -1,5 +1,5 @@
 from functools import lru_cache
-from typing import List, Optional
+from typing import Dict, List, Optional
 import os
 
 from pydantic import Field, field_validator
@@ -16,6 +16,22 @@ class Settings(BaseSettings):
         default=r"chrome-extension://.*"
     )
     database_url: str = Field(default="")
+    auto_migrate: bool = Field(
+        default=True,
+        description="Run pending schema migrations at startup when behind (prod runs `python migrate.py` per deploy)",
+    )
+
+    # Connection pooling. "transaction" = behind an external transaction pooler (PgBouncer
+    # pool_mode=transaction, e.g. Render's): NullPool or a small app-side pool, no pre-ping,
+    # no prepared statements, no session-level state (see app.core.db.engine_options)
+    db_pool_mode: str = Field(default="direct", description='"direct" (app-side pool) or "transaction" (external transaction pooler)')
+    db_pooler_pool_size: int = Field(default=0, description="App-side connections per engine in transaction mode (0 = NullPool)")
+
+    # Read replica (see app.core.db: read-only units of work; unset = everything on the primary)
+    database_replica_url: Optional[str] = Field(default=None, description="Read-replica URL for read-only routes, cache lookups and budget aggregates")
+    replica_max_lag_seconds: float = Field(default=5.0, description="Send reads to the primary while the replica lags more than this")
+    replica_lag_check_seconds: float = Field(default=2.0, description="How long a replica lag measurement is reused")
+    replica_read_your_writes_seconds: float = Field(default=10.0, description="Reads for a user go to the primary this long after record_usage")
 
     # Stripe (unificado; acepta múltiples nombres de variables de entorno)
     stripe_api_key: Optional[str] = Field(
@@ -61,6 +77,10 @@ class Settings(BaseSettings):
             "stripe_webhook_secret",
         ),
     )
+    stripe_api_base: Optional[str] = Field(
+        default=None,
+        description="Override the Stripe API URL (local stand-ins such as fake_stripe_server.py); unset in production",
+    )
 
     # Usage Limits & Cost Control
     # FREE: 3 análisis TOTAL lifetime (no reset) - Cost: $0.09 máx
@@ -74,7 +94,7 @@ class Settings(BaseSettings):
     revenue_per_starter_user: float = Field(default=1.20, description="Monthly AI budget contribution per active Starter user")
     revenue_per_pro_user: float = Field(default=4.50, description="Monthly AI budget contribution per active Pro user")
     revenue_per_team_user: float = Field(default=15.0, description="Monthly AI budget contribution per active Team user")
-    ai_cost_per_analysis_usd: float = Field(default=0.03, description="Estimated AI cost per successful analysis in USD")
+    ai_cost_per_analysis_usd: float = Field(default=0.03, description="Fallback AI cost per analysis in USD when no token usage is reported (mock mode)")
     
     # Rate Limiting: 1 análisis cada 30 segundos
     rate_limit_seconds: int = Field(default=30, description="Minimum seconds between analyses")
@@ -83,6 +103,74 @@ class Settings(BaseSettings):
     disable_free_plan: bool = Field(default=False, description="Emergency: disable all FREE analyses")
     disable_all_analyses: bool = Field(default=False, description="Emergency: disable ALL analyses globally")
 
+    # Observability
+    metrics_enabled: bool = Field(default=True, description="Expose Prometheus metrics at /metrics")
+    metrics_token: Optional[str] = Field(default=None, description="If set, /metrics requires Authorization: Bearer <token>")
+    db_query_headers: Optional[bool] = Field(
+        default=None,
+        description="Add X-DB-Queries / X-DB-Time-ms response headers (default: on unless ENV=prod)",
+    )
+    db_query_budget: int = Field(default=12, description="Warn when a request executes more SQL statements than this (0 = off)")
+    db_query_budget_overrides: Dict[str, int] = Field(
+        default_factory=dict,
+        description='Per-route budgets as JSON, e.g. {"/billing/status": 2}',
+    )
+    db_n_plus_one_threshold: int = Field(default=5, description="Warn when one statement repeats this often in a request")
+
+    # Logging (queue-based; see app.core.structured_logging)
+    log_level: str = Field(default="INFO")
+    log_format: Optional[str] = Field(default=None, description="json or text (default: json when ENV=prod)")
+    log_queue_size: int = Field(default=10_000, description="Records buffered before new ones are dropped")
+    log_info_sample_rate: float = Field(default=1.0, description="Fraction of INFO records kept")
+    log_sample_rates: Dict[str, float] = Field(
+        default_factory=dict,
+        description='Per-event INFO sampling by message prefix, e.g. {"BILLING_STATUS_CHECKED": 0.1}',
+    )
+
+    # Stripe webhook queue (see app.core.stripe_events)
+    stripe_webhook_workers: int = Field(default=2, description="Worker threads processing stored webhook events (0 = store only)")
+    stripe_webhook_max_attempts: int = Field(default=5, description="Attempts before an event is dead-lettered")
+    stripe_webhook_retry_base_seconds: float = Field(default=5.0, description="First retry delay; doubles per attempt")
+    stripe_webhook_poll_seconds: float = Field(default=2.0, description="How often the dispatcher looks for due retries")
+    stripe_webhook_lease_seconds: int = Field(default=300, description="Reclaim events stuck in processing after this long")
+
+    stripe_subscription_cache_ttl_seconds: int = Field(default=3600, description="How long cached subscriptions are trusted")
+    stripe_subscription_cache_size: int = Field(default=10_000, description="Subscriptions kept in memory per process")
+
+    # /events/track ingestion (buffered; see app.core.event_buffer)
+    tracking_sink: str = Field(default="db", description="db (tracking_events table), file (JSONL), columnar or log")
+    tracking_buffer_size: int = Field(default=10_000, description="Events held in memory before the overflow policy applies")
+    tracking_batch_size: int = Field(default=500, description="Flush as soon as this many events are buffered")
+    tracking_flush_interval_seconds: float = Field(default=2.0, description="Flush at least this often")
+    tracking_overflow_policy: str = Field(default="drop_newest", description="drop_newest or drop_oldest")
+    tracking_events_dir: str = Field(default="tracking_events", description="Directory for TRACKING_SINK=file / columnar")
+
+    # Request profiling (opt-in; profiles served at /admin/profiles)
+    profiling_enabled: bool = Field(default=False, description="Install the sampling profiler middleware")
+    profiling_sample_rate: float = Field(default=0.0, description="Fraction of requests profiled at random")
+    profiling_secret: Optional[str] = Field(default=None, description="HMAC secret for signed X-Profile headers")
+    profiling_interval_ms: float = Field(default=5.0, description="Stack sampling interval")
+    profiling_dir: str = Field(default="profiles", description="Where collapsed-stack profiles are written")
+    profiling_max_profiles: int = Field(default=200, description="Most recent profiles kept on disk")
+    admin_token: Optional[str] = Field(default=None, description="Bearer token for /admin endpoints (unset = disabled)")
+
+    # Local ICP pre-scoring (see app.services.prescore): clear accepts/rejects skip OpenAI
+    prescore_enabled: bool = Field(default=True, description="Score clear ICP accepts/rejects locally instead of calling OpenAI")
+    prescore_accept_score: float = Field(default=80.0, description="Minimum local score for a clear accept")
+    batch_score_max_profiles: int = Field(default=100_000, description="Maximum profiles per POST /analyze/batch-score request")
+    lead_import_chunk_rows: int = Field(default=500, description="Rows parsed, deduped and scored per chunk of POST /analyze/import")
+    lead_import_max_rows: int = Field(default=200_000, description="Rows read from one uploaded lead list before the import stops")
+
+    # Startup warmup (lifespan hook; readiness at /health/ready)
+    warmup_enabled: bool = Field(default=True, description="Pre-warm prompts, AI client and DB pool before serving traffic")
+    warmup_db_connections: int = Field(default=2, description="Pooled DB connections opened during warmup")
+    warmup_synthetic_analysis: bool = Field(default=False, description="Also run a synthetic cache lookup during warmup")
+
+    # usage_events partitioning (native monthly partitions on Postgres; SQLite keeps a single table)
+    usage_events_partitions_ahead: int = Field(default=3, description="Future monthly usage_events partitions to pre-create")
+    usage_events_retention_months: int = Field(default=0, description="Past months of usage_events kept online besides the current one (0 = keep forever)")
+    usage_events_archive_dir: str = Field(default="archive/usage_events", description="Directory for gzip-compressed CSV exports of archived months")
+
     # Soft Launch Mode (validación controlada)
     soft_launch_mode: bool = Field(default=False, description="Enable soft launch mode with registration limits")
     daily_registration_limit: int = Field(default=20, description="Max new registrations per day in soft launch mode")
@@ -106,9 +194,22 @@ class Settings(BaseSettings):
         default=None,
         validation_alias=AliasChoices("OPENAI_API_KEY", "openai_api_key"),
     )
+    openai_base_url: Optional[str] = Field(
+        default=None,
+        description="Override the OpenAI API base URL (e.g. http://127.0.0.1:8900/v1 for fake_openai_server.py)",
+    )
+    openai_timeout_seconds: float = Field(default=30.0, description="Per-request OpenAI timeout in seconds")
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
+    @field_validator("db_pool_mode", mode="after")
+    @classmethod
+    def check_pool_mode(cls, v: str) -> str:
+        value = v.strip().lower()
+        if value not in {"direct", "transaction"}:
+            raise ValueError('DB_POOL_MODE must be "direct" or "transaction"')
+        return value
+
     @field_validator("cors_allow_origins", mode="after")
     @classmethod
     def split_origins(cls, v: str) -> List[str]:
@@ -1,23 +1,63 @@
+import logging
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager, contextmanager
 from functools import lru_cache
-from typing import Generator
+from typing import Any, AsyncGenerator, AsyncIterator, Dict, Generator, Iterator, Optional, Tuple
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.pool import NullPool
 
 from app.core.config import get_settings
+from app.core.metrics import DB_READ_ROUTES, REPLICA_LAG_SECONDS
+from app.core.query_stats import instrument_engine
+
+logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
+# Sync driver -> asyncio driver for the same database
+_ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "postgres": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def uses_transaction_pooler() -> bool:
+    return get_settings().db_pool_mode == "transaction"
+
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """create_engine / create_async_engine keyword arguments for DB_POOL_MODE."""
+    if not uses_transaction_pooler():
+        return {"pool_pre_ping": True}
+    # Behind PgBouncer in transaction mode every transaction may land on a
+    # different server connection: the pooler owns pooling and liveness, so
+    # keep at most a small app-side pool and skip the pre-ping round trip.
+    size = get_settings().db_pooler_pool_size
+    options: Dict[str, Any] = {"poolclass": NullPool} if size <= 0 else {"pool_size": size, "max_overflow": 0}
+    if make_url(url).drivername == "postgresql+asyncpg":
+        # Named prepared statements live on one server connection; asyncpg must
+        # not cache them (psycopg2 never prepares server-side).
+        options["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    return options
+
 
 @lru_cache(maxsize=1)
 def get_engine():
     """Create a cached SQLAlchemy engine using settings."""
     settings = get_settings()
-    return create_engine(settings.database_url, pool_pre_ping=True)
+    return instrument_engine(create_engine(settings.database_url, **engine_options(settings.database_url)))
 
 
+@lru_cache(maxsize=1)
 def get_session_factory() -> sessionmaker:
-    """Return a configured session factory bound to the engine."""
+    """Return a cached session factory bound to the engine."""
     return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
 
 
@@ -29,3 +69,213 @@ def get_db() -> Generator:
         yield db
     finally:
         db.close()
+
+
+def async_database_url(database_url: str) -> str:
+    """DATABASE_URL rewritten for the asyncio driver (asyncpg on Postgres, aiosqlite locally)."""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend!r} databases")
+    if url.drivername in ("postgresql+asyncpg", "sqlite+aiosqlite"):
+        return database_url
+    url = url.set(drivername=_ASYNC_DRIVERS[backend])
+    if "sslmode" in url.query:  # libpq spelling; asyncpg takes `ssl`
+        url = url.difference_update_query(["sslmode"]).update_query_dict({"ssl": url.query["sslmode"]})
+    return url.render_as_string(hide_password=False)
+
+
+@lru_cache(maxsize=1)
+def get_async_engine():
+    """Cached AsyncEngine on the same database; queries are counted like the sync engine's."""
+    url = async_database_url(get_settings().database_url)
+    engine = create_async_engine(url, **engine_options(url))
+    instrument_engine(engine.sync_engine)
+    return engine
+
+
+@lru_cache(maxsize=1)
+def get_async_session_factory() -> async_sessionmaker:
+    """AsyncSession factory; objects stay usable after commit (no implicit lazy refresh)."""
+    return async_sessionmaker(get_async_engine(), autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """FastAPI dependency for routes migrated to the async path (no threadpool hop)."""
+    async with get_async_session_factory()() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    """Close the async pools (primary and replica) that were ever created."""
+    for factory in (get_async_engine, get_async_replica_engine):
+        if factory.cache_info().currsize:
+            await factory().dispose()
+
+
+# Read replica
+#
+# Read-only units of work (/billing/status, /user, /user/me/usage, analysis
+# cache lookups, budget aggregates) may run on DATABASE_REPLICA_URL. The
+# primary serves them instead when:
+#
+# - no replica is configured
+# - the replica lags more than REPLICA_MAX_LAG_SECONDS, or its lag can't be
+#   measured (checked at most every REPLICA_LAG_CHECK_SECONDS)
+# - the user's usage was recorded by this process within the last
+#   REPLICA_READ_YOUR_WRITES_SECONDS (read-your-writes after record_usage)
+
+_RECENT_WRITERS_MAX = 10_000
+
+# Postgres standby: seconds since the last replayed transaction, 0 when fully
+# caught up (an idle primary would otherwise look stale) or not in recovery.
+_PG_LAG_SQL = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+@lru_cache(maxsize=1)
+def get_replica_engine():
+    """Cached engine on DATABASE_REPLICA_URL."""
+    url = get_settings().database_replica_url
+    return instrument_engine(create_engine(url, **engine_options(url)))
+
+
+@lru_cache(maxsize=1)
+def get_replica_session_factory() -> sessionmaker:
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_replica_engine())
+
+
+@lru_cache(maxsize=1)
+def get_async_replica_engine():
+    url = async_database_url(get_settings().database_replica_url)
+    engine = create_async_engine(url, **engine_options(url))
+    instrument_engine(engine.sync_engine)
+    return engine
+
+
+@lru_cache(maxsize=1)
+def get_async_replica_session_factory() -> async_sessionmaker:
+    return async_sessionmaker(get_async_replica_engine(), autoflush=False, expire_on_commit=False)
+
+
+def dispose_replica_engine() -> None:
+    if get_replica_engine.cache_info().currsize:
+        get_replica_engine().dispose()
+
+
+def measure_replica_lag(conn: Connection) -> float:
+    """Replication lag in seconds (databases without replication report 0)."""
+    if conn.dialect.name != "postgresql":
+        return 0.0
+    return float(conn.execute(_PG_LAG_SQL).scalar() or 0.0)
+
+
+class ReplicaRouter:
+    """Per-process routing state: last measured lag and recent writers."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._recent_writers: Dict[int, float] = {}
+        self._lag: Optional[float] = None  # None = never measured or last check failed
+        self._lag_checked_at: Optional[float] = None
+
+    def note_write(self, user_id: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._recent_writers[user_id] = now
+            if len(self._recent_writers) > _RECENT_WRITERS_MAX:
+                horizon = now - get_settings().replica_read_your_writes_seconds
+                self._recent_writers = {uid: at for uid, at in self._recent_writers.items() if at >= horizon}
+
+    def wrote_recently(self, user_id: int) -> bool:
+        with self._lock:
+            written_at = self._recent_writers.get(user_id)
+        return written_at is not None and time.monotonic() - written_at < get_settings().replica_read_your_writes_seconds
+
+    def claim_lag_check(self) -> bool:
+        """True for the one caller that should measure the lag now (others reuse the last value)."""
+        now = time.monotonic()
+        with self._lock:
+            if self._lag_checked_at is not None and now - self._lag_checked_at < get_settings().replica_lag_check_seconds:
+                return False
+            self._lag_checked_at = now
+            return True
+
+    def record_lag(self, lag: Optional[float]) -> None:
+        self._lag = lag
+        if lag is not None:
+            REPLICA_LAG_SECONDS.set(lag)
+
+    def route(self, user_id: Optional[int]) -> Tuple[str, str]:
+        """(target, reason) for a read-only unit of work; target is "replica" or "primary"."""
+        settings = get_settings()
+        if not settings.database_replica_url:
+            return "primary", "no_replica"
+        if user_id is not None and self.wrote_recently(user_id):
+            return "primary", "read_your_writes"
+        if self._lag is None:
+            return "primary", "replica_unavailable"
+        if self._lag > settings.replica_max_lag_seconds:
+            return "primary", "replica_stale"
+        return "replica", "ok"
+
+
+replica_router = ReplicaRouter()
+
+
+def note_primary_write(user_id: int) -> None:
+    """Pin this user's reads to the primary for the read-your-writes window."""
+    if get_settings().database_replica_url:
+        replica_router.note_write(user_id)
+
+
+def _measure_lag_sync() -> None:
+    try:
+        with get_replica_engine().connect() as conn:
+            replica_router.record_lag(measure_replica_lag(conn))
+    except Exception as exc:
+        logger.warning("REPLICA_LAG_CHECK_FAILED | %s", exc)
+        replica_router.record_lag(None)
+
+
+async def _measure_lag_async() -> None:
+    try:
+        async with get_async_replica_engine().connect() as conn:
+            replica_router.record_lag(await conn.run_sync(measure_replica_lag))
+    except Exception as exc:
+        logger.warning("REPLICA_LAG_CHECK_FAILED | %s", exc)
+        replica_router.record_lag(None)
+
+
+def _route_read(user_id: Optional[int]) -> str:
+    target, reason = replica_router.route(user_id)
+    DB_READ_ROUTES.labels(target=target, reason=reason).inc()
+    return target
+
+
+@contextmanager
+def read_session(primary: Session, user_id: Optional[int] = None) -> Iterator[Session]:
+    """A replica Session for a read-only unit of work, or `primary` itself when routing says so."""
+    if get_settings().database_replica_url and replica_router.claim_lag_check():
+        _measure_lag_sync()
+    if _route_read(user_id) == "primary":
+        yield primary
+        return
+    db = get_replica_session_factory()()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@asynccontextmanager
+async def async_read_session(user_id: Optional[int] = None) -> AsyncIterator[AsyncSession]:
+    """AsyncSession on the replica or the primary for a read-only unit of work."""
+    if get_settings().database_replica_url and replica_router.claim_lag_check():
+        await _measure_lag_async()
+    factory = get_async_session_factory() if _route_read(user_id) == "primary" else get_async_replica_session_factory()
+    async with factory() as db:
+        yield db
@@ -1,9 +1,16 @@
-from fastapi import Depends, HTTPException, status
+import hmac
+from typing import AsyncGenerator
+
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.db import get_db
+from app.core.config import get_settings
+from app.core.db import async_read_session, get_async_db, get_db
+from app.core.metrics import track_stage
 from app.core.security import decode_access_token
+from app.core.structured_logging import bind_log_context
 from app.models.user import User
 
 security = HTTPBearer()
@@ -14,7 +21,49 @@ def get_current_user(
     db: Session = Depends(get_db),
 ) -> User:
     """Dependency to get the current authenticated user from JWT token."""
-    token = credentials.credentials
+    with track_stage("auth"):
+        user = _authenticate(credentials.credentials, db)
+    bind_log_context(user_id=user.id)
+    return user
+
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db),
+) -> User:
+    """get_current_user for routes on the async session path."""
+    with track_stage("auth"):
+        user = _require_user(await db.get(User, _token_user_id(credentials.credentials)))
+    bind_log_context(user_id=user.id)
+    return user
+
+
+async def get_async_read_db(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+) -> AsyncGenerator[AsyncSession, None]:
+    """Session for read-only routes: the replica unless routing pins this user to the primary."""
+    async with async_read_session(_token_user_id(credentials.credentials)) as db:
+        yield db
+
+
+async def get_current_reader_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_read_db),
+) -> User:
+    """get_current_user_async loaded through the read session (read-only routes only)."""
+    with track_stage("auth"):
+        user = _require_user(await db.get(User, _token_user_id(credentials.credentials)))
+    bind_log_context(user_id=user.id)
+    return user
+
+
+def _authenticate(token: str, db: Session) -> User:
+    """Resolve a bearer token to its User or raise 401."""
+    user_id = _token_user_id(token)
+    return _require_user(db.query(User).filter(User.id == user_id).first())
+
+
+def _token_user_id(token: str) -> int:
     payload = decode_access_token(token)
     
     if payload is None:
@@ -31,8 +80,10 @@ def get_current_user(
             detail="Invalid authentication credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
-    user = db.query(User).filter(User.id == user_id).first()
+    return user_id
+
+
+def _require_user(user: User | None) -> User:
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -41,3 +92,12 @@ def get_current_user(
         )
     
     return user
+
+
+def require_admin(authorization: str | None = Header(default=None)) -> None:
+    """Guard for /admin endpoints: 404 unless ADMIN_TOKEN is set, 401 on a wrong token."""
+    admin_token = get_settings().admin_token
+    if not admin_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not authorization or not hmac.compare_digest(authorization, f"Bearer {admin_token}"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid admin token")
@@ -0,0 +1,256 @@
+"""
+Buffered ingestion for /events/track.
+
+The endpoint only appends the event to an in-memory buffer (O(1) under a
+lock, never touches the DB); a background thread flushes it in batches when
+TRACKING_BATCH_SIZE events are waiting or every
+TRACKING_FLUSH_INTERVAL_SECONDS, whichever comes first. Sinks:
+
+- db:   one executemany INSERT per batch into the append-only tracking_events table
+- file: JSONL appended to TRACKING_EVENTS_DIR/events-YYYY-MM-DD.jsonl
+- columnar: one dictionary-encoded segment per batch in TRACKING_EVENTS_DIR
+  (app.core.event_store; aggregated by tracking_stats.py)
+- log:  the legacy EVENT_TRACK log lines (what analyze_tracking.py used to parse)
+
+When the buffer is full (TRACKING_BUFFER_SIZE) the overflow policy decides
+what is lost: drop_newest rejects the incoming event (the endpoint answers
+status="dropped"), drop_oldest evicts the oldest buffered one. A failed flush
+puts the batch back in front of the buffer as far as capacity allows.
+Counts, depth and batch throughput are exported as Prometheus metrics and at
+GET /admin/events/stats.
+"""
+
+import atexit
+import json
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from sqlalchemy import insert
+
+from app.core.config import get_settings
+from app.core.metrics import TRACKING_BUFFER_DEPTH, TRACKING_EVENTS, TRACKING_FLUSH_SECONDS
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("drop_newest", "drop_oldest")
+
+Sink = Callable[[List[Dict[str, Any]]], None]
+
+
+@dataclass
+class BufferStats:
+    accepted: int = 0
+    dropped: int = 0
+    flushed: int = 0
+    failed: int = 0
+    batches: int = 0
+    flush_seconds: float = 0.0
+    max_depth: int = 0
+    last_batch_size: int = 0
+    last_flush_ms: float = 0.0
+
+
+class EventBuffer:
+    """Bounded in-memory buffer with a background batch flusher."""
+
+    def __init__(
+        self,
+        sink: Sink,
+        capacity: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 2.0,
+        overflow_policy: str = "drop_newest",
+    ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow_policy!r} (choose from {', '.join(OVERFLOW_POLICIES)})")
+        self.sink = sink
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.stats = BufferStats()
+        self._events: deque = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="event-buffer-flusher", daemon=True)
+
+    def start(self) -> "EventBuffer":
+        self._thread.start()
+        return self
+
+    def offer(self, event: Dict[str, Any]) -> bool:
+        """Buffer one event. Returns False when it was dropped (drop_newest on a full buffer)."""
+        with self._lock:
+            if len(self._events) >= self.capacity:
+                self.stats.dropped += 1
+                if self.overflow_policy == "drop_newest":
+                    TRACKING_EVENTS.labels(outcome="dropped").inc()
+                    return False
+                self._events.popleft()
+                TRACKING_EVENTS.labels(outcome="dropped").inc()
+            self._events.append(event)
+            self.stats.accepted += 1
+            depth = len(self._events)
+            if depth > self.stats.max_depth:
+                self.stats.max_depth = depth
+        TRACKING_EVENTS.labels(outcome="accepted").inc()
+        TRACKING_BUFFER_DEPTH.set(depth)
+        if depth >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def depth(self) -> int:
+        return len(self._events)
+
+    def flush(self) -> int:
+        """Write everything currently buffered, one batch at a time. Returns rows written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [self._events.popleft() for _ in range(min(self.batch_size, len(self._events)))]
+                if not batch:
+                    break
+                started = time.perf_counter()
+                try:
+                    self.sink(batch)
+                except Exception as e:
+                    self._requeue(batch)
+                    logger.warning("TRACKING_FLUSH_FAILED | batch=%d | error=%s", len(batch), e)
+                    break
+                elapsed = time.perf_counter() - started
+                TRACKING_FLUSH_SECONDS.observe(elapsed)
+                TRACKING_EVENTS.labels(outcome="flushed").inc(len(batch))
+                with self._lock:
+                    self.stats.flushed += len(batch)
+                    self.stats.batches += 1
+                    self.stats.flush_seconds += elapsed
+                    self.stats.last_batch_size = len(batch)
+                    self.stats.last_flush_ms = round(elapsed * 1000, 2)
+                written += len(batch)
+        TRACKING_BUFFER_DEPTH.set(self.depth())
+        return written
+
+    def _requeue(self, batch: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            room = max(0, self.capacity - len(self._events))
+            self._events.extendleft(reversed(batch[:room]))
+            lost = len(batch) - min(room, len(batch))
+            self.stats.failed += lost
+        if lost:
+            TRACKING_EVENTS.labels(outcome="failed").inc(lost)
+
+    def _run(self) -> None:
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def close(self) -> None:
+        """Stop the flusher and write what is left."""
+        self._stopping = True
+        self._wakeup.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.flush()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = asdict(self.stats)
+            depth = len(self._events)
+        flush_seconds = stats.pop("flush_seconds")
+        return {
+            **stats,
+            "depth": depth,
+            "capacity": self.capacity,
+            "batch_size": self.batch_size,
+            "flush_interval_seconds": self.flush_interval,
+            "overflow_policy": self.overflow_policy,
+            "flush_seconds_total": round(flush_seconds, 4),
+            "rows_per_second": round(stats["flushed"] / flush_seconds, 1) if flush_seconds else None,
+        }
+
+
+def db_sink(batch: List[Dict[str, Any]]) -> None:
+    from app.core.db import get_engine
+    from app.models.tracking_event import TrackingEvent
+
+    with get_engine().begin() as conn:
+        conn.execute(insert(TrackingEvent.__table__), batch)
+
+
+class FileSink:
+    """Append events as JSON lines to one file per UTC day."""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    def __call__(self, batch: List[Dict[str, Any]]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        by_day: Dict[str, List[str]] = {}
+        for event in batch:
+            created_at = event["created_at"]
+            line = json.dumps({**event, "created_at": created_at.isoformat()}, ensure_ascii=False)
+            by_day.setdefault(created_at.strftime("%Y-%m-%d"), []).append(line)
+        for day, lines in by_day.items():
+            with open(self.directory / f"events-{day}.jsonl", "a", encoding="utf-8") as handle:
+                handle.write("\n".join(lines) + "\n")
+
+
+def log_sink(batch: List[Dict[str, Any]]) -> None:
+    for event in batch:
+        logger.info(
+            "EVENT_TRACK | %s | page=%s | ip=%s | ua=%s | referrer=%s",
+            event["event"],
+            event["page"],
+            event["ip_prefix"],
+            event["user_agent"],
+            event["referrer"] or "direct",
+        )
+
+
+def _build_sink(name: str) -> Sink:
+    if name == "db":
+        return db_sink
+    if name == "file":
+        return FileSink(get_settings().tracking_events_dir)
+    if name == "columnar":
+        from app.core.event_store import ColumnarSink
+
+        return ColumnarSink(get_settings().tracking_events_dir)
+    if name == "log":
+        return log_sink
+    raise ValueError(f"Unknown TRACKING_SINK {name!r} (choose from db, file, columnar, log)")
+
+
+@lru_cache(maxsize=1)
+def get_event_buffer() -> EventBuffer:
+    """Process-wide buffer, started on first use."""
+    settings = get_settings()
+    return EventBuffer(
+        _build_sink(settings.tracking_sink),
+        capacity=settings.tracking_buffer_size,
+        batch_size=settings.tracking_batch_size,
+        flush_interval=settings.tracking_flush_interval_seconds,
+        overflow_policy=settings.tracking_overflow_policy,
+    ).start()
+
+
+def shutdown_event_buffer() -> None:
+    """Flush and stop the buffer if it was ever used (lifespan shutdown)."""
+    if get_event_buffer.cache_info().currsize:
+        buffer = get_event_buffer()
+        buffer.close()
+        get_event_buffer.cache_clear()
+        logger.info("TRACKING_BUFFER_CLOSED | %s", buffer.snapshot())
+
+
+atexit.register(shutdown_event_buffer)
@@ -0,0 +1,220 @@
+"""
+Columnar storage for tracking events.
+
+A store is a directory of immutable segments (`segment-*.npz`). Every segment
+holds one numpy array per column:
+
+- ts: int64 unix seconds
+- event / page / referrer / ip: dictionary-encoded, i.e. small integer codes
+  (`<col>_codes`) plus the distinct values (`<col>_values`, unicode arrays so
+  loading never needs pickle)
+
+Segments are written by TRACKING_SINK=columnar (one per flushed batch) or by
+`tracking_stats.py import`; `compact` merges them into one. Reading remaps
+each segment's codes onto store-wide dictionaries with a single fancy-index
+per column, and group-bys combine the key columns into one int64 key
+(mixed radix) counted with np.unique, so aggregating millions of events never
+touches Python objects per row.
+"""
+
+import os
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DICTIONARY_COLUMNS = ("event", "page", "referrer", "ip")
+GROUP_KEYS = ("day",) + DICTIONARY_COLUMNS
+_SECONDS_PER_DAY = 86_400
+
+# Field names in TrackingEvent rows / event buffer dicts
+_SOURCE_FIELDS = {"event": "event", "page": "page", "referrer": "referrer", "ip": "ip_prefix"}
+
+
+@dataclass
+class EventColumns:
+    """Decoded-on-demand view of a store: codes per column plus their dictionaries."""
+
+    ts: np.ndarray
+    codes: Dict[str, np.ndarray]
+    values: Dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return int(self.ts.shape[0])
+
+    def filter(self, mask: np.ndarray) -> "EventColumns":
+        """Rows selected by a boolean mask or an index array."""
+        return EventColumns(self.ts[mask], {name: codes[mask] for name, codes in self.codes.items()}, self.values)
+
+    def key_column(self, name: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(codes, labels) for a group-by key; `day` is derived from ts."""
+        if name == "day":
+            days = self.ts // _SECONDS_PER_DAY
+            labels, codes = np.unique(days, return_inverse=True)
+            as_dates = np.array(
+                [datetime.fromtimestamp(int(d) * _SECONDS_PER_DAY, tz=timezone.utc).strftime("%Y-%m-%d") for d in labels]
+            )
+            return codes.reshape(-1), as_dates
+        return self.codes[name], self.values[name]
+
+
+def _smallest_code_dtype(size: int) -> np.dtype:
+    return np.dtype(np.uint8 if size <= 0xFF else np.uint16 if size <= 0xFFFF else np.uint32)
+
+
+def _encode(values: Iterable[Optional[str]]) -> Tuple[np.ndarray, np.ndarray]:
+    index: Dict[str, int] = {}
+    codes = [index.setdefault(value if value is not None else "direct", len(index)) for value in values]
+    return np.array(codes, dtype=_smallest_code_dtype(len(index))), np.array(list(index), dtype=str)
+
+
+def _as_unix(value: Any) -> int:
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+    if isinstance(value, str):
+        return _as_unix(datetime.fromisoformat(value.replace("Z", "+00:00")))
+    return int(value)
+
+
+def _write(directory: Path, arrays: Dict[str, np.ndarray]) -> Path:
+    directory.mkdir(parents=True, exist_ok=True)
+    stem = f"segment-{int(arrays['ts'].min()) if arrays['ts'].size else 0}-{uuid.uuid4().hex[:8]}"
+    tmp = directory / f".{stem}.tmp.npz"
+    np.savez_compressed(tmp, **arrays)
+    path = directory / f"{stem}.npz"
+    os.replace(tmp, path)  # readers never see a half-written segment
+    return path
+
+
+def write_segment(directory: str, events: Sequence[Dict[str, Any]]) -> Optional[Path]:
+    """Dictionary-encode a batch of event dicts (TrackingEvent-shaped) into a new segment."""
+    if not events:
+        return None
+    arrays: Dict[str, np.ndarray] = {"ts": np.array([_as_unix(e["created_at"]) for e in events], dtype=np.int64)}
+    for column in DICTIONARY_COLUMNS:
+        field = _SOURCE_FIELDS[column]
+        codes, values = _encode(e.get(field) for e in events)
+        arrays[f"{column}_codes"] = codes
+        arrays[f"{column}_values"] = values
+    return _write(Path(directory), arrays)
+
+
+def segment_paths(directory: str) -> List[Path]:
+    path = Path(directory)
+    return sorted(path.glob("segment-*.npz")) if path.exists() else []
+
+
+def load_store(directory: str, since: Optional[datetime] = None, until: Optional[datetime] = None) -> EventColumns:
+    """Concatenate every segment, remapping codes onto store-wide dictionaries."""
+    return load_segments(segment_paths(directory), since, until)
+
+
+def load_segments(
+    paths: Iterable[Path], since: Optional[datetime] = None, until: Optional[datetime] = None
+) -> EventColumns:
+    """Concatenate exactly these segments, remapping codes onto shared dictionaries."""
+    ts_parts: List[np.ndarray] = []
+    code_parts: Dict[str, List[np.ndarray]] = {column: [] for column in DICTIONARY_COLUMNS}
+    dictionaries: Dict[str, Dict[str, int]] = {column: {} for column in DICTIONARY_COLUMNS}
+
+    for path in paths:
+        with np.load(path, allow_pickle=False) as segment:
+            ts_parts.append(segment["ts"])
+            for column in DICTIONARY_COLUMNS:
+                dictionary = dictionaries[column]
+                mapping = np.array(
+                    [dictionary.setdefault(value, len(dictionary)) for value in segment[f"{column}_values"].tolist()],
+                    dtype=np.uint32,
+                )
+                code_parts[column].append(mapping[segment[f"{column}_codes"]])
+
+    columns = EventColumns(
+        ts=np.concatenate(ts_parts) if ts_parts else np.empty(0, dtype=np.int64),
+        codes={
+            column: np.concatenate(parts) if parts else np.empty(0, dtype=np.uint32)
+            for column, parts in code_parts.items()
+        },
+        values={column: np.array(list(dictionary), dtype=str) for column, dictionary in dictionaries.items()},
+    )
+    if since is None and until is None:
+        return columns
+    mask = np.ones(len(columns), dtype=bool)
+    if since is not None:
+        mask &= columns.ts >= _as_unix(since)
+    if until is not None:
+        mask &= columns.ts < _as_unix(until)
+    return columns.filter(mask)
+
+
+def write_columns(directory: str, columns: EventColumns) -> Path:
+    """Write already-encoded columns as one segment, with minimal code widths."""
+    arrays: Dict[str, np.ndarray] = {"ts": columns.ts.astype(np.int64)}
+    for column in DICTIONARY_COLUMNS:
+        values = columns.values[column]
+        arrays[f"{column}_codes"] = columns.codes[column].astype(_smallest_code_dtype(len(values)))
+        arrays[f"{column}_values"] = values
+    return _write(Path(directory), arrays)
+
+
+def compact(directory: str) -> Optional[Path]:
+    """
+    Merge all segments into one, sorted by time; returns the new segment.
+    Segments flushed while compacting are left alone (only the listed ones
+    are read and then deleted).
+    """
+    paths = segment_paths(directory)
+    if len(paths) < 2:
+        return paths[0] if paths else None
+    columns = load_segments(paths)
+    merged = write_columns(directory, columns.filter(np.argsort(columns.ts, kind="stable")))
+    for path in paths:
+        path.unlink()
+    return merged
+
+
+def group_counts(columns: EventColumns, by: Sequence[str]) -> List[Tuple[Tuple[str, ...], int]]:
+    """Event counts per distinct combination of `by` keys, largest first."""
+    unknown = [key for key in by if key not in GROUP_KEYS]
+    if unknown:
+        raise ValueError(f"Unknown group-by key(s) {unknown} (choose from {', '.join(GROUP_KEYS)})")
+    if not len(columns):
+        return []
+    if not by:
+        return [((), len(columns))]
+
+    keys = [columns.key_column(name) for name in by]
+    combined = np.zeros(len(columns), dtype=np.int64)
+    for codes, labels in keys:
+        combined = combined * max(len(labels), 1) + codes.astype(np.int64)
+    unique, counts = np.unique(combined, return_counts=True)
+
+    # Split the combined keys back into per-column codes (last column first)
+    parts = []
+    remainder = unique
+    for codes, labels in reversed(keys):
+        radix = max(len(labels), 1)
+        parts.append(labels[remainder % radix])
+        remainder = remainder // radix
+    parts.reverse()
+
+    order = np.argsort(-counts, kind="stable")
+    return [(tuple(str(part[i]) for part in parts), int(counts[i])) for i in order]
+
+
+def count_distinct(columns: EventColumns, column: str) -> int:
+    return int(np.unique(columns.codes[column]).size) if len(columns) else 0
+
+
+class ColumnarSink:
+    """Event buffer sink (TRACKING_SINK=columnar): one segment per flushed batch."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def __call__(self, batch: List[Dict[str, Any]]) -> None:
+        write_segment(self.directory, batch)
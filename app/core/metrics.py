@@ -0,0 +1,207 @@
+"""
+Prometheus metrics for the analyze pipeline.
+
+Exposed at GET /metrics (see app.api.routes.metrics). Stage histograms are
+meant to answer "which stage dominates p99": every analyze request records
+the time spent in auth, budget evaluation, usage check, cache lookup,
+prescore, run_fit, run_decision, record_usage and cache_analysis.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+from app.core.structured_logging import record_stage_timing
+
+# Sub-millisecond DB stages up to multi-second OpenAI calls
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+ANALYZE_STAGES = (
+    "auth",
+    "budget_evaluation",
+    "usage_check",
+    "cache_lookup",
+    "prescore",
+    "run_fit",
+    "run_decision",
+    "record_usage",
+    "cache_analysis",
+    "batch_build",
+    "batch_score",
+    "import_chunk",
+)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=STAGE_BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    "analyze_stage_duration_seconds",
+    "Time spent in each analyze pipeline stage",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    "analysis_cache_lookups_total",
+    "Analysis cache lookups by result",
+    ["response_type", "result"],
+)
+PRESCORE_OUTCOMES = Counter(
+    "analyze_prescore_total",
+    "Local ICP pre-score outcomes (reject/accept short-circuit OpenAI, ambiguous goes to it)",
+    ["outcome", "reason"],
+)
+LEAD_IMPORT_ROWS = Counter(
+    "lead_import_rows_total",
+    "Uploaded lead rows by result (invalid, duplicate, cached, scored, pending)",
+    ["result"],
+)
+PREVIEW_RESPONSES = Counter(
+    "analyze_preview_responses_total",
+    "Preview (no-AI) responses by reason",
+    ["endpoint", "reason"],
+)
+OPENAI_RETRIES = Counter(
+    "openai_retries_total",
+    "OpenAI call retries by error class",
+    ["error_class"],
+)
+OPENAI_IN_FLIGHT = Gauge(
+    "openai_requests_in_flight",
+    "OpenAI chat completion calls currently in progress",
+)
+OPENAI_TOKENS = Counter(
+    "openai_tokens_total",
+    "OpenAI tokens consumed by model, stage and kind (prompt/cached/completion)",
+    ["model", "stage", "kind"],
+)
+OPENAI_COST_USD = Counter(
+    "openai_cost_usd_total",
+    "OpenAI spend in USD computed from completion usage",
+    ["model", "stage"],
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed per request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 12, 16, 24, 32, 64),
+)
+DB_SECONDS_PER_REQUEST = Histogram(
+    "http_request_db_seconds",
+    "Time spent executing SQL per request",
+    ["route"],
+    buckets=STAGE_BUCKETS,
+)
+DB_READ_ROUTES = Counter(
+    "db_read_routes_total",
+    "Read-only units of work by target database (replica/primary) and routing reason",
+    ["target", "reason"],
+)
+REPLICA_LAG_SECONDS = Gauge(
+    "db_replica_lag_seconds",
+    "Last measured read-replica replication lag",
+)
+DB_QUERY_BUDGET_EXCEEDED = Counter(
+    "db_query_budget_exceeded_total",
+    "Requests that executed more SQL statements than their route budget",
+    ["route"],
+)
+STRIPE_WEBHOOK_EVENTS = Counter(
+    "stripe_webhook_events_total",
+    "Stripe webhook events by type and outcome (queued, duplicate, processed, skipped, retry, dead)",
+    ["type", "outcome"],
+)
+STRIPE_WEBHOOK_LAG_SECONDS = Histogram(
+    "stripe_webhook_processing_lag_seconds",
+    "Time from webhook receipt to successful processing",
+    buckets=STAGE_BUCKETS,
+)
+SUBSCRIPTION_CACHE = Counter(
+    "stripe_subscription_cache_total",
+    "Stripe subscription cache lookups (hit/miss) and fills",
+    ["result"],
+)
+TRACKING_EVENTS = Counter(
+    "tracking_events_total",
+    "/events/track events by outcome (accepted, dropped, flushed, failed)",
+    ["outcome"],
+)
+TRACKING_BUFFER_DEPTH = Gauge(
+    "tracking_buffer_depth",
+    "Tracking events waiting in memory for the next flush",
+)
+TRACKING_FLUSH_SECONDS = Histogram(
+    "tracking_flush_duration_seconds",
+    "Time to write one batch of tracking events",
+    buckets=STAGE_BUCKETS,
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "DB connections currently checked out of the pool",
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Configured DB pool size",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections",
+    "DB connections opened beyond the pool size",
+)
+
+
+_current_stage: ContextVar[Optional[str]] = ContextVar("analyze_stage", default=None)
+
+
+def current_stage() -> Optional[str]:
+    """Name of the innermost active track_stage block, if any."""
+    return _current_stage.get()
+
+
+@contextmanager
+def track_stage(stage: str) -> Iterator[None]:
+    """Observe the wall time of the wrapped block under analyze_stage_duration_seconds."""
+    token = _current_stage.set(stage)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.labels(stage=stage).observe(elapsed)
+        record_stage_timing(stage, elapsed)
+        _current_stage.reset(token)
+
+
+def record_preview(endpoint: str, reason: str | None) -> None:
+    PREVIEW_RESPONSES.labels(endpoint=endpoint, reason=reason or "free_plan").inc()
+
+
+def record_openai_retry(error: Exception) -> None:
+    OPENAI_RETRIES.labels(error_class=type(error).__name__).inc()
+
+
+def _refresh_pool_gauges() -> None:
+    """Sample the SQLAlchemy pool; pools without counters (e.g. SQLite/NullPool) report 0."""
+    from app.core.db import get_engine
+
+    pool = get_engine().pool
+    for gauge, attr in (
+        (DB_POOL_CHECKED_OUT, "checkedout"),
+        (DB_POOL_SIZE, "size"),
+        (DB_POOL_OVERFLOW, "overflow"),
+    ):
+        getter = getattr(pool, attr, None)
+        try:
+            gauge.set(max(0, getter()) if callable(getter) else 0)
+        except Exception:
+            gauge.set(0)
+
+
+def render_latest() -> tuple[bytes, str]:
+    """Return (payload, content_type) in the Prometheus text exposition format."""
+    _refresh_pool_gauges()
+    return generate_latest(), CONTENT_TYPE_LATEST
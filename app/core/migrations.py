@@ -0,0 +1,303 @@
+"""
+Versioned schema migrations.
+
+Replaces the ad-hoc scripts that used to live in migrations/ and the root
+add_subscription_*.py files, plus the ALTER TABLE statements that ran in
+create_app on every worker start.
+
+- Applied versions are recorded in the schema_migrations table
+- `python migrate.py` runs pending migrations once per deploy
+- App startup only compares the recorded version with LATEST_VERSION; when
+  behind it migrates (AUTO_MIGRATE=true) or refuses to start
+
+Every migration is idempotent (checks the live schema before altering it) so
+legacy databases created before this runner existed upgrade cleanly.
+"""
+
+import importlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.db import Base, uses_transaction_pooler
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary constant used with pg_advisory_lock so only one process migrates at a time.
+_ADVISORY_LOCK_ID = 7_340_021
+
+_version_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _version_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String(100), nullable=False),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    upgrade: Callable[[Engine], None]
+
+
+def _column_names(engine: Engine, table: str) -> set[str]:
+    inspector = inspect(engine)
+    if not inspector.has_table(table):
+        return set()
+    return {column["name"] for column in inspector.get_columns(table)}
+
+
+def _add_columns(engine: Engine, table: str, columns: dict[str, dict[str, str]]) -> None:
+    """Add missing columns. `columns` maps name -> {dialect or "default": DDL type}."""
+    existing = _column_names(engine, table)
+    missing = [name for name in columns if name not in existing]
+    if not missing:
+        return
+    dialect = engine.dialect.name
+    with engine.begin() as conn:
+        for name in missing:
+            ddl_type = columns[name].get(dialect, columns[name]["default"])
+            conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {name} {ddl_type}")
+            logger.info("MIGRATION | added column %s.%s", table, name)
+
+
+def _initial_schema(engine: Engine) -> None:
+    from app.core.usage_partitions import prepare_usage_events_table
+
+    importlib.import_module("app.models")  # registers every model on Base.metadata
+    Base.metadata.create_all(
+        bind=engine,
+        tables=[table for table in Base.metadata.sorted_tables if table.name != "usage_events"],
+    )
+    # Legacy usage_events tables are converted later (migration 5), once month_key exists.
+    if not inspect(engine).has_table("usage_events"):
+        prepare_usage_events_table(engine)
+
+
+def _user_subscription_columns(engine: Engine) -> None:
+    _add_columns(engine, "users", {
+        "subscription_status": {"default": "VARCHAR(50)"},
+        "monthly_analyses_count": {"default": "INTEGER NOT NULL DEFAULT 0"},
+        "monthly_analyses_reset_at": {"default": "TIMESTAMP", "postgresql": "TIMESTAMPTZ"},
+    })
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_users_stripe_customer_id ON users (stripe_customer_id)")
+        conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_users_stripe_subscription_id ON users (stripe_subscription_id)")
+
+
+def _user_usage_columns(engine: Engine) -> None:
+    _add_columns(engine, "users", {
+        "lifetime_analyses_count": {"default": "INTEGER NOT NULL DEFAULT 0"},
+        "last_analysis_at": {"default": "TIMESTAMP", "postgresql": "TIMESTAMPTZ"},
+        "icp_config_json": {"default": "JSON"},
+    })
+
+
+def _usage_events_month_key(engine: Engine) -> None:
+    from app.core.utils import get_month_key_for_date
+
+    if "month_key" in _column_names(engine, "usage_events"):
+        return
+    _add_columns(engine, "usage_events", {"month_key": {"default": "VARCHAR(16)"}})
+    with engine.begin() as conn:
+        rows = conn.execute(text("SELECT id, created_at FROM usage_events WHERE month_key IS NULL")).fetchall()
+        for row_id, created_at in rows:
+            if not created_at:
+                continue
+            if isinstance(created_at, str):
+                created_at = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+            conn.execute(
+                text("UPDATE usage_events SET month_key = :month_key WHERE id = :id"),
+                {"month_key": get_month_key_for_date(created_at), "id": row_id},
+            )
+        conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_usage_events_month_key ON usage_events (month_key)")
+    logger.info("MIGRATION | backfilled usage_events.month_key rows=%d", len(rows))
+
+
+def _usage_events_partitioning(engine: Engine) -> None:
+    from app.core.usage_partitions import prepare_usage_events_table
+
+    prepare_usage_events_table(engine)
+
+
+def _usage_events_token_usage(engine: Engine) -> None:
+    _add_columns(engine, "usage_events", {
+        "model": {"default": "VARCHAR(50)"},
+        "prompt_tokens": {"default": "INTEGER"},
+        "completion_tokens": {"default": "INTEGER"},
+        "cached_tokens": {"default": "INTEGER"},
+    })
+    if engine.dialect.name == "postgresql":
+        # Per-analysis costs are fractions of a cent; 4 decimals rounded them away
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ALTER TABLE usage_events ALTER COLUMN cost_usd TYPE NUMERIC(10, 6)")
+
+
+def _tracking_events(engine: Engine) -> None:
+    from app.models.tracking_event import TrackingEvent
+
+    TrackingEvent.__table__.create(bind=engine, checkfirst=True)
+
+
+def _stripe_events(engine: Engine) -> None:
+    from app.models.stripe_event import StripeEvent
+
+    StripeEvent.__table__.create(bind=engine, checkfirst=True)
+
+
+def _analysis_cache_history(engine: Engine) -> None:
+    from app.core.analysis_cache import analysis_score_priority
+    from app.models.analysis_cache import AnalysisCache
+
+    _add_columns(engine, "analysis_cache", {
+        "score": {"default": "FLOAT", "postgresql": "DOUBLE PRECISION"},
+        "priority": {"default": "VARCHAR(16)"},
+    })
+    table = AnalysisCache.__table__
+    backfilled, last_id = 0, 0
+    while True:  # keyset batches by id, so memory doesn't grow with the table
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select(table.c.id, table.c.response_json)
+                .where(table.c.id > last_id, table.c.score.is_(None))
+                .order_by(table.c.id)
+                .limit(1000)
+            ).fetchall()
+            for row_id, payload in rows:
+                if isinstance(payload, str):
+                    payload = json.loads(payload)
+                score, priority = analysis_score_priority(payload)
+                if score is not None:
+                    conn.execute(
+                        table.update().where(table.c.id == row_id).values(score=score, priority=priority)
+                    )
+                    backfilled += 1
+        if not rows:
+            break
+        last_id = rows[-1][0]
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS ix_analysis_cache_user_created_id ON analysis_cache (user_id, created_at, id)"
+        )
+    logger.info("MIGRATION | backfilled analysis_cache score/priority rows=%d", backfilled)
+
+
+def _analysis_cache_created_at_precision(engine: Engine) -> None:
+    # SQLite stores DateTime as text: rows written by the server default
+    # (CURRENT_TIMESTAMP) lack the ".ffffff" that SQLAlchemy writes and binds,
+    # so they compare as older than a history cursor at the same instant.
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        updated = conn.exec_driver_sql(
+            "UPDATE analysis_cache SET created_at = created_at || '.000000' WHERE length(created_at) = 19"
+        ).rowcount
+    logger.info("MIGRATION | normalized analysis_cache created_at rows=%d", updated)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "initial_schema", _initial_schema),
+    Migration(2, "user_subscription_columns", _user_subscription_columns),
+    Migration(3, "user_usage_columns", _user_usage_columns),
+    Migration(4, "usage_events_month_key", _usage_events_month_key),
+    Migration(5, "usage_events_partitioning", _usage_events_partitioning),
+    Migration(6, "usage_events_token_usage", _usage_events_token_usage),
+    Migration(7, "tracking_events", _tracking_events),
+    Migration(8, "stripe_events", _stripe_events),
+    Migration(9, "analysis_cache_history", _analysis_cache_history),
+    Migration(10, "analysis_cache_created_at_precision", _analysis_cache_created_at_precision),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def get_schema_version(engine: Engine) -> int:
+    """Return the highest applied migration version (0 if none / table missing)."""
+    try:
+        with engine.connect() as conn:
+            return int(conn.execute(select(func.max(schema_migrations.c.version))).scalar() or 0)
+    except Exception:
+        return 0
+
+
+def _record(conn: Connection, migration: Migration) -> None:
+    conn.execute(schema_migrations.insert().values(version=migration.version, name=migration.name))
+
+
+def run_migrations(engine: Engine) -> List[Migration]:
+    """Apply all pending migrations in order. Returns the migrations that ran."""
+    _version_metadata.create_all(bind=engine)
+    is_postgres = engine.dialect.name == "postgresql"
+    lock_conn = engine.connect() if is_postgres else None
+    # A session-level lock would outlive a crash on a PgBouncer-pooled server
+    # connection; behind a transaction pooler hold a transaction-scoped lock in
+    # a transaction kept open for the whole run (released when lock_conn closes).
+    session_lock = not uses_transaction_pooler()
+    applied: List[Migration] = []
+    try:
+        if lock_conn is not None:
+            lock_sql = "SELECT pg_advisory_lock(:id)" if session_lock else "SELECT pg_advisory_xact_lock(:id)"
+            lock_conn.execute(text(lock_sql), {"id": _ADVISORY_LOCK_ID})
+
+        current = get_schema_version(engine)
+        for migration in MIGRATIONS:
+            if migration.version <= current:
+                continue
+            started = time.perf_counter()
+            logger.info("MIGRATION | applying %03d_%s", migration.version, migration.name)
+            migration.upgrade(engine)
+            with engine.begin() as conn:
+                _record(conn, migration)
+            applied.append(migration)
+            logger.info(
+                "MIGRATION | applied %03d_%s in %.3fs",
+                migration.version,
+                migration.name,
+                time.perf_counter() - started,
+            )
+    finally:
+        if lock_conn is not None:
+            if session_lock:
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": _ADVISORY_LOCK_ID})
+            lock_conn.close()
+    return applied
+
+
+class SchemaOutdatedError(RuntimeError):
+    """The database is behind LATEST_VERSION and AUTO_MIGRATE is off."""
+
+
+def ensure_schema_current(engine: Engine, auto_migrate: bool) -> int:
+    """
+    Cheap startup check: one SELECT against schema_migrations.
+
+    If the schema is behind and auto_migrate is enabled, pending migrations run
+    (under the advisory lock, so concurrent workers migrate once). Otherwise
+    startup fails with SchemaOutdatedError: serving traffic on an old schema
+    breaks requests in ways that are much harder to spot.
+    """
+    version = get_schema_version(engine)
+    if version >= LATEST_VERSION:
+        logger.info("✓ Schema version %d is current", version)
+        return version
+    if auto_migrate:
+        logger.warning("Schema version %d < %d - running pending migrations", version, LATEST_VERSION)
+        run_migrations(engine)
+        return get_schema_version(engine)
+    logger.error(
+        "SCHEMA_OUTDATED: version %d < %d - run `python migrate.py` before serving traffic",
+        version,
+        LATEST_VERSION,
+    )
+    raise SchemaOutdatedError(
+        f"Schema version {version} < {LATEST_VERSION}: run `python migrate.py` or set AUTO_MIGRATE=true"
+    )
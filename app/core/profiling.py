@@ -0,0 +1,178 @@
+"""
+Opt-in statistical profiler for individual requests.
+
+When PROFILING_ENABLED=true the middleware in app.main profiles:
+- a random PROFILING_SAMPLE_RATE fraction of requests, and
+- any request carrying a valid `X-Profile` header (see sign_profile_token)
+
+A background thread samples, via sys._current_frames(), the Python stack of
+every thread currently inside app/ code every PROFILING_INTERVAL_MS while the
+request runs (wall-clock and process-wide: concurrent requests show up too). Stacks are stored
+in collapsed format (`frame;frame;frame count`, readable by flamegraph.pl and
+speedscope) under PROFILING_DIR, keyed by X-Request-ID, and served by the
+/admin/profiles endpoints.
+
+Profile one request on demand (header valid for 10 minutes):
+
+    python -c "import time; from app.core.profiling import sign_profile_token; \
+        print(sign_profile_token('<PROFILING_SECRET>', int(time.time()) + 600))"
+    curl -H "X-Profile: <token>" -H "X-Request-ID: slow-linkedin-1" ...
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+
+# Only stacks running through our own code are kept; idle pool workers and the
+# parked event loop never have an app/ frame on their stack.
+_APP_ROOT = str(Path(__file__).resolve().parents[1])
+_SAFE_ID = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+
+_active = threading.BoundedSemaphore(2)  # at most two requests profiled at once
+
+
+class StackSampler:
+    """Samples all thread stacks (except its own) at a fixed interval until stopped."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread in threading.enumerate():
+                names.setdefault(thread.ident, thread.name)
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                in_app = False
+                while frame is not None:
+                    code = frame.f_code
+                    in_app = in_app or code.co_filename.startswith(_APP_ROOT)
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                if not in_app:
+                    continue
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+
+def sign_profile_token(secret: str, expires_at: int) -> str:
+    """Build an X-Profile header value valid until the unix timestamp `expires_at`."""
+    signature = hmac.new(secret.encode("utf-8"), str(expires_at).encode("utf-8"), hashlib.sha256).hexdigest()
+    return f"{expires_at}.{signature}"
+
+
+def verify_profile_token(secret: Optional[str], token: Optional[str]) -> bool:
+    if not secret or not token or "." not in token:
+        return False
+    expires_raw, signature = token.split(".", 1)
+    if not expires_raw.isdigit() or int(expires_raw) < time.time():
+        return False
+    expected = sign_profile_token(secret, int(expires_raw)).split(".", 1)[1]
+    return hmac.compare_digest(expected, signature)
+
+
+def should_profile(header_value: Optional[str]) -> Optional[str]:
+    """Return the trigger ("header" / "sampled") if this request should be profiled, else None."""
+    settings = get_settings()
+    if verify_profile_token(settings.profiling_secret, header_value):
+        return "header"
+    if settings.profiling_sample_rate > 0 and random.random() < settings.profiling_sample_rate:
+        return "sampled"
+    return None
+
+
+def start_profile() -> Optional[StackSampler]:
+    """Start sampling unless two profiles are already running (then skip this request)."""
+    if not _active.acquire(blocking=False):
+        return None
+    return StackSampler(get_settings().profiling_interval_ms / 1000).start()
+
+
+def _profile_dir() -> Path:
+    return Path(get_settings().profiling_dir)
+
+
+def _file_stem(request_id: str) -> str:
+    return request_id if _SAFE_ID.match(request_id) else hashlib.sha256(request_id.encode("utf-8")).hexdigest()[:32]
+
+
+def finish_profile(sampler: StackSampler, request_id: str, metadata: Dict) -> Path:
+    """Stop sampling, write <request_id>.collapsed + .json and prune old profiles."""
+    try:
+        stacks = sampler.stop()
+    finally:
+        _active.release()
+
+    directory = _profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    stem = _file_stem(request_id)
+    path = directory / f"{stem}.collapsed"
+    path.write_text("".join(f"{stack} {count}\n" for stack, count in stacks.most_common()), encoding="utf-8")
+    (directory / f"{stem}.json").write_text(
+        json.dumps({**metadata, "request_id": request_id, "samples": sampler.samples, "created_at": time.time()}),
+        encoding="utf-8",
+    )
+    logger.info("PROFILE_SAVED | request_id=%s | samples=%d | path=%s", request_id, sampler.samples, path)
+    _prune(directory, get_settings().profiling_max_profiles)
+    return path
+
+
+def _prune(directory: Path, keep: int) -> None:
+    metas = sorted(directory.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for meta in metas[keep:]:
+        meta.unlink(missing_ok=True)
+        meta.with_suffix(".collapsed").unlink(missing_ok=True)
+
+
+def list_profiles(limit: int = 50) -> List[Dict]:
+    """Metadata of the most recent profiles, newest first."""
+    directory = _profile_dir()
+    if not directory.exists():
+        return []
+    metas = sorted(directory.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)[:limit]
+    profiles = []
+    for meta in metas:
+        try:
+            profiles.append(json.loads(meta.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+
+def get_profile_path(request_id: str) -> Optional[Path]:
+    path = _profile_dir() / f"{_file_stem(request_id)}.collapsed"
+    return path if path.exists() else None
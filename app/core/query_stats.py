@@ -0,0 +1,124 @@
+"""
+Per-request SQL query counting.
+
+SQLAlchemy cursor events on the app engine feed a QueryStats object bound to
+the current request (a ContextVar set by the middleware in app.main; sync
+routes run in the threadpool with a copy of that context, so they update the
+same object). At the end of the request the middleware:
+
+- adds X-DB-Queries / X-DB-Time-ms response headers (dev, or DB_QUERY_HEADERS=true)
+- observes the per-route Prometheus histograms
+- warns when a route exceeds its query budget, or when one statement repeats
+  often enough to look like an N+1 loop
+"""
+
+import logging
+import time
+from collections import Counter as StatementCounter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import get_settings
+from app.core.metrics import DB_QUERIES_PER_REQUEST, DB_QUERY_BUDGET_EXCEEDED, DB_SECONDS_PER_REQUEST
+from app.core.structured_logging import bind_log_context
+
+logger = logging.getLogger(__name__)
+
+QUERIES_HEADER = "X-DB-Queries"
+DB_TIME_HEADER = "X-DB-Time-ms"
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+    statements: StatementCounter = field(default_factory=StatementCounter)
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statements executed at least `threshold` times (N+1 candidates)."""
+        return [(sql, n) for sql, n in self.statements.most_common() if n >= threshold]
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Count the queries issued inside the block (nested blocks get their own counts)."""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    started = conn.info.get("query_started")
+    stats.count += 1
+    if started:
+        stats.seconds += time.perf_counter() - started.pop()
+    stats.statements[statement] += 1
+
+
+def instrument_engine(engine: Engine) -> Engine:
+    """Attach the counting listeners (idempotent)."""
+    if not event.contains(engine, "after_cursor_execute", _after_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    return engine
+
+
+def query_budget_for(route: str) -> int:
+    settings = get_settings()
+    return settings.db_query_budget_overrides.get(route, settings.db_query_budget)
+
+
+def finish_request(stats: QueryStats, route: str, request_id: str, headers) -> None:
+    """Export one request's counts: metrics always, headers when enabled, warnings when over budget."""
+    settings = get_settings()
+    DB_QUERIES_PER_REQUEST.labels(route=route).observe(stats.count)
+    DB_SECONDS_PER_REQUEST.labels(route=route).observe(stats.seconds)
+    bind_log_context(db_queries=stats.count, db_ms=round(stats.seconds * 1000, 2))
+
+    show_headers = settings.db_query_headers if settings.db_query_headers is not None else settings.env != "prod"
+    if show_headers:
+        headers[QUERIES_HEADER] = str(stats.count)
+        headers[DB_TIME_HEADER] = f"{stats.seconds * 1000:.2f}"
+
+    budget = query_budget_for(route)
+    if budget and stats.count > budget:
+        DB_QUERY_BUDGET_EXCEEDED.labels(route=route).inc()
+        logger.warning(
+            "DB_QUERY_BUDGET_EXCEEDED | request_id=%s | route=%s | queries=%d | budget=%d | db_ms=%.1f",
+            request_id,
+            route,
+            stats.count,
+            budget,
+            stats.seconds * 1000,
+        )
+    for statement, repeats in stats.repeated(settings.db_n_plus_one_threshold):
+        logger.warning(
+            "DB_N_PLUS_ONE_SUSPECTED | request_id=%s | route=%s | repeats=%d | sql=%s",
+            request_id,
+            route,
+            repeats,
+            " ".join(statement.split())[:200],
+        )
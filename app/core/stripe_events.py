@@ -0,0 +1,366 @@
+"""
+Durable Stripe webhook queue.
+
+The webhook route only verifies the signature and stores the raw event in
+stripe_events (primary key = Stripe event id, so redeliveries are detected
+by the insert itself) and answers 200 right away. Handlers that hit the DB or
+the Stripe API run here, off the event loop:
+
+- a dispatcher thread selects, in SQL, each customer's oldest unfinished event
+  when it is due (pending, failed with an elapsed backoff, or processing with
+  an expired lease), oldest-first, and claims them with a conditional UPDATE,
+  so several app processes can share the table
+- at most one event per customer is in flight, and a customer whose oldest
+  event is waiting for a retry is held back without blocking anyone else:
+  events for one customer are applied in Stripe `created` order
+- each customer hashes to one of STRIPE_WEBHOOK_WORKERS worker threads
+- an exception schedules a retry (STRIPE_WEBHOOK_RETRY_BASE_SECONDS, doubling);
+  after STRIPE_WEBHOOK_MAX_ATTEMPTS the event is dead-lettered (status=dead)
+  and can be requeued from /admin/stripe-events
+- a handler returning None (unknown user/customer) is recorded as skipped,
+  matching the old synchronous behaviour
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import and_, exists, or_, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+
+from app.core.config import get_settings
+from app.core.metrics import STRIPE_WEBHOOK_EVENTS, STRIPE_WEBHOOK_LAG_SECONDS
+from app.core.utils import as_utc
+from app.models.stripe_event import StripeEvent
+
+logger = logging.getLogger(__name__)
+
+# Event type -> StripeService method
+HANDLERS = {
+    "checkout.session.completed": "handle_checkout_completed",
+    "customer.subscription.created": "handle_subscription_created",
+    "customer.subscription.updated": "handle_subscription_updated",
+    "customer.subscription.deleted": "handle_subscription_deleted",
+}
+
+_CANDIDATE_BATCH = 200
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def persist_stripe_event(event: Dict[str, Any], payload: bytes) -> bool:
+    """Store a verified event. Returns False if this event id was already stored."""
+    from app.core.db import get_session_factory
+
+    event_type = event.get("type")
+    data = event.get("data", {}).get("object", {})
+    db = get_session_factory()()
+    try:
+        db.add(StripeEvent(
+            id=event.get("id"),
+            type=event_type,
+            customer_id=data.get("customer"),
+            stripe_created=int(event.get("created") or 0),
+            payload=payload.decode("utf-8"),
+            status="pending",
+        ))
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        STRIPE_WEBHOOK_EVENTS.labels(type=event_type, outcome="duplicate").inc()
+        return False
+    finally:
+        db.close()
+    STRIPE_WEBHOOK_EVENTS.labels(type=event_type, outcome="queued").inc()
+    return True
+
+
+class StripeEventWorker:
+    """Dispatcher + per-customer-sharded worker threads over the stripe_events table."""
+
+    def __init__(self, service_factory: Callable[[], Any], workers: Optional[int] = None):
+        settings = get_settings()
+        self.service_factory = service_factory
+        self.workers = workers if workers is not None else settings.stripe_webhook_workers
+        self.max_attempts = settings.stripe_webhook_max_attempts
+        self.retry_base = settings.stripe_webhook_retry_base_seconds
+        self.poll_interval = settings.stripe_webhook_poll_seconds
+        self.lease = timedelta(seconds=settings.stripe_webhook_lease_seconds)
+        self._in_flight: Set[str] = set()  # customer keys with a dispatched event
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._queues: List[queue.Queue] = []
+        self._threads: List[threading.Thread] = []
+
+    # -- dispatching -----------------------------------------------------
+
+    @staticmethod
+    def _customer_key(row: StripeEvent) -> str:
+        return row.customer_id or f"event:{row.id}"
+
+    def _claim(self, db, row: StripeEvent, now: datetime) -> bool:
+        result = db.execute(
+            update(StripeEvent)
+            .where(StripeEvent.id == row.id, StripeEvent.status == row.status, StripeEvent.attempts == row.attempts)
+            .values(status="processing", locked_at=now, attempts=StripeEvent.attempts + 1)
+        )
+        db.commit()
+        return result.rowcount == 1
+
+    def _due_heads_query(self, now: datetime, in_flight: Set[str]):
+        """
+        Each customer's oldest unfinished event, when it is due: no earlier
+        unfinished event for the same customer (NOT EXISTS), pending, failed
+        with an elapsed backoff, or processing with an expired lease. Oldest
+        first, so _CANDIDATE_BATCH bounds the claims, not the backlog scanned.
+        """
+        earlier = aliased(StripeEvent)
+        unfinished = ("pending", "failed", "processing")
+        query = (
+            select(StripeEvent)
+            .where(
+                StripeEvent.status.in_(unfinished),
+                or_(
+                    StripeEvent.status == "pending",
+                    and_(
+                        StripeEvent.status == "failed",
+                        or_(StripeEvent.next_attempt_at.is_(None), StripeEvent.next_attempt_at <= now),
+                    ),
+                    and_(
+                        StripeEvent.status == "processing",
+                        or_(StripeEvent.locked_at.is_(None), StripeEvent.locked_at <= now - self.lease),
+                    ),
+                ),
+                or_(
+                    StripeEvent.customer_id.is_(None),
+                    ~exists().where(
+                        earlier.customer_id == StripeEvent.customer_id,
+                        earlier.status.in_(unfinished),
+                        tuple_(earlier.stripe_created, earlier.received_at, earlier.id)
+                        < tuple_(StripeEvent.stripe_created, StripeEvent.received_at, StripeEvent.id),
+                    ),
+                ),
+            )
+            .order_by(StripeEvent.stripe_created, StripeEvent.received_at, StripeEvent.id)
+            .limit(_CANDIDATE_BATCH)
+        )
+        customers = [key for key in in_flight if not key.startswith("event:")]
+        if customers:
+            query = query.where(StripeEvent.customer_id.not_in(customers))
+        return query
+
+    def claim_due(self) -> List[StripeEvent]:
+        """Claim the next event of every customer that is free to progress."""
+        from app.core.db import get_session_factory
+
+        now = _now()
+        with self._lock:
+            in_flight = set(self._in_flight)
+        db = get_session_factory()()
+        try:
+            claimed: List[StripeEvent] = []
+            for row in db.execute(self._due_heads_query(now, in_flight)).scalars().all():
+                with self._lock:
+                    if self._customer_key(row) in self._in_flight:
+                        continue
+                if self._claim(db, row, now):
+                    db.refresh(row)
+                    db.expunge(row)
+                    claimed.append(row)
+            return claimed
+        finally:
+            db.close()
+
+    # -- processing ------------------------------------------------------
+
+    def process(self, row: StripeEvent) -> str:
+        """Run the handler for one claimed event and record the outcome."""
+        from app.core.db import get_session_factory
+
+        db = get_session_factory()()
+        outcome = "processed"
+        error: Optional[str] = None
+        try:
+            event = json.loads(row.payload)
+            handler = getattr(self.service_factory(), HANDLERS[row.type])
+            result = handler(event.get("data", {}).get("object", {}), db)
+            if result is None:
+                outcome = "skipped"
+        except Exception as e:
+            db.rollback()
+            error = f"{type(e).__name__}: {e}"
+            outcome = "dead" if row.attempts >= self.max_attempts else "retry"
+        finally:
+            db.close()
+
+        now = _now()
+        values: Dict[str, Any] = {"locked_at": None, "last_error": error}
+        if outcome == "retry":
+            delay = self.retry_base * (2 ** max(row.attempts - 1, 0))
+            values.update(status="failed", next_attempt_at=now + timedelta(seconds=delay))
+        else:
+            values.update(status=outcome, processed_at=now, next_attempt_at=None)
+        db = get_session_factory()()
+        try:
+            db.execute(update(StripeEvent).where(StripeEvent.id == row.id).values(**values))
+            db.commit()
+        finally:
+            db.close()
+
+        STRIPE_WEBHOOK_EVENTS.labels(type=row.type, outcome=outcome).inc()
+        if outcome in ("processed", "skipped") and row.received_at:
+            STRIPE_WEBHOOK_LAG_SECONDS.observe(max((now - as_utc(row.received_at)).total_seconds(), 0.0))
+        log = logger.info if outcome in ("processed", "skipped") else logger.warning
+        log(
+            "WEBHOOK_PROCESSED | event_type=%s | event_id=%s | customer=%s | attempt=%d | outcome=%s%s",
+            row.type,
+            row.id,
+            row.customer_id,
+            row.attempts,
+            outcome,
+            f" | error={error}" if error else "",
+        )
+        return outcome
+
+    def drain(self, max_rounds: int = 1000) -> int:
+        """Process every due event in the calling thread (tests, CLI). Returns events handled."""
+        handled = 0
+        for _ in range(max_rounds):
+            rows = self.claim_due()
+            if not rows:
+                break
+            for row in rows:
+                self.process(row)
+                handled += 1
+        return handled
+
+    # -- threads ---------------------------------------------------------
+
+    def start(self) -> "StripeEventWorker":
+        for index in range(self.workers):
+            work: queue.Queue = queue.Queue()
+            thread = threading.Thread(target=self._work, args=(work,), name=f"stripe-webhook-{index}", daemon=True)
+            self._queues.append(work)
+            self._threads.append(thread)
+            thread.start()
+        dispatcher = threading.Thread(target=self._dispatch, name="stripe-webhook-dispatcher", daemon=True)
+        self._threads.append(dispatcher)
+        dispatcher.start()
+        logger.info("Stripe webhook worker started (workers=%d)", self.workers)
+        return self
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    def _dispatch(self) -> None:
+        while not self._stopping:
+            try:
+                for row in self.claim_due():
+                    key = self._customer_key(row)
+                    with self._lock:
+                        self._in_flight.add(key)
+                    self._queues[zlib.crc32(key.encode("utf-8")) % len(self._queues)].put(row)
+            except Exception as e:
+                logger.error("WEBHOOK_DISPATCH_FAILED | error=%s", e)
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _work(self, work: queue.Queue) -> None:
+        while True:
+            row = work.get()
+            if row is None:
+                return
+            try:
+                self.process(row)
+            except Exception as e:
+                # Status update failed: the lease expires and the event is reclaimed
+                logger.error("WEBHOOK_WORKER_FAILED | event_id=%s | error=%s", row.id, e)
+            finally:
+                with self._lock:
+                    self._in_flight.discard(self._customer_key(row))
+                self.notify()  # this customer's next event may be due now
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stopping = True
+        self._wakeup.set()
+        for work in self._queues:
+            work.put(None)
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+
+
+_worker: Optional[StripeEventWorker] = None
+
+
+def start_stripe_event_worker(service_factory: Callable[[], Any]) -> Optional[StripeEventWorker]:
+    global _worker
+    if _worker is None and get_settings().stripe_webhook_workers > 0:
+        _worker = StripeEventWorker(service_factory).start()
+    return _worker
+
+
+def notify_stripe_event_worker() -> None:
+    if _worker is not None:
+        _worker.notify()
+
+
+def stop_stripe_event_worker() -> None:
+    global _worker
+    if _worker is not None:
+        _worker.stop()
+        _worker = None
+
+
+def list_stripe_events(status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+    from app.core.db import get_session_factory
+
+    db = get_session_factory()()
+    try:
+        query = select(StripeEvent).order_by(StripeEvent.received_at.desc()).limit(limit)
+        if status:
+            query = query.where(StripeEvent.status == status)
+        return [
+            {
+                "id": row.id,
+                "type": row.type,
+                "customer_id": row.customer_id,
+                "status": row.status,
+                "attempts": row.attempts,
+                "last_error": row.last_error,
+                "received_at": row.received_at,
+                "processed_at": row.processed_at,
+                "next_attempt_at": row.next_attempt_at,
+            }
+            for row in db.execute(query).scalars()
+        ]
+    finally:
+        db.close()
+
+
+def requeue_stripe_event(event_id: str) -> bool:
+    """Send a dead-lettered (or failed) event back to the queue with a fresh attempt budget."""
+    from app.core.db import get_session_factory
+
+    db = get_session_factory()()
+    try:
+        result = db.execute(
+            update(StripeEvent)
+            .where(StripeEvent.id == event_id, StripeEvent.status.in_(("dead", "failed")))
+            .values(status="pending", attempts=0, next_attempt_at=None, last_error=None)
+        )
+        db.commit()
+    finally:
+        db.close()
+    if result.rowcount:
+        notify_stripe_event_worker()
+    return bool(result.rowcount)
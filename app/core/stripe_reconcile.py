@@ -0,0 +1,260 @@
+"""
+Stripe <-> users reconciliation.
+
+Fetching: every list is auto-paged (`auto_paging_iter`, 100 per page), and the
+independent streams run on a bounded thread pool: products, all prices in one
+listing (grouped by product locally instead of one Price.list per product),
+and subscriptions split by status so the largest listing pages in parallel.
+
+The result (`StripeState`) can be saved as a JSON snapshot and loaded again,
+so audits and repeated diffs don't have to hit the API.
+
+Diffing: users are read in one streamed query and compared in memory with the
+state the webhook handlers would have produced for each customer's
+subscription (see app.core.stripe_service):
+
+- active / trialing with an allowed price -> that plan, status "active"
+- canceled / unpaid / past_due            -> plan "free", same status
+- other statuses (incomplete, paused, ...) are not compared
+
+Each user is compared with the customer's newest active/trialing subscription
+when there is one, so a stale users.stripe_subscription_id (e.g. pointing at
+an old canceled subscription) is flagged instead of hiding the live one.
+"""
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import or_, select
+
+from app.core.subscription_cache import as_dict, subscription_snapshot
+from app.models.user import User
+
+PAGE_SIZE = 100
+DEFAULT_WORKERS = 8
+# Stripe's default subscription listing excludes canceled ones; each status is its own stream
+SUBSCRIPTION_STATUSES = (
+    "active", "trialing", "past_due", "canceled", "unpaid", "incomplete", "incomplete_expired", "paused",
+)
+ACTIVE_STATUSES = ("active", "trialing")
+LAPSED_STATUSES = ("canceled", "unpaid", "past_due")
+_USER_CHUNK = 5_000
+
+
+def iter_all(resource: Any, **params: Any) -> Iterator[Any]:
+    """Every object of a Stripe list endpoint (e.g. stripe.Product), following has_more."""
+    return iter(resource.list(limit=PAGE_SIZE, **params).auto_paging_iter())
+
+
+@dataclass
+class StripeState:
+    """Products and prices as StripeObjects (attribute access), subscriptions as snapshots."""
+
+    products: List[Any] = field(default_factory=list)
+    prices: List[Any] = field(default_factory=list)
+    subscriptions: List[Dict[str, Any]] = field(default_factory=list)
+    fetched_at: float = 0.0
+    fetch_seconds: float = 0.0
+
+    def prices_by_product(self, active: Optional[bool] = None) -> Dict[str, List[Any]]:
+        grouped: Dict[str, List[Any]] = {}
+        for price in self.prices:
+            if active is None or price.active == active:
+                grouped.setdefault(price.product, []).append(price)
+        return grouped
+
+    def subscriptions_by_customer(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Customer -> subscriptions, newest first."""
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for subscription in sorted(self.subscriptions, key=lambda s: s.get("created") or 0, reverse=True):
+            grouped.setdefault(subscription["customer"], []).append(subscription)
+        return grouped
+
+
+def _subscription_record(subscription: Any) -> Dict[str, Any]:
+    return {**subscription_snapshot(subscription), "created": as_dict(subscription).get("created")}
+
+
+def fetch_stripe_state(
+    stripe_module: Any = None,
+    workers: int = DEFAULT_WORKERS,
+    include_subscriptions: bool = True,
+    product_filters: Optional[Dict[str, Any]] = None,
+) -> StripeState:
+    """Page through products, prices and (optionally) subscriptions concurrently."""
+    if stripe_module is None:
+        import stripe as stripe_module
+
+    started = time.perf_counter()
+    streams: Dict[Tuple[str, str], Any] = {
+        ("products", ""): lambda: list(iter_all(stripe_module.Product, **(product_filters or {}))),
+        ("prices", ""): lambda: list(iter_all(stripe_module.Price)),
+    }
+    if include_subscriptions:
+        for status in SUBSCRIPTION_STATUSES:
+            streams[("subscriptions", status)] = (
+                lambda status=status: [_subscription_record(s) for s in iter_all(stripe_module.Subscription, status=status)]
+            )
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(streams))), thread_name_prefix="stripe-fetch") as pool:
+        futures = {key: pool.submit(fetch) for key, fetch in streams.items()}
+        results = {key: future.result() for key, future in futures.items()}
+
+    state = StripeState(fetched_at=time.time())
+    for (kind, _), objects in results.items():
+        getattr(state, kind).extend(objects)
+    state.fetch_seconds = time.perf_counter() - started
+    return state
+
+
+def save_snapshot(state: StripeState, path: str) -> Path:
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.tmp")
+    with open(tmp, "w", encoding="utf-8") as handle:
+        json.dump(
+            {
+                "fetched_at": state.fetched_at,
+                "products": [as_dict(product) for product in state.products],
+                "prices": [as_dict(price) for price in state.prices],
+                "subscriptions": state.subscriptions,
+            },
+            handle,
+        )
+    tmp.replace(target)
+    return target
+
+
+def load_snapshot(path: str) -> StripeState:
+    from stripe import StripeObject
+
+    with open(path, encoding="utf-8") as handle:
+        data = json.load(handle)
+    return StripeState(
+        products=[StripeObject.construct_from(product, None) for product in data.get("products", [])],
+        prices=[StripeObject.construct_from(price, None) for price in data.get("prices", [])],
+        subscriptions=data.get("subscriptions", []),
+        fetched_at=data.get("fetched_at", 0.0),
+    )
+
+
+def expected_user_state(subscription: Dict[str, Any], price_plans: Dict[str, str]) -> Optional[Tuple[str, str]]:
+    """(plan, subscription_status) the webhook handlers leave for this subscription, or None."""
+    status = subscription.get("status")
+    if status in ACTIVE_STATUSES:
+        return price_plans.get(subscription.get("price_id"), "free"), "active"
+    if status in LAPSED_STATUSES:
+        return "free", status
+    return None
+
+
+@dataclass
+class ReconcileReport:
+    users_checked: int = 0
+    subscriptions: int = 0
+    mismatches: List[Dict[str, Any]] = field(default_factory=list)
+    seconds: float = 0.0
+
+    def counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for mismatch in self.mismatches:
+            counts[mismatch["issue"]] = counts.get(mismatch["issue"], 0) + 1
+        return counts
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "users_checked": self.users_checked,
+            "subscriptions": self.subscriptions,
+            "seconds": round(self.seconds, 3),
+            "counts": self.counts(),
+            "mismatches": self.mismatches,
+        }
+
+
+def _iter_billing_users(db) -> Iterator[Any]:
+    """Users with a Stripe customer or a paid plan, streamed in chunks."""
+    query = (
+        select(
+            User.id,
+            User.email,
+            User.plan,
+            User.subscription_status,
+            User.stripe_customer_id,
+            User.stripe_subscription_id,
+        )
+        .where(or_(User.stripe_customer_id.isnot(None), User.plan != "free"))
+        .execution_options(yield_per=_USER_CHUNK)
+    )
+    yield from db.execute(query)
+
+
+def reconcile_users(db, state: StripeState, price_plans: Dict[str, str]) -> ReconcileReport:
+    """Compare users.plan / subscription_status with Stripe; Stripe is the source of truth."""
+    started = time.perf_counter()
+    by_customer = state.subscriptions_by_customer()
+    report = ReconcileReport(subscriptions=len(state.subscriptions))
+    seen_customers = set()
+
+    for user in _iter_billing_users(db):
+        report.users_checked += 1
+        base = {"user_id": user.id, "email": user.email, "customer_id": user.stripe_customer_id}
+        subscriptions = by_customer.get(user.stripe_customer_id, []) if user.stripe_customer_id else []
+        seen_customers.add(user.stripe_customer_id)
+
+        # Newest live subscription, else the one the user row points at, else the newest one
+        subscription = next((s for s in subscriptions if s["status"] in ACTIVE_STATUSES), None)
+        if subscription is None:
+            subscription = next((s for s in subscriptions if s["id"] == user.stripe_subscription_id), None)
+        if subscription is None and subscriptions:
+            subscription = subscriptions[0]
+
+        if subscription is None:
+            if user.plan != "free":
+                report.mismatches.append({**base, "issue": "missing_subscription", "db_plan": user.plan,
+                                          "subscription_id": user.stripe_subscription_id})
+            continue
+
+        expected = expected_user_state(subscription, price_plans)
+        if expected is None:
+            continue
+        plan, status = expected
+        row = {**base, "subscription_id": subscription["id"], "stripe_status": subscription["status"]}
+        if user.stripe_subscription_id != subscription["id"]:
+            report.mismatches.append({**row, "issue": "subscription_id", "db": user.stripe_subscription_id,
+                                      "expected": subscription["id"]})
+        if user.plan != plan:
+            report.mismatches.append({**row, "issue": "plan", "db": user.plan, "expected": plan})
+        if user.subscription_status != status:
+            report.mismatches.append({**row, "issue": "status", "db": user.subscription_status, "expected": status})
+
+    for customer, subscriptions in by_customer.items():
+        if customer not in seen_customers and subscriptions[0]["status"] in ACTIVE_STATUSES:
+            report.mismatches.append({
+                "user_id": None,
+                "email": None,
+                "customer_id": customer,
+                "subscription_id": subscriptions[0]["id"],
+                "stripe_status": subscriptions[0]["status"],
+                "issue": "orphan_subscription",
+            })
+
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def configured_price_plans(settings=None) -> Dict[str, str]:
+    """Allowed price id -> plan, as StripeService builds it."""
+    if settings is None:
+        from app.core.config import get_settings
+
+        settings = get_settings()
+    plans = {
+        settings.stripe_price_starter_id: "starter",
+        settings.stripe_price_pro_id: "pro",
+        settings.stripe_price_team_id: "team",
+    }
+    return {price_id: plan for price_id, plan in plans.items() if price_id}
@@ -8,17 +8,30 @@ Manages:
 
 import logging
 from typing import Optional, Dict, Any
-import stripe
 from sqlalchemy.orm import Session
+from app.core.subscription_cache import get_subscription_cache
+from app.core.utils import as_utc
 from app.models.user import User
 
 logger = logging.getLogger(__name__)
 
 
+def load_stripe():
+    """
+    Import the Stripe SDK on first use.
+
+    Keeps the SDK off the cold-start path: it is only loaded once a billing
+    endpoint builds a StripeService (see get_stripe_service).
+    """
+    import stripe
+
+    return stripe
+
+
 class StripeService:
     """Service for Stripe payment integration."""
 
-    def __init__(self, api_key: str, webhook_secret: str, starter_price_id: Optional[str] = None, pro_price_id: Optional[str] = None, team_price_id: Optional[str] = None):
+    def __init__(self, api_key: str, webhook_secret: str, starter_price_id: Optional[str] = None, pro_price_id: Optional[str] = None, team_price_id: Optional[str] = None, api_base: Optional[str] = None):
         """
         Initialize Stripe service.
         
@@ -28,8 +41,12 @@ class StripeService:
             starter_price_id: Stripe price ID for Starter plan ($9/mo - 40 analyses/month)
             pro_price_id: Stripe price ID for Pro plan ($19/mo - 150 analyses/month)
             team_price_id: Stripe price ID for Team plan ($49/mo - 500 analyses/month)
+            api_base: Stripe API URL override (STRIPE_API_BASE, local stand-ins only)
         """
+        stripe = load_stripe()
         stripe.api_key = api_key
+        if api_base:
+            stripe.api_base = api_base
         self.webhook_secret = webhook_secret
         self.starter_price_id = starter_price_id
         self.pro_price_id = pro_price_id
@@ -133,6 +150,8 @@ class StripeService:
             stripe.error.StripeError: If session creation fails
             ValueError: If plan is invalid or not configured
         """
+        stripe = load_stripe()
+
         # SECURITY: Validate plan name
         plan = plan.lower().strip()
         if plan not in ["starter", "pro", "team"]:
@@ -232,7 +251,11 @@ class StripeService:
         - Sets monthly_analyses_reset_at to next billing date
         
         SECURITY: Validates price_id against whitelist to prevent unauthorized plans.
+
+        The subscription comes from the subscription cache; a miss costs one
+        stripe.Subscription.retrieve, which raises stripe.error.StripeError on failure.
         """
+        stripe = load_stripe()
         user_id = session.get("client_reference_id") or session.get("metadata", {}).get("user_id")
         customer_id = session.get("customer")
         subscription_id = session.get("subscription")
@@ -256,26 +279,19 @@ class StripeService:
             )
             return user
         
-        # SECURITY: Fetch subscription to get actual price_id paid
+        # SECURITY: Get the actual price_id paid from the subscription (cached
+        # from customer.subscription.* webhooks; retrieved only on a cache miss)
         try:
-            subscription = stripe.Subscription.retrieve(subscription_id)
-            items = subscription.get("items", {}).get("data", [])
-            
-            if not items:
-                logger.error(
-                    "CHECKOUT_COMPLETED | ERROR: No subscription items | user_id=%s | subscription_id=%s",
-                    user_id,
-                    subscription_id
-                )
-                return None
-            
+            subscription = get_subscription_cache().get_or_fetch(subscription_id, stripe.Subscription.retrieve)
+
             # Get actual price_id that was paid
-            actual_price_id = items[0].get("price", {}).get("id")
+            actual_price_id = subscription.get("price_id")
             
             if not actual_price_id:
                 logger.error(
-                    "CHECKOUT_COMPLETED | ERROR: No price_id in subscription | user_id=%s",
-                    user_id
+                    "CHECKOUT_COMPLETED | ERROR: No price_id in subscription | user_id=%s | subscription_id=%s",
+                    user_id,
+                    subscription_id
                 )
                 return None
             
@@ -335,7 +351,7 @@ class StripeService:
                     tz=timezone.utc
                 )
             if user.monthly_analyses_reset_at is None or (
-                next_reset_at and next_reset_at > user.monthly_analyses_reset_at
+                next_reset_at and next_reset_at > as_utc(user.monthly_analyses_reset_at)
             ):
                 user.monthly_analyses_count = 0
             user.monthly_analyses_reset_at = next_reset_at
@@ -361,7 +377,7 @@ class StripeService:
                 subscription_id,
                 str(e)
             )
-            return None
+            raise  # transient: the webhook queue retries the event
 
     def handle_subscription_created(
         self,
@@ -376,6 +392,7 @@ class StripeService:
         
         IDEMPOTENCY: Checks if subscription already processed.
         """
+        get_subscription_cache().remember(subscription)
         customer_id = subscription.get("customer")
         subscription_id = subscription.get("id")
         subscription_status = subscription.get("status", "active")
@@ -446,7 +463,7 @@ class StripeService:
                 tz=timezone.utc
             )
         if user.monthly_analyses_reset_at is None or (
-            next_reset_at and next_reset_at > user.monthly_analyses_reset_at
+            next_reset_at and next_reset_at > as_utc(user.monthly_analyses_reset_at)
         ):
             user.monthly_analyses_count = 0
         user.monthly_analyses_reset_at = next_reset_at
@@ -480,6 +497,7 @@ class StripeService:
         - Keeps customer_id and subscription_id for history
         - Resets monthly_analyses_count to 0
         """
+        get_subscription_cache().remember(subscription)
         customer_id = subscription.get("customer")
         subscription_id = subscription.get("id")
         
@@ -529,6 +547,7 @@ class StripeService:
         Returns:
             Updated User object, or None if user not found
         """
+        get_subscription_cache().remember(subscription)
         customer_id = subscription.get("customer")
         subscription_id = subscription.get("id")
         status = subscription.get("status")
@@ -589,13 +608,14 @@ class StripeService:
                     current_period_end,
                     tz=timezone.utc
                 )
+            current_reset_at = as_utc(user.monthly_analyses_reset_at) if user.monthly_analyses_reset_at else None
 
             # IDEMPOTENCY: skip if no changes
             if (
                 user.stripe_subscription_id == subscription_id
                 and user.plan == plan
                 and user.subscription_status == "active"
-                and user.monthly_analyses_reset_at == next_reset_at
+                and current_reset_at == next_reset_at
             ):
                 logger.info(
                     "SUBSCRIPTION_UPDATED | IDEMPOTENT_SKIP | webhook_event_type=customer.subscription.updated | user_id=%s | "
@@ -611,9 +631,7 @@ class StripeService:
             user.stripe_subscription_id = subscription_id
             user.subscription_status = "active"
 
-            if user.monthly_analyses_reset_at is None or (
-                next_reset_at and next_reset_at > user.monthly_analyses_reset_at
-            ):
+            if current_reset_at is None or (next_reset_at and next_reset_at > current_reset_at):
                 user.monthly_analyses_count = 0
             user.monthly_analyses_reset_at = next_reset_at
 
@@ -656,6 +674,7 @@ class StripeService:
         Raises:
             stripe.error.SignatureVerificationError: If signature is invalid
         """
+        stripe = load_stripe()
         try:
             event = stripe.Webhook.construct_event(
                 payload,
@@ -0,0 +1,206 @@
+"""
+Structured, non-blocking logging.
+
+- Request threads only enqueue records (QueueHandler on a bounded queue; when
+  the queue is full the record is dropped and counted instead of blocking).
+  A QueueListener thread formats and writes them to stderr.
+- LOG_FORMAT=json emits one JSON object per line; default is json when
+  ENV=prod and the classic text format otherwise.
+- Every record emitted during a request carries request_id, user_id and route
+  (bound by the middleware in app.main and get_current_user). track_stage
+  timings are collected into the same context and logged once per request in
+  the REQUEST_COMPLETED summary.
+- High-volume INFO events can be sampled: LOG_SAMPLE_RATES maps a message
+  prefix (e.g. "BILLING_STATUS_CHECKED") to the fraction kept; other INFO
+  records use LOG_INFO_SAMPLE_RATE. WARNING and above are never sampled.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Iterator, Optional
+
+from app.core.config import get_settings
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+TEXT_DATEFMT = "%Y-%m-%d %H:%M:%S"
+_CONTEXT_FIELDS = ("request_id", "user_id", "route")
+# Attributes every LogRecord has; anything else was passed via extra=
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "stages"}
+
+_TRACEBACK_FORMATTER = logging.Formatter()
+_logger = logging.getLogger("app.requests")
+
+_request_context: ContextVar[Optional[Dict[str, Any]]] = ContextVar("log_request_context", default=None)
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional["DroppingQueueHandler"] = None
+
+
+@contextmanager
+def request_log_context(**fields: Any) -> Iterator[Dict[str, Any]]:
+    """Bind request-scoped log fields for the duration of one request."""
+    context: Dict[str, Any] = {**fields, "stages": {}}
+    token = _request_context.set(context)
+    try:
+        yield context
+    finally:
+        _request_context.reset(token)
+
+
+def bind_log_context(**fields: Any) -> None:
+    """Add fields (e.g. user_id once authenticated) to the current request context."""
+    context = _request_context.get()
+    if context is not None:
+        context.update(fields)
+
+
+def record_stage_timing(stage: str, seconds: float) -> None:
+    context = _request_context.get()
+    if context is not None:
+        stages = context["stages"]
+        stages[stage] = round(stages.get(stage, 0.0) + seconds * 1000, 2)
+
+
+def log_request_completed(context: Dict[str, Any], method: str, status: int, seconds: float) -> None:
+    """One summary record per request with its stage timings and DB counters."""
+    stages = context.get("stages") or {}
+    extra = {name: value for name, value in context.items() if name not in _CONTEXT_FIELDS and name != "stages"}
+    _logger.info(
+        "REQUEST_COMPLETED | %s %s | status=%d | duration_ms=%.1f | stages=%s",
+        method,
+        context.get("route"),
+        status,
+        seconds * 1000,
+        ",".join(f"{stage}:{ms}" for stage, ms in stages.items()) or "-",
+        extra={**extra, "status": status, "duration_ms": round(seconds * 1000, 2), "stages": stages},
+    )
+
+
+class RequestContextFilter(logging.Filter):
+    """Copy the request context onto the record (runs in the emitting thread)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _request_context.get()
+        if context is not None:
+            for name in _CONTEXT_FIELDS:
+                if name in context and not hasattr(record, name):
+                    setattr(record, name, context[name])
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Drop a configurable fraction of INFO-and-below records."""
+
+    def __init__(self, default_rate: float, rates: Dict[str, float]):
+        super().__init__()
+        self.default_rate = default_rate
+        # Longest prefix first so "Cache hit for" can override "Cache"
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def rate_for(self, record: logging.LogRecord) -> float:
+        template = str(record.msg)
+        for prefix, rate in self.rates:
+            if template.startswith(prefix):
+                return rate
+        return self.default_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate_for(record)
+        return rate >= 1.0 or random.random() < rate
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for name, value in vars(record).items():
+            if name not in _RESERVED and not name.startswith("_"):
+                entry[name] = value
+        if getattr(record, "stages", None):
+            entry["stages_ms"] = record.stages
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks: a full queue drops the record."""
+
+    dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args and render the traceback in the caller thread (args may be
+        # mutated later, tracebacks can't cross threads) but keep extra fields.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _TRACEBACK_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _formatter(log_format: str) -> logging.Formatter:
+    if log_format == "json":
+        return JSONFormatter()
+    return logging.Formatter(TEXT_FORMAT, datefmt=TEXT_DATEFMT)
+
+
+def configure_logging() -> None:
+    """Install the queue-based pipeline on the root logger (idempotent)."""
+    global _listener, _queue_handler
+    settings = get_settings()
+    log_format = settings.log_format or ("json" if settings.env == "prod" else "text")
+
+    root = logging.getLogger()
+    shutdown_logging()
+
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.log_queue_size)
+    handler = DroppingQueueHandler(log_queue)
+    handler.addFilter(SamplingFilter(settings.log_info_sample_rate, settings.log_sample_rates))
+    handler.addFilter(RequestContextFilter())
+
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(_formatter(log_format))
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+    root.addHandler(handler)
+    root.setLevel(settings.log_level.upper())
+    _queue_handler = handler
+
+
+def shutdown_logging() -> None:
+    """Flush and stop the listener thread (registered atexit)."""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,105 @@
+"""
+In-process TTL cache of Stripe subscriptions.
+
+checkout.session.completed payloads don't carry the price, so the handler
+needs the subscription object. Instead of a blocking stripe.Subscription.retrieve
+per event, snapshots are kept here keyed by subscription id:
+
+- filled from every customer.subscription.* webhook payload (these are
+  processed before the matching checkout event, see app.core.stripe_events)
+- filled from the API on a miss (get_or_fetch), so the next delivery is free
+
+Only the fields the billing handlers use are kept (price id, status, billing
+period, customer), and price ids are validated against the cached snapshot.
+Entries expire after STRIPE_SUBSCRIPTION_CACHE_TTL_SECONDS; the oldest entry is
+evicted once STRIPE_SUBSCRIPTION_CACHE_SIZE is reached. The cache is per
+process: a cold worker pays one retrieve per subscription.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import get_settings
+from app.core.metrics import SUBSCRIPTION_CACHE
+
+
+def as_dict(obj: Any) -> Dict[str, Any]:
+    """Plain dict for a webhook payload or a StripeObject."""
+    if isinstance(obj, dict):
+        return obj
+    for method in ("to_dict", "to_dict_recursive"):  # StripeObject across SDK versions
+        if hasattr(obj, method):
+            return getattr(obj, method)()
+    return dict(obj)
+
+
+def subscription_snapshot(subscription: Any) -> Dict[str, Any]:
+    """Reduce a Stripe subscription (payload dict or SDK object) to the fields billing needs."""
+    data = as_dict(subscription)
+    items = (data.get("items") or {}).get("data") or []
+    first = as_dict(items[0]) if items else {}
+    price = as_dict(first.get("price") or {})
+    return {
+        "id": data.get("id"),
+        "customer": data.get("customer"),
+        "status": data.get("status"),
+        "price_id": price.get("id"),
+        # Newer API versions moved the billing period onto the subscription item
+        "current_period_end": data.get("current_period_end") or first.get("current_period_end"),
+        "cancel_at_period_end": data.get("cancel_at_period_end"),
+    }
+
+
+class SubscriptionCache:
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def remember(self, subscription: Any) -> Dict[str, Any]:
+        snapshot = subscription_snapshot(subscription)
+        if snapshot["id"]:
+            with self._lock:
+                self._entries.pop(snapshot["id"], None)
+                self._entries[snapshot["id"]] = (time.monotonic() + self.ttl, snapshot)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            SUBSCRIPTION_CACHE.labels(result="fill").inc()
+        return snapshot
+
+    def get(self, subscription_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(subscription_id)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[subscription_id]
+                entry = None
+        SUBSCRIPTION_CACHE.labels(result="hit" if entry else "miss").inc()
+        return entry[1] if entry else None
+
+    def get_or_fetch(self, subscription_id: str, fetch: Callable[[str], Any]) -> Dict[str, Any]:
+        """Cached snapshot, or fetch (e.g. stripe.Subscription.retrieve) and cache it."""
+        cached = self.get(subscription_id)
+        if cached is not None:
+            return cached
+        return self.remember(fetch(subscription_id))
+
+    def invalidate(self, subscription_id: str) -> None:
+        with self._lock:
+            self._entries.pop(subscription_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@lru_cache(maxsize=1)
+def get_subscription_cache() -> SubscriptionCache:
+    settings = get_settings()
+    return SubscriptionCache(settings.stripe_subscription_cache_ttl_seconds, settings.stripe_subscription_cache_size)
@@ -5,11 +5,14 @@ from decimal import Decimal
 from typing import Tuple
 
 from fastapi import HTTPException, status
-from sqlalchemy import func
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.core.ai_costs import AICostLedger
 from app.core.config import get_settings
-from app.core.utils import get_current_month_key
+from app.core.db import note_primary_write
+from app.core.utils import as_utc, get_current_month_key, get_month_bounds
 from app.models.usage_event import UsageEvent
 from app.models.user import User
 
@@ -19,7 +22,7 @@ logger = logging.getLogger(__name__)
 _ai_activation_logged = False
 
 
-def _log_ai_activation_if_first(db: Session, subscriber_count: int) -> None:
+def _log_ai_activation_if_first(subscriber_count: int) -> None:
     """
     Log when AI activates for the FIRST TIME (first paying subscriber).
     This is a critical business event: we can now start using OpenAI.
@@ -47,34 +50,69 @@ class BudgetStatus:
 
 
 def _current_month_window() -> Tuple[datetime, datetime]:
-    """Return UTC month start and now for spend calculations."""
-    now = datetime.now(timezone.utc)
-    start = datetime(year=now.year, month=now.month, day=1, tzinfo=timezone.utc)
-    return start, now
+    """
+    Return the UTC [start, end) range of the current month.
 
+    Every usage_events aggregate filters on created_at with these bounds so that
+    Postgres prunes down to the current monthly partition.
+    """
+    return get_month_bounds(get_current_month_key())
 
-def get_active_subscriber_counts(db: Session) -> Tuple[int, int, int]:
-    """Count active paid subscribers by plan (starter/pro/team)."""
-    starter_count = db.query(func.count(User.id)).filter(User.plan == "starter").scalar() or 0
-    pro_count = db.query(func.count(User.id)).filter(User.plan == "pro").scalar() or 0
-    team_count = db.query(func.count(User.id)).filter(User.plan == "team").scalar() or 0
-    return int(starter_count), int(pro_count), int(team_count)
 
+def _month_usage_filters(user: User, month_key: str) -> list:
+    """Filters for a user's profile analyses in one month (partition-prunable)."""
+    start, end = get_month_bounds(month_key)
+    return [
+        UsageEvent.user_id == user.id,
+        UsageEvent.month_key == month_key,
+        UsageEvent.event_type == "profile_analysis",
+        UsageEvent.created_at >= start,
+        UsageEvent.created_at < end,
+    ]
 
-def get_monthly_ai_spend(db: Session) -> float:
-    """Calculate accumulated AI spend for the current month."""
-    start, now = _current_month_window()
-    total = (
-        db.query(func.coalesce(func.sum(UsageEvent.cost_usd), 0))
-        .filter(UsageEvent.created_at >= start, UsageEvent.created_at <= now)
-        .scalar()
+
+def _subscriber_count_query(plan: str):
+    return select(func.count(User.id)).where(User.plan == plan)
+
+
+def _monthly_spend_query():
+    start, end = _current_month_window()
+    return select(func.coalesce(func.sum(UsageEvent.cost_usd), 0)).where(
+        UsageEvent.created_at >= start, UsageEvent.created_at < end
     )
+
+
+def _as_spend(total) -> float:
     try:
         return float(total or 0)
     except Exception:
         return 0.0
 
 
+def get_active_subscriber_counts(db: Session) -> Tuple[int, int, int]:
+    """Count active paid subscribers by plan (starter/pro/team)."""
+    starter_count, pro_count, team_count = (
+        db.execute(_subscriber_count_query(plan)).scalar() or 0 for plan in ("starter", "pro", "team")
+    )
+    return int(starter_count), int(pro_count), int(team_count)
+
+
+async def get_active_subscriber_counts_async(db: AsyncSession) -> Tuple[int, int, int]:
+    """Async version of get_active_subscriber_counts."""
+    counts = [(await db.execute(_subscriber_count_query(plan))).scalar() or 0 for plan in ("starter", "pro", "team")]
+    return int(counts[0]), int(counts[1]), int(counts[2])
+
+
+def get_monthly_ai_spend(db: Session) -> float:
+    """Calculate accumulated AI spend for the current month."""
+    return _as_spend(db.execute(_monthly_spend_query()).scalar())
+
+
+async def get_monthly_ai_spend_async(db: AsyncSession) -> float:
+    """Async version of get_monthly_ai_spend."""
+    return _as_spend((await db.execute(_monthly_spend_query())).scalar())
+
+
 def evaluate_budget_status(db: Session) -> BudgetStatus:
     """
     Compute global budget availability based on active subscribers and spend.
@@ -91,10 +129,23 @@ def evaluate_budget_status(db: Session) -> BudgetStatus:
                                (active_pro_users * revenue_per_pro_user) +
                                (active_team_users * revenue_per_team_user)
     """
-    settings = get_settings()
-    
+    disabled = _openai_disabled_status()
+    if disabled is not None:
+        return disabled
+    return _budget_status(get_active_subscriber_counts(db), get_monthly_ai_spend(db))
+
+
+async def evaluate_budget_status_async(db: AsyncSession) -> BudgetStatus:
+    """Async version of evaluate_budget_status."""
+    disabled = _openai_disabled_status()
+    if disabled is not None:
+        return disabled
+    return _budget_status(await get_active_subscriber_counts_async(db), await get_monthly_ai_spend_async(db))
+
+
+def _openai_disabled_status() -> BudgetStatus | None:
     # CRITICAL: Check if OpenAI is globally enabled first
-    if not settings.openai_enabled:
+    if not get_settings().openai_enabled:
         logger.info("AI_DISABLED: OPENAI_ENABLED=false - OpenAI calls blocked globally")
         return BudgetStatus(
             budget=0.0,
@@ -104,20 +155,23 @@ def evaluate_budget_status(db: Session) -> BudgetStatus:
             allowed=False,
             reason="openai_disabled",
         )
-    
-    active_starter, active_pro, active_business = get_active_subscriber_counts(db)
-    total_subscribers = active_starter + active_pro + active_business
+    return None
+
+
+def _budget_status(counts: Tuple[int, int, int], spend: float) -> BudgetStatus:
+    settings = get_settings()
+    active_starter, active_pro, active_team = counts
+    total_subscribers = active_starter + active_pro + active_team
     
     budget = (
         (active_starter * settings.revenue_per_starter_user) +
         (active_pro * settings.revenue_per_pro_user) +
-        (active_business * settings.revenue_per_business_user)
+        (active_team * settings.revenue_per_team_user)
     )
-    spend = get_monthly_ai_spend(db)
 
     # Check for first activation (0 -> 1+ subscribers)
     if total_subscribers > 0:
-        _log_ai_activation_if_first(db, total_subscribers)
+        _log_ai_activation_if_first(total_subscribers)
 
     if total_subscribers == 0:
         logger.info(
@@ -127,7 +181,7 @@ def evaluate_budget_status(db: Session) -> BudgetStatus:
             budget=budget,
             spend=spend,
             active_pro_users=active_pro,
-            active_team_users=0,
+            active_team_users=active_team,
             allowed=False,
             reason="no_subscribers",
         )
@@ -137,7 +191,7 @@ def evaluate_budget_status(db: Session) -> BudgetStatus:
             budget=budget,
             spend=spend,
             active_pro_users=active_pro,
-            active_team_users=0,
+            active_team_users=active_team,
             allowed=False,
             reason="no_budget",
         )
@@ -147,7 +201,7 @@ def evaluate_budget_status(db: Session) -> BudgetStatus:
             budget=budget,
             spend=spend,
             active_pro_users=active_pro,
-            active_team_users=0,
+            active_team_users=active_team,
             allowed=False,
             reason="exhausted",
         )
@@ -156,7 +210,7 @@ def evaluate_budget_status(db: Session) -> BudgetStatus:
         budget=budget,
         spend=spend,
         active_pro_users=active_pro,
-        active_team_users=0,
+        active_team_users=active_team,
         allowed=True,
     )
 
@@ -169,6 +223,70 @@ def check_usage_limit(user: User, db: Session) -> None:
     Free plan should be handled by the caller (preview mode) and must not
     reach this function.
     """
+    check_plan_limit(user, db)
+
+    # Pre-mark last_analysis_at to enforce rate-limit even if AI fails (PRO/TEAM)
+    user.last_analysis_at = datetime.now(timezone.utc)
+    db.add(user)
+    db.commit()
+
+
+def check_plan_limit(user: User, db: Session) -> None:
+    """
+    check_usage_limit without pre-marking last_analysis_at: for requests that
+    make no OpenAI call (lead import), so they don't rate-limit the user's
+    next analysis.
+    """
+    _check_access(user)
+
+    # MONTHLY LIMITS: Use monthly_analyses_count from user model (set by Stripe webhook)
+    # Fallback to UsageEvent count if monthly_analyses_count is None (legacy users)
+    month_key = get_current_month_key()
+    if user.monthly_analyses_count is not None:
+        usage_count = user.monthly_analyses_count
+    else:
+        # Legacy: count from UsageEvent table
+        usage_count = db.execute(_month_usage_count_query(user, month_key)).scalar() or 0
+
+    limit, limit_label = _plan_limit(user)
+    first_event = db.execute(_first_month_event_query(user, month_key)).scalars().first()
+    _enforce_plan_limit(user, usage_count, limit, limit_label, first_event)
+
+
+async def check_usage_limit_async(user: User, db: AsyncSession) -> None:
+    """Async version of check_usage_limit (`user` must belong to `db`)."""
+    _check_access(user)
+
+    month_key = get_current_month_key()
+    if user.monthly_analyses_count is not None:
+        usage_count = user.monthly_analyses_count
+    else:
+        usage_count = (await db.execute(_month_usage_count_query(user, month_key))).scalar() or 0
+
+    limit, limit_label = _plan_limit(user)
+    first_event = (await db.execute(_first_month_event_query(user, month_key))).scalars().first()
+    _enforce_plan_limit(user, usage_count, limit, limit_label, first_event)
+
+    user.last_analysis_at = datetime.now(timezone.utc)
+    db.add(user)
+    await db.commit()
+
+
+def _month_usage_count_query(user: User, month_key: str):
+    return select(func.count(UsageEvent.id)).where(*_month_usage_filters(user, month_key))
+
+
+def _first_month_event_query(user: User, month_key: str):
+    return (
+        select(UsageEvent)
+        .where(*_month_usage_filters(user, month_key))
+        .order_by(UsageEvent.created_at.asc())
+        .limit(1)
+    )
+
+
+def _check_access(user: User) -> None:
+    """Kill switch, free plan and rate limit checks (no DB access)."""
     settings = get_settings()
 
     if settings.disable_all_analyses:
@@ -190,7 +308,7 @@ def check_usage_limit(user: User, db: Session) -> None:
 
     # RATE LIMIT: 1 analysis every 30 seconds
     if user.last_analysis_at:
-        time_since_last = datetime.now(timezone.utc) - user.last_analysis_at
+        time_since_last = datetime.now(timezone.utc) - as_utc(user.last_analysis_at)
         if time_since_last.total_seconds() < settings.rate_limit_seconds:
             seconds_remaining = settings.rate_limit_seconds - int(time_since_last.total_seconds())
             logger.warning(
@@ -204,54 +322,31 @@ def check_usage_limit(user: User, db: Session) -> None:
                 detail=f"Rate limit: Please wait {seconds_remaining} seconds before next analysis.",
             )
 
-    # MONTHLY LIMITS: Use monthly_analyses_count from user model (set by Stripe webhook)
-    # Fallback to UsageEvent count if monthly_analyses_count is None (legacy users)
-    if user.monthly_analyses_count is not None:
-        usage_count = user.monthly_analyses_count
-    else:
-        # Legacy: count from UsageEvent table
-        month_key = get_current_month_key()
-        usage_query = db.query(func.count(UsageEvent.id)).filter(
-            UsageEvent.user_id == user.id,
-            UsageEvent.month_key == month_key,
-            UsageEvent.event_type == "profile_analysis",
-        )
-        usage_count = usage_query.scalar() or 0
 
-    # Get limit based on plan
+def _plan_limit(user: User) -> Tuple[int, str]:
+    """(monthly limit, log label) for a paid plan; 402 for anything else."""
+    settings = get_settings()
     if user.plan == "starter":
-        limit = settings.usage_limit_starter
-        limit_label = "STARTER"
-    elif user.plan == "pro":
-        limit = settings.usage_limit_pro
-        limit_label = "PRO"
-    elif user.plan == "team":
-        limit = settings.usage_limit_team
-        limit_label = "TEAM"
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_402_PAYMENT_REQUIRED,
-            detail="See example lead analysis. Upgrade to unlock real checks.",
-        )
+        return settings.usage_limit_starter, "STARTER"
+    if user.plan == "pro":
+        return settings.usage_limit_pro, "PRO"
+    if user.plan == "team":
+        return settings.usage_limit_team, "TEAM"
+    raise HTTPException(
+        status_code=status.HTTP_402_PAYMENT_REQUIRED,
+        detail="See example lead analysis. Upgrade to unlock real checks.",
+    )
+
 
+def _enforce_plan_limit(user: User, usage_count: int, limit: int, limit_label: str, first_event: UsageEvent | None) -> None:
     predicted_usage = usage_count + 1
 
     # Early abuse signal: >=80% of monthly limit consumed within 24h (observability only)
-    first_event = (
-        db.query(UsageEvent)
-        .filter(
-            UsageEvent.user_id == user.id,
-            UsageEvent.month_key == month_key,
-            UsageEvent.event_type == "profile_analysis",
-        )
-        .order_by(UsageEvent.created_at.asc())
-        .first()
-    )
     if (
         limit > 0
         and predicted_usage >= int(limit * 0.8)
         and first_event
-        and (datetime.now(timezone.utc) - first_event.created_at) <= timedelta(hours=24)
+        and (datetime.now(timezone.utc) - as_utc(first_event.created_at)) <= timedelta(hours=24)
     ):
         logger.warning(
             "Early abuse signal: user_id=%d plan=%s usage=%d/%d window<24h",
@@ -275,11 +370,6 @@ def check_usage_limit(user: User, db: Session) -> None:
             detail=f"You've reached your monthly limit ({limit} analyses/month). Your limit will reset on the 1st of next month.",
         )
 
-    # Pre-mark last_analysis_at to enforce rate-limit even if AI fails (PRO/TEAM)
-    user.last_analysis_at = datetime.now(timezone.utc)
-    db.add(user)
-    db.commit()
-
 
 def record_usage(
     user: User,
@@ -287,20 +377,54 @@ def record_usage(
     event_type: str = "profile_analysis",
     *,
     cost_usd: float | None = None,
+    ai_cost: AICostLedger | None = None,
 ) -> UsageEvent:
     """
     Record a usage event after successful analysis.
 
     - Creates UsageEvent with month_key for monthly tracking (STARTER/PRO/TEAM)
     - Updates User.last_analysis_at for rate limiting
-    - Associates cost for budget accounting
+    - Associates cost for budget accounting: an explicit cost_usd wins, then the
+      actual token cost collected in `ai_cost`, then the flat per-analysis estimate
+      (mock mode / no usage reported)
 
     CRITICAL: Only call this AFTER OpenAI API call succeeds.
     """
+    usage_event = _apply_usage(user, event_type, cost_usd, ai_cost)
+    db.add(usage_event)
+    db.commit()
+    note_primary_write(user.id)
+    db.refresh(usage_event)
+
+    return usage_event
+
+
+async def record_usage_async(
+    user: User,
+    db: AsyncSession,
+    event_type: str = "profile_analysis",
+    *,
+    cost_usd: float | None = None,
+    ai_cost: AICostLedger | None = None,
+) -> UsageEvent:
+    """Async version of record_usage (`user` must belong to `db`)."""
+    usage_event = _apply_usage(user, event_type, cost_usd, ai_cost)
+    db.add(usage_event)
+    await db.commit()
+    note_primary_write(user.id)
+    await db.refresh(usage_event)
+    return usage_event
+
+
+def _apply_usage(user: User, event_type: str, cost_usd: float | None, ai_cost: AICostLedger | None) -> UsageEvent:
+    """Build the UsageEvent and bump the user's counters (caller adds and commits)."""
     settings = get_settings()
     month_key = get_current_month_key()
 
-    resolved_cost = Decimal(str(cost_usd if cost_usd is not None else settings.ai_cost_per_analysis_usd))
+    if cost_usd is None:
+        fallback = settings.ai_cost_per_analysis_usd
+        cost_usd = ai_cost.cost_or(fallback) if ai_cost is not None else fallback
+    resolved_cost = Decimal(str(cost_usd))
 
     usage_event = UsageEvent(
         user_id=user.id,
@@ -308,7 +432,19 @@ def record_usage(
         month_key=month_key,
         cost_usd=resolved_cost,
     )
-    db.add(usage_event)
+    if ai_cost is not None and ai_cost.calls:
+        usage_event.model = ai_cost.model
+        usage_event.prompt_tokens = ai_cost.total.prompt_tokens
+        usage_event.completion_tokens = ai_cost.total.completion_tokens
+        usage_event.cached_tokens = ai_cost.total.cached_tokens
+        logger.info(
+            "AI_COST | user_id=%d | model=%s | calls=%d | cost_usd=%.6f | %s",
+            user.id,
+            ai_cost.model,
+            ai_cost.calls,
+            ai_cost.total.cost_usd,
+            ai_cost.summary(),
+        )
 
     if user.plan == "free":
         user.lifetime_analyses_count += 1
@@ -319,10 +455,6 @@ def record_usage(
         user.monthly_analyses_count += 1
 
     user.last_analysis_at = datetime.now(timezone.utc)
-
-    db.commit()
-    db.refresh(usage_event)
-
     return usage_event
 
 
@@ -333,6 +465,20 @@ def get_usage_stats(user: User, db: Session) -> dict:
     - FREE: Returns lifetime usage (no reset)
     - STARTER/PRO/BUSINESS: Returns monthly usage (YYYY-MM)
     """
+    if user.plan == "free" or user.monthly_analyses_count is not None:
+        return _usage_stats(user, user.monthly_analyses_count)
+    # Legacy: count from UsageEvent table
+    return _usage_stats(user, db.execute(_month_usage_count_query(user, get_current_month_key())).scalar())
+
+
+async def get_usage_stats_async(user: User, db: AsyncSession) -> dict:
+    """Async version of get_usage_stats."""
+    if user.plan == "free" or user.monthly_analyses_count is not None:
+        return _usage_stats(user, user.monthly_analyses_count)
+    return _usage_stats(user, (await db.execute(_month_usage_count_query(user, get_current_month_key()))).scalar())
+
+
+def _usage_stats(user: User, usage_count: int | None) -> dict:
     settings = get_settings()
     
     if user.plan == "free":
@@ -345,22 +491,8 @@ def get_usage_stats(user: User, db: Session) -> dict:
             "remaining": max(0, limit - used),
         }
     
-    # STARTER/PRO/TEAM: monthly usage (use monthly_analyses_count from user)
-    # Fallback to UsageEvent count if monthly_analyses_count is None (legacy users)
-    if user.monthly_analyses_count is not None:
-        usage_count = user.monthly_analyses_count
-    else:
-        # Legacy: count from UsageEvent table
-        month_key = get_current_month_key()
-        usage_count = (
-            db.query(func.count(UsageEvent.id))
-            .filter(
-                UsageEvent.user_id == user.id,
-                UsageEvent.month_key == month_key,
-                UsageEvent.event_type == "profile_analysis",
-            )
-            .scalar()
-        )
+    # STARTER/PRO/TEAM: monthly usage (monthly_analyses_count from user, or the
+    # UsageEvent count for legacy users where it is None)
     
     # Get limit based on plan
     if user.plan == "starter":
@@ -0,0 +1,290 @@
+"""
+Monthly partitioning and retention for the append-only usage_events table.
+
+Postgres:
+- usage_events is a native RANGE (created_at) partitioned table
+- One partition per month (usage_events_YYYY_MM) plus a default catch-all
+- Future partitions are pre-created so inserts never land in the default one
+- Expired months are exported to gzip CSV, then detached and dropped
+
+SQLite (dev) keeps a single plain table; retention exports and deletes rows.
+"""
+
+import csv
+import gzip
+import logging
+import os
+from pathlib import Path
+from typing import List
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import get_settings
+from app.core.utils import get_current_month_key, get_month_bounds, get_month_key_for_date, shift_month_key
+from app.models.usage_event import UsageEvent
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "usage_events"
+DEFAULT_PARTITION = "usage_events_default"
+# Columns present since before partitioning (copied when converting a legacy table)
+BASE_COLUMNS = ["id", "user_id", "event_type", "week_key", "month_key", "cost_usd", "created_at"]
+EXPORT_COLUMNS = BASE_COLUMNS + ["model", "prompt_tokens", "completion_tokens", "cached_tokens"]
+
+# Partition key must be part of the primary key on a partitioned table.
+_CREATE_PARENT_SQL = """
+CREATE TABLE usage_events (
+    id BIGSERIAL,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    event_type VARCHAR(50) NOT NULL,
+    week_key VARCHAR(16),
+    month_key VARCHAR(16),
+    cost_usd NUMERIC(10, 6),
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at)
+"""
+
+_PARENT_INDEXES_SQL = [
+    "CREATE INDEX IF NOT EXISTS ix_usage_events_user_id ON usage_events (user_id)",
+    "CREATE INDEX IF NOT EXISTS ix_usage_events_week_key ON usage_events (week_key)",
+    "CREATE INDEX IF NOT EXISTS ix_usage_events_month_key ON usage_events (month_key)",
+]
+
+
+def partition_name(month_key: str) -> str:
+    """Return the partition table name for a YYYY-MM month key."""
+    return f"{PARENT_TABLE}_{month_key.replace('-', '_')}"
+
+
+def partition_month_key(name: str) -> str | None:
+    """Inverse of partition_name; returns None for the default/unknown partitions."""
+    suffix = name[len(PARENT_TABLE) + 1:] if name.startswith(f"{PARENT_TABLE}_") else ""
+    parts = suffix.split("_")
+    if len(parts) != 2 or not all(part.isdigit() for part in parts):
+        return None
+    return f"{parts[0]}-{parts[1]}"
+
+
+def partition_ddl(month_key: str) -> str:
+    """Return the CREATE statement for one monthly partition."""
+    start, end = get_month_bounds(month_key)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month_key)} PARTITION OF {PARENT_TABLE} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+def supports_partitioning(engine: Engine) -> bool:
+    """Native partitioning is only used on Postgres."""
+    return engine.dialect.name == "postgresql"
+
+
+def _relkind(conn: Connection, table: str) -> str | None:
+    return conn.execute(
+        text("SELECT c.relkind FROM pg_class c WHERE c.oid = to_regclass(:name)"),
+        {"name": table},
+    ).scalar()
+
+
+def list_partitions(conn: Connection) -> List[str]:
+    """Return the names of all attached usage_events partitions (Postgres)."""
+    rows = conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :parent ORDER BY c.relname"
+        ),
+        {"parent": PARENT_TABLE},
+    )
+    return [row[0] for row in rows]
+
+
+def _create_partitioned_parent(conn: Connection) -> None:
+    conn.exec_driver_sql(_CREATE_PARENT_SQL)
+    for statement in _PARENT_INDEXES_SQL:
+        conn.exec_driver_sql(statement)
+    conn.exec_driver_sql(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT")
+
+
+def _convert_plain_table(conn: Connection) -> int:
+    """Move a legacy plain usage_events table under a partitioned parent. Returns rows copied."""
+    logger.warning("USAGE_PARTITIONS | converting plain usage_events table to monthly partitions")
+    conn.exec_driver_sql("ALTER TABLE usage_events RENAME TO usage_events_legacy")
+    conn.exec_driver_sql("ALTER TABLE usage_events_legacy RENAME CONSTRAINT usage_events_pkey TO usage_events_legacy_pkey")
+    conn.exec_driver_sql("ALTER SEQUENCE IF EXISTS usage_events_id_seq RENAME TO usage_events_legacy_id_seq")
+    for index in ("ix_usage_events_id", "ix_usage_events_user_id", "ix_usage_events_week_key", "ix_usage_events_month_key"):
+        conn.exec_driver_sql(f"ALTER INDEX IF EXISTS {index} RENAME TO {index}_legacy")
+    conn.exec_driver_sql("UPDATE usage_events_legacy SET created_at = now() WHERE created_at IS NULL")
+
+    _create_partitioned_parent(conn)
+
+    oldest = conn.execute(text("SELECT MIN(created_at) FROM usage_events_legacy")).scalar()
+    if oldest is not None:
+        month_key = get_month_key_for_date(oldest)
+        current = get_current_month_key()
+        while month_key <= current:
+            conn.exec_driver_sql(partition_ddl(month_key))
+            month_key = shift_month_key(month_key, 1)
+
+    copied = conn.execute(
+        text(
+            f"INSERT INTO usage_events ({', '.join(BASE_COLUMNS)}) "
+            f"SELECT {', '.join(BASE_COLUMNS)} FROM usage_events_legacy"
+        )
+    ).rowcount
+    conn.exec_driver_sql(
+        "SELECT setval(pg_get_serial_sequence('usage_events', 'id'), "
+        "COALESCE((SELECT MAX(id) FROM usage_events), 0) + 1, false)"
+    )
+    conn.exec_driver_sql("DROP TABLE usage_events_legacy")
+    logger.warning("USAGE_PARTITIONS | conversion complete | rows=%d", copied)
+    return copied
+
+
+def ensure_usage_event_partitions(engine: Engine, months_ahead: int | None = None) -> List[str]:
+    """
+    Pre-create the current and next `months_ahead` monthly partitions.
+
+    Also (re)creates the parent indexes, so tables partitioned before an index
+    was added pick it up. Cheap and idempotent (IF NOT EXISTS); safe to run on
+    every deploy.
+    Returns the partition names that were ensured. No-op outside Postgres.
+    """
+    if not supports_partitioning(engine):
+        return []
+    if months_ahead is None:
+        months_ahead = get_settings().usage_events_partitions_ahead
+
+    current = get_current_month_key()
+    ensured = []
+    with engine.begin() as conn:
+        for statement in _PARENT_INDEXES_SQL:
+            conn.exec_driver_sql(statement)
+        for offset in range(0, max(0, months_ahead) + 1):
+            month_key = shift_month_key(current, offset)
+            conn.exec_driver_sql(partition_ddl(month_key))
+            ensured.append(partition_name(month_key))
+    logger.info("USAGE_PARTITIONS | ensured=%s", ",".join(ensured))
+    return ensured
+
+
+def prepare_usage_events_table(engine: Engine) -> None:
+    """
+    Create usage_events in the right shape for the current database.
+
+    - SQLite/other: plain table from the ORM model
+    - Postgres: partitioned parent (converting a legacy plain table if present)
+      plus current and future monthly partitions
+    """
+    if not supports_partitioning(engine):
+        UsageEvent.__table__.create(bind=engine, checkfirst=True)
+        return
+
+    with engine.begin() as conn:
+        kind = _relkind(conn, PARENT_TABLE)
+        if kind is None:
+            _create_partitioned_parent(conn)
+            logger.info("USAGE_PARTITIONS | created partitioned usage_events table")
+        elif kind == "r":
+            _convert_plain_table(conn)
+    ensure_usage_event_partitions(engine)
+
+
+def _export_rows(conn: Connection, month_key: str, destination: Path, source_table: str | None = None) -> int:
+    """Stream one month of usage_events into a gzip CSV file. Returns row count."""
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = destination.with_suffix(destination.suffix + ".tmp")
+
+    if source_table:
+        query = text(f"SELECT {', '.join(EXPORT_COLUMNS)} FROM {source_table} ORDER BY id")
+    else:
+        start, end = get_month_bounds(month_key)
+        table = UsageEvent.__table__
+        query = (
+            select(*[table.c[name] for name in EXPORT_COLUMNS])
+            .where(table.c.created_at >= start, table.c.created_at < end)
+            .order_by(table.c.id)
+        )
+
+    count = 0
+    result = conn.execution_options(stream_results=True, yield_per=1000).execute(query)
+    with gzip.open(tmp_path, "wt", encoding="utf-8", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(EXPORT_COLUMNS)
+        for row in result:
+            writer.writerow(["" if value is None else value for value in row])
+            count += 1
+    os.replace(tmp_path, destination)
+    return count
+
+
+def archive_expired_usage_events(
+    engine: Engine,
+    retention_months: int | None = None,
+    archive_dir: str | None = None,
+) -> List[dict]:
+    """
+    Export months older than the retention window to gzip CSV and remove them.
+
+    retention_months=N keeps the current month plus the N previous months online.
+    A value of 0 disables archival. Each archived month is exported before it is
+    dropped (Postgres: DETACH + DROP partition, SQLite: DELETE rows).
+    """
+    settings = get_settings()
+    if retention_months is None:
+        retention_months = settings.usage_events_retention_months
+    if archive_dir is None:
+        archive_dir = settings.usage_events_archive_dir
+    if retention_months <= 0:
+        logger.info("USAGE_RETENTION | disabled (retention_months=0)")
+        return []
+
+    cutoff_key = shift_month_key(get_current_month_key(), -retention_months)
+    archived: List[dict] = []
+
+    if supports_partitioning(engine):
+        with engine.connect() as conn:
+            expired = [
+                (name, partition_month_key(name))
+                for name in list_partitions(conn)
+                if partition_month_key(name) and partition_month_key(name) < cutoff_key
+            ]
+        for name, month_key in expired:
+            destination = Path(archive_dir) / f"{name}.csv.gz"
+            with engine.begin() as conn:
+                rows = _export_rows(conn, month_key, destination, source_table=name)
+                conn.exec_driver_sql(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}")
+                conn.exec_driver_sql(f"DROP TABLE {name}")
+            archived.append({"month_key": month_key, "rows": rows, "path": str(destination)})
+    else:
+        table = UsageEvent.__table__
+        cutoff_start, _ = get_month_bounds(cutoff_key)
+        with engine.connect() as conn:
+            oldest = conn.execute(
+                select(func.min(table.c.created_at)).where(table.c.created_at < cutoff_start)
+            ).scalar()
+        month_key = get_month_key_for_date(oldest) if oldest is not None else cutoff_key
+        while month_key < cutoff_key:
+            start, end = get_month_bounds(month_key)
+            destination = Path(archive_dir) / f"{partition_name(month_key)}.csv.gz"
+            with engine.begin() as conn:
+                rows = _export_rows(conn, month_key, destination)
+                if rows:
+                    conn.execute(delete(table).where(table.c.created_at >= start, table.c.created_at < end))
+            if rows:
+                archived.append({"month_key": month_key, "rows": rows, "path": str(destination)})
+            else:
+                destination.unlink(missing_ok=True)
+            month_key = shift_month_key(month_key, 1)
+
+    for item in archived:
+        logger.info(
+            "USAGE_RETENTION | archived month=%s | rows=%d | path=%s",
+            item["month_key"],
+            item["rows"],
+            item["path"],
+        )
+    return archived
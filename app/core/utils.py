@@ -1,4 +1,5 @@
 from datetime import datetime, timezone
+from typing import Tuple
 
 
 def get_current_week_key() -> str:
@@ -14,6 +15,11 @@ def get_week_key_for_date(dt: datetime) -> str:
     return f"{iso_calendar[0]}-W{iso_calendar[1]:02d}"
 
 
+def as_utc(dt: datetime) -> datetime:
+    """Treat naive datetimes (SQLite drops tzinfo) as UTC."""
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+
+
 def get_current_month_key() -> str:
     """Get current month key in format YYYY-MM."""
     now = datetime.now(timezone.utc)
@@ -23,3 +29,19 @@ def get_current_month_key() -> str:
 def get_month_key_for_date(dt: datetime) -> str:
     """Get month key for a specific datetime."""
     return f"{dt.year}-{dt.month:02d}"
+
+
+def shift_month_key(month_key: str, months: int) -> str:
+    """Return the month key `months` months after (or before, if negative) `month_key`."""
+    year, month = (int(part) for part in month_key.split("-"))
+    index = year * 12 + (month - 1) + months
+    return f"{index // 12}-{index % 12 + 1:02d}"
+
+
+def get_month_bounds(month_key: str) -> Tuple[datetime, datetime]:
+    """Return the UTC [start, end) range covered by a YYYY-MM month key."""
+    year, month = (int(part) for part in month_key.split("-"))
+    next_year, next_month = (int(part) for part in shift_month_key(month_key, 1).split("-"))
+    start = datetime(year, month, 1, tzinfo=timezone.utc)
+    end = datetime(next_year, next_month, 1, tzinfo=timezone.utc)
+    return start, end
@@ -0,0 +1,164 @@
+"""
+Startup warmup so the first request after a deploy / Render wake-up costs the
+same as a steady-state one.
+
+Runs from the FastAPI lifespan hook (see app.main) and pre-pays:
+- settings construction
+- prompt file reads (load_prompt cache)
+- OpenAI client construction (only when OPENAI_ENABLED=true)
+- N pooled DB connections
+- optionally a synthetic cache lookup + response validation (ORM/pydantic warm)
+
+Readiness is tracked here and served by GET /health/ready; GET /health stays
+an unconditional liveness probe.
+"""
+
+import logging
+import time
+from typing import Any, Callable, Dict
+
+from sqlalchemy import text
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_readiness: Dict[str, Any] = {
+    "ready": False,
+    "steps": {},
+    "error": None,
+}
+
+SYNTHETIC_PROFILE = {
+    "profile_url": "https://www.linkedin.com/in/warmup-synthetic",
+    "name": "Warmup Probe",
+    "headline": "VP Engineering",
+    "experience": [{"title": "VP Engineering"}],
+}
+
+SYNTHETIC_RESPONSE = {
+    "qualification": {
+        "overall_score": 70.0,
+        "dimension_scores": {
+            "seniority_match": 70.0,
+            "industry_match": 70.0,
+            "company_size_match": 70.0,
+            "skills_match": 70.0,
+            "experience_match": 70.0,
+            "engagement_level": 70.0,
+        },
+        "positive_signals": ["warmup"],
+        "negative_signals": [],
+        "data_quality": 70.0,
+        "confidence": 70.0,
+    },
+    "ui": {
+        "should_contact": True,
+        "priority": "medium",
+        "score": 70.0,
+        "reasoning": "warmup",
+        "key_points": ["warmup"],
+        "suggested_approach": "warmup",
+        "red_flags": [],
+        "next_steps": "warmup",
+    },
+    "plan": "pro",
+}
+
+
+def get_readiness() -> Dict[str, Any]:
+    """Return a copy of the current readiness state."""
+    return {**_readiness, "steps": dict(_readiness["steps"])}
+
+
+def mark_not_ready(reason: str | None = None) -> None:
+    """Flip readiness off (e.g. during shutdown)."""
+    _readiness["ready"] = False
+    _readiness["error"] = reason
+
+
+def _warm_prompts() -> None:
+    from app.core.prompts import get_decision_writer_prompt, get_fit_scorer_prompt, get_system_prompt
+
+    get_system_prompt()
+    get_fit_scorer_prompt()
+    get_decision_writer_prompt()
+
+
+def _warm_ai_client() -> None:
+    if not get_settings().openai_enabled:
+        return
+    from app.services.ai_service import get_ai_service
+
+    get_ai_service()
+
+
+def _warm_db_pool(connections: int) -> None:
+    from app.core.db import get_engine
+
+    engine = get_engine()
+    opened = []
+    try:
+        for _ in range(max(0, connections)):
+            conn = engine.connect()
+            conn.execute(text("SELECT 1"))
+            opened.append(conn)
+    finally:
+        # Closing returns each connection to the pool, where the next request picks it up
+        for conn in opened:
+            conn.close()
+
+
+def _warm_synthetic_analysis() -> None:
+    from app.core.analysis_cache import build_profile_hash, get_cached_analysis
+    from app.core.db import get_session_factory
+    from app.schemas.analyze import AnalyzeLinkedInResponse
+
+    db = get_session_factory()()
+    try:
+        get_cached_analysis(db, build_profile_hash(SYNTHETIC_PROFILE), "linkedin")
+    finally:
+        db.close()
+
+    # Build the response model once so pydantic validators are compiled
+    AnalyzeLinkedInResponse.model_validate(SYNTHETIC_RESPONSE)
+
+
+def run_warmup() -> Dict[str, Any]:
+    """
+    Execute all warmup steps and update readiness.
+
+    A failing step is logged and recorded but does not abort the others; the
+    instance is reported ready only if every step succeeded.
+    """
+    settings = get_settings()
+    steps: list[tuple[str, Callable[[], None]]] = [
+        ("settings", get_settings),
+        ("prompts", _warm_prompts),
+        ("ai_client", _warm_ai_client),
+        ("db_pool", lambda: _warm_db_pool(settings.warmup_db_connections)),
+    ]
+    if settings.warmup_synthetic_analysis:
+        steps.append(("synthetic_analysis", _warm_synthetic_analysis))
+
+    started = time.perf_counter()
+    errors = []
+    for name, step in steps:
+        step_started = time.perf_counter()
+        try:
+            step()
+            _readiness["steps"][name] = {"ok": True, "ms": round((time.perf_counter() - step_started) * 1000, 1)}
+        except Exception as e:
+            logger.warning("WARMUP_STEP_FAILED | step=%s | error=%s", name, str(e))
+            _readiness["steps"][name] = {"ok": False, "error": str(e)}
+            errors.append(name)
+
+    _readiness["ready"] = not errors
+    _readiness["error"] = f"failed steps: {', '.join(errors)}" if errors else None
+    logger.info(
+        "WARMUP_COMPLETE | ready=%s | total_ms=%.1f | steps=%s",
+        _readiness["ready"],
+        (time.perf_counter() - started) * 1000,
+        ",".join(f"{name}:{info.get('ms', 'err')}" for name, info in _readiness["steps"].items()),
+    )
+    return get_readiness()
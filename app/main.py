@@ -1,31 +1,41 @@
 import logging
+import time
+from contextlib import asynccontextmanager
 from uuid import uuid4
 
+from anyio import to_thread
 from fastapi import FastAPI
 from starlette.requests import Request
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.api.routes.admin import router as admin_router
 from app.api.routes.analyze import router as analyze_router
 from app.api.routes.auth import router as auth_router
+from app.api.routes.billing import get_stripe_service
 from app.api.routes.billing import router as billing_router
 from app.api.routes.events import router as events_router
 from app.api.routes.feedback import router as feedback_router
 from app.api.routes.health import router as health_router
+from app.api.routes.metrics import router as metrics_router
 from app.api.routes.user import router as user_router
 from app.core.config import get_settings
-from app.core.db import Base, get_engine
-
-# Configure basic logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+from app.core.db import dispose_async_engine, dispose_replica_engine, get_engine
+from app.core.event_buffer import shutdown_event_buffer
+from app.core.metrics import HTTP_REQUEST_SECONDS
+from app.core.migrations import ensure_schema_current
+from app.core.profiling import PROFILE_HEADER, finish_profile, should_profile, start_profile
+from app.core.query_stats import finish_request, track_queries
+from app.core.stripe_events import start_stripe_event_worker, stop_stripe_event_worker
+from app.core.structured_logging import configure_logging, log_request_completed, request_log_context
+from app.core.warmup import mark_not_ready, run_warmup
+
 logger = logging.getLogger(__name__)
 
 
 def create_app() -> FastAPI:
+    startup_started = time.perf_counter()
     settings = get_settings()
+    configure_logging()
     logger.info("="*60)
     logger.info("Starting LinkedIn Lead Checker API")
     logger.info("="*60)
@@ -37,13 +47,66 @@ def create_app() -> FastAPI:
     # Log optional service status
     _log_service_status(settings)
     
-    app = FastAPI(title="LinkedIn Lead Checker API", version="1.0.0")
+    app = FastAPI(title="LinkedIn Lead Checker API", version="1.0.0", lifespan=_lifespan)
+
+    if settings.profiling_enabled:
+        # Registered first so it runs inside request_id_middleware and sees request.state.request_id
+        @app.middleware("http")
+        async def profiling_middleware(request: Request, call_next):
+            trigger = should_profile(request.headers.get(PROFILE_HEADER))
+            sampler = start_profile() if trigger else None
+            if sampler is None:
+                return await call_next(request)
+            started = time.perf_counter()
+            status_code = 500
+            try:
+                response = await call_next(request)
+                status_code = response.status_code
+                response.headers["X-Profiled"] = trigger
+                return response
+            finally:
+                await to_thread.run_sync(
+                    finish_profile,
+                    sampler,
+                    request.state.request_id,
+                    {
+                        "method": request.method,
+                        "path": request.url.path,
+                        "status": status_code,
+                        "trigger": trigger,
+                        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                    },
+                )
+
+    @app.middleware("http")
+    async def request_metrics_middleware(request: Request, call_next):
+        started = time.perf_counter()
+        with track_queries() as query_stats:
+            response = await call_next(request)
+        # Route template (e.g. /analyze/linkedin) keeps label cardinality bounded
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        HTTP_REQUEST_SECONDS.labels(
+            method=request.method,
+            route=route,
+            status=str(response.status_code),
+        ).observe(time.perf_counter() - started)
+        finish_request(
+            query_stats,
+            route,
+            getattr(request.state, "request_id", "unknown"),
+            response.headers,
+        )
+        return response
 
     @app.middleware("http")
     async def request_id_middleware(request: Request, call_next):
+        # Outermost: every inner middleware and log record sees the request id
         request_id = request.headers.get("X-Request-ID") or str(uuid4())
         request.state.request_id = request_id
-        response = await call_next(request)
+        started = time.perf_counter()
+        with request_log_context(request_id=request_id, route=request.url.path) as log_context:
+            response = await call_next(request)
+            log_request_completed(log_context, request.method, response.status_code, time.perf_counter() - started)
         response.headers["X-Request-ID"] = request_id
         return response
 
@@ -57,20 +120,17 @@ def create_app() -> FastAPI:
     )
 
     app.include_router(health_router)
+    app.include_router(metrics_router)
     app.include_router(auth_router)
     app.include_router(user_router)
     app.include_router(analyze_router)
     app.include_router(billing_router)
     app.include_router(events_router)
     app.include_router(feedback_router)
+    app.include_router(admin_router)
 
-    # Ensure all models are imported before creating tables
-    from app import models as _models  # noqa: F401
-
-    # Initialize database tables
-    Base.metadata.create_all(bind=get_engine())
-    _ensure_user_columns(get_engine())
-    logger.info("Database tables initialized")
+    # Startup only checks the version; DDL runs via `python migrate.py` or, when behind, AUTO_MIGRATE
+    ensure_schema_current(get_engine(), auto_migrate=settings.auto_migrate)
     
     # Log kill switch status
     if settings.disable_all_analyses:
@@ -79,12 +139,30 @@ def create_app() -> FastAPI:
         logger.warning("KILL SWITCH ACTIVE: Free plan disabled")
     
     logger.info("="*60)
-    logger.info("Backend ready to receive traffic")
+    logger.info("Backend ready to receive traffic (startup %.3fs)", time.perf_counter() - startup_started)
     logger.info("="*60)
 
     return app
 
 
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    """Warm up and start the webhook workers before serving traffic; drain and release on shutdown."""
+    settings = get_settings()
+    if settings.warmup_enabled:
+        await to_thread.run_sync(run_warmup)
+    else:
+        logger.info("Warmup disabled (WARMUP_ENABLED=false)")
+    start_stripe_event_worker(get_stripe_service)
+    yield
+    mark_not_ready("shutting down")
+    await to_thread.run_sync(stop_stripe_event_worker)
+    await to_thread.run_sync(shutdown_event_buffer)
+    get_engine().dispose()
+    dispose_replica_engine()
+    await dispose_async_engine()
+
+
 def _validate_required_env(settings: object) -> None:
     """Validate required environment variables at startup."""
     errors = []
@@ -113,33 +191,6 @@ def _validate_required_env(settings: object) -> None:
     logger.info("✓ Required environment variables validated")
 
 
-def _ensure_user_columns(engine) -> None:
-    """Ensure critical user columns exist (for legacy DBs without migrations)."""
-    try:
-        with engine.begin() as conn:
-            conn.exec_driver_sql(
-                "ALTER TABLE users ADD COLUMN IF NOT EXISTS subscription_status VARCHAR(50)"
-            )
-            conn.exec_driver_sql(
-                "ALTER TABLE users ADD COLUMN IF NOT EXISTS monthly_analyses_count INTEGER NOT NULL DEFAULT 0"
-            )
-            conn.exec_driver_sql(
-                "ALTER TABLE users ADD COLUMN IF NOT EXISTS monthly_analyses_reset_at TIMESTAMPTZ"
-            )
-            conn.exec_driver_sql(
-                "ALTER TABLE users ADD COLUMN IF NOT EXISTS lifetime_analyses_count INTEGER NOT NULL DEFAULT 0"
-            )
-            conn.exec_driver_sql(
-                "ALTER TABLE users ADD COLUMN IF NOT EXISTS last_analysis_at TIMESTAMPTZ"
-            )
-            conn.exec_driver_sql(
-                "ALTER TABLE users ADD COLUMN IF NOT EXISTS icp_config_json JSON"
-            )
-        logger.info("✓ User columns ensured")
-    except Exception as exc:
-        logger.warning("User column check failed: %s", exc)
-
-
 def _log_service_status(settings: object) -> None:
     """Log status of optional services at startup."""
     # OpenAI status
@@ -152,6 +203,8 @@ def _log_service_status(settings: object) -> None:
         logger.info("OpenAI: MOCK MODE (no API key - preview only, zero cost)")
     else:
         logger.info("openai_enabled=true")
+    if getattr(settings, 'openai_base_url', None):
+        logger.warning("OpenAI base URL overridden: %s", settings.openai_base_url)
     
     # Stripe status
     has_stripe_key = bool(getattr(settings, 'stripe_api_key', None))
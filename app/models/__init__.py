@@ -1,6 +1,8 @@
 from app.models.analysis_cache import AnalysisCache
 from app.models.feedback import Feedback
+from app.models.stripe_event import StripeEvent
+from app.models.tracking_event import TrackingEvent
 from app.models.usage_event import UsageEvent
 from app.models.user import User
 
-__all__ = ["User", "UsageEvent", "AnalysisCache", "Feedback"]
+__all__ = ["User", "UsageEvent", "AnalysisCache", "Feedback", "TrackingEvent", "StripeEvent"]
@@ -1,7 +1,7 @@
 import json
-from datetime import datetime
+from datetime import datetime, timezone
 
-from sqlalchemy import JSON, DateTime, ForeignKey, String, func
+from sqlalchemy import JSON, DateTime, Float, ForeignKey, Index, String, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.core.db import Base
@@ -9,6 +9,8 @@ from app.core.db import Base
 
 class AnalysisCache(Base):
     __tablename__ = "analysis_cache"
+    # Keyset pagination of a user's history (GET /user/analyses), newest first
+    __table_args__ = (Index("ix_analysis_cache_user_created_id", "user_id", "created_at", "id"),)
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     profile_hash: Mapped[str] = mapped_column(String(128), nullable=False, index=True)
@@ -17,7 +19,13 @@ class AnalysisCache(Base):
     user_id: Mapped[int | None] = mapped_column(
         ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True
     )
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # Denormalized from response_json so history filters don't parse JSON per row
+    score: Mapped[float | None] = mapped_column(Float, nullable=True)
+    priority: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    # Set in Python too: microsecond precision keeps keyset cursors exact on SQLite
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=func.now()
+    )
 
     def dump_response(self) -> dict:
         """Return a shallow copy of the cached payload."""
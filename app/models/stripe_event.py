@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.db import Base
+
+
+class StripeEvent(Base):
+    # Durable webhook queue; the Stripe event id is the primary key, so a
+    # redelivered event can never be stored (or processed) twice.
+    __tablename__ = "stripe_events"
+    __table_args__ = (Index("ix_stripe_events_status_next_attempt", "status", "next_attempt_at"),)
+
+    id: Mapped[str] = mapped_column(String(255), primary_key=True)
+    type: Mapped[str] = mapped_column(String(100), nullable=False)
+    customer_id: Mapped[str | None] = mapped_column(String(255), nullable=True, index=True)
+    stripe_created: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # event.created (unix)
+    payload: Mapped[str] = mapped_column(Text, nullable=False)  # raw signed body
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending")  # pending, processing, failed, processed, skipped, dead
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    next_attempt_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    locked_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    received_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    processed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.db import Base
+
+
+class TrackingEvent(Base):
+    # Append-only; rows arrive in batches from app.core.event_buffer
+    __tablename__ = "tracking_events"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    event: Mapped[str] = mapped_column(String(50), nullable=False)
+    page: Mapped[str] = mapped_column(String(100), nullable=False)
+    referrer: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    ip_prefix: Mapped[str | None] = mapped_column(String(16), nullable=True)  # masked, never the full IP
+    user_agent: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
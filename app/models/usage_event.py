@@ -1,12 +1,14 @@
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, Numeric, String, func
+from sqlalchemy import DateTime, ForeignKey, Integer, Numeric, String, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.core.db import Base
 
 
 class UsageEvent(Base):
+    # On Postgres this table is RANGE-partitioned by created_at (one partition per
+    # month); its DDL lives in app.core.usage_partitions. SQLite uses this model as-is.
     __tablename__ = "usage_events"
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
@@ -14,5 +16,10 @@ class UsageEvent(Base):
     event_type: Mapped[str] = mapped_column(String(50), nullable=False)
     week_key: Mapped[str] = mapped_column(String(16), nullable=True, index=True)  # Deprecated: use month_key
     month_key: Mapped[str | None] = mapped_column(String(16), nullable=True, index=True)  # Format: YYYY-MM
-    cost_usd: Mapped[float | None] = mapped_column(Numeric(10, 4), nullable=True)
+    cost_usd: Mapped[float | None] = mapped_column(Numeric(10, 6), nullable=True)
+    # Actual OpenAI usage of the analysis (NULL for legacy rows and mock mode)
+    model: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    prompt_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    completion_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    cached_tokens: Mapped[int | None] = mapped_column(Integer, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
@@ -1,7 +1,7 @@
 """Schemas for AI responses - ensures type safety and validation."""
 from typing import List, Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 
 class DimensionScores(BaseModel):
@@ -22,6 +22,31 @@ class FitScoringResult(BaseModel):
     negative_signals: List[str]
     data_quality: float = Field(..., ge=0, le=100)
     confidence: float = Field(..., ge=0, le=100)
+    # Private: never parsed from OpenAI's JSON, never dumped into prompts or responses
+    _scored_locally: bool = PrivateAttr(default=False)
+
+    @property
+    def scored_locally(self) -> bool:
+        """True when app.services.prescore decided without OpenAI."""
+        return self._scored_locally
+
+    def mark_scored_locally(self) -> "FitScoringResult":
+        self._scored_locally = True
+        return self
+
+
+# Same thresholds as app/prompts/decision_writer.txt
+CONTACT_SCORE = 60
+HIGH_PRIORITY_SCORE = 80
+
+
+def score_priority(score: float) -> Literal["high", "medium", "low"]:
+    """Priority for a 0-100 fit score."""
+    if score >= HIGH_PRIORITY_SCORE:
+        return "high"
+    if score >= CONTACT_SCORE:
+        return "medium"
+    return "low"
 
 
 class DecisionResult(BaseModel):
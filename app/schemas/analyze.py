@@ -2,7 +2,7 @@ from typing import Literal, Optional
 
 from pydantic import BaseModel, Field
 from pydantic import ConfigDict
-from app.schemas.ai_responses import DecisionResult, FitScoringResult
+from app.schemas.ai_responses import DimensionScores, FitScoringResult, ICPConfig
 
 
 class AnalyzeProfileRequest(BaseModel):
@@ -58,7 +58,32 @@ class AnalyzeLinkedInResponse(BaseModel):
     """Response payload for /analyze/linkedin endpoint."""
     qualification: FitScoringResult
     ui: AnalyzeLinkedInUI
-    plan: Literal["free", "pro", "team"]
+    plan: Literal["free", "starter", "pro", "team"]
     preview: bool = False
     message: Optional[str] = None
     cache_hit: bool = False
+
+
+class BatchScoreRequest(BaseModel):
+    """Request payload for /analyze/batch-score: many profile extracts against one ICP."""
+    profiles: list[dict]
+    icp: Optional[ICPConfig] = None  # defaults to the user's saved ICP
+    top_k: int = Field(default=50, ge=1, le=1000)
+
+
+class BatchScoreRow(BaseModel):
+    index: int  # position in the request's profiles list
+    name: Optional[str] = None
+    profile_url: Optional[str] = None
+    overall_score: float
+    priority: Literal["high", "medium", "low"]
+    outcome: Literal["accept", "reject", "ambiguous"]
+    dimension_scores: DimensionScores
+
+
+class BatchScoreResponse(BaseModel):
+    """Response payload for /analyze/batch-score."""
+    total: int
+    outcomes: dict[str, int]
+    top: list[BatchScoreRow]
+    elapsed_ms: float
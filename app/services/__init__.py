@@ -1,3 +1,4 @@
 from app.services.ai_service import AIAnalysisService, get_ai_service, run_fit, run_decision
+from app.services.prescore import local_decision, prescore_fit
 
-__all__ = ["AIAnalysisService", "get_ai_service", "run_fit", "run_decision"]
+__all__ = ["AIAnalysisService", "get_ai_service", "run_fit", "run_decision", "prescore_fit", "local_decision"]
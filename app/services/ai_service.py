@@ -5,34 +5,52 @@ import os
 import time
 from typing import Dict, Optional, Union
 
-try:
-    # Lazy import; only required when not using mock mode
-    from openai import OpenAI, APIError, APIConnectionError, RateLimitError, APITimeoutError  # type: ignore
-except Exception:
-    OpenAI = None  # type: ignore
-    APIError = Exception  # type: ignore
-    APIConnectionError = Exception  # type: ignore
-    RateLimitError = Exception  # type: ignore
-    APITimeoutError = Exception  # type: ignore
-
 from app.core.prompts import (
     get_decision_writer_prompt,
     get_fit_scorer_prompt,
     get_system_prompt,
 )
-from app.schemas.ai_responses import DecisionResult, FitScoringResult, ICPConfig
+from app.schemas.ai_responses import CONTACT_SCORE, DecisionResult, FitScoringResult, ICPConfig, score_priority
+from app.core.ai_costs import record_completion_usage
 from app.core.config import get_settings
+from app.core.metrics import OPENAI_IN_FLIGHT, record_openai_retry, track_stage
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 # Hardening Configuration
-OPENAI_TIMEOUT = 30  # seconds
+OPENAI_TIMEOUT = 30  # seconds (default of OPENAI_TIMEOUT_SECONDS)
 MAX_RETRIES = 3
 BASE_RETRY_DELAY = 1  # seconds
 MAX_RETRY_DELAY = 10  # seconds
 
 
+class _SDKUnavailableError(Exception):
+    """Placeholder for OpenAI error types when the SDK is not installed (never raised)."""
+
+
+def _load_openai():
+    """
+    Import the OpenAI SDK on first use.
+
+    The SDK takes ~0.6s to import, so it stays off the cold-start path when
+    OPENAI_ENABLED=false (the Render default). Returns None if not installed.
+    """
+    try:
+        import openai  # type: ignore
+    except Exception:
+        return None
+    return openai
+
+
+def _openai_error_types() -> tuple:
+    """Return (APITimeoutError, RateLimitError, APIConnectionError, APIError) from the SDK."""
+    openai = _load_openai()
+    if openai is None:
+        return (_SDKUnavailableError,) * 4
+    return openai.APITimeoutError, openai.RateLimitError, openai.APIConnectionError, openai.APIError
+
+
 class AIAnalysisService:
     """Service for analyzing LinkedIn profiles using AI prompts."""
     
@@ -62,14 +80,20 @@ class AIAnalysisService:
         self.use_mock = self.openai_api_key is None
         self._client = None
         
-        if not self.use_mock and OpenAI is not None:
+        openai = _load_openai() if not self.use_mock else None
+        if openai is not None:
             try:
-                self._client = OpenAI(
+                self._client = openai.OpenAI(
                     api_key=self.openai_api_key,
-                    timeout=OPENAI_TIMEOUT,
+                    base_url=settings.openai_base_url or None,
+                    timeout=settings.openai_timeout_seconds,
                     max_retries=0,  # We handle retries ourselves for better control
                 )
-                logger.info("AIAnalysisService initialized with OpenAI client (timeout=%ds)", OPENAI_TIMEOUT)
+                logger.info(
+                    "AIAnalysisService initialized with OpenAI client (timeout=%ss, base_url=%s)",
+                    settings.openai_timeout_seconds,
+                    settings.openai_base_url or "default",
+                )
             except Exception as e:
                 # Don't crash on init - just log and use mock mode
                 logger.warning("Failed to initialize OpenAI client: %s - using MOCK mode", str(e))
@@ -110,11 +134,13 @@ class AIAnalysisService:
                 return self._mock_analysis(profile_data)
             
             # Step 1: Score the fit
-            fit_result = self._score_fit(profile_data, icp_config)
+            with track_stage("run_fit"):
+                fit_result = self._score_fit(profile_data, icp_config)
             logger.info("Fit scoring completed: overall_score=%.1f", fit_result.overall_score)
             
             # Step 2: Generate decision
-            decision = self._generate_decision(profile_data, fit_result)
+            with track_stage("run_decision"):
+                decision = self._generate_decision(profile_data, fit_result)
             logger.info("Decision generated: should_contact=%s, priority=%s", 
                        decision.should_contact, decision.priority)
             
@@ -194,13 +220,8 @@ class AIAnalysisService:
         """
         # If no API key, return deterministic mock decision derived from scoring
         if self.use_mock or self._client is None:
-            should_contact = fit_result.overall_score >= 60
-            if fit_result.overall_score >= 80:
-                priority = "high"
-            elif fit_result.overall_score >= 60:
-                priority = "medium"
-            else:
-                priority = "low"
+            should_contact = fit_result.overall_score >= CONTACT_SCORE
+            priority = score_priority(fit_result.overall_score)
             return DecisionResult(
                 should_contact=should_contact,
                 priority=priority,
@@ -285,6 +306,7 @@ def _run_chat_json(client: Optional[object], messages: list, model: str = "gpt-4
     - Implements retry logic with exponential backoff
     - Handles OpenAI errors gracefully
     - Raises if JSON can't be parsed
+    - Reports the completion's token usage to app.core.ai_costs
     
     Raises:
         RuntimeError: If client not initialized or all retries exhausted
@@ -293,17 +315,25 @@ def _run_chat_json(client: Optional[object], messages: list, model: str = "gpt-4
     if client is None:
         raise RuntimeError("OpenAI client not initialized. Provide OPENAI_API_KEY or pass a key.")
 
+    APITimeoutError, RateLimitError, APIConnectionError, APIError = _openai_error_types()
     last_error = None
     
     for attempt in range(1, MAX_RETRIES + 1):
         try:
-            completion = client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=max(0.0, min(temperature, 0.3)),
-                response_format={"type": "json_object"},
-            )
+            with OPENAI_IN_FLIGHT.track_inprogress():
+                completion = client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=max(0.0, min(temperature, 0.3)),
+                    response_format={"type": "json_object"},
+                )
             
+            usage = getattr(completion, "usage", None)
+            if usage is not None:
+                # The API echoes the dated model name (e.g. gpt-4o-mini-2024-07-18)
+                reported_model = getattr(completion, "model", None)
+                record_completion_usage(usage, reported_model if isinstance(reported_model, str) else model)
+
             content = completion.choices[0].message.content
             if not content:
                 raise ValueError("OpenAI returned empty response")
@@ -320,6 +350,7 @@ def _run_chat_json(client: Optional[object], messages: list, model: str = "gpt-4
             last_error = e
             logger.warning("OpenAI timeout on attempt %d/%d: %s", attempt, MAX_RETRIES, str(e))
             if attempt < MAX_RETRIES:
+                record_openai_retry(e)
                 delay = min(BASE_RETRY_DELAY * (2 ** (attempt - 1)), MAX_RETRY_DELAY)
                 logger.info("Retrying in %.1fs...", delay)
                 time.sleep(delay)
@@ -331,6 +362,7 @@ def _run_chat_json(client: Optional[object], messages: list, model: str = "gpt-4
             last_error = e
             logger.warning("OpenAI rate limit on attempt %d/%d: %s", attempt, MAX_RETRIES, str(e))
             if attempt < MAX_RETRIES:
+                record_openai_retry(e)
                 # Rate limits need longer backoff
                 delay = min(BASE_RETRY_DELAY * (2 ** attempt), MAX_RETRY_DELAY * 2)
                 logger.info("Rate limited. Retrying in %.1fs...", delay)
@@ -343,6 +375,7 @@ def _run_chat_json(client: Optional[object], messages: list, model: str = "gpt-4
             last_error = e
             logger.warning("OpenAI connection error on attempt %d/%d: %s", attempt, MAX_RETRIES, str(e))
             if attempt < MAX_RETRIES:
+                record_openai_retry(e)
                 delay = min(BASE_RETRY_DELAY * (2 ** (attempt - 1)), MAX_RETRY_DELAY)
                 logger.info("Connection failed. Retrying in %.1fs...", delay)
                 time.sleep(delay)
@@ -358,6 +391,7 @@ def _run_chat_json(client: Optional[object], messages: list, model: str = "gpt-4
                 logger.warning("OpenAI server error %d on attempt %d/%d: %s", 
                              status_code, attempt, MAX_RETRIES, str(e))
                 if attempt < MAX_RETRIES:
+                    record_openai_retry(e)
                     delay = min(BASE_RETRY_DELAY * (2 ** (attempt - 1)), MAX_RETRY_DELAY)
                     logger.info("Server error. Retrying in %.1fs...", delay)
                     time.sleep(delay)
@@ -369,6 +403,10 @@ def _run_chat_json(client: Optional[object], messages: list, model: str = "gpt-4
                 logger.error("OpenAI client error (status=%s): %s", status_code, str(e))
                 raise RuntimeError(f"OpenAI API error: {str(e)}")
         
+        except ValueError:
+            # Empty/invalid JSON content - surface as documented, don't retry
+            raise
+        
         except Exception as e:
             # Unexpected error - don't retry
             logger.error("Unexpected error calling OpenAI: %s", str(e), exc_info=True)
@@ -388,22 +426,23 @@ def run_fit(profile: Dict, icp: Optional[Union[ICPConfig, Dict]] = None, *, api_
         logger.error("AI_CALL_BLOCKED_OPENAI_DISABLED: run_fit called but OpenAI is disabled")
         raise RuntimeError("OpenAI API is disabled. Cannot perform AI analysis.")
     
-    service = get_ai_service(api_key)
-    # Ensure ICP config is the right type
-    icp_config = icp if isinstance(icp, ICPConfig) else (ICPConfig(**icp) if isinstance(icp, dict) else None)
-    if service.use_mock:
-        # In mock mode, return deterministic data
-        return service._score_fit(profile, icp_config)
-    # Build messages and call
-    system_prompt = get_system_prompt()
-    scorer_prompt = get_fit_scorer_prompt()
-    user_payload = {"profile": profile, "icp": icp_config.dict() if icp_config else None}
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": f"{scorer_prompt}\n\nINPUT JSON:\n{json.dumps(user_payload, ensure_ascii=False)}"},
-    ]
-    raw = _run_chat_json(service._client, messages, model=model)
-    return FitScoringResult(**raw)
+    with track_stage("run_fit"):
+        service = get_ai_service(api_key)
+        # Ensure ICP config is the right type
+        icp_config = icp if isinstance(icp, ICPConfig) else (ICPConfig(**icp) if isinstance(icp, dict) else None)
+        if service.use_mock:
+            # In mock mode, return deterministic data
+            return service._score_fit(profile, icp_config)
+        # Build messages and call
+        system_prompt = get_system_prompt()
+        scorer_prompt = get_fit_scorer_prompt()
+        user_payload = {"profile": profile, "icp": icp_config.dict() if icp_config else None}
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"{scorer_prompt}\n\nINPUT JSON:\n{json.dumps(user_payload, ensure_ascii=False)}"},
+        ]
+        raw = _run_chat_json(service._client, messages, model=model)
+        return FitScoringResult(**raw)
 
 
 def run_decision(qualification: Union[FitScoringResult, Dict], profile: Optional[Dict] = None, *, api_key: Optional[str] = None, model: str = "gpt-4o-mini") -> DecisionResult:
@@ -416,17 +455,18 @@ def run_decision(qualification: Union[FitScoringResult, Dict], profile: Optional
         logger.error("AI_CALL_BLOCKED_OPENAI_DISABLED: run_decision called but OpenAI is disabled")
         raise RuntimeError("OpenAI API is disabled. Cannot perform AI analysis.")
     
-    service = get_ai_service(api_key)
-    fit_result = qualification if isinstance(qualification, FitScoringResult) else FitScoringResult(**qualification)
-    if service.use_mock:
-        # In mock mode, derive decision locally
-        return service._generate_decision(profile or {}, fit_result)
-    system_prompt = get_system_prompt()
-    decision_prompt = get_decision_writer_prompt()
-    user_payload = {"qualification": fit_result.model_dump(), "profile": profile or {}}
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": f"{decision_prompt}\n\nINPUT JSON:\n{json.dumps(user_payload, ensure_ascii=False)}"},
-    ]
-    raw = _run_chat_json(service._client, messages, model=model)
-    return DecisionResult(**raw)
+    with track_stage("run_decision"):
+        service = get_ai_service(api_key)
+        fit_result = qualification if isinstance(qualification, FitScoringResult) else FitScoringResult(**qualification)
+        if service.use_mock:
+            # In mock mode, derive decision locally
+            return service._generate_decision(profile or {}, fit_result)
+        system_prompt = get_system_prompt()
+        decision_prompt = get_decision_writer_prompt()
+        user_payload = {"qualification": fit_result.model_dump(), "profile": profile or {}}
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"{decision_prompt}\n\nINPUT JSON:\n{json.dumps(user_payload, ensure_ascii=False)}"},
+        ]
+        raw = _run_chat_json(service._client, messages, model=model)
+        return DecisionResult(**raw)
@@ -0,0 +1,312 @@
+"""
+Vectorized ICP scoring of many profiles at once.
+
+`ProfileMatrix.build` normalizes every profile (app.services.prescore) and
+tokenizes it once into flat numpy arrays per field: one entry per token
+occurrence holding (row, position, token id). Position gaps between the
+parts of a field keep phrases from matching across them. Any number of ICPs
+can then be scored against the same matrix:
+
+- every ICP term (seniority keywords, industries, skills, exclude keywords)
+  is encoded as a vector of token ids, and a term hit per profile is one
+  comparison over the token array plus, for phrases, an intersection of
+  (row, position) keys
+- locations are dictionary-encoded, so the location match runs once per
+  distinct location
+- DimensionScores-style sub-scores, the weighted overall score and the
+  reject / accept / ambiguous outcome follow the same rules and weights as
+  the single-profile pre-scorer, as arrays over all profiles
+
+`BatchScores.top(k)` returns the best K rows via argpartition.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.schemas.ai_responses import ICPConfig, score_priority
+from app.services.prescore import (
+    DIMENSION_WEIGHTS,
+    NEUTRAL_SCORE,
+    REJECT_SCORE_CAP,
+    SENIORITY_LEVELS,
+    SKILLS_MATCH_COVERAGE,
+    _VICE_PRESIDENT,
+    _clean,
+    location_status,
+    normalize_profile,
+    target_seniority_levels,
+)
+
+TOKEN_RE = re.compile(r"[\w+#]+(?:\.[\w+#]+)*")
+FIELDS = ("title", "text")
+_PART_GAP = 2  # positions skipped between the parts of a field
+
+# Status codes per dimension (UNSPECIFIED = the ICP doesn't set that criterion)
+UNSPECIFIED, MATCH, PARTIAL, MISMATCH, UNKNOWN = -1, 0, 1, 2, 3
+OUTCOMES = np.array(["ambiguous", "accept", "reject"])
+_LOCATION_CODES = {"match": MATCH, "mismatch": MISMATCH, "unknown": UNKNOWN}  # prescore.location_status
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+@dataclass
+class TermField:
+    """Token occurrences of one field across all profiles."""
+
+    rows: np.ndarray
+    positions: np.ndarray
+    tokens: np.ndarray
+    stride: int  # > any position, so row * stride + position is a unique key
+
+
+class _FieldBuilder:
+    def __init__(self) -> None:
+        self.rows: List[int] = []
+        self.positions: List[int] = []
+        self.tokens: List[int] = []
+        self.max_position = 0
+
+    def add(self, row: int, parts: Iterable[str], vocab: Dict[str, int]) -> None:
+        position = 0
+        for part in parts:
+            for token in tokenize(part):
+                self.rows.append(row)
+                self.positions.append(position)
+                self.tokens.append(vocab.setdefault(token, len(vocab)))
+                position += 1
+            position += _PART_GAP
+        self.max_position = max(self.max_position, position)
+
+    def build(self) -> TermField:
+        return TermField(
+            rows=np.asarray(self.rows, dtype=np.int32),
+            positions=np.asarray(self.positions, dtype=np.int32),
+            tokens=np.asarray(self.tokens, dtype=np.int32),
+            stride=self.max_position + 1,
+        )
+
+
+@dataclass
+class ProfileMatrix:
+    """All profiles tokenized once; score with `score_matrix(matrix, icp)`."""
+
+    vocab: Dict[str, int]
+    fields: Dict[str, TermField]
+    has_text: np.ndarray
+    has_industry: np.ndarray
+    location_codes: np.ndarray
+    locations: List[str]
+    company_size: np.ndarray
+    years_experience: np.ndarray
+    labels: List[Tuple[Optional[str], Optional[str]]] = field(default_factory=list)  # (name, profile_url)
+
+    def __len__(self) -> int:
+        return int(self.has_text.shape[0])
+
+    @classmethod
+    def build(cls, profiles: Iterable[dict]) -> "ProfileMatrix":
+        vocab: Dict[str, int] = {}
+        builders = {name: _FieldBuilder() for name in FIELDS}
+        location_index: Dict[str, int] = {}
+        location_codes, has_text, has_industry, sizes, years, labels = [], [], [], [], [], []
+        for row, profile in enumerate(profiles):
+            features = normalize_profile(profile)
+            builders["title"].add(row, [_VICE_PRESIDENT.sub("vp", part) for part in (features.headline, *features.titles)], vocab)
+            builders["text"].add(row, features.text.split(" | "), vocab)
+            location_codes.append(location_index.setdefault(features.location, len(location_index)))
+            has_text.append(bool(features.text))
+            has_industry.append(bool(features.industry))
+            sizes.append(np.nan if features.company_size is None else features.company_size)
+            years.append(np.nan if features.years_experience is None else features.years_experience)
+            labels.append((profile.get("name"), profile.get("profile_url") or profile.get("url")))
+        return cls(
+            vocab=vocab,
+            fields={name: builder.build() for name, builder in builders.items()},
+            has_text=np.asarray(has_text, dtype=bool),
+            has_industry=np.asarray(has_industry, dtype=bool),
+            location_codes=np.asarray(location_codes, dtype=np.int32),
+            locations=list(location_index),
+            company_size=np.asarray(sizes, dtype=np.float64),
+            years_experience=np.asarray(years, dtype=np.float64),
+            labels=labels,
+        )
+
+    def encode(self, term: str) -> Optional[np.ndarray]:
+        """Token ids of a term, or None when some word never occurs in any profile."""
+        ids = [self.vocab.get(token) for token in tokenize(term)]
+        if not ids or any(token_id is None for token_id in ids):
+            return None
+        return np.asarray(ids, dtype=np.int32)
+
+    def term_hits(self, field_name: str, term: str) -> np.ndarray:
+        """Boolean per profile: the term (word or phrase) occurs in the field."""
+        hits = np.zeros(len(self), dtype=bool)
+        ids = self.encode(term)
+        if ids is None:
+            return hits
+        column = self.fields[field_name]
+        first = column.tokens == ids[0]
+        keys = column.rows[first].astype(np.int64) * column.stride + column.positions[first]
+        for offset, token_id in enumerate(ids[1:], start=1):
+            following = column.tokens == token_id
+            shifted = column.rows[following].astype(np.int64) * column.stride + column.positions[following] - offset
+            keys = np.intersect1d(keys, shifted, assume_unique=False)
+        hits[(keys // column.stride).astype(np.int64)] = True
+        return hits
+
+    def any_hits(self, field_name: str, terms: Sequence[str]) -> np.ndarray:
+        """(profiles x terms) hit matrix for a criterion vector."""
+        if not terms:
+            return np.zeros((len(self), 0), dtype=bool)
+        return np.column_stack([self.term_hits(field_name, term) for term in terms])
+
+
+@dataclass
+class BatchScores:
+    matrix: ProfileMatrix
+    dimensions: Dict[str, np.ndarray]
+    overall: np.ndarray
+    outcome: np.ndarray  # index into OUTCOMES
+
+    def top(self, k: int) -> List[Dict[str, Any]]:
+        """The K best-scoring profiles, highest first (ties keep input order)."""
+        n = len(self.overall)
+        k = max(0, min(k, n))
+        if k == 0:
+            return []
+        candidates = np.argpartition(-self.overall, k - 1)[:k] if k < n else np.arange(n)
+        order = candidates[np.lexsort((candidates, -self.overall[candidates]))]
+        return [self.row(int(index)) for index in order]
+
+    def row(self, index: int) -> Dict[str, Any]:
+        name, profile_url = self.matrix.labels[index] if self.matrix.labels else (None, None)
+        overall = float(self.overall[index])
+        return {
+            "index": index,
+            "name": name,
+            "profile_url": profile_url,
+            "overall_score": round(overall, 1),
+            "priority": score_priority(overall),
+            "outcome": str(OUTCOMES[self.outcome[index]]),
+            "dimension_scores": {name: round(float(values[index]), 1) for name, values in self.dimensions.items()},
+        }
+
+    def outcome_counts(self) -> Dict[str, int]:
+        counts = np.bincount(self.outcome, minlength=len(OUTCOMES))
+        return {str(label): int(count) for label, count in zip(OUTCOMES, counts)}
+
+
+def _seniority(matrix: ProfileMatrix, icp: ICPConfig) -> Tuple[np.ndarray, np.ndarray]:
+    n = len(matrix)
+    targets = target_seniority_levels(icp.target_seniority)
+    if not targets:
+        return np.full(n, NEUTRAL_SCORE), np.full(n, UNSPECIFIED)
+    by_level = np.column_stack([matrix.any_hits("title", keywords).any(axis=1) for _, keywords in SENIORITY_LEVELS])
+    detected = by_level.any(axis=1)
+    level = np.argmax(by_level, axis=1)  # first True = highest level
+    distance = np.abs(level[:, None] - np.asarray(targets)[None, :]).min(axis=1)
+    scores = np.where(distance == 0, 100.0, np.maximum(0.0, 100.0 - 35.0 * distance))
+    status = np.where(distance == 0, MATCH, MISMATCH)
+    return np.where(detected, scores, NEUTRAL_SCORE), np.where(detected, status, UNKNOWN)
+
+
+def _industry(matrix: ProfileMatrix, icp: ICPConfig) -> Tuple[np.ndarray, np.ndarray]:
+    n = len(matrix)
+    targets = _clean(icp.target_industries)
+    if not targets:
+        return np.full(n, NEUTRAL_SCORE), np.full(n, UNSPECIFIED)
+    hit = matrix.any_hits("text", targets).any(axis=1)
+    scores = np.where(hit, 100.0, np.where(matrix.has_industry, 10.0, 35.0))
+    status = np.where(hit, MATCH, np.where(matrix.has_industry, MISMATCH, UNKNOWN))
+    return scores, status
+
+
+def _skills(matrix: ProfileMatrix, icp: ICPConfig) -> Tuple[np.ndarray, np.ndarray]:
+    n = len(matrix)
+    required = _clean(icp.required_skills)
+    if not required:
+        return np.full(n, NEUTRAL_SCORE), np.full(n, UNSPECIFIED)
+    coverage = matrix.any_hits("text", required).sum(axis=1) / len(required)
+    scores = np.where(matrix.has_text, np.round(100.0 * coverage, 1), NEUTRAL_SCORE)
+    status = np.where(coverage == 0, MISMATCH, np.where(coverage >= SKILLS_MATCH_COVERAGE, MATCH, PARTIAL))
+    return scores, np.where(matrix.has_text, status, UNKNOWN)
+
+
+def _location(matrix: ProfileMatrix, icp: ICPConfig) -> np.ndarray:
+    targets = _clean(icp.target_locations)
+    if not targets:
+        return np.full(len(matrix), UNSPECIFIED)
+    per_location = np.array(
+        [_LOCATION_CODES[location_status(location, targets)] for location in matrix.locations],
+        dtype=np.int64,
+    )
+    return per_location[matrix.location_codes]
+
+
+def _range(values: np.ndarray, low: float, high: Optional[float], partial: Optional[np.ndarray] = None):
+    known = ~np.isnan(values)
+    filled = np.nan_to_num(values, nan=0.0)
+    inside = (filled >= low) & (filled <= (np.inf if high is None else high))
+    scores = np.where(inside, 100.0, 20.0 if partial is None else partial)
+    return np.where(known, scores, NEUTRAL_SCORE), np.where(known, np.where(inside, MATCH, MISMATCH), UNKNOWN)
+
+
+def _company_size(matrix: ProfileMatrix, icp: ICPConfig) -> Tuple[np.ndarray, np.ndarray]:
+    low, high = icp.company_size_min or 0, icp.company_size_max
+    if not low and high in (None, 0, 1_000_000):
+        return np.full(len(matrix), NEUTRAL_SCORE), np.full(len(matrix), UNSPECIFIED)
+    return _range(matrix.company_size, low, high)
+
+
+def _experience(matrix: ProfileMatrix, icp: ICPConfig) -> Tuple[np.ndarray, np.ndarray]:
+    minimum = icp.min_years_experience or 0
+    if not minimum:
+        return np.full(len(matrix), NEUTRAL_SCORE), np.full(len(matrix), UNSPECIFIED)
+    partial = np.round(100.0 * np.nan_to_num(matrix.years_experience) / minimum, 1)
+    return _range(matrix.years_experience, minimum, None, partial)
+
+
+def score_matrix(matrix: ProfileMatrix, icp: Optional[ICPConfig]) -> BatchScores:
+    """Score every profile in `matrix` against one ICP."""
+    icp = icp or ICPConfig()
+    n = len(matrix)
+    computed = {
+        "seniority_match": _seniority(matrix, icp),
+        "industry_match": _industry(matrix, icp),
+        "company_size_match": _company_size(matrix, icp),
+        "skills_match": _skills(matrix, icp),
+        "experience_match": _experience(matrix, icp),
+    }
+    dimensions = {name: scores.astype(np.float64) for name, (scores, _) in computed.items()}
+    dimensions["engagement_level"] = np.full(n, NEUTRAL_SCORE)
+    statuses = {name: status for name, (_, status) in computed.items()}
+
+    weights = {name: weight for name, weight in DIMENSION_WEIGHTS.items() if (statuses[name] != UNSPECIFIED).all()}
+    if weights:
+        overall = sum(dimensions[name] * weight for name, weight in weights.items()) / sum(weights.values())
+        overall = np.round(overall, 1)
+    else:
+        overall = np.full(n, NEUTRAL_SCORE)
+
+    location = _location(matrix, icp)
+    excluded = matrix.any_hits("text", _clean(icp.exclude_keywords)).any(axis=1)
+    reject = excluded | (location == MISMATCH) | (statuses["skills_match"] == MISMATCH)
+
+    specified = [status for status in (*statuses.values(), location) if (status != UNSPECIFIED).all()]
+    decisive = any((statuses[name] != UNSPECIFIED).all() for name in ("seniority_match", "industry_match", "skills_match"))
+    all_match = np.logical_and.reduce([status == MATCH for status in specified]) if specified else np.zeros(n, dtype=bool)
+    accept = ~reject & all_match & (overall >= get_settings().prescore_accept_score) if decisive else np.zeros(n, dtype=bool)
+
+    overall = np.where(reject, np.minimum(overall, REJECT_SCORE_CAP), overall)
+    outcome = np.where(reject, 2, np.where(accept, 1, 0)).astype(np.int64)
+    return BatchScores(matrix=matrix, dimensions=dimensions, overall=overall, outcome=outcome)
+
+
+def score_profiles(profiles: Iterable[dict], icp: Optional[ICPConfig]) -> BatchScores:
+    return score_matrix(ProfileMatrix.build(profiles), icp)
@@ -0,0 +1,179 @@
+"""
+Incremental parsing of uploaded lead lists (CSV or JSONL) for /analyze/import.
+
+The upload is read line by line from a temporary-file copy the route takes
+before streaming its response, each row is normalized into the extension's
+profile_extract shape and rows are handed out in chunks of `chunk_rows`, so
+memory stays bounded by the chunk size whatever the file size. Duplicates are
+dropped by canonical profile hash (build_profile_hash); only a 16-byte prefix
+of each hash seen so far is kept between chunks.
+
+Verdicts come from the uploader's own rows and ICP, so they are cached under
+`analysis_cache.local_response_type(icp)` for that user only, never in the
+shared "linkedin" cache that /analyze/linkedin serves to everyone.
+"""
+
+import codecs
+import csv
+import json
+import re
+from dataclasses import dataclass, field
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+
+from app.core.analysis_cache import build_profile_hash
+
+MAX_FIELD_CHARS = 5000
+MAX_ERRORS_REPORTED = 20
+
+# CSV header (lower-cased, spaces -> "_") -> profile_extract key
+COLUMN_ALIASES = {
+    "url": "profile_url",
+    "linkedin_url": "profile_url",
+    "linkedin": "profile_url",
+    "profile_link": "profile_url",
+    "full_name": "name",
+    "job_title": "headline",
+    "title": "headline",
+    "summary": "about",
+    "company_name": "company",
+    "current_company": "company",
+    "titles": "experience_titles",
+    "experience": "experience_titles",
+    "employees": "company_size",
+    "employee_count": "company_size",
+    "years_of_experience": "years_experience",
+}
+_LIST_FIELDS = ("experience_titles", "skills")
+_LIST_SEPARATOR = re.compile(r"\s*[;|]\s*")
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    """"csv" or "jsonl" from the upload's file name or content type, else None."""
+    name = (filename or "").lower()
+    kind = (content_type or "").lower()
+    if name.endswith((".jsonl", ".ndjson")) or "ndjson" in kind or "jsonl" in kind:
+        return "jsonl"
+    if name.endswith(".csv") or "csv" in kind:
+        return "csv"
+    return None
+
+
+def _clip(value) -> Optional[str]:
+    text = str(value).strip() if value is not None else ""
+    return text[:MAX_FIELD_CHARS] or None
+
+
+def normalize_row(raw: dict) -> dict:
+    """Map a CSV/JSONL row onto profile_extract keys; ValueError when it can't identify a profile."""
+    if not isinstance(raw, dict):
+        raise ValueError("row is not an object")
+    if isinstance(raw.get("profile_extract"), dict):
+        raw = raw["profile_extract"]
+
+    profile: Dict[str, object] = {}
+    for key, value in raw.items():
+        if key is None:
+            continue  # surplus CSV cells
+        name = str(key).strip().lower().replace(" ", "_")
+        name = COLUMN_ALIASES.get(name, name)
+        if name in _LIST_FIELDS and isinstance(value, str):
+            value = [item for item in _LIST_SEPARATOR.split(value) if item]
+        if isinstance(value, list):
+            items = [item if isinstance(item, dict) else _clip(item) for item in value[:100]]
+            value = [item for item in items if item]
+        elif isinstance(value, (dict, bool, int, float)) or value is None:
+            pass
+        else:
+            value = _clip(value)
+        if value not in (None, "", []) and name not in profile:
+            profile[name] = value
+
+    if not profile.get("profile_url") and not profile.get("headline"):
+        raise ValueError("row needs a profile_url or a headline")
+    return profile
+
+
+def iter_rows(stream: IO[bytes], fmt: str) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Yield (line number, profile or None, error or None) without reading the whole stream."""
+    text = codecs.getreader("utf-8-sig")(stream, errors="replace")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        try:
+            for raw in reader:
+                try:
+                    yield reader.line_num, normalize_row(raw), None
+                except ValueError as exc:
+                    yield reader.line_num, None, str(exc)
+        except csv.Error as exc:
+            yield reader.line_num, None, f"invalid CSV: {exc}"
+        return
+
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, normalize_row(json.loads(line)), None
+        except json.JSONDecodeError as exc:
+            yield line_number, None, f"invalid JSON: {exc.msg}"
+        except ValueError as exc:
+            yield line_number, None, str(exc)
+
+
+@dataclass
+class ImportChunk:
+    number: int
+    profiles: List[Tuple[str, dict]]  # (profile hash, profile_extract), unique across the upload
+    rows: int
+    invalid: int
+    duplicates: int
+
+
+@dataclass
+class ImportTotals:
+    rows: int = 0
+    invalid: int = 0
+    duplicates: int = 0
+    errors: List[Dict[str, object]] = field(default_factory=list)  # first MAX_ERRORS_REPORTED only
+
+
+def iter_chunks(
+    stream: IO[bytes],
+    fmt: str,
+    *,
+    chunk_rows: int,
+    max_rows: int,
+    totals: ImportTotals,
+) -> Iterator[ImportChunk]:
+    """Group rows into chunks of unique, valid profiles; stops after `max_rows` rows."""
+    seen: set[bytes] = set()
+    number = 0
+    profiles: List[Tuple[str, dict]] = []
+    rows = invalid = duplicates = 0
+
+    for line_number, profile, error in iter_rows(stream, fmt):
+        if totals.rows >= max_rows:
+            totals.errors.append({"line": line_number, "error": f"stopped after {max_rows} rows"})
+            break
+        totals.rows += 1
+        rows += 1
+        if profile is None:
+            invalid += 1
+            totals.invalid += 1
+            if len(totals.errors) < MAX_ERRORS_REPORTED:
+                totals.errors.append({"line": line_number, "error": error})
+        else:
+            profile_hash = build_profile_hash(profile)
+            key = bytes.fromhex(profile_hash[:32])
+            if key in seen:
+                duplicates += 1
+                totals.duplicates += 1
+            else:
+                seen.add(key)
+                profiles.append((profile_hash, profile))
+        if rows >= chunk_rows:
+            number += 1
+            yield ImportChunk(number, profiles, rows, invalid, duplicates)
+            profiles, rows, invalid, duplicates = [], 0, 0, 0
+
+    if rows:
+        yield ImportChunk(number + 1, profiles, rows, invalid, duplicates)
@@ -0,0 +1,440 @@
+"""
+Local rule-based pre-scoring against the user's ICPConfig.
+
+Before the fit_scorer prompt runs, the profile extract is normalized
+(`normalize_profile`) and each ICP dimension is estimated from keywords:
+seniority level from the headline / experience titles, industry and skills
+overlap from the profile text, plus location, company size and years of
+experience when the extract carries them.
+
+- Clear rejects: an exclude_keywords hit, a location whose country is known
+  and outside every target's country (`location_status`), or none of the
+  required_skills anywhere in the profile.
+- Clear accepts: every ICP criterion that is set matches and the estimated
+  score reaches PRESCORE_ACCEPT_SCORE.
+
+Both short-circuit with a FitScoringResult marked `scored_locally` (and a
+DecisionResult from `local_decision`); everything else is ambiguous and goes
+to OpenAI. An ICP with no criteria set is always ambiguous.
+
+Used by POST /analyze, /analyze/linkedin, /analyze/batch-score and
+/analyze/import. /analyze/profile is left out: it makes one analyze_profile
+call with no fit_scorer stage to skip, and its cached responses have their
+own shape.
+"""
+
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from app.core.analysis_cache import extract_experience_titles
+from app.core.config import get_settings
+from app.core.metrics import PRESCORE_OUTCOMES
+from app.schemas.ai_responses import (
+    CONTACT_SCORE,
+    DecisionResult,
+    DimensionScores,
+    FitScoringResult,
+    ICPConfig,
+    score_priority,
+)
+
+# Highest first; a profile's level is the highest one any title mentions.
+SENIORITY_LEVELS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("c-level", (
+        "chief", "ceo", "cto", "cfo", "coo", "cmo", "cio", "ciso", "cro", "cpo", "founder", "co-founder",
+        "cofounder", "president", "managing director",
+    )),
+    ("vp", ("vp", "vice president", "svp", "evp", "head of")),
+    ("director", ("director",)),
+    ("manager", ("manager", "team lead", "lead")),
+    ("senior", ("senior", "sr", "principal", "staff")),
+    ("entry", ("junior", "jr", "intern", "associate", "assistant", "trainee", "graduate")),
+)
+SENIORITY_ALIASES = {"c-suite": "c-level", "cxo": "c-level", "executive": "c-level", "vice-president": "vp"}
+
+# Weights of the estimated dimensions in the local overall score (engagement
+# can't be judged from an extract, so it stays neutral and unweighted).
+DIMENSION_WEIGHTS = {
+    "seniority_match": 0.3,
+    "industry_match": 0.2,
+    "skills_match": 0.3,
+    "company_size_match": 0.1,
+    "experience_match": 0.1,
+}
+NEUTRAL_SCORE = 50.0
+REJECT_SCORE_CAP = 15.0
+SKILLS_MATCH_COVERAGE = 1.0  # a clear accept needs every required skill
+
+MATCH, PARTIAL, MISMATCH, UNKNOWN = "match", "partial", "mismatch", "unknown"
+
+# Country names and common aliases (lower-cased) -> ISO code. Only a location
+# whose country is known can be a location reject.
+COUNTRY_NAMES = {
+    "united states": "us", "united states of america": "us", "usa": "us", "us": "us", "u.s.": "us",
+    "canada": "ca", "mexico": "mx", "brazil": "br", "argentina": "ar", "chile": "cl", "colombia": "co",
+    "peru": "pe", "united kingdom": "gb", "uk": "gb", "england": "gb", "scotland": "gb", "wales": "gb",
+    "great britain": "gb", "ireland": "ie", "germany": "de", "deutschland": "de", "austria": "at",
+    "switzerland": "ch", "france": "fr", "spain": "es", "españa": "es", "portugal": "pt", "italy": "it",
+    "netherlands": "nl", "the netherlands": "nl", "belgium": "be", "luxembourg": "lu", "denmark": "dk",
+    "sweden": "se", "norway": "no", "finland": "fi", "iceland": "is", "poland": "pl", "czechia": "cz",
+    "czech republic": "cz", "romania": "ro", "greece": "gr", "ukraine": "ua", "russia": "ru", "turkey": "tr",
+    "israel": "il", "united arab emirates": "ae", "uae": "ae", "saudi arabia": "sa", "egypt": "eg",
+    "nigeria": "ng", "kenya": "ke", "south africa": "za", "india": "in", "pakistan": "pk", "china": "cn",
+    "hong kong": "hk", "taiwan": "tw", "japan": "jp", "south korea": "kr", "korea": "kr", "singapore": "sg",
+    "malaysia": "my", "indonesia": "id", "philippines": "ph", "vietnam": "vn", "thailand": "th",
+    "australia": "au", "new zealand": "nz",
+}
+_EU = frozenset({"at", "be", "cz", "de", "dk", "es", "fi", "fr", "gr", "ie", "it", "lu", "nl", "pl", "pt", "ro", "se"})
+_EUROPE = _EU | {"ch", "gb", "is", "no", "ua"}
+REGIONS: Dict[str, FrozenSet[str]] = {
+    "north america": frozenset({"us", "ca", "mx"}),
+    "latin america": frozenset({"mx", "br", "ar", "cl", "co", "pe"}),
+    "latam": frozenset({"mx", "br", "ar", "cl", "co", "pe"}),
+    "europe": _EUROPE,
+    "eu": _EU,
+    "european union": _EU,
+    "dach": frozenset({"de", "at", "ch"}),
+    "nordics": frozenset({"dk", "se", "no", "fi", "is"}),
+    "benelux": frozenset({"be", "nl", "lu"}),
+    "middle east": frozenset({"il", "ae", "sa", "eg", "tr"}),
+    "emea": _EUROPE | {"il", "ae", "sa", "eg", "tr", "ng", "ke", "za"},
+    "apac": frozenset({"in", "cn", "hk", "tw", "jp", "kr", "sg", "my", "id", "ph", "vn", "th", "au", "nz"}),
+    "anz": frozenset({"au", "nz"}),
+}
+
+_VICE_PRESIDENT = re.compile(r"vice[\s-]+president")
+
+
+@dataclass
+class ProfileFeatures:
+    """Lower-cased fields of a profile extract, as the pre-scorer reads them."""
+
+    headline: str = ""
+    titles: List[str] = field(default_factory=list)
+    skills: List[str] = field(default_factory=list)
+    location: str = ""
+    industry: str = ""
+    company_size: Optional[int] = None
+    years_experience: Optional[float] = None
+    text: str = ""  # headline, about, titles, skills, industry and company joined
+
+    @property
+    def data_quality(self) -> float:
+        present = [self.headline, self.titles, self.skills or self.text, self.location, self.industry]
+        return round(100.0 * sum(1 for value in present if value) / len(present), 1)
+
+
+def _first(profile: dict, *keys: str):
+    for key in keys:
+        value = profile.get(key)
+        if value not in (None, "", []):
+            return value
+    return None
+
+
+def _as_int(value) -> Optional[int]:
+    """Employee counts come as numbers or ranges ("51-200", "10,001+"); ranges use their midpoint."""
+    if isinstance(value, (int, float)):
+        return int(value)
+    numbers = [int(n.replace(",", "")) for n in re.findall(r"\d[\d,]*", str(value or ""))]
+    return sum(numbers) // len(numbers) if numbers else None
+
+
+def _as_float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_profile(profile: dict) -> ProfileFeatures:
+    """Flatten the extension's profile_extract (and richer API payloads) into ProfileFeatures."""
+    headline = str(_first(profile, "headline", "title", "occupation") or "").strip().lower()
+    about = str(_first(profile, "about", "summary", "bio") or "").strip().lower()
+    titles = [title.strip().lower() for title in extract_experience_titles(profile) if str(title).strip()]
+    skills = []
+    for skill in profile.get("skills") or []:
+        name = skill.get("name") if isinstance(skill, dict) else skill
+        if name:
+            skills.append(str(name).strip().lower())
+    location = str(_first(profile, "location", "locationName", "geo") or "").strip().lower()
+    industry = str(_first(profile, "industry", "industryName") or "").strip().lower()
+    company = str(_first(profile, "company", "company_name", "companyName", "current_company") or "").strip().lower()
+    return ProfileFeatures(
+        headline=headline,
+        titles=titles,
+        skills=skills,
+        location=location,
+        industry=industry,
+        company_size=_as_int(_first(profile, "company_size", "companySize", "employee_count", "employees")),
+        years_experience=_as_float(_first(profile, "years_experience", "yearsExperience", "years_of_experience")),
+        text=" | ".join(part for part in [headline, about, *titles, *skills, industry, company] if part),
+    )
+
+
+@lru_cache(maxsize=4096)
+def _term_pattern(term: str) -> re.Pattern:
+    return re.compile(r"(?<![\w])" + re.escape(term.strip().lower()) + r"(?![\w])")
+
+
+def contains_term(text: str, term: str) -> bool:
+    """Whole-word (or whole-phrase), case-insensitive match; `text` must already be lower-cased."""
+    return bool(term and term.strip()) and _term_pattern(term).search(text) is not None
+
+
+def location_matches(location: str, targets: Iterable[str]) -> bool:
+    """
+    A target names the location or the location names the target, as whole
+    words ("us" matches "austin, us" but not "moscow, russia").
+    """
+    return any(contains_term(location, target) or contains_term(target, location) for target in targets)
+
+
+def location_countries(text: str) -> FrozenSet[str]:
+    """Countries a lower-cased location or target names, directly or through a region ("dach", "emea", ...)."""
+    countries = {country for name, country in COUNTRY_NAMES.items() if contains_term(text, name)}
+    for region, members in REGIONS.items():
+        if contains_term(text, region):
+            countries |= members
+    return frozenset(countries)
+
+
+def location_status(location: str, targets: List[str]) -> str:
+    """
+    MATCH when the texts match or the location's country is a target
+    country; MISMATCH only when the location's country is known and none of
+    the targets' countries; UNKNOWN otherwise ("San Francisco Bay Area" vs
+    "United States" can't be placed, so it isn't a confident reject).
+    """
+    if not location:
+        return UNKNOWN
+    if location_matches(location, targets):
+        return MATCH
+    countries = location_countries(location)
+    target_countries = frozenset().union(*(location_countries(target) for target in targets))
+    if not countries or not target_countries:
+        return UNKNOWN
+    return MATCH if countries & target_countries else MISMATCH
+
+
+def _clean(terms: Optional[Iterable[str]]) -> List[str]:
+    return [term.strip().lower() for term in terms or [] if term and term.strip()]
+
+
+def seniority_level(text: str) -> Optional[int]:
+    """Index into SENIORITY_LEVELS (0 = c-level) of the highest level mentioned, or None."""
+    text = _VICE_PRESIDENT.sub("vp", text)  # not "president"
+    for rank, (_, keywords) in enumerate(SENIORITY_LEVELS):
+        if any(contains_term(text, keyword) for keyword in keywords):
+            return rank
+    return None
+
+
+def target_seniority_levels(targets: Optional[Iterable[str]]) -> List[int]:
+    """ICP seniority labels ("C-level", "VP", "Head of", "CTO", ...) as SENIORITY_LEVELS indexes."""
+    names = [name for name, _ in SENIORITY_LEVELS]
+    levels = set()
+    for target in _clean(targets):
+        target = SENIORITY_ALIASES.get(target, target)
+        level = names.index(target) if target in names else seniority_level(target)
+        if level is not None:
+            levels.add(level)
+    return sorted(levels)
+
+
+def _seniority(features: ProfileFeatures, icp: ICPConfig) -> Tuple[Optional[str], float, str]:
+    targets = target_seniority_levels(icp.target_seniority)
+    if not targets:
+        return None, NEUTRAL_SCORE, ""
+    level = seniority_level(" | ".join([features.headline, *features.titles]))
+    if level is None:
+        return UNKNOWN, NEUTRAL_SCORE, ""
+    distance = min(abs(level - target) for target in targets)
+    label = SENIORITY_LEVELS[level][0]
+    if distance == 0:
+        return MATCH, 100.0, f"Seniority matches target ({label})"
+    return MISMATCH, max(0.0, 100.0 - 35.0 * distance), f"Seniority {label} is outside the target levels"
+
+
+def _industry(features: ProfileFeatures, icp: ICPConfig) -> Tuple[Optional[str], float, str]:
+    targets = _clean(icp.target_industries)
+    if not targets:
+        return None, NEUTRAL_SCORE, ""
+    hits = [target for target in targets if contains_term(features.text, target)]
+    if hits:
+        return MATCH, 100.0, f"Industry matches target: {', '.join(hits)}"
+    if features.industry:
+        return MISMATCH, 10.0, f"Industry {features.industry} is not a target industry"
+    return UNKNOWN, 35.0, ""
+
+
+def _skills(features: ProfileFeatures, icp: ICPConfig) -> Tuple[Optional[str], float, str, List[str]]:
+    required = _clean(icp.required_skills)
+    if not required:
+        return None, NEUTRAL_SCORE, "", []
+    if not features.text:
+        return UNKNOWN, NEUTRAL_SCORE, "", []
+    hits = [skill for skill in required if contains_term(features.text, skill)]
+    coverage = len(hits) / len(required)
+    if not hits:
+        return MISMATCH, 0.0, f"None of the required skills: {', '.join(required)}", hits
+    status = MATCH if coverage >= SKILLS_MATCH_COVERAGE else PARTIAL
+    return status, round(100.0 * coverage, 1), f"Has required skills: {', '.join(hits)}", hits
+
+
+def _location(features: ProfileFeatures, icp: ICPConfig) -> Optional[str]:
+    targets = _clean(icp.target_locations)
+    if not targets:
+        return None
+    return location_status(features.location, targets)
+
+
+def _company_size(features: ProfileFeatures, icp: ICPConfig) -> Tuple[Optional[str], float]:
+    low, high = icp.company_size_min or 0, icp.company_size_max
+    if not low and high in (None, 0, 1_000_000):  # the route's "no preference" default
+        return None, NEUTRAL_SCORE
+    if features.company_size is None:
+        return UNKNOWN, NEUTRAL_SCORE
+    inside = features.company_size >= low and (high is None or features.company_size <= high)
+    return (MATCH, 100.0) if inside else (MISMATCH, 20.0)
+
+
+def _experience(features: ProfileFeatures, icp: ICPConfig) -> Tuple[Optional[str], float]:
+    minimum = icp.min_years_experience or 0
+    if not minimum:
+        return None, NEUTRAL_SCORE
+    if features.years_experience is None:
+        return UNKNOWN, NEUTRAL_SCORE
+    if features.years_experience >= minimum:
+        return MATCH, 100.0
+    return MISMATCH, round(100.0 * features.years_experience / minimum, 1)
+
+
+@dataclass
+class PreScore:
+    """Outcome of the local pass: "reject", "accept" or "ambiguous" (fit is None when ambiguous)."""
+
+    outcome: str
+    reason: str
+    dimension_scores: DimensionScores
+    overall_score: float
+    fit: Optional[FitScoringResult] = None
+
+
+def prescore(profile: dict, icp: Optional[ICPConfig]) -> PreScore:
+    """Estimate the ICP dimensions locally and classify the profile."""
+    icp = icp or ICPConfig()
+    features = normalize_profile(profile)
+
+    seniority_status, seniority_score, seniority_signal = _seniority(features, icp)
+    industry_status, industry_score, industry_signal = _industry(features, icp)
+    skills_status, skills_score, skills_signal, _ = _skills(features, icp)
+    location_status = _location(features, icp)
+    size_status, size_score = _company_size(features, icp)
+    experience_status, experience_score = _experience(features, icp)
+
+    scores = DimensionScores(
+        seniority_match=seniority_score,
+        industry_match=industry_score,
+        company_size_match=size_score,
+        skills_match=skills_score,
+        experience_match=experience_score,
+        engagement_level=NEUTRAL_SCORE,
+    )
+    statuses: Dict[str, Optional[str]] = {
+        "seniority_match": seniority_status,
+        "industry_match": industry_status,
+        "skills_match": skills_status,
+        "company_size_match": size_status,
+        "experience_match": experience_status,
+    }
+    weighted = {name: weight for name, weight in DIMENSION_WEIGHTS.items() if statuses[name] is not None}
+    overall = (
+        round(sum(getattr(scores, name) * weight for name, weight in weighted.items()) / sum(weighted.values()), 1)
+        if weighted
+        else NEUTRAL_SCORE
+    )
+
+    positive = [signal for signal, status in (
+        (seniority_signal, seniority_status), (industry_signal, industry_status), (skills_signal, skills_status),
+    ) if signal and status in (MATCH, PARTIAL)]
+    if location_status == MATCH:
+        positive.append(f"Located in a target location ({features.location})")
+    negative = [signal for signal, status in (
+        (seniority_signal, seniority_status), (industry_signal, industry_status), (skills_signal, skills_status),
+    ) if signal and status == MISMATCH]
+
+    excluded = [keyword for keyword in _clean(icp.exclude_keywords) if contains_term(features.text, keyword)]
+    reject_reason = None
+    if excluded:
+        reject_reason = "exclude_keyword"
+        negative.insert(0, f"Matches excluded keywords: {', '.join(excluded)}")
+    elif location_status == MISMATCH:
+        reject_reason = "location"
+        negative.insert(0, f"Location {features.location} is outside the target locations")
+    elif skills_status == MISMATCH:
+        reject_reason = "no_required_skills"
+
+    if reject_reason:
+        fit = FitScoringResult(
+            overall_score=min(overall, REJECT_SCORE_CAP),
+            dimension_scores=scores,
+            positive_signals=positive,
+            negative_signals=negative,
+            data_quality=features.data_quality,
+            confidence=90.0 if reject_reason != "no_required_skills" else 80.0,
+        ).mark_scored_locally()
+        return PreScore("reject", reject_reason, scores, fit.overall_score, fit)
+
+    criteria = [status for status in (*statuses.values(), location_status) if status is not None]
+    decisive = any(statuses[name] is not None for name in ("seniority_match", "industry_match", "skills_match"))
+    if decisive and all(status == MATCH for status in criteria) and overall >= get_settings().prescore_accept_score:
+        fit = FitScoringResult(
+            overall_score=overall,
+            dimension_scores=scores,
+            positive_signals=positive,
+            negative_signals=negative,
+            data_quality=features.data_quality,
+            confidence=75.0,
+        ).mark_scored_locally()
+        return PreScore("accept", "all_criteria_match", scores, overall, fit)
+
+    return PreScore("ambiguous", "no_criteria" if not criteria else "mixed_signals", scores, overall)
+
+
+def prescore_fit(profile: dict, icp: Optional[ICPConfig]) -> Optional[FitScoringResult]:
+    """FitScoringResult for a clear accept/reject, or None when OpenAI should score the profile."""
+    if not get_settings().prescore_enabled:
+        return None
+    result = prescore(profile, icp)
+    PRESCORE_OUTCOMES.labels(outcome=result.outcome, reason=result.reason).inc()
+    return result.fit
+
+
+def local_decision(fit: FitScoringResult) -> DecisionResult:
+    """Decision for a locally scored fit (no decision_writer call)."""
+    should_contact = fit.overall_score >= CONTACT_SCORE
+    priority = score_priority(fit.overall_score)
+    if should_contact:
+        return DecisionResult(
+            should_contact=True,
+            priority=priority,
+            score=fit.overall_score,
+            reasoning="Matches every criterion of your ICP: " + "; ".join(fit.positive_signals) + ".",
+            key_points=fit.positive_signals[:3],
+            suggested_approach="Reach out referencing their role and how your offer fits their industry.",
+            red_flags=fit.negative_signals,
+            next_steps="Send a personalized LinkedIn message or email within 48 hours.",
+        )
+    return DecisionResult(
+        should_contact=False,
+        priority="low",
+        score=fit.overall_score,
+        reasoning="Outside your ICP: " + "; ".join(fit.negative_signals) + ".",
+        key_points=fit.negative_signals[:3],
+        suggested_approach="Not a fit for your current ICP; no outreach suggested.",
+        red_flags=fit.negative_signals,
+        next_steps="Skip this profile or adjust your ICP if it should qualify.",
+    )
@@ -18,6 +18,8 @@ from datetime import datetime
 import stripe
 from dotenv import load_dotenv
 
+from app.core.stripe_reconcile import fetch_stripe_state
+
 load_dotenv()
 
 STRIPE_API_KEY = os.getenv("STRIPE_SECRET_KEY") or os.getenv("STRIPE_API_KEY")
@@ -67,16 +69,18 @@ def archive_products():
     print("="*80)
     print()
     
-    # Get all active products
-    all_products = stripe.Product.list(limit=100, active=True)
+    # Get all active products and their active prices (every page, fetched concurrently)
+    state = fetch_stripe_state(stripe, include_subscriptions=False, product_filters={"active": True})
+    all_products = state.products
+    active_prices = state.prices_by_product(active=True)
     
     archived_products = []
     kept_products = []
     archived_prices = []
     
-    print(f"📦 Productos activos encontrados: {len(all_products.data)}\n")
+    print(f"📦 Productos activos encontrados: {len(all_products)}\n")
     
-    for product in all_products.data:
+    for product in all_products:
         should_archive = should_archive_product(product.name)
         
         if should_archive:
@@ -84,10 +88,10 @@ def archive_products():
             print(f"   Product ID: {product.id}")
             
             # Get all prices for this product
-            prices = stripe.Price.list(product=product.id, active=True, limit=100)
+            prices = active_prices.get(product.id, [])
             
             # Archive all active prices first
-            for price in prices.data:
+            for price in prices:
                 amount = price.unit_amount / 100 if price.unit_amount else 0
                 print(f"   ├─ Desactivando precio: ${amount:.2f} {price.currency.upper()} ({price.id})")
                 
@@ -108,7 +112,7 @@ def archive_products():
                 'product_id': product.id,
                 'name': product.name,
                 'created': datetime.fromtimestamp(product.created).strftime('%Y-%m-%d'),
-                'prices_archived': len(prices.data)
+                'prices_archived': len(prices)
             })
             
             print(f"   ✓ Producto archivado\n")
@@ -9,6 +9,8 @@ from datetime import datetime
 import stripe
 from dotenv import load_dotenv
 
+from app.core.stripe_reconcile import fetch_stripe_state
+
 # Load environment variables
 load_dotenv()
 
@@ -34,14 +36,16 @@ def audit_stripe():
     print(f"API Key: {STRIPE_API_KEY[:20]}...")
     print()
     
-    # Get all products
-    products = stripe.Product.list(limit=100)
+    # Get all products and prices (every page, fetched concurrently)
+    state = fetch_stripe_state(stripe, include_subscriptions=False)
+    products = state.products
+    prices_by_product = state.prices_by_product()
     
     audit_data = []
     
-    for product in products.data:
-        # Get all prices for this product
-        prices = stripe.Price.list(product=product.id, limit=100)
+    for product in products:
+        # Prices for this product
+        prices = prices_by_product.get(product.id, [])
         
         product_info = {
             'product_id': product.id,
@@ -51,7 +55,7 @@ def audit_stripe():
             'prices': []
         }
         
-        for price in prices.data:
+        for price in prices:
             # Check if this price is configured in backend
             used_as = None
             for plan, price_id in CONFIGURED_PRICES.items():
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Score a file of profile extracts against one ICP with the vectorized local
+scorer (app.services.batch_score) and print the top K. No OpenAI calls.
+
+    python batch_score.py profiles.jsonl --icp icp.json --top 20
+    python batch_score.py profiles.json --icp icp.json --out ranked.json
+    python batch_score.py --synthetic 100000 --icp icp.json   # timing run
+
+Input is JSON (a list of profile extracts) or JSONL (one per line); the ICP
+file holds ICPConfig fields. Without --icp every profile is ambiguous.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.schemas.ai_responses import ICPConfig  # noqa: E402
+from app.services.batch_score import ProfileMatrix, score_matrix  # noqa: E402
+
+_TITLES = ["VP Engineering", "CTO", "Director of Sales", "Software Engineer", "Head of Data", "Product Manager",
+           "Senior Developer", "Founder", "Marketing Associate", "Chief Revenue Officer"]
+_INDUSTRIES = ["fintech", "saas", "healthcare", "retail", "logistics", "edtech"]
+_SKILLS = ["python", "aws", "sql", "kubernetes", "react", "sales", "marketing", "go", "java", "terraform"]
+_LOCATIONS = ["Berlin, Germany", "Munich, Germany", "London, UK", "Madrid, Spain", "New York, USA", ""]
+
+
+def synthetic_profiles(count: int, seed: int = 7) -> list[dict]:
+    """Deterministic profile extracts shaped like the extension's payload."""
+    rng = random.Random(seed)
+    profiles = []
+    for index in range(count):
+        title = rng.choice(_TITLES)
+        industry = rng.choice(_INDUSTRIES)
+        profiles.append({
+            "name": f"Profile {index}",
+            "profile_url": f"https://www.linkedin.com/in/profile-{index}",
+            "headline": f"{title} at Company{index % 997} ({industry})",
+            "about": "Working with " + ", ".join(rng.sample(_SKILLS, 3)) + ".",
+            "experience": [{"title": title}, {"title": rng.choice(_TITLES)}],
+            "skills": rng.sample(_SKILLS, 2),
+            "location": rng.choice(_LOCATIONS),
+            "company_size": rng.choice([10, 50, 200, 1000, 5000]),
+            "years_experience": rng.randint(1, 25),
+        })
+    return profiles
+
+
+def load_profiles(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as handle:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in handle if line.strip()]
+        data = json.load(handle)
+    return data["profiles"] if isinstance(data, dict) else data
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", nargs="?", help="JSON or JSONL file of profile extracts")
+    parser.add_argument("--icp", help="JSON file with ICPConfig fields")
+    parser.add_argument("--top", type=int, default=20, help="How many profiles to print (default: 20)")
+    parser.add_argument("--synthetic", type=int, default=0, help="Score N generated profiles instead of a file")
+    parser.add_argument("--out", help="Write the totals and top K as JSON here")
+    args = parser.parse_args()
+    if not args.input and not args.synthetic:
+        parser.error("give an input file or --synthetic N")
+
+    icp = None
+    if args.icp:
+        with open(args.icp, encoding="utf-8") as handle:
+            icp = ICPConfig(**json.load(handle))
+    profiles = synthetic_profiles(args.synthetic) if args.synthetic else load_profiles(args.input)
+
+    started = time.perf_counter()
+    matrix = ProfileMatrix.build(profiles)
+    built = time.perf_counter()
+    scores = score_matrix(matrix, icp)
+    top = scores.top(args.top)
+    finished = time.perf_counter()
+
+    print(f"Scored {len(matrix)} profiles ({len(matrix.vocab)} distinct tokens): "
+          f"build {built - started:.2f}s, score {finished - built:.3f}s")
+    print("Outcomes: " + ", ".join(f"{name}={count}" for name, count in scores.outcome_counts().items()))
+    for rank, row in enumerate(top, start=1):
+        print(f"{rank:>4}. {row['overall_score']:>5.1f} {row['priority']:<6} {row['outcome']:<9} "
+              f"{row['name'] or '#' + str(row['index'])}")
+
+    if args.out:
+        report = {
+            "total": len(matrix),
+            "outcomes": scores.outcome_counts(),
+            "build_seconds": round(built - started, 3),
+            "score_seconds": round(finished - built, 3),
+            "top": top,
+        }
+        with open(args.out, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+        print(f"✓ Report written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
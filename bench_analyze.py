@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test for the API with OpenAI replaced by fake_openai_server.py.
+
+Boots the fake OpenAI server and a uvicorn instance against a throwaway SQLite
+DB (or --database-url for Postgres), seeds Pro and Free users, then drives
+/analyze, /analyze/linkedin, /billing/status, /user, /user/me/usage and
+/auth/login from N concurrent workers. Prints one JSON document (RPS,
+p50/p95/p99, DB queries per request) that can be diffed between commits:
+
+    python bench_analyze.py --duration 20 --concurrency 8 --out bench.json
+    python bench_analyze.py --mix linkedin=6,analyze=2,billing=1,login=1 --cache-hit-ratio 0.8
+    python bench_analyze.py --preview-ratio 0.3 --openai-latency lognormal:0.8,0.4
+    python bench_analyze.py --compare bench.json --max-regression 0.2   # exit 1 on p95 regressions
+    python bench_analyze.py --mix billing=2,user=2,usage=2 --api-workers 2 --compare sync.json
+
+Compare runs at the same --api-workers (uvicorn processes) and --concurrency;
+the reads on the async session path (billing, user, usage) skip the threadpool,
+so their RPS at equal workers is the number to watch.
+
+Behind PgBouncer in transaction mode (point --database-url at the pooler):
+
+    python bench_analyze.py --database-url postgresql+psycopg2://u:p@127.0.0.1:6432/app \\
+        --db-pool-mode transaction --concurrency 32 --compare direct.json
+
+Mix weights pick the endpoint for each request. --cache-hit-ratio is the share
+of profile requests drawn from a small pre-warmed "hot" set; --preview-ratio is
+the share sent as preview (mode=preview for /analyze, a Free user's token for
+/analyze/linkedin).
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+ENDPOINTS = ("analyze", "linkedin", "billing", "user", "usage", "login")
+DB_QUERIES_HEADER = "x-db-queries"  # set by app.core.query_stats
+HOT_PROFILES = 20
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise SystemExit(f"Unknown endpoint in --mix: {name!r} (choose from {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank percentile
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+
+def _profile(key: str) -> dict:
+    return {
+        "profile_url": f"https://www.linkedin.com/in/bench-{key}",
+        "name": f"Bench {key}",
+        "headline": "VP Engineering at Example Corp",
+        "experience": [{"title": "VP Engineering"}, {"title": "Director of Engineering"}],
+        "location": "Berlin",
+    }
+
+
+# --- setup --------------------------------------------------------------------
+
+def _seed_users(database_url: str, pro_users: int, free_users: int) -> Tuple[List[str], List[str]]:
+    """Migrate the bench DB and create users; returns (pro_emails, free_emails)."""
+    os.environ["DATABASE_URL"] = database_url
+    from app.core.db import get_engine, get_session_factory
+    from app.core.migrations import run_migrations
+    from app.models.user import User
+
+    run_migrations(get_engine())
+    db = get_session_factory()()
+    pro = [f"bench-pro-{i}@example.com" for i in range(pro_users)]
+    free = [f"bench-free-{i}@example.com" for i in range(free_users)]
+    try:
+        existing = {email for (email,) in db.query(User.email).filter(User.email.in_(pro + free))}
+        for email in pro:
+            if email not in existing:
+                db.add(User(email=email, plan="pro", subscription_status="active", monthly_analyses_count=0))
+        for email in free:
+            if email not in existing:
+                db.add(User(email=email, plan="free"))
+        db.commit()
+    finally:
+        db.close()
+    get_engine().dispose()
+    return pro, free
+
+
+def _wait_ready(port: int, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API process exited with code {process.returncode}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/health/ready")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("API did not become ready in time")
+
+
+# --- client side --------------------------------------------------------------
+
+@dataclass
+class Sample:
+    endpoint: str
+    status: int
+    seconds: float
+    db_queries: Optional[int]
+
+
+@dataclass
+class Workload:
+    port: int
+    mix: Dict[str, float]
+    cache_hit_ratio: float
+    preview_ratio: float
+    pro_tokens: List[str]
+    free_tokens: List[str]
+    pro_emails: List[str]
+    hot_profiles: List[dict] = field(default_factory=lambda: [_profile(f"hot-{i}") for i in range(HOT_PROFILES)])
+
+
+def _request(conn: http.client.HTTPConnection, method: str, path: str, body: Optional[dict], token: Optional[str]):
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+    response = conn.getresponse()
+    payload = response.read()
+    return response.status, response.getheader(DB_QUERIES_HEADER), payload
+
+
+def _login(port: int, email: str) -> str:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    status, _, payload = _request(conn, "POST", "/auth/login", {"email": email}, None)
+    if status != 200:
+        raise RuntimeError(f"Login failed for {email}: {status} {payload[:200]!r}")
+    return json.loads(payload)["access_token"]
+
+
+def _next_request(workload: Workload, rng: random.Random, worker: int, counter: int) -> Tuple[str, str, str, Optional[dict], Optional[str]]:
+    names = list(workload.mix)
+    endpoint = rng.choices(names, weights=[workload.mix[name] for name in names])[0]
+    if endpoint == "billing":
+        return endpoint, "GET", "/billing/status", None, rng.choice(workload.pro_tokens)
+    if endpoint == "user":
+        return endpoint, "GET", "/user", None, rng.choice(workload.pro_tokens)
+    if endpoint == "usage":
+        return endpoint, "GET", "/user/me/usage", None, rng.choice(workload.pro_tokens)
+    if endpoint == "login":
+        return endpoint, "POST", "/auth/login", {"email": rng.choice(workload.pro_emails)}, None
+
+    if rng.random() < workload.cache_hit_ratio:
+        profile = rng.choice(workload.hot_profiles)
+    else:
+        profile = _profile(f"cold-{worker}-{counter}")
+    preview = rng.random() < workload.preview_ratio
+
+    if endpoint == "analyze":
+        body = {"profileExtract": profile, "mode": "preview" if preview else "ai"}
+        return endpoint, "POST", "/analyze", body, rng.choice(workload.pro_tokens)
+    token = rng.choice(workload.free_tokens if preview else workload.pro_tokens)
+    return endpoint, "POST", "/analyze/linkedin", {"profile_extract": profile}, token
+
+
+def _worker(workload: Workload, worker: int, seed: int, deadline: float, samples: List[Sample], lock: threading.Lock) -> None:
+    rng = random.Random(seed * 1000 + worker)
+    conn = http.client.HTTPConnection("127.0.0.1", workload.port, timeout=120)
+    local: List[Sample] = []
+    counter = 0
+    while time.perf_counter() < deadline:
+        counter += 1
+        endpoint, method, path, body, token = _next_request(workload, rng, worker, counter)
+        started = time.perf_counter()
+        try:
+            status, queries, _ = _request(conn, method, path, body, token)
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", workload.port, timeout=120)
+            status, queries = 0, None
+        local.append(Sample(endpoint, status, time.perf_counter() - started, int(queries) if queries else None))
+    conn.close()
+    with lock:
+        samples.extend(local)
+
+
+def summarize(samples: List[Sample], elapsed: float) -> dict:
+    """Aggregate samples into the JSON report body (latencies in ms)."""
+
+    def _stats(group: List[Sample]) -> dict:
+        latencies = sorted(sample.seconds * 1000 for sample in group)
+        queries = [sample.db_queries for sample in group if sample.db_queries is not None]
+        statuses: Dict[str, int] = {}
+        for sample in group:
+            statuses[str(sample.status)] = statuses.get(str(sample.status), 0) + 1
+        return {
+            "requests": len(group),
+            "errors": sum(1 for sample in group if sample.status == 0 or sample.status >= 500),
+            "status_codes": statuses,
+            "rps": round(len(group) / elapsed, 2) if elapsed else 0.0,
+            "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            "p50_ms": round(_percentile(latencies, 50), 2),
+            "p95_ms": round(_percentile(latencies, 95), 2),
+            "p99_ms": round(_percentile(latencies, 99), 2),
+            "db_queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+        }
+
+    by_endpoint = {name: [sample for sample in samples if sample.endpoint == name] for name in ENDPOINTS}
+    return {
+        "total": _stats(samples),
+        "endpoints": {name: _stats(group) for name, group in by_endpoint.items() if group},
+    }
+
+
+def compare(report: dict, baseline: dict, max_regression: Optional[float]) -> bool:
+    """Print per-endpoint deltas against a previous report; False if p95 regressed beyond the limit."""
+    ok = True
+    workers = (baseline.get("config", {}).get("api_workers", 1), report.get("config", {}).get("api_workers", 1))
+    if workers[0] != workers[1]:
+        print(f"⚠️  api_workers differ ({workers[0]} -> {workers[1]}): RPS is not comparable", file=sys.stderr)
+    for name, current in report["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before:
+            continue
+        p95_delta = (current["p95_ms"] - before["p95_ms"]) / before["p95_ms"] if before["p95_ms"] else 0.0
+        rps_delta = (current["rps"] - before["rps"]) / before["rps"] if before["rps"] else 0.0
+        regressed = max_regression is not None and p95_delta > max_regression
+        ok = ok and not regressed
+        print(
+            f"{name:<10} p95 {before['p95_ms']:>8.1f} -> {current['p95_ms']:>8.1f} ms ({p95_delta:+.0%})  "
+            f"rps {before['rps']:>7.1f} -> {current['rps']:>7.1f} ({rps_delta:+.0%})  "
+            f"queries {before.get('db_queries_per_request')} -> {current.get('db_queries_per_request')}"
+            f"{'  REGRESSION' if regressed else ''}",
+            file=sys.stderr,
+        )
+    return ok
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def run(args: argparse.Namespace) -> dict:
+    workdir = tempfile.mkdtemp(prefix="bench-analyze-")
+    database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    pro_emails, free_emails = _seed_users(database_url, args.users, args.users)
+
+    openai_port, api_port = _free_port(), _free_port()
+    fake_cmd = [
+        sys.executable, os.path.join(ROOT, "fake_openai_server.py"),
+        "--port", str(openai_port),
+        "--latency", args.openai_latency,
+        "--rate-limit", str(args.openai_rate_limit),
+        "--server-error", str(args.openai_server_error),
+        "--seed", str(args.seed),
+    ]
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "OPENAI_ENABLED": "true",
+        "OPENAI_API_KEY": "sk-bench",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{openai_port}/v1",
+        "AUTO_MIGRATE": "false",
+        "RATE_LIMIT_SECONDS": "0",
+        "USAGE_LIMIT_PRO": "1000000000",
+        "REVENUE_PER_PRO_USER": "1000000",
+        "SOFT_LAUNCH_MODE": "false",
+        "DB_QUERY_HEADERS": "true",
+        "DB_POOL_MODE": args.db_pool_mode,
+        "DB_POOLER_POOL_SIZE": str(args.db_pooler_pool_size),
+    }
+    processes = [
+        subprocess.Popen(fake_cmd, cwd=ROOT, stdout=subprocess.DEVNULL),
+        subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(api_port),
+                "--workers", str(args.api_workers), "--log-level", "warning",
+            ],
+            cwd=ROOT,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=None if args.verbose else subprocess.DEVNULL,
+        ),
+    ]
+    try:
+        _wait_ready(api_port, processes[1])
+        pro_tokens = [_login(api_port, email) for email in pro_emails]
+        free_tokens = [_login(api_port, email) for email in free_emails]
+        workload = Workload(api_port, _parse_mix(args.mix), args.cache_hit_ratio, args.preview_ratio, pro_tokens, free_tokens, pro_emails)
+
+        # Prime the hot set so cache hits are real hits during the measured window
+        primer = http.client.HTTPConnection("127.0.0.1", api_port, timeout=120)
+        for profile in workload.hot_profiles:
+            _request(primer, "POST", "/analyze/linkedin", {"profile_extract": profile}, pro_tokens[0])
+        primer.close()
+
+        samples: List[Sample] = []
+        lock = threading.Lock()
+        warmup_deadline = time.perf_counter() + args.warmup
+        warmup_threads = [
+            threading.Thread(target=_worker, args=(workload, i, args.seed + 1, warmup_deadline, [], lock))
+            for i in range(args.concurrency)
+        ]
+        for thread in warmup_threads:
+            thread.start()
+        for thread in warmup_threads:
+            thread.join()
+
+        started = time.perf_counter()
+        deadline = started + args.duration
+        threads = [
+            threading.Thread(target=_worker, args=(workload, i, args.seed, deadline, samples, lock))
+            for i in range(args.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if not args.keep_db:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "commit": _git_commit(),
+        "config": {
+            "database": "postgresql" if database_url.startswith("postgres") else "sqlite",
+            "duration_s": args.duration,
+            "concurrency": args.concurrency,
+            "api_workers": args.api_workers,
+            "db_pool_mode": args.db_pool_mode,
+            "db_pooler_pool_size": args.db_pooler_pool_size,
+            "mix": _parse_mix(args.mix),
+            "cache_hit_ratio": args.cache_hit_ratio,
+            "preview_ratio": args.preview_ratio,
+            "openai_latency": args.openai_latency,
+            "users": args.users,
+            "seed": args.seed,
+        },
+        "elapsed_s": round(elapsed, 3),
+        **summarize(samples, elapsed),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load-test the analyze endpoints against a fake OpenAI")
+    parser.add_argument("--duration", type=float, default=15.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before the run")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--api-workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--mix", default="linkedin=4,analyze=2,billing=2,login=1")
+    parser.add_argument("--cache-hit-ratio", type=float, default=0.5)
+    parser.add_argument("--preview-ratio", type=float, default=0.2)
+    parser.add_argument("--users", type=int, default=10, help="Pro users and Free users to seed (each)")
+    parser.add_argument("--database-url", help="Default: throwaway SQLite file")
+    parser.add_argument("--db-pool-mode", choices=["direct", "transaction"], default="direct",
+                        help="transaction = behind PgBouncer (point --database-url at the pooler)")
+    parser.add_argument("--db-pooler-pool-size", type=int, default=0, help="App-side pool in transaction mode (0 = NullPool)")
+    parser.add_argument("--openai-latency", default="lognormal:0.4,0.3")
+    parser.add_argument("--openai-rate-limit", type=float, default=0.0)
+    parser.add_argument("--openai-server-error", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="Write the JSON report here as well as stdout")
+    parser.add_argument("--compare", help="Previous JSON report to diff against")
+    parser.add_argument("--max-regression", type=float, help="Fail if any endpoint p95 grows by more than this fraction")
+    parser.add_argument("--keep-db", action="store_true")
+    parser.add_argument("--verbose", action="store_true", help="Show API server logs")
+    args = parser.parse_args()
+
+    report = run(args)
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as handle:
+            handle.write(output + "\n")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            if not compare(report, json.load(handle), args.max_regression):
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of the logging cost seen by request threads.
+
+Each simulated request emits the records a /analyze/linkedin call logs (cache
+lookup, usage, billing lines) inside a request log context, from N concurrent
+threads. Compares the old synchronous StreamHandler setup with the queue-based
+pipeline of app.core.structured_logging (text and JSON, optionally sampled) and
+prints one JSON document with caller-side per-request latency:
+
+    python bench_logging.py --requests 20000 --threads 8
+    python bench_logging.py --write-delay-ms 0.2 --sample-rate 0.1
+
+--write-delay-ms stalls every write to mimic a slow sink (a blocked stderr
+pipe, a busy log shipper); that is where the synchronous handler hurts
+request latency and the queue pays off. On a fast local file the sync handler
+is cheaper. The queue pipelines are also timed until the listener has drained,
+and report how many records a full queue dropped.
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+from logging.handlers import QueueListener
+from typing import Callable, Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+from app.core.structured_logging import (  # noqa: E402
+    TEXT_DATEFMT,
+    TEXT_FORMAT,
+    DroppingQueueHandler,
+    JSONFormatter,
+    RequestContextFilter,
+    SamplingFilter,
+    bind_log_context,
+    record_stage_timing,
+    request_log_context,
+)
+
+logger = logging.getLogger("bench.logging")
+
+
+def simulated_request(index: int) -> None:
+    with request_log_context(request_id=f"bench-{index}", route="/analyze/linkedin"):
+        bind_log_context(user_id=index % 50)
+        logger.info("Cache miss for profile_hash=%s", f"{index:064x}")
+        logger.info("BILLING_STATUS_CHECKED | user=%s | plan=%s | active=%s", index % 50, "pro", True)
+        logger.info("USAGE_RECORDED | user=%s | analyses_this_month=%d", index % 50, index % 100)
+        record_stage_timing("openai_fit", 0.4)
+        logger.info("AI_COST | model=%s | prompt_tokens=%d | completion_tokens=%d", "gpt-4o-mini", 812, 164)
+        logger.info("Cached analysis for profile_hash=%s", f"{index:064x}")
+        if index % 20 == 0:
+            logger.warning("DB_QUERY_BUDGET_EXCEEDED | route=%s | queries=%d", "/analyze/linkedin", 14)
+
+
+class SlowStream:
+    """File wrapper that sleeps on every write."""
+
+    def __init__(self, path: str, delay: float):
+        self._file = open(path, "a", encoding="utf-8")
+        self.delay = delay
+
+    def write(self, data: str) -> int:
+        if self.delay:
+            time.sleep(self.delay)
+        return self._file.write(data)
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def _sync_pipeline(path: str, sample_rate: float, delay: float) -> Tuple[logging.Handler, Callable[[], None]]:
+    stream = SlowStream(path, delay)
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter(TEXT_FORMAT, datefmt=TEXT_DATEFMT))
+
+    def close() -> None:
+        handler.flush()
+        stream.close()
+
+    return handler, close
+
+
+def _queue_pipeline(formatter: logging.Formatter) -> Callable:
+    def build(path: str, sample_rate: float, delay: float) -> Tuple[logging.Handler, Callable[[], None]]:
+        stream = SlowStream(path, delay)
+        output = logging.StreamHandler(stream)
+        output.setFormatter(formatter)
+        log_queue: queue.Queue = queue.Queue(maxsize=10000)
+        handler = DroppingQueueHandler(log_queue)
+        handler.addFilter(SamplingFilter(sample_rate, {}))
+        handler.addFilter(RequestContextFilter())
+        listener = QueueListener(log_queue, output)
+        listener.start()
+
+        def close() -> None:
+            listener.stop()  # drains the queue
+            stream.close()
+
+        return handler, close
+
+    return build
+
+
+PIPELINES: Dict[str, Callable] = {
+    "sync_text": _sync_pipeline,
+    "queue_text": _queue_pipeline(logging.Formatter(TEXT_FORMAT, datefmt=TEXT_DATEFMT)),
+    "queue_json": _queue_pipeline(JSONFormatter()),
+}
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def run_pipeline(name: str, path: str, requests: int, threads: int, sample_rate: float, delay: float) -> dict:
+    handler, close = PIPELINES[name](path, sample_rate, delay)
+    root = logging.getLogger()
+    saved = root.handlers[:], root.level
+    root.handlers = [handler]
+    root.setLevel(logging.INFO)
+    dropped_before = DroppingQueueHandler.dropped
+
+    latencies: List[float] = []
+    lock = threading.Lock()
+    per_thread = requests // threads
+
+    def worker(offset: int) -> None:
+        local = []
+        for i in range(offset, offset + per_thread):
+            started = time.perf_counter()
+            simulated_request(i)
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(t * per_thread,)) for t in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    caller_elapsed = time.perf_counter() - started
+    close()
+    drained_elapsed = time.perf_counter() - started
+    root.handlers, root.level = saved
+
+    return {
+        "requests": len(latencies),
+        "caller_us_per_request": {
+            "mean": round(sum(latencies) / len(latencies) * 1e6, 1),
+            "p50": round(_percentile(latencies, 50) * 1e6, 1),
+            "p99": round(_percentile(latencies, 99) * 1e6, 1),
+        },
+        "caller_elapsed_s": round(caller_elapsed, 3),
+        "drained_elapsed_s": round(drained_elapsed, 3),
+        "dropped_records": DroppingQueueHandler.dropped - dropped_before,
+        "bytes_written": os.path.getsize(path),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare sync vs queue-based logging overhead per request")
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--sample-rate", type=float, default=1.0, help="LOG_INFO_SAMPLE_RATE for queue pipelines")
+    parser.add_argument("--write-delay-ms", type=float, default=0.0, help="Simulated latency of each log write")
+    parser.add_argument("--output", help="Log file to append to (default: a temp file per pipeline)")
+    parser.add_argument("--pipelines", default=",".join(PIPELINES))
+    parser.add_argument("--out", help="Write the JSON report here as well as stdout")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench-logging-") as workdir:
+        for name in args.pipelines.split(","):
+            if name not in PIPELINES:
+                raise SystemExit(f"Unknown pipeline {name!r} (choose from {', '.join(PIPELINES)})")
+            path = args.output or os.path.join(workdir, f"{name}.log")
+            results[name] = run_pipeline(
+                name, path, args.requests, args.threads, args.sample_rate, args.write_delay_ms / 1000
+            )
+
+    report = {
+        "config": {
+            "requests": args.requests,
+            "threads": args.threads,
+            "sample_rate": args.sample_rate,
+            "write_delay_ms": args.write_delay_ms,
+        },
+        "pipelines": results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as handle:
+            handle.write(output + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Measure API cold-start time the way Render pays it after a sleep: a fresh
+interpreter importing app.main (which runs create_app).
+
+    python bench_startup.py                # 5 runs against a throwaway SQLite DB
+    python bench_startup.py --runs 10 --json
+    python bench_startup.py --importtime 20 --importtime-out importtime.txt
+    python bench_startup.py --budget 1.0   # exit 1 if the median cold start exceeds 1.0s
+
+Budget check also fails if a lazily-loaded SDK (default: openai, stripe) is
+imported during startup with the default settings.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+_PROBE = (
+    "import sys, time; t0 = time.perf_counter(); import app.main; "
+    "print(f'COLD_START {time.perf_counter() - t0:.6f}'); "
+    "print('LOADED ' + ','.join(sorted(m for m in sys.modules if '.' not in m)))"
+)
+
+DEFAULT_FORBIDDEN = "openai,stripe"
+
+
+def measure_once(env: dict) -> tuple[float, set[str]]:
+    """Return (seconds to import app.main, top-level modules loaded) in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    elapsed, loaded = None, set()
+    for line in result.stdout.splitlines():
+        if line.startswith("COLD_START "):
+            elapsed = float(line.split()[1])
+        elif line.startswith("LOADED "):
+            loaded = set(line[len("LOADED "):].split(","))
+    if elapsed is None:
+        raise RuntimeError(f"No timing in output:\n{result.stdout}\n{result.stderr}")
+    return elapsed, loaded
+
+
+def importtime_report(env: dict, top: int) -> tuple[list[dict], str]:
+    """Run `python -X importtime -c 'import app.main'` and return the slowest packages by cumulative time."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append({
+            "module": name,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+        })
+    # Packages only (no submodules): a submodule's time is already in its package's cumulative time
+    packages = [row for row in rows if "." not in row["module"]]
+    packages.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+    return packages[:top], result.stderr
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--database-url", default=None, help="Defaults to a temporary SQLite file")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    parser.add_argument("--importtime", type=int, default=0, metavar="N",
+                        help="Include the N slowest package imports from python -X importtime")
+    parser.add_argument("--importtime-out", default=None, help="Write the raw -X importtime output to this file")
+    parser.add_argument("--budget", type=float, default=None, metavar="SECONDS",
+                        help="Fail if the median cold start exceeds this many seconds")
+    parser.add_argument("--forbid", default=DEFAULT_FORBIDDEN,
+                        help="Comma-separated modules that must not load at startup (default: %(default)s)")
+    args = parser.parse_args()
+
+    forbidden = {name.strip() for name in args.forbid.split(",") if name.strip()}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        env.setdefault("JWT_SECRET_KEY", "bench-secret-key-with-at-least-32-characters")
+        env.setdefault("OPENAI_ENABLED", "false")
+
+        # First run migrates the fresh DB; it is reported separately from warm-schema starts.
+        first, loaded = measure_once(env)
+        samples = [measure_once(env)[0] for _ in range(args.runs)]
+
+        slowest, raw = importtime_report(env, args.importtime) if (args.importtime or args.importtime_out) else ([], "")
+        if args.importtime_out:
+            with open(args.importtime_out, "w", encoding="utf-8") as handle:
+                handle.write(raw)
+
+    report = {
+        "first_start_s": round(first, 4),
+        "runs": args.runs,
+        "median_s": round(statistics.median(samples), 4),
+        "min_s": round(min(samples), 4),
+        "max_s": round(max(samples), 4),
+        "forbidden_loaded": sorted(forbidden & loaded),
+        "budget_s": args.budget,
+    }
+    if args.importtime:
+        report["slowest_imports"] = slowest
+    failures = []
+    if report["forbidden_loaded"]:
+        failures.append(f"lazy SDKs imported at startup: {', '.join(report['forbidden_loaded'])}")
+    if args.budget is not None and report["median_s"] > args.budget:
+        failures.append(f"median cold start {report['median_s']:.3f}s exceeds budget {args.budget:.3f}s")
+    report["ok"] = not failures
+
+    if args.json:
+        print(json.dumps(report))
+    else:
+        print(f"First start (with migrations): {report['first_start_s']:.3f}s")
+        print(f"Cold start over {args.runs} runs: median={report['median_s']:.3f}s "
+              f"min={report['min_s']:.3f}s max={report['max_s']:.3f}s")
+        if slowest:
+            print("\nSlowest package imports (python -X importtime):")
+            for row in slowest[:args.importtime]:
+                print(f"  {row['cumulative_ms']:9.1f} ms  {row['module']}")
+        for failure in failures:
+            print(f"❌ {failure}")
+        if not failures:
+            print("✅ Startup budget OK")
+    return 0 if not failures else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Throughput of the /events/track ingestion path (app.core.event_buffer).
+
+Pushes N synthetic events through an EventBuffer from several threads against
+a throwaway SQLite DB (or --database-url) and prints one JSON document with
+the caller-side offer() latency, batch insert throughput and what the overflow
+policy dropped. --baseline also times one INSERT + commit per event, i.e. what
+writing synchronously from the endpoint would cost:
+
+    python bench_tracking.py --events 50000 --threads 8 --batch-size 500
+    python bench_tracking.py --events 50000 --buffer-size 2000 --overflow-policy drop_oldest
+    python bench_tracking.py --sink file --baseline
+"""
+import argparse
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+
+def _event(index: int) -> dict:
+    return {
+        "event": "install_extension_click" if index % 3 else "waitlist_join",
+        "page": "landing",
+        "referrer": None if index % 2 else "https://news.ycombinator.com",
+        "ip_prefix": "10.0.0.1***",
+        "user_agent": "Mozilla/5.0 (bench)",
+        "created_at": datetime.now(timezone.utc),
+    }
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def run(args: argparse.Namespace, workdir: str) -> dict:
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    from sqlalchemy import insert
+
+    from app.core.db import get_engine
+    from app.core.event_buffer import EventBuffer, FileSink, db_sink
+    from app.models.tracking_event import TrackingEvent
+
+    TrackingEvent.__table__.create(bind=get_engine(), checkfirst=True)
+    sink = db_sink if args.sink == "db" else FileSink(os.path.join(workdir, "events"))
+    buffer = EventBuffer(
+        sink,
+        capacity=args.buffer_size,
+        batch_size=args.batch_size,
+        flush_interval=args.flush_interval,
+        overflow_policy=args.overflow_policy,
+    ).start()
+
+    latencies: List[float] = []
+    lock = threading.Lock()
+    per_thread = args.events // args.threads
+
+    def worker(offset: int) -> None:
+        local = []
+        for i in range(offset, offset + per_thread):
+            event = _event(i)
+            started = time.perf_counter()
+            buffer.offer(event)
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(t * per_thread,)) for t in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    offered_elapsed = time.perf_counter() - started
+    buffer.close()
+    drained_elapsed = time.perf_counter() - started
+
+    report = {
+        "config": {
+            "events": args.events,
+            "threads": args.threads,
+            "sink": args.sink,
+            "buffer_size": args.buffer_size,
+            "batch_size": args.batch_size,
+            "flush_interval_s": args.flush_interval,
+            "overflow_policy": args.overflow_policy,
+        },
+        "offer_us": {
+            "mean": round(sum(latencies) / len(latencies) * 1e6, 2),
+            "p50": round(_percentile(latencies, 50) * 1e6, 2),
+            "p99": round(_percentile(latencies, 99) * 1e6, 2),
+        },
+        "offered_per_second": round(len(latencies) / offered_elapsed, 1),
+        "drained_elapsed_s": round(drained_elapsed, 3),
+        "buffer": buffer.snapshot(),
+    }
+
+    if args.baseline and args.sink == "db":
+        engine = get_engine()
+        count = min(args.events, 2000)
+        started = time.perf_counter()
+        for i in range(count):
+            with engine.begin() as conn:
+                conn.execute(insert(TrackingEvent.__table__), [_event(i)])
+        report["baseline_single_insert_rows_per_second"] = round(count / (time.perf_counter() - started), 1)
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark buffered /events/track ingestion")
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--sink", choices=("db", "file"), default="db")
+    parser.add_argument("--buffer-size", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--flush-interval", type=float, default=0.5)
+    parser.add_argument("--overflow-policy", choices=("drop_newest", "drop_oldest"), default="drop_newest")
+    parser.add_argument("--database-url", help="Default: throwaway SQLite file")
+    parser.add_argument("--baseline", action="store_true", help="Also time one INSERT per event (db sink)")
+    parser.add_argument("--out", help="Write the JSON report here as well as stdout")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-tracking-")
+    try:
+        report = run(args, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as handle:
+            handle.write(output + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+Replay benchmark for POST /billing/webhook/stripe.
+
+Generates a signed event stream locally, one subscription lifecycle per
+customer (customer.subscription.created, checkout.session.completed, plan
+changes via customer.subscription.updated, optionally
+customer.subscription.deleted), then:
+
+- delivers it like Stripe does: a share of events twice (same event id) and a
+  share displaced by up to --reorder-window positions
+- replays it at --rate events/s (open loop, 0 = as fast as possible) from
+  --concurrency connections against a uvicorn instance on a throwaway SQLite
+  DB (or --database-url), with fake_stripe_server.py standing in for
+  Subscription.retrieve
+- waits for the durable queue (stripe_events) to drain
+
+and prints one JSON document: acknowledgement throughput/latency, processing
+throughput and lag, outcome counts, Stripe API calls, and whether every
+user's final plan / subscription_status / subscription id matches the
+lifecycle's last event:
+
+    python bench_webhooks.py --customers 500 --rate 200 --concurrency 8
+    python bench_webhooks.py --duplicate-ratio 0.2 --reorder-ratio 0.3 --webhook-workers 4 --out webhooks.json
+"""
+import argparse
+import hashlib
+import hmac
+import http.client
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+from bench_analyze import _free_port, _git_commit, _percentile, _wait_ready  # noqa: E402
+from fake_stripe_server import PLAN_PRICES, FakeStripeServer, generate_fixture, plan_price_id  # noqa: E402
+
+WEBHOOK_PATH = "/billing/webhook/stripe"
+WEBHOOK_SECRET = "whsec_bench"
+PLANS = tuple(PLAN_PRICES)
+BASE_CREATED = 1_750_000_000
+_PRICES = {price["id"]: price for price in generate_fixture()["prices"]}
+
+
+@dataclass
+class Delivery:
+    event_id: str
+    event_type: str
+    customer: str
+    payload: bytes
+    duplicate: bool = False
+
+
+@dataclass
+class Sample:
+    event_type: str
+    status: int
+    seconds: float
+    queued: Optional[bool]
+    behind: float  # how late the send started vs. its schedule
+
+
+def sign(payload: bytes, secret: str = WEBHOOK_SECRET, timestamp: Optional[int] = None) -> str:
+    """Stripe-Signature header value (t=..,v1=HMAC-SHA256 of "t.payload")."""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    digest = hmac.new(secret.encode("utf-8"), f"{timestamp}.".encode("utf-8") + payload, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def _subscription(subscription_id: str, customer: str, plan: str, status: str, created: int) -> dict:
+    price = _PRICES[plan_price_id(plan)]
+    period_end = created + 30 * 86_400
+    return {
+        "id": subscription_id,
+        "object": "subscription",
+        "customer": customer,
+        "status": status,
+        "created": created,
+        "cancel_at_period_end": False,
+        "current_period_end": period_end,
+        "items": {"object": "list", "data": [{"id": f"si_{subscription_id}", "price": price, "current_period_end": period_end}]},
+    }
+
+
+def _event(event_id: str, event_type: str, created: int, obj: dict) -> dict:
+    return {"id": event_id, "object": "event", "type": event_type, "created": created, "data": {"object": obj}}
+
+
+def build_stream(
+    user_ids: List[int],
+    max_updates: int = 2,
+    cancel_ratio: float = 0.2,
+    seed: int = 1,
+    prefix: str = "bench",
+) -> Tuple[List[dict], List[dict], Dict[int, Tuple[str, str, str]]]:
+    """
+    Events in Stripe `created` order, the final subscriptions (the fake Stripe's
+    state) and the expected (plan, subscription_status, subscription_id) per user.
+    `prefix` namespaces event/customer/subscription ids so runs can share a DB.
+    """
+    rng = random.Random(seed)
+    events: List[dict] = []
+    subscriptions: List[dict] = []
+    expected: Dict[int, Tuple[str, str, str]] = {}
+    for index, user_id in enumerate(user_ids):
+        customer, subscription_id = f"cus_{prefix}_{index:06d}", f"sub_{prefix}_{index:06d}"
+        created = BASE_CREATED + index * 100
+        plan = rng.choice(PLANS)
+        lifecycle = [
+            ("customer.subscription.created", _subscription(subscription_id, customer, plan, "active", created)),
+            ("checkout.session.completed", {
+                "id": f"cs_{prefix}_{index:06d}",
+                "object": "checkout.session",
+                "client_reference_id": str(user_id),
+                "customer": customer,
+                "subscription": subscription_id,
+                "metadata": {"user_id": str(user_id), "plan": plan},
+            }),
+        ]
+        for _ in range(rng.randint(0, max_updates)):
+            plan = rng.choice([other for other in PLANS if other != plan])
+            lifecycle.append(("customer.subscription.updated", _subscription(subscription_id, customer, plan, "active", created)))
+        status = "active"
+        if rng.random() < cancel_ratio:
+            status = "canceled"
+            lifecycle.append(("customer.subscription.deleted", _subscription(subscription_id, customer, plan, status, created)))
+
+        for step, (event_type, obj) in enumerate(lifecycle):
+            events.append(_event(f"evt_{prefix}_{index:06d}_{step}", event_type, created + step, obj))
+        subscriptions.append(_subscription(subscription_id, customer, plan, status, created))
+        expected[user_id] = ("free", "canceled", subscription_id) if status == "canceled" else (plan, "active", subscription_id)
+    return events, subscriptions, expected
+
+
+def schedule(
+    events: List[dict],
+    duplicate_ratio: float = 0.0,
+    reorder_ratio: float = 0.0,
+    reorder_window: int = 10,
+    seed: int = 1,
+) -> List[Delivery]:
+    """Delivery order: events (plus duplicates) with a share moved later by up to reorder_window slots."""
+    rng = random.Random(seed)
+    deliveries: List[Delivery] = []
+    for event in events:
+        payload = json.dumps(event).encode("utf-8")
+        customer = event["data"]["object"]["customer"]
+        deliveries.append(Delivery(event["id"], event["type"], customer, payload))
+        if rng.random() < duplicate_ratio:
+            deliveries.append(Delivery(event["id"], event["type"], customer, payload, duplicate=True))
+
+    keys = []
+    for position in range(len(deliveries)):
+        shift = rng.randint(1, reorder_window) if reorder_window and rng.random() < reorder_ratio else 0
+        keys.append((position + shift, position))
+    return [deliveries[position] for _, position in sorted(keys)]
+
+
+def expected_mismatches(rows: List[Tuple[int, str, Optional[str], Optional[str]]], expected: Dict[int, Tuple[str, str, str]]) -> List[dict]:
+    """Compare (user_id, plan, subscription_status, stripe_subscription_id) rows with the expected end state."""
+    actual = {user_id: (plan, status, subscription_id) for user_id, plan, status, subscription_id in rows}
+    mismatches = []
+    for user_id, want in expected.items():
+        got = actual.get(user_id)
+        if got != want:
+            mismatches.append({"user_id": user_id, "expected": list(want), "actual": list(got) if got else None})
+    return mismatches
+
+
+# --- setup --------------------------------------------------------------------
+
+def _seed_users(database_url: str, customers: int) -> List[int]:
+    os.environ["DATABASE_URL"] = database_url
+    from app.core.db import get_engine, get_session_factory
+    from app.core.migrations import run_migrations
+    from app.models.user import User
+
+    run_migrations(get_engine())
+    db = get_session_factory()()
+    try:
+        users = [User(email=f"bench-webhook-{i}@example.com", plan="free") for i in range(customers)]
+        db.add_all(users)
+        db.commit()
+        return [user.id for user in users]
+    finally:
+        db.close()
+
+
+def _queue_counts() -> Dict[str, int]:
+    from sqlalchemy import func, select
+
+    from app.core.db import get_session_factory
+    from app.models.stripe_event import StripeEvent
+
+    db = get_session_factory()()
+    try:
+        return dict(db.execute(select(StripeEvent.status, func.count()).group_by(StripeEvent.status)).all())
+    finally:
+        db.close()
+
+
+def _processing_lags() -> List[float]:
+    from sqlalchemy import select
+
+    from app.core.db import get_session_factory
+    from app.core.utils import as_utc
+    from app.models.stripe_event import StripeEvent
+
+    db = get_session_factory()()
+    try:
+        rows = db.execute(
+            select(StripeEvent.received_at, StripeEvent.processed_at).where(StripeEvent.processed_at.isnot(None))
+        ).all()
+        return sorted((as_utc(done) - as_utc(received)).total_seconds() * 1000 for received, done in rows)
+    finally:
+        db.close()
+
+
+def _user_rows(user_ids: List[int]) -> list:
+    from sqlalchemy import select
+
+    from app.core.db import get_session_factory
+    from app.models.user import User
+
+    db = get_session_factory()()
+    try:
+        return db.execute(
+            select(User.id, User.plan, User.subscription_status, User.stripe_subscription_id).where(User.id.in_(user_ids))
+        ).all()
+    finally:
+        db.close()
+
+
+# --- client side --------------------------------------------------------------
+
+def _sender(port: int, deliveries: List[Delivery], cursor: List[int], lock: threading.Lock, rate: float,
+            started: float, samples: List[Sample]) -> None:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    local: List[Sample] = []
+    while True:
+        with lock:
+            index = cursor[0]
+            cursor[0] += 1
+        if index >= len(deliveries):
+            break
+        delivery = deliveries[index]
+        due = started + index / rate if rate else time.perf_counter()
+        wait = due - time.perf_counter()
+        if wait > 0:
+            time.sleep(wait)
+        behind = max(time.perf_counter() - due, 0.0)
+        headers = {"Content-Type": "application/json", "Stripe-Signature": sign(delivery.payload)}
+        send_started = time.perf_counter()
+        queued = None
+        try:
+            conn.request("POST", WEBHOOK_PATH, body=delivery.payload, headers=headers)
+            response = conn.getresponse()
+            body = response.read()
+            status = response.status
+            if status == 200:
+                queued = json.loads(body).get("queued")
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+            status = 0
+        local.append(Sample(delivery.event_type, status, time.perf_counter() - send_started, queued, behind))
+    conn.close()
+    with lock:
+        samples.extend(local)
+
+
+def summarize(samples: List[Sample], elapsed: float) -> dict:
+    latencies = sorted(sample.seconds * 1000 for sample in samples)
+    statuses: Dict[str, int] = {}
+    for sample in samples:
+        statuses[str(sample.status)] = statuses.get(str(sample.status), 0) + 1
+    return {
+        "deliveries": len(samples),
+        "acked": sum(1 for sample in samples if sample.status == 200),
+        "queued": sum(1 for sample in samples if sample.queued),
+        "duplicates_detected": sum(1 for sample in samples if sample.queued is False),
+        "errors": sum(1 for sample in samples if sample.status != 200),
+        "status_codes": statuses,
+        "rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(_percentile(latencies, 50), 2),
+        "p95_ms": round(_percentile(latencies, 95), 2),
+        "p99_ms": round(_percentile(latencies, 99), 2),
+        "max_behind_schedule_ms": round(max((sample.behind for sample in samples), default=0.0) * 1000, 2),
+    }
+
+
+def run(args: argparse.Namespace) -> dict:
+    workdir = tempfile.mkdtemp(prefix="bench-webhooks-")
+    database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    user_ids = _seed_users(database_url, args.customers)
+    events, subscriptions, expected = build_stream(user_ids, args.max_updates, args.cancel_ratio, args.seed)
+    deliveries = schedule(events, args.duplicate_ratio, args.reorder_ratio, args.reorder_window, args.seed)
+
+    fixture = generate_fixture(customers=0)
+    fixture["subscriptions"] = subscriptions
+    fake_stripe = FakeStripeServer(port=0, fixture=fixture, latency=args.stripe_latency, seed=args.seed).start()
+
+    api_port = _free_port()
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "AUTO_MIGRATE": "false",
+        "STRIPE_API_KEY": "sk_test_bench",
+        "STRIPE_API_BASE": fake_stripe.base_url,
+        "STRIPE_WEBHOOK_SECRET": WEBHOOK_SECRET,
+        "STRIPE_WEBHOOK_WORKERS": str(args.webhook_workers),
+        "STRIPE_WEBHOOK_POLL_SECONDS": "0.2",
+        "STRIPE_WEBHOOK_RETRY_BASE_SECONDS": "0.5",
+        **{f"STRIPE_PRICE_{plan.upper()}_ID": plan_price_id(plan) for plan in PLANS},
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(api_port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=None if args.verbose else subprocess.DEVNULL,
+    )
+    try:
+        _wait_ready(api_port, process)
+        samples: List[Sample] = []
+        lock = threading.Lock()
+        cursor = [0]
+        started = time.perf_counter()
+        threads = [
+            threading.Thread(target=_sender, args=(api_port, deliveries, cursor, lock, args.rate, started, samples))
+            for _ in range(args.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        sent = time.perf_counter()
+
+        counts: Dict[str, int] = {}
+        deadline = sent + args.drain_timeout
+        while time.perf_counter() < deadline:
+            counts = _queue_counts()
+            if not any(counts.get(status) for status in ("pending", "processing", "failed")):
+                break
+            time.sleep(0.1)
+        drained = time.perf_counter()
+        lags = _processing_lags()
+        mismatches = expected_mismatches(_user_rows(user_ids), expected)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        fake_stripe.stop()
+        if not args.keep_db:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    finished = sum(counts.get(status, 0) for status in ("processed", "skipped", "dead"))
+    return {
+        "commit": _git_commit(),
+        "config": {
+            "database": "postgresql" if database_url.startswith("postgres") else "sqlite",
+            "customers": args.customers,
+            "events": len(events),
+            "deliveries": len(deliveries),
+            "rate": args.rate,
+            "concurrency": args.concurrency,
+            "webhook_workers": args.webhook_workers,
+            "duplicate_ratio": args.duplicate_ratio,
+            "reorder_ratio": args.reorder_ratio,
+            "reorder_window": args.reorder_window,
+            "stripe_latency": args.stripe_latency,
+            "seed": args.seed,
+        },
+        "ingest": {"elapsed_s": round(sent - started, 3), **summarize(samples, sent - started)},
+        "processing": {
+            "drained": not any(counts.get(status) for status in ("pending", "processing", "failed")),
+            "elapsed_s": round(drained - started, 3),
+            "events_per_s": round(finished / (drained - started), 2) if drained > started else 0.0,
+            "outcomes": counts,
+            "lag_p50_ms": round(_percentile(lags, 50), 2),
+            "lag_p95_ms": round(_percentile(lags, 95), 2),
+            "lag_max_ms": round(lags[-1], 2) if lags else 0.0,
+        },
+        "stripe_api": dict(fake_stripe.stats.by_path),
+        "consistency": {
+            "users": len(expected),
+            "consistent": len(expected) - len(mismatches),
+            "mismatches": mismatches[: args.show_mismatches],
+        },
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay signed Stripe webhook streams against the API")
+    parser.add_argument("--customers", type=int, default=300, help="Subscription lifecycles to generate")
+    parser.add_argument("--max-updates", type=int, default=2, help="Plan changes per lifecycle (0..N)")
+    parser.add_argument("--cancel-ratio", type=float, default=0.2, help="Share of lifecycles ending in deleted")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.1, help="Share of events delivered twice")
+    parser.add_argument("--reorder-ratio", type=float, default=0.2, help="Share of deliveries moved later")
+    parser.add_argument("--reorder-window", type=int, default=10, help="Max positions a delivery moves")
+    parser.add_argument("--rate", type=float, default=0.0, help="Target deliveries/s (0 = as fast as possible)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Sender connections")
+    parser.add_argument("--webhook-workers", type=int, default=2, help="STRIPE_WEBHOOK_WORKERS for the API")
+    parser.add_argument("--stripe-latency", default="fixed:0.05", help="Fake Stripe latency spec")
+    parser.add_argument("--drain-timeout", type=float, default=120.0, help="Seconds to wait for the queue")
+    parser.add_argument("--database-url", help="Default: throwaway SQLite file")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--show-mismatches", type=int, default=20)
+    parser.add_argument("--out", help="Write the JSON report here as well as stdout")
+    parser.add_argument("--keep-db", action="store_true")
+    parser.add_argument("--verbose", action="store_true", help="Show API server logs")
+    args = parser.parse_args()
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    consistency = report["consistency"]
+    return 0 if report["processing"]["drained"] and consistency["consistent"] == consistency["users"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
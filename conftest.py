@@ -0,0 +1,43 @@
+"""
+Shared pytest setup: every test gets its own SQLite database under tmp_path.
+
+app.main builds an app (and migrates DATABASE_URL) at import time, so imports
+run against an in-memory database; each test then points the cached settings
+and engines at a fresh, migrated file and drops them afterwards. Nothing is
+written to the repo root and tests don't share rows.
+"""
+
+import os
+
+os.environ["DATABASE_URL"] = "sqlite://"
+
+import pytest
+
+from app.core import db as db_module
+from app.core.config import get_settings
+from app.core.migrations import run_migrations
+
+_ENGINE_CACHES = (
+    db_module.get_engine,
+    db_module.get_session_factory,
+    db_module.get_async_engine,
+    db_module.get_async_session_factory,
+)
+
+
+def _reset_engines() -> None:
+    if db_module.get_engine.cache_info().currsize:
+        db_module.get_engine().dispose()
+    for factory in _ENGINE_CACHES:
+        factory.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def database_url(tmp_path, monkeypatch):
+    """A fresh SQLite file at the latest schema as DATABASE_URL for this test; yields the URL."""
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    monkeypatch.setattr(get_settings(), "database_url", url)
+    _reset_engines()
+    run_migrations(db_module.get_engine())
+    yield url
+    _reset_engines()
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Deterministic local stand-in for the OpenAI chat-completions API.
+
+Unlike the in-process mock mode (no API key), this exercises the real client
+path: the OpenAI SDK, HTTP, timeouts, JSON parsing and the retry/backoff logic
+in _run_chat_json.
+
+    python fake_openai_server.py                              # http://127.0.0.1:8900/v1
+    python fake_openai_server.py --latency lognormal:0.8,0.4 --rate-limit 0.05 --server-error 0.02
+    python fake_openai_server.py --timeout 0.01 --hang-seconds 40 --invalid-json 0.01 --seed 7
+
+Point the backend at it:
+
+    OPENAI_ENABLED=true OPENAI_API_KEY=sk-fake OPENAI_BASE_URL=http://127.0.0.1:8900/v1 uvicorn app.main:app
+
+Latency specs: fixed:S | uniform:LO,HI | normal:MEAN,STD | lognormal:MEDIAN,SIGMA (seconds).
+Responses are valid FitScoringResult / DecisionResult JSON derived from a hash
+of the request payload, so the same profile always gets the same score. Fault
+and latency draws come from a seeded RNG (reproducible for a given request order).
+GET /stats returns request counters.
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+
+DEFAULT_PORT = 8900
+DEFAULT_MODEL = "gpt-4o-mini-2024-07-18"
+
+_DIMENSIONS = (
+    "seniority_match",
+    "industry_match",
+    "company_size_match",
+    "skills_match",
+    "experience_match",
+    "engagement_level",
+)
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Turn a latency spec (see module docstring) into a sampler returning seconds."""
+    kind, _, raw = spec.partition(":")
+    args = [float(value) for value in raw.split(",") if value.strip()] if raw else []
+    if kind == "fixed" and len(args) == 1:
+        return lambda rng: args[0]
+    if kind == "uniform" and len(args) == 2:
+        return lambda rng: rng.uniform(args[0], args[1])
+    if kind == "normal" and len(args) == 2:
+        return lambda rng: max(0.0, rng.gauss(args[0], args[1]))
+    if kind == "lognormal" and len(args) == 2:
+        return lambda rng: rng.lognormvariate(math.log(args[0]), args[1])
+    raise ValueError(f"Invalid latency spec: {spec!r}")
+
+
+@dataclass
+class FaultConfig:
+    """Per-request probabilities of each injected failure (checked in this order)."""
+
+    rate_limit: float = 0.0
+    server_error: float = 0.0
+    timeout: float = 0.0
+    invalid_json: float = 0.0
+    hang_seconds: float = 60.0
+
+
+@dataclass
+class ServerStats:
+    requests: int = 0
+    ok: int = 0
+    rate_limited: int = 0
+    server_errors: int = 0
+    timeouts: int = 0
+    invalid_json: int = 0
+    by_kind: Dict[str, int] = field(default_factory=dict)
+
+
+def _payload_digest(payload: object) -> bytes:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).digest()
+
+
+def _extract_input(messages: list) -> dict:
+    """Return the INPUT JSON the backend appends to the user message (empty dict if absent)."""
+    for message in reversed(messages or []):
+        content = message.get("content") or ""
+        _, marker, tail = content.partition("INPUT JSON:")
+        if marker:
+            try:
+                return json.loads(tail.strip())
+            except json.JSONDecodeError:
+                return {}
+    return {}
+
+
+def fit_response(payload: dict) -> dict:
+    """Schema-valid FitScoringResult derived from the payload hash."""
+    digest = _payload_digest(payload)
+    dimensions = {name: float(40 + digest[index] % 60) for index, name in enumerate(_DIMENSIONS)}
+    overall = round(sum(dimensions.values()) / len(dimensions), 1)
+    return {
+        "overall_score": overall,
+        "dimension_scores": dimensions,
+        "positive_signals": ["Seniority aligned with ICP", "Relevant industry experience"][: 1 + digest[6] % 2],
+        "negative_signals": ["Limited recent activity"] if digest[7] % 3 == 0 else [],
+        "data_quality": float(60 + digest[8] % 40),
+        "confidence": float(55 + digest[9] % 45),
+    }
+
+
+def decision_response(payload: dict) -> dict:
+    """Schema-valid DecisionResult consistent with the qualification score."""
+    qualification = payload.get("qualification") or {}
+    score = float(qualification.get("overall_score", 50.0))
+    priority = "high" if score >= 80 else "medium" if score >= 60 else "low"
+    return {
+        "should_contact": score >= 60,
+        "priority": priority,
+        "score": score,
+        "reasoning": f"Synthetic decision for overall score {score}.",
+        "key_points": list(qualification.get("positive_signals") or ["Synthetic key point"])[:3],
+        "suggested_approach": "Reference their current role and a concrete pain point.",
+        "red_flags": list(qualification.get("negative_signals") or []),
+        "next_steps": "Send a personalized LinkedIn message.",
+    }
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class FakeOpenAIServer:
+    """Threaded HTTP server; usable from the CLI or started in-process by tests."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_PORT,
+        latency: str = "fixed:0",
+        faults: Optional[FaultConfig] = None,
+        seed: int = 0,
+        model: str = DEFAULT_MODEL,
+    ):
+        self.faults = faults or FaultConfig()
+        self.model = model
+        self.stats = ServerStats()
+        self._sample_latency = parse_latency(latency)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _draw(self) -> tuple[float, Optional[str]]:
+        """Pick (latency, fault) for one request under the lock so draws stay reproducible."""
+        with self._lock:
+            self.stats.requests += 1
+            latency = self._sample_latency(self._rng)
+            roll = self._rng.random()
+        threshold = 0.0
+        for fault in ("rate_limit", "server_error", "timeout", "invalid_json"):
+            threshold += getattr(self.faults, fault)
+            if roll < threshold:
+                return latency, fault
+        return latency, None
+
+    def _count(self, attr: str, kind: Optional[str] = None) -> None:
+        with self._lock:
+            setattr(self.stats, attr, getattr(self.stats, attr) + 1)
+            if kind:
+                self.stats.by_kind[kind] = self.stats.by_kind.get(kind, 0) + 1
+
+    def completion(self, request: dict, content: str) -> dict:
+        prompt_text = "".join(str(message.get("content") or "") for message in request.get("messages") or [])
+        prompt_tokens = _estimate_tokens(prompt_text)
+        completion_tokens = _estimate_tokens(content)
+        return {
+            "id": f"chatcmpl-fake-{hashlib.sha1(prompt_text.encode('utf-8')).hexdigest()[:16]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": self.model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": 0},
+            },
+        }
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):  # noqa: A002 - keep load tests quiet
+                return
+
+            def _send_json(self, status: int, body: dict, headers: Optional[dict] = None) -> None:
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_error(self, status: int, message: str, error_type: str, headers: Optional[dict] = None) -> None:
+                self._send_json(status, {"error": {"message": message, "type": error_type, "code": None}}, headers)
+
+            def do_GET(self):
+                if self.path.rstrip("/") == "/stats":
+                    with server._lock:
+                        self._send_json(200, {**server.stats.__dict__, "by_kind": dict(server.stats.by_kind)})
+                    return
+                self._send_error(404, "Not found", "invalid_request_error")
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                if self.path.rstrip("/") not in ("/v1/chat/completions", "/chat/completions"):
+                    self._send_error(404, "Not found", "invalid_request_error")
+                    return
+                try:
+                    request = json.loads(raw or b"{}")
+                except json.JSONDecodeError:
+                    self._send_error(400, "Request body is not valid JSON", "invalid_request_error")
+                    return
+
+                latency, fault = server._draw()
+                if fault == "timeout":
+                    server._count("timeouts")
+                    server._stopping.wait(server.faults.hang_seconds)
+                    return
+                if latency > 0:
+                    time.sleep(latency)
+
+                if fault == "rate_limit":
+                    server._count("rate_limited")
+                    self._send_error(429, "Rate limit reached (injected)", "rate_limit_exceeded", {"Retry-After": "1"})
+                    return
+                if fault == "server_error":
+                    server._count("server_errors")
+                    self._send_error(500, "Internal server error (injected)", "server_error")
+                    return
+
+                payload = _extract_input(request.get("messages") or [])
+                if "qualification" in payload:
+                    kind, body = "decision", decision_response(payload)
+                else:
+                    kind, body = "fit", fit_response(payload)
+
+                if fault == "invalid_json":
+                    server._count("invalid_json", kind)
+                    content = json.dumps(body)[:-7]  # truncated mid-object
+                else:
+                    server._count("ok", kind)
+                    content = json.dumps(body)
+                self._send_json(200, server.completion(request, content))
+
+        return Handler
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local fake OpenAI chat-completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", default="lognormal:0.6,0.35", help="Latency distribution spec (seconds)")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--server-error", type=float, default=0.0, help="Fraction answered with 500")
+    parser.add_argument("--timeout", type=float, default=0.0, help="Fraction that hang for --hang-seconds")
+    parser.add_argument("--invalid-json", type=float, default=0.0, help="Fraction whose content is truncated JSON")
+    parser.add_argument("--hang-seconds", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    args = parser.parse_args()
+
+    faults = FaultConfig(args.rate_limit, args.server_error, args.timeout, args.invalid_json, args.hang_seconds)
+    server = FakeOpenAIServer(args.host, args.port, args.latency, faults, args.seed, args.model)
+    print(f"Fake OpenAI listening on {server.base_url} (latency={args.latency}, faults={faults})")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Deterministic local stand-in for the parts of the Stripe API the backend and
+the maintenance scripts use:
+
+    GET  /v1/products, /v1/prices, /v1/subscriptions   (cursor pagination: limit, starting_after)
+    GET  /v1/subscriptions/{id}
+    POST /v1/products/{id}, /v1/prices/{id}            (modify; only `active` is applied)
+
+    python fake_stripe_server.py                                  # http://127.0.0.1:8901
+    python fake_stripe_server.py --customers 5000 --latency fixed:0.05 --seed 3
+
+Point the SDK at it (the real client path: paging, HTTP, JSON decoding):
+
+    stripe.api_key = "sk_test_fake"; stripe.api_base = server.base_url
+
+The catalog mirrors production (Starter/Pro/Team plus archived legacy products);
+`generate_fixture` adds N customers with subscriptions in a realistic status
+mix. List filters supported: products/prices `active`, prices `product`,
+subscriptions `status` (default excludes canceled, like Stripe; `all`
+includes it) and `customer`. Latency specs are the same as fake_openai_server.py.
+GET /stats returns request counters.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from fake_openai_server import parse_latency
+
+DEFAULT_PORT = 8901
+PLAN_PRICES = {"starter": 900, "pro": 1900, "team": 4900}
+SUBSCRIPTION_STATUSES = ("active", "trialing", "past_due", "canceled", "unpaid", "incomplete", "incomplete_expired", "paused")
+_MAX_LIMIT = 100
+
+
+@dataclass
+class ServerStats:
+    requests: int = 0
+    by_path: Dict[str, int] = field(default_factory=dict)
+
+
+def plan_price_id(plan: str) -> str:
+    return f"price_fake_{plan}"
+
+
+def generate_fixture(customers: int = 0, legacy_products: int = 3, seed: int = 0) -> Dict[str, List[dict]]:
+    """Catalog (3 live plans + archived legacy products) and `customers` subscriptions."""
+    rng = random.Random(seed)
+    created = 1_700_000_000
+    products: List[dict] = []
+    prices: List[dict] = []
+
+    def add_product(product_id: str, name: str, active: bool, amount: int, price_id: str) -> None:
+        products.append({"id": product_id, "object": "product", "name": name, "active": active, "created": created})
+        prices.append({
+            "id": price_id,
+            "object": "price",
+            "product": product_id,
+            "active": active,
+            "unit_amount": amount,
+            "currency": "usd",
+            "recurring": {"interval": "month"},
+            "created": created,
+        })
+
+    for plan, amount in PLAN_PRICES.items():
+        add_product(f"prod_fake_{plan}", f"LinkedIn Lead Checker – {plan.title()}", True, amount, plan_price_id(plan))
+    for index in range(legacy_products):
+        add_product(f"prod_fake_legacy{index}", f"Legacy {index}", False, 999, f"price_fake_legacy{index}")
+
+    statuses = ("active",) * 14 + ("trialing", "past_due", "canceled", "canceled", "unpaid", "incomplete")
+    subscriptions: List[dict] = []
+    for index in range(customers):
+        plan = rng.choice(tuple(PLAN_PRICES))
+        period_end = created + 86_400 * rng.randint(1, 60)
+        subscriptions.append({
+            "id": f"sub_fake_{index:06d}",
+            "object": "subscription",
+            "customer": f"cus_fake_{index:06d}",
+            "status": rng.choice(statuses),
+            "created": created + index,
+            "cancel_at_period_end": False,
+            "current_period_end": period_end,
+            "items": {
+                "object": "list",
+                "data": [{
+                    "id": f"si_fake_{index:06d}",
+                    "object": "subscription_item",
+                    "price": prices[list(PLAN_PRICES).index(plan)],
+                    "current_period_end": period_end,
+                }],
+            },
+        })
+    return {"products": products, "prices": prices, "subscriptions": subscriptions}
+
+
+def _matches(obj: dict, filters: Dict[str, str], kind: str) -> bool:
+    active = filters.get("active")
+    if active is not None and obj.get("active") != (active == "true"):
+        return False
+    if kind == "prices" and "product" in filters and obj.get("product") != filters["product"]:
+        return False
+    if kind == "subscriptions":
+        if "customer" in filters and obj.get("customer") != filters["customer"]:
+            return False
+        status = filters.get("status")
+        if status is None:
+            return obj.get("status") != "canceled"
+        if status != "all" and obj.get("status") != status:
+            return False
+    return True
+
+
+class FakeStripeServer:
+    """Threaded HTTP server; usable from the CLI or started in-process by tests."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_PORT,
+        fixture: Optional[Dict[str, List[dict]]] = None,
+        latency: str = "fixed:0",
+        seed: int = 0,
+    ):
+        fixture = fixture if fixture is not None else generate_fixture(seed=seed)
+        # Insertion order = list order (Stripe lists newest first; order only has to be stable)
+        self.objects: Dict[str, Dict[str, dict]] = {
+            kind: {obj["id"]: obj for obj in fixture.get(kind, [])} for kind in ("products", "prices", "subscriptions")
+        }
+        self.stats = ServerStats()
+        self._sample_latency = parse_latency(latency)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _record(self, path: str) -> float:
+        with self._lock:
+            self.stats.requests += 1
+            self.stats.by_path[path] = self.stats.by_path.get(path, 0) + 1
+            return self._sample_latency(self._rng)
+
+    def list_page(self, kind: str, params: Dict[str, str]) -> dict:
+        limit = max(1, min(int(params.get("limit", 10)), _MAX_LIMIT))
+        with self._lock:
+            ids = list(self.objects[kind])
+            start = ids.index(params["starting_after"]) + 1 if params.get("starting_after") in self.objects[kind] else 0
+            page: List[dict] = []
+            has_more = False
+            for object_id in ids[start:]:
+                obj = self.objects[kind][object_id]
+                if not _matches(obj, params, kind):
+                    continue
+                if len(page) == limit:
+                    has_more = True
+                    break
+                page.append(obj)
+        return {"object": "list", "url": f"/v1/{kind}", "has_more": has_more, "data": page}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):  # noqa: A002 - keep load tests quiet
+                return
+
+            def _send_json(self, status: int, body: dict) -> None:
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("Request-Id", f"req_fake_{server.stats.requests}")
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _not_found(self, message: str = "Not found") -> None:
+                self._send_json(404, {"error": {"type": "invalid_request_error", "message": message}})
+
+            def _route(self) -> tuple[List[str], Dict[str, str]]:
+                url = urlparse(self.path)
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                return [part for part in url.path.split("/") if part], params
+
+            def do_GET(self):
+                parts, params = self._route()
+                if parts == ["stats"]:
+                    with server._lock:
+                        self._send_json(200, {"requests": server.stats.requests, "by_path": dict(server.stats.by_path)})
+                    return
+                if len(parts) < 2 or parts[0] != "v1" or parts[1] not in server.objects:
+                    self._not_found()
+                    return
+                latency = server._record(f"GET /v1/{parts[1]}" + ("/{id}" if len(parts) > 2 else ""))
+                if latency > 0:
+                    time.sleep(latency)
+                if len(parts) == 2:
+                    self._send_json(200, server.list_page(parts[1], params))
+                    return
+                obj = server.objects[parts[1]].get(parts[2])
+                if obj is None:
+                    self._not_found(f"No such {parts[1][:-1]}: '{parts[2]}'")
+                    return
+                self._send_json(200, obj)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                form = parse_qs((self.rfile.read(length) if length else b"").decode("utf-8"))
+                parts, _ = self._route()
+                if len(parts) != 3 or parts[0] != "v1" or parts[1] not in ("products", "prices"):
+                    self._not_found()
+                    return
+                server._record(f"POST /v1/{parts[1]}/{{id}}")
+                with server._lock:
+                    obj = server.objects[parts[1]].get(parts[2])
+                    if obj is not None and "active" in form:
+                        obj["active"] = form["active"][-1] == "true"
+                if obj is None:
+                    self._not_found(f"No such {parts[1][:-1]}: '{parts[2]}'")
+                    return
+                self._send_json(200, obj)
+
+        return Handler
+
+    def start(self) -> "FakeStripeServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-stripe", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeStripeServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local fake Stripe API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--customers", type=int, default=1000, help="Subscriptions to generate")
+    parser.add_argument("--legacy-products", type=int, default=3, help="Archived products besides the 3 plans")
+    parser.add_argument("--latency", default="fixed:0", help="Latency distribution spec (seconds)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    fixture = generate_fixture(args.customers, args.legacy_products, args.seed)
+    server = FakeStripeServer(args.host, args.port, fixture, args.latency, args.seed)
+    print(f"Fake Stripe listening on {server.base_url} ({args.customers} subscriptions, latency={args.latency})")
+    print(f"Price ids: {', '.join(f'{plan}={plan_price_id(plan)}' for plan in PLAN_PRICES)}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
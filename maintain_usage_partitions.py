@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Maintain the usage_events table: pre-create future monthly partitions and
+(optionally) archive months older than the retention window.
+
+Run from cron / a Render cron job:
+    python maintain_usage_partitions.py              # ensure partitions only
+    python maintain_usage_partitions.py --archive    # + export & drop expired months
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import get_settings
+from app.core.db import get_engine
+from app.core.usage_partitions import (
+    archive_expired_usage_events,
+    ensure_usage_event_partitions,
+    supports_partitioning,
+)
+
+
+def main() -> int:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--months-ahead", type=int, default=settings.usage_events_partitions_ahead)
+    parser.add_argument("--archive", action="store_true", help="Export and remove months past the retention window")
+    parser.add_argument("--retention-months", type=int, default=settings.usage_events_retention_months)
+    parser.add_argument("--archive-dir", default=settings.usage_events_archive_dir)
+    args = parser.parse_args()
+
+    engine = get_engine()
+    if supports_partitioning(engine):
+        ensured = ensure_usage_event_partitions(engine, months_ahead=args.months_ahead)
+        print(f"✓ Partitions ensured: {', '.join(ensured)}")
+    else:
+        print(f"ℹ️  {engine.dialect.name}: single usage_events table (no partitions)")
+
+    if args.archive:
+        archived = archive_expired_usage_events(
+            engine,
+            retention_months=args.retention_months,
+            archive_dir=args.archive_dir,
+        )
+        if not archived:
+            print("✓ Nothing to archive")
+        for item in archived:
+            print(f"✓ Archived {item['month_key']}: {item['rows']} rows -> {item['path']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Schema migration entry point. Run once per deploy, before starting the API.
+
+    python migrate.py            # apply pending migrations
+    python migrate.py status     # show current / latest schema version
+"""
+import argparse
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.db import get_engine
+from app.core.migrations import LATEST_VERSION, MIGRATIONS, get_schema_version, run_migrations
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", nargs="?", choices=["upgrade", "status"], default="upgrade")
+    args = parser.parse_args()
+
+    engine = get_engine()
+    current = get_schema_version(engine)
+
+    if args.command == "status":
+        print(f"Schema version: {current} (latest: {LATEST_VERSION})")
+        for migration in MIGRATIONS:
+            mark = "✓" if migration.version <= current else " "
+            print(f"  [{mark}] {migration.version:03d}_{migration.name}")
+        return 0 if current >= LATEST_VERSION else 1
+
+    applied = run_migrations(engine)
+    if applied:
+        print(f"✅ Applied {len(applied)} migration(s): {', '.join(m.name for m in applied)}")
+    else:
+        print(f"✅ Schema already at version {current}")
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -1,32 +0,0 @@
-"""Create feedback table
-
-Revision ID: 002
-Revises: 001
-Create Date: 2026-01-24
-
-"""
-from alembic import op
-import sqlalchemy as sa
-
-
-def upgrade():
-    """Create feedback table for user feedback collection"""
-    op.create_table(
-        'feedback',
-        sa.Column('id', sa.Integer(), nullable=False),
-        sa.Column('user_id', sa.Integer(), nullable=True),
-        sa.Column('email', sa.String(length=255), nullable=True),
-        sa.Column('message', sa.Text(), nullable=False),
-        sa.Column('status', sa.String(length=20), nullable=False, server_default='new'),
-        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
-        sa.PrimaryKeyConstraint('id')
-    )
-    op.create_index(op.f('ix_feedback_id'), 'feedback', ['id'], unique=False)
-    op.create_index(op.f('ix_feedback_user_id'), 'feedback', ['user_id'], unique=False)
-
-
-def downgrade():
-    """Drop feedback table"""
-    op.drop_index(op.f('ix_feedback_user_id'), table_name='feedback')
-    op.drop_index(op.f('ix_feedback_id'), table_name='feedback')
-    op.drop_table('feedback')
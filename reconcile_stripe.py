@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Reconcile users.plan / users.subscription_status with Stripe.
+
+    python reconcile_stripe.py                                   # fetch, snapshot, diff
+    python reconcile_stripe.py --from-snapshot                   # diff the last snapshot, no API calls
+    python reconcile_stripe.py --workers 12 --out reconcile.json
+
+Products, prices and subscriptions are auto-paged concurrently
+(app.core.stripe_reconcile) and written to --snapshot; the users table is read
+in one streamed query. Exit code 1 when mismatches are found.
+
+Against the local stand-in:
+
+    python fake_stripe_server.py --customers 5000 &
+    STRIPE_API_BASE=http://127.0.0.1:8901 STRIPE_SECRET_KEY=sk_test_fake \\
+        STRIPE_PRICE_STARTER_ID=price_fake_starter STRIPE_PRICE_PRO_ID=price_fake_pro \\
+        STRIPE_PRICE_TEAM_ID=price_fake_team python reconcile_stripe.py
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.core.config import get_settings  # noqa: E402
+from app.core.db import get_session_factory  # noqa: E402
+from app.core.stripe_reconcile import (  # noqa: E402
+    DEFAULT_WORKERS,
+    configured_price_plans,
+    fetch_stripe_state,
+    load_snapshot,
+    reconcile_users,
+    save_snapshot,
+)
+
+DEFAULT_SNAPSHOT = "stripe_snapshot.json"
+
+
+def configure_stripe():
+    """stripe module with the API key (and STRIPE_API_BASE override for local stand-ins)."""
+    import stripe
+
+    settings = get_settings()
+    stripe.api_key = settings.stripe_api_key
+    if settings.stripe_api_base:
+        stripe.api_base = settings.stripe_api_base
+    return stripe
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--snapshot", default=DEFAULT_SNAPSHOT, help="Snapshot file to write (or read)")
+    parser.add_argument("--from-snapshot", action="store_true", help="Diff the saved snapshot instead of fetching")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent list streams")
+    parser.add_argument("--show", type=int, default=20, help="Mismatches printed (0 = all)")
+    parser.add_argument("--out", help="Write the full JSON report here")
+    args = parser.parse_args()
+
+    if args.from_snapshot:
+        state = load_snapshot(args.snapshot)
+        print(f"📂 Loaded snapshot {args.snapshot}")
+    else:
+        if not configure_stripe().api_key:
+            print("❌ Error: STRIPE_SECRET_KEY not found in .env")
+            return 1
+        state = fetch_stripe_state(workers=args.workers)
+        save_snapshot(state, args.snapshot)
+        print(f"✓ Fetched from Stripe in {state.fetch_seconds:.2f}s -> {args.snapshot}")
+    print(f"   • Products: {len(state.products)}  Prices: {len(state.prices)}  Subscriptions: {len(state.subscriptions)}")
+
+    price_plans = configured_price_plans()
+    if not price_plans:
+        print("⚠️  No STRIPE_PRICE_*_ID configured: every active subscription will be expected as 'free'")
+
+    db = get_session_factory()()
+    try:
+        report = reconcile_users(db, state, price_plans)
+    finally:
+        db.close()
+
+    print(f"\n🔍 Checked {report.users_checked} users in {report.seconds:.2f}s")
+    if not report.mismatches:
+        print("✅ users table matches Stripe")
+    else:
+        print(f"❌ {len(report.mismatches)} mismatch(es): {report.counts()}")
+        for mismatch in report.mismatches[: args.show or None]:
+            print("   • " + " | ".join(f"{key}={value}" for key, value in mismatch.items() if value is not None))
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as handle:
+            json.dump(report.to_dict(), handle, indent=2, default=str)
+        print(f"\n📝 Report written to {args.out}")
+    return 1 if report.mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Tests for OpenAI token/cost accounting and its persistence on UsageEvent.
+"""
+
+from decimal import Decimal
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.ai_costs import get_model_price, record_completion_usage, track_ai_cost, usage_from_completion
+from app.core.db import Base
+from app.core.metrics import track_stage
+from app.core.usage import get_monthly_ai_spend, record_usage
+from app.models.user import User
+from app.services.ai_service import _run_chat_json
+
+
+def _completion(content: str, prompt: int, completion: int, cached: int = 0):
+    return SimpleNamespace(
+        model="gpt-4o-mini-2024-07-18",
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+        usage=SimpleNamespace(
+            prompt_tokens=prompt,
+            completion_tokens=completion,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=cached),
+        ),
+    )
+
+
+class _FakeClient:
+    def __init__(self, *completions):
+        self._completions = list(completions)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        return self._completions.pop(0)
+
+
+def test_usage_priced_per_model_with_cached_discount():
+    assert get_model_price("gpt-4o-mini-2024-07-18") == get_model_price("gpt-4o-mini")
+    assert get_model_price("gpt-4o-2024-08-06").input == Decimal("2.50")
+
+    tokens = usage_from_completion(
+        {"prompt_tokens": 2000, "completion_tokens": 500, "prompt_tokens_details": {"cached_tokens": 1000}},
+        "gpt-4o-mini",
+    )
+    # 1000 * 0.15 + 1000 * 0.075 + 500 * 0.60 per 1M tokens
+    assert tokens.cost_usd == Decimal("0.000525")
+    assert (tokens.prompt_tokens, tokens.completion_tokens, tokens.cached_tokens) == (2000, 500, 1000)
+
+
+def test_ledger_collects_cost_per_stage_from_run_chat_json():
+    client = _FakeClient(_completion('{"a": 1}', 1000, 200), _completion('{"b": 2}', 3000, 100, cached=2000))
+
+    with track_ai_cost() as ledger:
+        with track_stage("run_fit"):
+            assert _run_chat_json(client, []) == {"a": 1}
+        with track_stage("run_decision"):
+            _run_chat_json(client, [])
+
+    assert ledger.calls == 2
+    assert ledger.model == "gpt-4o-mini-2024-07-18"
+    assert set(ledger.stages) == {"run_fit", "run_decision"}
+    assert ledger.stages["run_fit"].cost_usd == Decimal("0.00027")
+    assert ledger.total.prompt_tokens == 4000
+    assert ledger.total.cached_tokens == 2000
+
+    # Outside a ledger the call is still counted in metrics but not attributed
+    record_completion_usage({"prompt_tokens": 10, "completion_tokens": 1}, "gpt-4o-mini")
+    assert ledger.calls == 2
+
+
+def test_record_usage_persists_actual_cost_and_tokens():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    user = User(email="cost@example.com", plan="pro", subscription_status="active")
+    db.add(user)
+    db.commit()
+
+    with track_ai_cost() as ledger:
+        record_completion_usage({"prompt_tokens": 4000, "completion_tokens": 1000}, "gpt-4o-mini")
+    event = record_usage(user, db, ai_cost=ledger)
+    assert event.cost_usd == Decimal("0.0012")
+    assert (event.model, event.prompt_tokens, event.completion_tokens, event.cached_tokens) == ("gpt-4o-mini", 4000, 1000, 0)
+
+    # No usage reported (mock mode) falls back to the flat estimate
+    with track_ai_cost() as empty:
+        pass
+    fallback = record_usage(user, db, ai_cost=empty)
+    assert float(fallback.cost_usd) == 0.03
+    assert fallback.prompt_tokens is None
+
+    assert abs(get_monthly_ai_spend(db) - 0.0312) < 1e-9
+    db.close()
@@ -0,0 +1,147 @@
+"""
+Tests for GET /user/analyses: keyset pages, score/priority filters, streamed
+NDJSON/CSV exports and the analysis_cache score/priority backfill.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, inspect
+
+from app.core.analysis_cache import analysis_score_priority, cache_analyses
+from app.core.analysis_history import decode_cursor, encode_cursor
+from app.core.db import get_engine, get_session_factory
+from app.core.migrations import run_migrations
+from app.main import create_app
+from app.models.analysis_cache import AnalysisCache
+from app.models.user import User
+
+
+def _linkedin_payload(score: float) -> dict:
+    priority = "high" if score >= 80 else "medium" if score >= 60 else "low"
+    return {
+        "qualification": {"overall_score": score},
+        "ui": {"should_contact": score >= 60, "priority": priority, "score": score, "reasoning": f"score {score}"},
+        "plan": "pro",
+    }
+
+
+def _login(client, email):
+    token = client.post("/auth/login", json={"email": email}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _seed(email: str, scores, created_at=None) -> int:
+    db = get_session_factory()()
+    user_id = db.query(User).filter(User.email == email).one().id
+    items = [(f"history-{email}-{index}", _linkedin_payload(score)) for index, score in enumerate(scores)]
+    cache_analyses(db, items, response_type="linkedin", user_id=user_id)
+    if created_at is not None:
+        db.query(AnalysisCache).filter(AnalysisCache.user_id == user_id).update({"created_at": created_at})
+        db.commit()
+    db.close()
+    return user_id
+
+
+def test_score_priority_and_cursor_helpers():
+    assert analysis_score_priority(_linkedin_payload(85)) == (85.0, "high")
+    assert analysis_score_priority({"score": 61, "should_contact": True}) == (61.0, "medium")
+    assert analysis_score_priority({"preview": True}) == (None, None)
+    stamp = datetime(2026, 10, 19, 6, 30, 15, 123456)
+    assert decode_cursor(encode_cursor(stamp, 42)) == (stamp, 42)
+
+
+def test_keyset_pages_cover_history_once_newest_first():
+    with TestClient(create_app()) as client:
+        headers = _login(client, "history-pages@example.com")
+        _seed("history-pages@example.com", [10 * index % 100 for index in range(7)],
+              created_at=datetime(2026, 1, 1, 12, 0, 0))  # all tied: id breaks the tie
+        _seed("history-pages@example.com", [95, 40, 70])
+        _login(client, "history-other@example.com")
+        _seed("history-other@example.com", [99])
+
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 4, **({"cursor": cursor} if cursor else {})}
+            page = client.get("/user/analyses", params=params, headers=headers).json()
+            seen += page["items"]
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+        assert len(seen) == 10 and len({item["id"] for item in seen}) == 10
+        keys = [(item["created_at"], item["id"]) for item in seen]
+        assert keys == sorted(keys, reverse=True)
+        assert seen[0]["score"] == 70 and seen[0]["priority"] == "medium" and seen[0]["should_contact"] is True
+
+        filtered = client.get("/user/analyses", params={"min_score": 60, "priority": ["high"]}, headers=headers).json()
+        assert [item["score"] for item in filtered["items"]] == [95.0]
+        ranged = client.get("/user/analyses", params={"min_score": 20, "max_score": 50}, headers=headers).json()
+        assert sorted(item["score"] for item in ranged["items"]) == [20.0, 30.0, 40.0, 40.0, 50.0]
+        assert client.get("/user/analyses", params={"cursor": "%%%"}, headers=headers).status_code == 400
+
+
+def test_exports_stream_every_matching_row(monkeypatch):
+    import app.core.analysis_history as history
+
+    monkeypatch.setattr(history, "EXPORT_BATCH_ROWS", 7)
+    with TestClient(create_app()) as client:
+        headers = _login(client, "history-export@example.com")
+        _seed("history-export@example.com", [float(index % 100) for index in range(50)])
+
+        response = client.get("/user/analyses", params={"format": "ndjson"}, headers=headers)
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert len(rows) == 50 and rows[0]["analysis"]["plan"] == "pro"
+
+        response = client.get("/user/analyses", params={"format": "csv", "priority": ["low"]}, headers=headers)
+        assert response.headers["content-disposition"] == 'attachment; filename="analyses.csv"'
+        table = list(csv.DictReader(io.StringIO(response.text)))
+        assert len(table) == 50 and {row["priority"] for row in table} == {"low"}
+
+        empty = client.get("/user/analyses", params={"format": "csv", "min_score": 100}, headers=headers)
+        assert empty.text.strip() == ",".join(history.CSV_COLUMNS)
+
+
+def test_migration_backfills_score_and_priority(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'history.db'}")
+    run_migrations(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "INSERT INTO analysis_cache (profile_hash, response_type, response_json) VALUES (?, ?, ?)",
+            ("legacy", "profile", json.dumps({"score": 72, "should_contact": True})),
+        )
+        conn.exec_driver_sql("DELETE FROM schema_migrations WHERE version >= 9")
+    assert [migration.version for migration in run_migrations(engine)] == [9, 10]
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT score, priority FROM analysis_cache").one() == (72.0, "medium")
+    indexes = {index["name"] for index in inspect(engine).get_indexes("analysis_cache")}
+    assert "ix_analysis_cache_user_created_id" in indexes
+
+
+def test_pages_over_legacy_rows_without_microseconds():
+    with TestClient(create_app()) as client:
+        headers = _login(client, "history-legacy@example.com")
+        user_id = _seed("history-legacy@example.com", [50])
+        engine = get_engine()
+        with engine.begin() as conn:
+            for index in range(5):  # server-default created_at: "YYYY-MM-DD HH:MM:SS", one shared second
+                conn.exec_driver_sql(
+                    "INSERT INTO analysis_cache (profile_hash, response_type, response_json, user_id, created_at) "
+                    "VALUES (?, 'linkedin', '{}', ?, '2026-01-01 12:00:00')",
+                    (f"legacy-{index}", user_id),
+                )
+            conn.exec_driver_sql("DELETE FROM schema_migrations WHERE version = 10")
+        assert [migration.version for migration in run_migrations(engine)] == [10]
+
+        seen, cursor = [], None
+        for _ in range(10):  # a repeated boundary row would page forever
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            page = client.get("/user/analyses", params=params, headers=headers).json()
+            seen += [item["id"] for item in page["items"]]
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+        assert len(seen) == 6 and len(set(seen)) == 6
@@ -0,0 +1,96 @@
+"""
+Tests for the streaming EVENT_TRACK log parser in analyze_tracking.py.
+"""
+
+import gzip
+import json
+import logging
+
+from analyze_tracking import parse_log_file, parse_logs
+from app.core.structured_logging import JSONFormatter
+
+LINE = "2026-01-01 10:00:00 - app.core.event_buffer - INFO - EVENT_TRACK | {event} | page={page} | ip=10.0.0.1*** | ua=Mozilla | referrer={ref}\n"
+
+
+def _lines(n, event="install_extension_click", page="landing", ref="direct"):
+    return "".join(LINE.format(event=event, page=page, ref=ref) for _ in range(n))
+
+
+def test_parse_skips_noise_and_partial_last_line(tmp_path):
+    log = tmp_path / "server.log"
+    log.write_text("INFO - startup\n" + _lines(2) + "EVENT_TRACK | waitlist_join | page=landing")
+    stats, offset = parse_log_file(str(log))
+    assert stats.total == 2 and stats.types["install_extension_click"] == 2
+    assert offset == len(("INFO - startup\n" + _lines(2)).encode())
+
+
+def test_checkpoint_only_reads_new_bytes(tmp_path):
+    log = tmp_path / "server.log"
+    checkpoint = str(tmp_path / "checkpoint.json")
+    log.write_text(_lines(3))
+    assert parse_logs([str(log)], checkpoint_path=checkpoint).total == 3
+
+    with open(log, "a") as f:
+        f.write(_lines(2, event="waitlist_join", page="pricing", ref="https://x.com"))
+    stats = parse_logs([str(log)], checkpoint_path=checkpoint)
+    assert stats.total == 5
+    assert stats.types["waitlist_join"] == 2 and stats.referrers["https://x.com"] == 2
+
+    # Unchanged file: nothing reparsed, totals still reported
+    assert parse_logs([str(log)], checkpoint_path=checkpoint).total == 5
+
+    log.write_text(_lines(1))  # truncated/rotated in place -> start over for that file
+    assert parse_logs([str(log)], checkpoint_path=checkpoint).total == 6
+
+
+def test_rotated_and_compressed_copy_is_not_reparsed(tmp_path):
+    log = tmp_path / "server.log"
+    checkpoint = str(tmp_path / "checkpoint.json")
+    log.write_text("".join(_lines(1, page=f"p{i}") for i in range(3)))
+    assert parse_logs([str(log)], checkpoint_path=checkpoint).total == 3
+
+    # Lines written after the checkpoint, then logrotate: rename + gzip, fresh server.log
+    with open(log, "a") as f:
+        f.write(_lines(1, event="waitlist_join"))
+    rotated = tmp_path / "server.log.1.gz"
+    with gzip.open(rotated, "wb") as f:
+        f.write(log.read_bytes())
+    log.unlink()
+    log.write_text(_lines(1, page="after-rotation"))
+
+    stats = parse_logs([str(log), str(rotated)], checkpoint_path=checkpoint, workers=1)
+    assert stats.total == 5
+    assert stats.types["waitlist_join"] == 1 and stats.pages["after-rotation"] == 1
+
+    # Both files are known now; nothing is counted twice
+    assert parse_logs([str(log), str(rotated)], checkpoint_path=checkpoint).total == 5
+
+
+def test_gzip_and_parallel_files(tmp_path):
+    plain = tmp_path / "server.log"
+    plain.write_text(_lines(4))
+    rotated = tmp_path / "server.log.1.gz"
+    with gzip.open(rotated, "wt") as f:
+        f.write(_lines(3, event="waitlist_join"))
+
+    stats = parse_logs([str(plain), str(rotated)], checkpoint_path=None, workers=2)
+    assert stats.total == 7
+    assert stats.types == {"install_extension_click": 4, "waitlist_join": 3}
+    assert stats.ips == {"10.0.0.1***"}
+
+
+def test_json_formatted_lines(tmp_path):
+    record = logging.LogRecord(
+        "app.core.event_buffer", logging.INFO, __file__, 0,
+        "EVENT_TRACK | %s | page=%s | ip=%s | ua=%s | referrer=%s",
+        ("waitlist_join", "pricing", "10.0.0.2***", 'Mozilla "quoted"', "direct"), None,
+    )
+    line = JSONFormatter().format(record)
+    assert json.loads(line)["msg"].endswith("referrer=direct")
+    log = tmp_path / "server.log"
+    log.write_text(line + "\n" + _lines(1))
+
+    stats, _ = parse_log_file(str(log))
+    assert stats.total == 2
+    assert stats.referrers == {"direct": 2}
+    assert stats.types == {"waitlist_join": 1, "install_extension_click": 1}
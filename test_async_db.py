@@ -0,0 +1,122 @@
+"""
+Tests for the AsyncEngine/AsyncSession path: URL mapping, async usage/cache
+functions agreeing with the sync ones, and the routes migrated to it.
+"""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.api.routes.billing import get_billing_status
+from app.api.routes.user import get_me, get_my_usage
+from app.core.analysis_cache import (
+    cache_analysis_async,
+    get_cached_analysis,
+    get_cached_analysis_async,
+)
+from app.core.config import get_settings
+from app.core.db import (
+    async_database_url,
+    dispose_async_engine,
+    get_async_session_factory,
+    get_session_factory,
+)
+from app.core.usage import (
+    evaluate_budget_status,
+    evaluate_budget_status_async,
+    get_usage_stats,
+    get_usage_stats_async,
+    record_usage_async,
+)
+from app.main import create_app
+from app.models.user import User
+
+
+def _run(coro_fn):
+    """Run one unit of async work on a fresh loop and release its pooled connections."""
+    async def runner():
+        try:
+            async with get_async_session_factory()() as db:
+                return await coro_fn(db)
+        finally:
+            await dispose_async_engine()
+
+    return asyncio.run(runner())
+
+
+def test_async_database_url():
+    assert async_database_url("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+    assert async_database_url("postgres://u:p@db:5432/app") == "postgresql+asyncpg://u:p@db:5432/app"
+    assert (
+        async_database_url("postgresql+psycopg2://u:p@db/app?sslmode=require")
+        == "postgresql+asyncpg://u:p@db/app?ssl=require"
+    )
+    assert async_database_url("sqlite+aiosqlite:///x.db") == "sqlite+aiosqlite:///x.db"
+
+
+def test_async_usage_and_cache_match_sync():
+    db = get_session_factory()()
+    user = db.query(User).filter(User.email == "async-db@example.com").first()
+    if user is None:
+        user = User(email="async-db@example.com")
+        db.add(user)
+    user.plan, user.monthly_analyses_count = "pro", 3
+    db.commit()
+    user_id = user.id
+
+    assert _run(lambda adb: adb.get(User, user_id)).email == "async-db@example.com"
+    assert _run(lambda adb: _stats_for(adb, user_id)) == get_usage_stats(user, db)
+    assert _run(evaluate_budget_status_async) == evaluate_budget_status(db)
+
+    async def record(adb):
+        await record_usage_async(await adb.get(User, user_id), adb)
+    _run(record)
+    db.refresh(user)
+    assert user.monthly_analyses_count == 4
+
+    async def cache(adb):
+        await cache_analysis_async(adb, profile_hash="async-hash", response_type="linkedin",
+                                   payload={"score": 7}, user_id=user_id)
+        return await get_cached_analysis_async(adb, "async-hash", "linkedin")
+    assert _run(cache) == {"score": 7}
+    assert get_cached_analysis(db, "async-hash", "linkedin") == {"score": 7}
+    assert _run(lambda adb: get_cached_analysis_async(adb, "async-missing", "linkedin")) is None
+    db.close()
+
+
+def test_team_users_count_toward_budget(monkeypatch):
+    """Team subscribers are reported and budgeted with revenue_per_team_user, on both paths."""
+    settings = get_settings()
+    monkeypatch.setattr(settings, "openai_enabled", True)
+    db = get_session_factory()()
+    db.add(User(email="async-team@example.com", plan="team"))
+    db.commit()
+
+    status = evaluate_budget_status(db)
+    assert status.active_team_users == 1
+    assert status.budget == settings.revenue_per_team_user
+    assert _run(evaluate_budget_status_async) == status
+    db.close()
+
+
+async def _stats_for(adb, user_id):
+    return await get_usage_stats_async(await adb.get(User, user_id), adb)
+
+
+def test_read_routes_use_async_session():
+    for endpoint in (get_me, get_my_usage, get_billing_status):
+        assert asyncio.iscoroutinefunction(endpoint), endpoint.__name__
+
+    with TestClient(create_app()) as client:
+        token = client.post("/auth/login", json={"email": "async-routes@example.com"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        me = client.get("/user", headers=headers)
+        assert me.status_code == 200
+        assert me.json()["email"] == "async-routes@example.com"
+        assert me.json()["usage"] == client.get("/user/me/usage", headers=headers).json()
+        status = client.get("/billing/status", headers=headers)
+        assert status.json()["plan"] == "free"
+        assert status.headers["X-DB-Queries"] == "1"  # counted on the async engine too
+
+        assert client.get("/user", headers={"Authorization": "Bearer nope"}).status_code == 401
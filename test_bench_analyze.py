@@ -0,0 +1,34 @@
+"""
+Tests for the report/compare helpers of bench_analyze.py (the load run itself is manual).
+"""
+
+import pytest
+
+from bench_analyze import Sample, _parse_mix, _percentile, compare, summarize
+
+
+def test_summarize_reports_percentiles_and_queries():
+    samples = [Sample("linkedin", 200, i / 1000, 10) for i in range(1, 101)]
+    samples += [Sample("billing", 200, 0.002, 1), Sample("billing", 503, 0.004, None)]
+
+    report = summarize(samples, elapsed=2.0)
+    linkedin = report["endpoints"]["linkedin"]
+    assert (linkedin["p50_ms"], linkedin["p95_ms"], linkedin["p99_ms"]) == (50.0, 95.0, 99.0)
+    assert linkedin["rps"] == 50.0
+    assert linkedin["db_queries_per_request"] == 10
+    assert report["endpoints"]["billing"]["errors"] == 1
+    assert report["endpoints"]["billing"]["db_queries_per_request"] == 1
+    assert report["total"]["requests"] == 102
+    assert "login" not in report["endpoints"]
+    assert _percentile([], 99) == 0.0
+
+
+def test_mix_parsing_and_regression_check():
+    assert _parse_mix("linkedin=3,billing") == {"linkedin": 3.0, "billing": 1.0}
+    with pytest.raises(SystemExit):
+        _parse_mix("checkout=1")
+
+    baseline = {"endpoints": {"linkedin": {"p95_ms": 100.0, "rps": 20.0}}}
+    slower = {"endpoints": {"linkedin": {"p95_ms": 130.0, "rps": 18.0}}}
+    assert compare(slower, baseline, max_regression=0.5) is True
+    assert compare(slower, baseline, max_regression=0.2) is False
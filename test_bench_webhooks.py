@@ -0,0 +1,116 @@
+"""
+Tests for bench_webhooks.py: stream generation, delivery scheduling, and an
+in-process replay through the webhook route and the queue worker.
+"""
+
+import json
+import uuid
+from collections import Counter
+
+import pytest
+import stripe
+from fastapi.testclient import TestClient
+
+from app.api.routes.billing import get_stripe_service
+from app.core.db import Base, get_engine, get_session_factory
+from app.core.stripe_events import StripeEventWorker
+from app.core.stripe_service import StripeService
+from app.main import create_app
+from app.models.user import User
+from bench_webhooks import (
+    PLANS,
+    WEBHOOK_PATH,
+    WEBHOOK_SECRET,
+    build_stream,
+    expected_mismatches,
+    schedule,
+    sign,
+)
+from fake_stripe_server import FakeStripeServer, generate_fixture, plan_price_id
+
+
+def test_stream_lifecycles_and_expected_state():
+    events, subscriptions, expected = build_stream([10, 11, 12], max_updates=3, cancel_ratio=0.5, seed=4)
+
+    assert [e["type"] for e in events[:2]] == ["customer.subscription.created", "checkout.session.completed"]
+    assert [e["created"] for e in events] == sorted(e["created"] for e in events)
+    assert len(subscriptions) == len(expected) == 3
+    for subscription, (user_id, (plan, status, subscription_id)) in zip(subscriptions, expected.items()):
+        assert subscription["id"] == subscription_id
+        if subscription["status"] == "canceled":
+            assert (plan, status) == ("free", "canceled")
+        else:
+            assert subscription["items"]["data"][0]["price"]["id"] == plan_price_id(plan)
+
+    assert expected_mismatches([(10, *expected[10]), (11, "free", None, None)], expected) == [
+        {"user_id": 11, "expected": list(expected[11]), "actual": ["free", None, None]},
+        {"user_id": 12, "expected": list(expected[12]), "actual": None},
+    ]
+
+
+def test_schedule_duplicates_and_reorders():
+    events, _, _ = build_stream(list(range(50)), seed=2)
+    in_order = schedule(events)
+    assert [d.event_id for d in in_order] == [e["id"] for e in events]
+
+    deliveries = schedule(events, duplicate_ratio=0.3, reorder_ratio=0.5, reorder_window=5, seed=2)
+    counts = Counter(d.event_id for d in deliveries)
+    assert set(counts) == {e["id"] for e in events}
+    assert sum(1 for d in deliveries if d.duplicate) == sum(counts.values()) - len(events) > 0
+    assert [d.event_id for d in deliveries if not d.duplicate] != [e["id"] for e in events]
+
+
+def test_signature_matches_stripe_verification():
+    payload = json.dumps({"id": "evt_x", "object": "event"}).encode()
+    header = sign(payload)
+    assert stripe.WebhookSignature.verify_header(payload.decode(), header, WEBHOOK_SECRET, tolerance=300)
+
+
+@pytest.fixture
+def users():
+    Base.metadata.create_all(bind=get_engine())
+    db = get_session_factory()()
+    created = [User(email=f"webhook-replay-{uuid.uuid4().hex[:10]}@example.com", plan="free") for _ in range(25)]
+    db.add_all(created)
+    db.commit()
+    ids = [user.id for user in created]
+    db.close()
+    yield ids
+    db = get_session_factory()()
+    db.query(User).filter(User.id.in_(ids)).delete(synchronize_session=False)
+    db.commit()
+    db.close()
+
+
+def test_replay_with_duplicates_and_reordering_is_consistent(users, monkeypatch):
+    prefix = uuid.uuid4().hex[:8]
+    events, subscriptions, expected = build_stream(users, max_updates=2, cancel_ratio=0.3, seed=5, prefix=prefix)
+    deliveries = schedule(events, duplicate_ratio=0.3, reorder_ratio=0.4, reorder_window=8, seed=5)
+
+    fixture = generate_fixture(customers=0)
+    fixture["subscriptions"] = subscriptions
+    monkeypatch.setattr(stripe, "api_base", stripe.api_base)
+    with FakeStripeServer(port=0, fixture=fixture) as fake:
+        service = StripeService(
+            api_key="sk_test_replay",
+            webhook_secret=WEBHOOK_SECRET,
+            api_base=fake.base_url,
+            **{f"{plan}_price_id": plan_price_id(plan) for plan in PLANS},
+        )
+        app = create_app()
+        app.dependency_overrides[get_stripe_service] = lambda: service
+        client = TestClient(app)
+        queued = [
+            client.post(WEBHOOK_PATH, content=d.payload, headers={"stripe-signature": sign(d.payload)}).json()["queued"]
+            for d in deliveries
+        ]
+        StripeEventWorker(lambda: service, workers=0).drain()
+
+    assert queued.count(True) == len(events)
+    assert queued.count(False) == sum(1 for d in deliveries if d.duplicate)
+    db = get_session_factory()()
+    try:
+        rows = db.query(User.id, User.plan, User.subscription_status, User.stripe_subscription_id).filter(User.id.in_(users)).all()
+    finally:
+        db.close()
+    assert expected_mismatches(rows, expected) == []
@@ -0,0 +1,45 @@
+"""
+Tests for DB_POOL_MODE=transaction (external transaction pooler such as PgBouncer).
+"""
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool, QueuePool
+
+from app.core.config import Settings, get_settings
+from app.core.db import engine_options
+
+
+def test_direct_mode_keeps_app_pool_with_pre_ping():
+    assert get_settings().db_pool_mode == "direct"
+    assert engine_options("postgresql+psycopg2://u:p@db/app") == {"pool_pre_ping": True}
+
+
+def test_transaction_mode_options(monkeypatch, tmp_path):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "db_pool_mode", "transaction")
+
+    options = engine_options("postgresql+psycopg2://u:p@pgbouncer:6432/app")
+    assert options == {"poolclass": NullPool}  # no pre-ping, no prepared statements with psycopg2
+
+    asyncpg = engine_options("postgresql+asyncpg://u:p@pgbouncer:6432/app")
+    assert "pool_pre_ping" not in asyncpg
+    assert asyncpg["connect_args"]["statement_cache_size"] == 0
+    assert asyncpg["connect_args"]["prepared_statement_cache_size"] == 0
+    name_func = asyncpg["connect_args"]["prepared_statement_name_func"]
+    assert name_func() != name_func()
+
+    monkeypatch.setattr(settings, "db_pooler_pool_size", 3)
+    url = f"sqlite:///{tmp_path / 'pooled.db'}"
+    engine = create_engine(url, **engine_options(url))
+    assert isinstance(engine.pool, QueuePool) and engine.pool.size() == 3
+    assert engine.pool._pre_ping is False
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+
+
+def test_pool_mode_validated():
+    assert Settings(db_pool_mode=" Transaction ").db_pool_mode == "transaction"
+    with pytest.raises(ValidationError):
+        Settings(db_pool_mode="session")
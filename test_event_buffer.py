@@ -0,0 +1,94 @@
+"""
+Tests for buffered /events/track ingestion.
+"""
+
+import time
+from datetime import datetime, timezone
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from app.core.config import get_settings
+from app.core.db import get_engine
+from app.core.event_buffer import EventBuffer, FileSink, get_event_buffer, shutdown_event_buffer
+from app.main import create_app
+from app.models.tracking_event import TrackingEvent
+
+
+def _event(name="waitlist_join"):
+    return {"event": name, "page": "landing", "referrer": None, "ip_prefix": "127.0.0.***",
+            "user_agent": "pytest", "created_at": datetime(2026, 1, 2, 3, 4, tzinfo=timezone.utc)}
+
+
+def test_overflow_policies():
+    batches = []
+    newest = EventBuffer(batches.append, capacity=2, batch_size=10, flush_interval=60)
+    assert newest.offer(_event("a")) and newest.offer(_event("b"))
+    assert not newest.offer(_event("c"))
+    newest.flush()
+    assert [e["event"] for e in batches[0]] == ["a", "b"]
+
+    batches.clear()
+    oldest = EventBuffer(batches.append, capacity=2, batch_size=10, flush_interval=60, overflow_policy="drop_oldest")
+    for name in "abc":
+        assert oldest.offer(_event(name))
+    oldest.flush()
+    assert [e["event"] for e in batches[0]] == ["b", "c"]
+    assert oldest.snapshot()["dropped"] == 1
+
+
+def test_flush_in_batches_and_requeue_on_failure():
+    batches = []
+    buffer = EventBuffer(batches.append, capacity=100, batch_size=4, flush_interval=60)
+    for _ in range(10):
+        buffer.offer(_event())
+    assert buffer.flush() == 10
+    assert [len(b) for b in batches] == [4, 4, 2]
+    stats = buffer.snapshot()
+    assert stats["flushed"] == 10 and stats["batches"] == 3 and stats["depth"] == 0
+
+    def broken(batch):
+        raise RuntimeError("db down")
+
+    failing = EventBuffer(broken, capacity=5, batch_size=5, flush_interval=60)
+    for _ in range(5):
+        failing.offer(_event())
+    assert failing.flush() == 0
+    assert failing.depth() == 5 and failing.snapshot()["failed"] == 0
+
+
+def test_background_flush_on_batch_size():
+    batches = []
+    buffer = EventBuffer(batches.append, capacity=100, batch_size=3, flush_interval=60).start()
+    for _ in range(3):
+        buffer.offer(_event())
+    deadline = time.monotonic() + 2
+    while not batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+    buffer.close()
+    assert sum(len(b) for b in batches) == 3
+
+
+def test_file_sink_writes_daily_jsonl(tmp_path):
+    FileSink(str(tmp_path))([_event(), _event("install_extension_click")])
+    lines = (tmp_path / "events-2026-01-02.jsonl").read_text().splitlines()
+    assert len(lines) == 2 and '"created_at": "2026-01-02T03:04:00+00:00"' in lines[0]
+
+
+def test_track_endpoint_persists_to_db(monkeypatch):
+    shutdown_event_buffer()
+    monkeypatch.setattr(get_settings(), "tracking_sink", "db")
+    client = TestClient(create_app())
+    with get_engine().connect() as conn:
+        before = conn.execute(select(func.count()).select_from(TrackingEvent)).scalar()
+
+    response = client.post("/events/track", json={"event": "waitlist_join", "page": "pricing"})
+    assert response.json()["status"] == "tracked"
+    assert get_event_buffer().snapshot()["accepted"] == 1
+    shutdown_event_buffer()
+
+    with get_engine().connect() as conn:
+        after = conn.execute(select(func.count()).select_from(TrackingEvent)).scalar()
+        row = conn.execute(select(TrackingEvent).order_by(TrackingEvent.id.desc())).first()
+    assert after == before + 1
+    assert row.page == "pricing" and row.ip_prefix.endswith("***")
@@ -0,0 +1,88 @@
+"""
+Tests for the columnar tracking event store and its aggregations.
+"""
+
+from datetime import datetime, timezone
+
+import numpy as np
+
+import app.core.event_store as event_store
+from app.core.event_buffer import EventBuffer
+from app.core.event_store import (
+    ColumnarSink,
+    compact,
+    count_distinct,
+    group_counts,
+    load_segments,
+    load_store,
+    segment_paths,
+    write_segment,
+)
+
+
+def _event(event, page, day, referrer=None, ip="10.0.0.1***"):
+    return {"event": event, "page": page, "referrer": referrer, "ip_prefix": ip, "user_agent": "pytest",
+            "created_at": datetime(2026, 3, day, 12, tzinfo=timezone.utc)}
+
+
+def test_segments_are_dictionary_encoded(tmp_path):
+    path = write_segment(str(tmp_path), [_event("waitlist_join", "landing", 1)] * 3 + [_event("waitlist_join", "pricing", 1)])
+    with np.load(path) as segment:
+        assert segment["page_codes"].dtype == np.uint8
+        assert segment["page_codes"].tolist() == [0, 0, 0, 1]
+        assert segment["page_values"].tolist() == ["landing", "pricing"]
+        assert segment["referrer_values"].tolist() == ["direct"]
+
+
+def test_group_by_across_segments_with_different_dictionaries(tmp_path):
+    store = str(tmp_path)
+    write_segment(store, [_event("install_extension_click", "landing", 1), _event("waitlist_join", "pricing", 1)])
+    write_segment(store, [_event("waitlist_join", "pricing", 2, "https://x.com", ip="10.0.0.2***")] * 2)
+
+    columns = load_store(store)
+    assert len(columns) == 4
+    assert group_counts(columns, ["page"]) == [(("pricing",), 3), (("landing",), 1)]
+    assert dict(group_counts(columns, ["day", "event"])) == {
+        ("2026-03-01", "install_extension_click"): 1,
+        ("2026-03-01", "waitlist_join"): 1,
+        ("2026-03-02", "waitlist_join"): 2,
+    }
+    assert dict(group_counts(columns, ["referrer"])) == {("direct",): 2, ("https://x.com",): 2}
+    assert count_distinct(columns, "ip") == 2
+
+    recent = load_store(store, since=datetime(2026, 3, 2, tzinfo=timezone.utc))
+    assert group_counts(recent, []) == [((), 2)]
+
+    compact(store)
+    assert len(segment_paths(store)) == 1
+    assert dict(group_counts(load_store(store), ["day", "event"])) == dict(group_counts(columns, ["day", "event"]))
+
+
+def test_compact_ignores_segments_flushed_meanwhile(tmp_path, monkeypatch):
+    store = str(tmp_path)
+    first = write_segment(store, [_event("waitlist_join", "landing", 1)])
+    write_segment(store, [_event("waitlist_join", "pricing", 2)])
+    assert len(load_segments([first])) == 1
+
+    listed = segment_paths
+
+    def flush_after_listing(directory):
+        paths = listed(directory)
+        if len(paths) == 2:
+            write_segment(directory, [_event("waitlist_join", "landing", 3)])  # a flush lands mid-compaction
+        return paths
+
+    monkeypatch.setattr(event_store, "segment_paths", flush_after_listing)
+    compact(store)
+    monkeypatch.undo()
+    assert len(segment_paths(store)) == 2
+    assert len(load_store(store)) == 3  # nothing counted twice
+
+
+def test_columnar_sink_via_event_buffer(tmp_path):
+    buffer = EventBuffer(ColumnarSink(str(tmp_path)), batch_size=2, flush_interval=60)
+    for day in (1, 2, 3):
+        buffer.offer(_event("waitlist_join", "landing", day))
+    buffer.flush()
+    assert len(segment_paths(str(tmp_path))) == 2
+    assert len(load_store(str(tmp_path))) == 3
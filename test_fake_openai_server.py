@@ -0,0 +1,70 @@
+"""
+Tests driving the real OpenAI client path (_run_chat_json) against fake_openai_server.py.
+"""
+
+import json
+
+import openai
+import pytest
+
+from app.schemas.ai_responses import DecisionResult, FitScoringResult
+from app.services import ai_service
+from app.services.ai_service import MAX_RETRIES, _run_chat_json
+from fake_openai_server import FakeOpenAIServer, FaultConfig, parse_latency
+
+
+def _client(server: FakeOpenAIServer, timeout: float = 5.0):
+    return openai.OpenAI(api_key="sk-fake", base_url=server.base_url, timeout=timeout, max_retries=0)
+
+
+def _messages(payload: dict) -> list:
+    return [
+        {"role": "system", "content": "system"},
+        {"role": "user", "content": f"prompt\n\nINPUT JSON:\n{json.dumps(payload)}"},
+    ]
+
+
+@pytest.fixture(autouse=True)
+def _no_backoff(monkeypatch):
+    monkeypatch.setattr(ai_service.time, "sleep", lambda seconds: None)
+
+
+def test_schema_valid_deterministic_responses():
+    profile = {"profile": {"profile_url": "https://linkedin.com/in/fake", "headline": "CTO"}, "icp": None}
+    with FakeOpenAIServer(port=0) as server:
+        client = _client(server)
+        fit = FitScoringResult(**_run_chat_json(client, _messages(profile)))
+        assert FitScoringResult(**_run_chat_json(client, _messages(profile))) == fit
+
+        decision = DecisionResult(**_run_chat_json(client, _messages({"qualification": fit.model_dump()})))
+        assert decision.score == fit.overall_score
+        assert server.stats.by_kind == {"fit": 2, "decision": 1}
+
+
+def test_retries_rate_limits_then_gives_up():
+    with FakeOpenAIServer(port=0, faults=FaultConfig(rate_limit=1.0)) as server:
+        with pytest.raises(RuntimeError, match="rate limit"):
+            _run_chat_json(_client(server), _messages({}))
+        assert server.stats.rate_limited == MAX_RETRIES
+
+
+def test_timeouts_and_invalid_json():
+    with FakeOpenAIServer(port=0, faults=FaultConfig(timeout=1.0, hang_seconds=5)) as server:
+        with pytest.raises(RuntimeError, match="timeout"):
+            _run_chat_json(_client(server, timeout=0.2), _messages({}))
+        assert server.stats.timeouts == MAX_RETRIES
+
+    with FakeOpenAIServer(port=0, faults=FaultConfig(invalid_json=1.0)) as server:
+        with pytest.raises(ValueError, match="valid JSON"):
+            _run_chat_json(_client(server), _messages({}))
+
+
+def test_latency_specs():
+    import random
+
+    rng = random.Random(1)
+    assert parse_latency("fixed:0.25")(rng) == 0.25
+    assert 0.1 <= parse_latency("uniform:0.1,0.2")(rng) <= 0.2
+    assert parse_latency("lognormal:0.5,0.3")(rng) > 0
+    with pytest.raises(ValueError):
+        parse_latency("poisson:1")
@@ -0,0 +1,35 @@
+"""
+Cold-start guard: the OpenAI and Stripe SDKs must not be imported at startup
+when they are not configured (OPENAI_ENABLED=false, no Stripe key).
+"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def _loaded_after_startup(tmp_path, **extra_env) -> set[str]:
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'lazy.db'}",
+        "OPENAI_ENABLED": "false",
+        **extra_env,
+    })
+    env.pop("STRIPE_API_KEY", None)
+    probe = "import sys, app.main; print(','.join(m for m in ('openai', 'stripe') if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return set(filter(None, result.stdout.strip().split(",")))
+
+
+def test_sdks_not_imported_at_startup(tmp_path):
+    assert _loaded_after_startup(tmp_path) == set()
+
+
+def test_stripe_loaded_on_first_service_use():
+    from app.core.stripe_service import StripeService
+
+    service = StripeService(api_key="sk_test_dummy", webhook_secret="whsec_dummy", pro_price_id="price_pro")
+    assert "stripe" in sys.modules
+    assert service.validate_price_id("price_pro") == "pro"
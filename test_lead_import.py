@@ -0,0 +1,138 @@
+"""
+Tests for streaming lead list imports (POST /analyze/import): CSV/JSONL
+parsing, dedupe by profile hash, per-chunk progress and cache writes.
+"""
+
+import io
+import json
+
+from fastapi.testclient import TestClient
+
+from app.core.analysis_cache import build_profile_hash, get_cached_analysis, local_response_type
+from app.core.config import get_settings
+from app.core.db import get_session_factory
+from app.main import create_app
+from app.models.user import User
+from app.schemas.ai_responses import ICPConfig
+from app.services.lead_import import ImportTotals, detect_format, iter_chunks, normalize_row
+
+CSV_HEADER = "Full Name,LinkedIn URL,Job Title,About,Location,Skills,Experience\n"
+
+
+def _csv_row(index: int, title: str = "VP Engineering at PayFlow", about: str = "Python and AWS") -> str:
+    return f'Lead {index},https://linkedin.com/in/import-{index},{title},{about},"Berlin, Germany",python;aws,{title}\n'
+
+
+def _login(client, email):
+    token = client.post("/auth/login", json={"email": email}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_normalize_row_and_format_detection():
+    profile = normalize_row({" Job Title ": "CTO", "URL": " https://linkedin.com/in/x ", "Skills": "Go; Rust",
+                             "Experience": "CTO | Engineer", "Empty": ""})
+    assert profile == {"headline": "CTO", "profile_url": "https://linkedin.com/in/x", "skills": ["Go", "Rust"],
+                       "experience_titles": ["CTO", "Engineer"]}
+    assert build_profile_hash(profile) == build_profile_hash({**profile, "name": "ignored"})
+    assert normalize_row({"profile_extract": {"headline": "CEO"}}) == {"headline": "CEO"}
+    assert detect_format("leads.CSV", None) == "csv"
+    assert detect_format("export", "application/x-ndjson") == "jsonl"
+    assert detect_format("leads.xlsx", "application/octet-stream") is None
+
+
+def test_chunks_dedupe_and_report_bad_rows():
+    body = "".join([
+        json.dumps({"headline": "CTO", "profile_url": "https://linkedin.com/in/a"}) + "\n",
+        "not json\n",
+        json.dumps({"headline": "CTO", "profile_url": "https://linkedin.com/in/a", "name": "dupe"}) + "\n",
+        json.dumps({"name": "no identity"}) + "\n",
+        "\n",
+        json.dumps({"headline": "CFO", "profile_url": "https://linkedin.com/in/b"}) + "\n",
+    ])
+    totals = ImportTotals()
+    chunks = list(iter_chunks(io.BytesIO(body.encode()), "jsonl", chunk_rows=2, max_rows=100, totals=totals))
+    assert [(chunk.rows, len(chunk.profiles), chunk.invalid, chunk.duplicates) for chunk in chunks] == [
+        (2, 1, 1, 0), (2, 0, 1, 1), (1, 1, 0, 0),
+    ]
+    assert [error["line"] for error in totals.errors] == [2, 4]
+
+    limited = ImportTotals()
+    list(iter_chunks(io.BytesIO(body.encode()), "jsonl", chunk_rows=10, max_rows=3, totals=limited))
+    assert limited.rows == 3 and limited.errors[-1]["error"] == "stopped after 3 rows"
+
+
+def _set_plan(email, plan):
+    db = get_session_factory()()
+    user = db.query(User).filter(User.email == email).one()
+    user.plan, user.monthly_analyses_count, user.last_analysis_at = plan, 0, None
+    db.commit()
+    db.close()
+
+
+def test_upload_streams_progress_and_fills_cache(monkeypatch):
+    monkeypatch.setattr(get_settings(), "lead_import_chunk_rows", 4)
+    rows = [_csv_row(index) for index in range(8)]
+    rows += [_csv_row(0), _csv_row(8, title="Engineer", about="Tech Recruiter"), "only-one-cell\n"]
+    rows += [_csv_row(9, title="Engineer", about="Frontend work")]
+    upload = (CSV_HEADER + "".join(rows)).encode()
+
+    with TestClient(create_app()) as client:
+        headers = _login(client, "lead-import@example.com")
+        _set_plan("lead-import@example.com", "pro")
+        icp = {"target_seniority": ["VP"], "required_skills": ["python", "aws"], "exclude_keywords": ["recruiter"]}
+        client.put("/user/icp", json=icp, headers=headers)
+
+        response = client.post("/analyze/import", files={"file": ("leads.csv", upload, "text/csv")}, headers=headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["type"] for line in lines] == ["progress", "progress", "progress", "summary"]
+        assert [line["rows_total"] for line in lines[:-1]] == [4, 8, 12]
+        summary = lines[-1]
+        assert (summary["rows"], summary["invalid"], summary["duplicates"]) == (12, 1, 1)
+        assert summary["scored"] + summary["pending"] + summary["cached"] == 10
+        pending = [profile for line in lines[:-1] for profile in line["pending_profiles"]]
+        assert len(pending) == summary["pending"] > 0
+        assert "https://linkedin.com/in/import-9" in pending  # ambiguous: left for /analyze/linkedin
+        assert "/analyze/linkedin" in summary["message"]
+
+        profile_hash = build_profile_hash(normalize_row({
+            "url": "https://linkedin.com/in/import-0", "job title": "VP Engineering at PayFlow",
+            "experience": "VP Engineering at PayFlow",
+        }))
+        db = get_session_factory()()
+        shared = get_cached_analysis(db, profile_hash, "linkedin")
+        imported = get_cached_analysis(db, profile_hash, local_response_type(ICPConfig(**icp).model_dump()))
+        db.close()
+        assert shared is None  # never served to other users by /analyze/linkedin
+        assert imported and imported["ui"]["should_contact"] is True
+
+        again = client.post("/analyze/import", files={"file": ("leads.csv", upload, "text/csv")}, headers=headers)
+        assert json.loads(again.text.splitlines()[-1])["cached"] >= summary["scored"]
+
+        # Imports make no OpenAI call and don't start the rate-limit window
+        db = get_session_factory()()
+        assert db.query(User).filter(User.email == "lead-import@example.com").one().last_analysis_at is None
+        db.close()
+
+        # Another (starter) user importing the same rows doesn't see the first user's verdicts
+        other = _login(client, "lead-import-other@example.com")
+        _set_plan("lead-import-other@example.com", "starter")
+        client.put("/user/icp", json=icp, headers=other)
+        third = client.post("/analyze/import", files={"file": ("leads.csv", upload, "text/csv")}, headers=other)
+        third_summary = json.loads(third.text.splitlines()[-1])
+        assert third_summary["type"] == "summary"
+        assert (third_summary["cached"], third_summary["scored"]) == (0, summary["scored"])
+
+        rejected = client.post("/analyze/import", files={"file": ("leads.xlsx", b"x", "application/octet-stream")},
+                               headers=headers)
+        assert rejected.status_code == 415
+
+
+def test_free_plan_cannot_import():
+    with TestClient(create_app()) as client:
+        headers = _login(client, "lead-import-free@example.com")
+        _set_plan("lead-import-free@example.com", "free")
+        response = client.post("/analyze/import", files={"file": ("leads.csv", CSV_HEADER + _csv_row(0), "text/csv")},
+                               headers=headers)
+        assert response.status_code == 402
@@ -0,0 +1,43 @@
+"""
+Tests for the Prometheus /metrics endpoint and analyze stage instrumentation.
+"""
+
+from fastapi.testclient import TestClient
+
+from app.core.analysis_cache import get_cached_analysis
+from app.core.config import get_settings
+from app.core.db import get_session_factory
+from app.core.metrics import track_stage
+from app.main import create_app
+
+
+def test_metrics_exposes_stage_histograms_and_cache_counters():
+    client = TestClient(create_app())
+
+    with track_stage("run_fit"):
+        pass
+    db = get_session_factory()()
+    try:
+        get_cached_analysis(db, "metrics-test-missing-hash", "linkedin")
+    finally:
+        db.close()
+    client.get("/health")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'analyze_stage_duration_seconds_count{stage="run_fit"}' in body
+    assert 'analysis_cache_lookups_total{response_type="linkedin",result="miss"}' in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/health",status="200"}' in body
+    assert "db_pool_checked_out_connections" in body
+    assert "openai_requests_in_flight" in body
+
+
+def test_metrics_token_required_when_configured(monkeypatch):
+    monkeypatch.setattr(get_settings(), "metrics_token", "scrape-secret")
+    client = TestClient(create_app())
+
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"}).status_code == 200
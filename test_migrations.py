@@ -0,0 +1,71 @@
+"""
+Tests for the versioned migration runner (app/core/migrations.py).
+"""
+
+import pytest
+from sqlalchemy import create_engine, inspect
+
+from app.core.migrations import (
+    LATEST_VERSION,
+    SchemaOutdatedError,
+    ensure_schema_current,
+    get_schema_version,
+    run_migrations,
+)
+
+
+def test_fresh_database_migrates_to_latest(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    assert get_schema_version(engine) == 0
+
+    applied = run_migrations(engine)
+    assert [m.version for m in applied] == list(range(1, LATEST_VERSION + 1))
+    assert get_schema_version(engine) == LATEST_VERSION
+
+    tables = set(inspect(engine).get_table_names())
+    assert {"users", "usage_events", "analysis_cache", "feedback", "schema_migrations"} <= tables
+
+    # Re-running is a no-op
+    assert run_migrations(engine) == []
+
+
+def test_legacy_database_gets_missing_columns(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR(255) NOT NULL, "
+            "plan VARCHAR(20) NOT NULL, stripe_customer_id VARCHAR(255), "
+            "stripe_subscription_id VARCHAR(255), created_at TIMESTAMP)"
+        )
+        conn.exec_driver_sql(
+            "CREATE TABLE usage_events (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, "
+            "event_type VARCHAR(50) NOT NULL, week_key VARCHAR(16), cost_usd NUMERIC(10, 4), "
+            "created_at TIMESTAMP)"
+        )
+        conn.exec_driver_sql("INSERT INTO users (id, email, plan) VALUES (1, 'legacy@example.com', 'pro')")
+        conn.exec_driver_sql(
+            "INSERT INTO usage_events (user_id, event_type, created_at) "
+            "VALUES (1, 'profile_analysis', '2025-11-03 10:00:00')"
+        )
+
+    run_migrations(engine)
+
+    user_columns = {c["name"] for c in inspect(engine).get_columns("users")}
+    assert {
+        "subscription_status",
+        "monthly_analyses_count",
+        "monthly_analyses_reset_at",
+        "lifetime_analyses_count",
+        "last_analysis_at",
+        "icp_config_json",
+    } <= user_columns
+    with engine.connect() as conn:
+        month_key = conn.exec_driver_sql("SELECT month_key FROM usage_events").scalar()
+    assert month_key == "2025-11"
+
+
+def test_startup_check_respects_auto_migrate(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'startup.db'}")
+    with pytest.raises(SchemaOutdatedError):
+        ensure_schema_current(engine, auto_migrate=False)
+    assert ensure_schema_current(engine, auto_migrate=True) == LATEST_VERSION
@@ -0,0 +1,142 @@
+"""
+Tests for the local ICP pre-scorer (app.services.prescore) and its short-circuit in the analyze route.
+"""
+
+from fastapi.testclient import TestClient
+
+import app.api.routes.analyze as analyze_routes
+from app.core.analysis_cache import build_profile_hash, get_cached_analysis, local_response_type
+from app.core.config import get_settings
+from app.core.db import get_session_factory
+from app.main import create_app
+from app.models.user import User
+from app.schemas.ai_responses import FitScoringResult, ICPConfig
+from app.services.prescore import normalize_profile, prescore, prescore_fit, seniority_level
+
+ICP = ICPConfig(
+    target_industries=["fintech", "saas"],
+    target_seniority=["C-level", "VP"],
+    required_skills=["python", "aws"],
+    target_locations=["Berlin", "Germany"],
+    exclude_keywords=["recruiter"],
+)
+
+
+def _profile(**overrides):
+    profile = {
+        "name": "Ada",
+        "headline": "VP Engineering at PayFlow (Fintech)",
+        "about": "Scaling Python services on AWS.",
+        "experience": [{"title": "VP Engineering"}, {"title": "Director of Engineering"}],
+        "location": "Berlin, Germany",
+    }
+    profile.update(overrides)
+    return profile
+
+
+def test_normalize_and_seniority():
+    features = normalize_profile({"headline": "CTO", "experience_titles": ["Engineer"], "skills": [{"name": "Go"}],
+                                  "companySize": "51-200"})
+    assert features.titles == ["engineer"] and features.skills == ["go"] and features.company_size == 125
+    assert seniority_level("senior vice president, sales") == 1  # vp, not "president"
+    assert seniority_level("managing director") == 0
+    assert seniority_level("software engineer") is None
+
+
+def test_clear_accept_is_scored_locally():
+    result = prescore(_profile(), ICP)
+    assert result.outcome == "accept"
+    assert result.fit.scored_locally is True
+    assert result.fit.dimension_scores.seniority_match == 100
+    assert result.fit.dimension_scores.skills_match == 100
+    assert result.fit.overall_score >= 80
+
+
+def test_clear_rejects():
+    assert prescore(_profile(headline="Tech Recruiter at PayFlow"), ICP).reason == "exclude_keyword"
+    assert prescore(_profile(location="Madrid, Spain"), ICP).reason == "location"
+    no_skills = prescore(_profile(about="Leading product teams.", headline="VP Product at PayFlow"), ICP)
+    assert no_skills.reason == "no_required_skills"
+    assert no_skills.fit.overall_score <= 15
+    assert no_skills.fit.dimension_scores.skills_match == 0
+
+
+def test_location_matches_whole_words():
+    icp = ICPConfig(target_seniority=["C-level"], required_skills=["python"], target_locations=["US"])
+    cto = dict(headline="CTO at PayFlow", about="Python platform work.")
+    assert prescore(_profile(location="Moscow, Russia", **cto), icp).reason == "location"
+    assert prescore(_profile(location="Austin, US", **cto), icp).outcome == "accept"
+
+
+def test_location_rejects_need_a_known_country():
+    cto = dict(headline="CTO at PayFlow", about="Python platform work.")
+    usa = ICPConfig(target_seniority=["C-level"], required_skills=["python"], target_locations=["United States"])
+    assert prescore(_profile(location="San Francisco Bay Area", **cto), usa).outcome == "ambiguous"
+    assert prescore(_profile(location="Austin, Texas, USA", **cto), usa).outcome == "accept"
+    assert prescore(_profile(location="Toronto, Canada", **cto), usa).reason == "location"
+    assert prescore(_profile(location="Madrid"), ICP).outcome == "ambiguous"  # no country named
+
+    dach = ICPConfig(target_seniority=["C-level"], required_skills=["python"], target_locations=["DACH"])
+    assert prescore(_profile(location="Zurich, Switzerland", **cto), dach).outcome == "accept"
+    assert prescore(_profile(location="Paris, France", **cto), dach).reason == "location"
+    city = ICPConfig(target_seniority=["C-level"], required_skills=["python"], target_locations=["Bay Area"])
+    assert prescore(_profile(location="Austin, Texas, USA", **cto), city).outcome == "ambiguous"
+
+
+def test_ambiguous_profiles_go_to_openai():
+    assert prescore(_profile(), ICPConfig()).outcome == "ambiguous"  # no criteria set
+    assert prescore(_profile(about="Python only."), ICP).outcome == "ambiguous"  # half the skills
+    assert prescore(_profile(location=None), ICP).outcome == "ambiguous"  # unknown location
+    assert prescore_fit(_profile(headline="Director of Engineering", experience=[]), ICP) is None
+
+
+def test_scored_locally_is_not_parsed_or_dumped():
+    fit = prescore(_profile(), ICP).fit
+    assert fit.scored_locally and "scored_locally" not in fit.model_dump()
+    assert not FitScoringResult(**{**fit.model_dump(), "scored_locally": True}).scored_locally
+
+
+def test_route_skips_openai_for_clear_cases(monkeypatch):
+    calls = []
+
+    def fake_run_fit(profile, icp):
+        calls.append(profile)
+        return FitScoringResult(**prescore(_profile(), ICP).fit.model_dump())
+
+    monkeypatch.setattr(analyze_routes, "run_fit", fake_run_fit)
+    monkeypatch.setattr(analyze_routes, "run_decision", lambda fit, profile: analyze_routes.local_decision(fit))
+
+    fit, decision = analyze_routes._qualify(_profile(location="Madrid, Spain"), ICP)
+    assert fit.scored_locally and decision.should_contact is False and decision.priority == "low"
+    fit, decision = analyze_routes._qualify(_profile(), ICP)
+    assert fit.scored_locally and decision.should_contact is True
+    assert calls == []
+
+    fit, _ = analyze_routes._qualify(_profile(location=None), ICP)
+    assert not fit.scored_locally and len(calls) == 1
+
+
+def test_local_verdicts_are_cached_per_user_and_icp(monkeypatch):
+    monkeypatch.setattr(get_settings(), "openai_enabled", True)
+    with TestClient(create_app()) as client:
+        token = client.post("/auth/login", json={"email": "prescore-cache@example.com"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        db = get_session_factory()()
+        db.query(User).filter(User.email == "prescore-cache@example.com").update({"plan": "pro"})
+        db.commit()
+        client.put("/user/icp", json=ICP.model_dump(), headers=headers)
+
+        first = client.post("/analyze/linkedin", json={"profile_extract": _profile()}, headers=headers)
+        assert first.status_code == 200 and first.json()["cache_hit"] is False
+        again = client.post("/analyze/linkedin", json={"profile_extract": _profile()}, headers=headers)
+        assert again.json()["cache_hit"] is True
+
+        profile_hash = build_profile_hash(_profile())
+        usage = client.get("/user/me/usage", headers=headers)  # unchanged by the cache hit
+        assert usage.json()["used"] == 1
+        history = client.get("/user/analyses", params={"response_type": "linkedin"}, headers=headers).json()
+        assert len(history["items"]) == 1
+        assert get_cached_analysis(db, profile_hash, "linkedin") is None  # not served to other users
+        saved_icp = ICPConfig(**db.query(User).filter(User.email == "prescore-cache@example.com").one().icp_config_json)
+        assert get_cached_analysis(db, profile_hash, local_response_type(saved_icp.model_dump())) is not None
+        db.close()
@@ -0,0 +1,62 @@
+"""
+Tests for the opt-in request profiler and the /admin/profiles endpoints.
+"""
+
+import time
+
+from fastapi.testclient import TestClient
+
+from app.core.config import get_settings
+from app.core.profiling import StackSampler, sign_profile_token, verify_profile_token
+from app.main import create_app
+
+
+def test_profile_token_signature_and_expiry():
+    future = int(time.time()) + 60
+    token = sign_profile_token("s3cret", future)
+    assert verify_profile_token("s3cret", token)
+    assert not verify_profile_token("other", token)
+    assert not verify_profile_token("s3cret", sign_profile_token("s3cret", int(time.time()) - 1))
+    assert not verify_profile_token(None, token)
+    assert not verify_profile_token("s3cret", "garbage")
+
+
+def test_sampler_collects_app_stacks():
+    from app.core.analysis_cache import build_profile_hash
+
+    sampler = StackSampler(0.001).start()
+    deadline = time.perf_counter() + 0.1
+    while time.perf_counter() < deadline:
+        build_profile_hash({"profile_url": "x" * 1000, "experience": [{"title": "CTO"}] * 50})
+    stacks = sampler.stop()
+    assert sampler.samples > 0
+    assert any("build_profile_hash (analysis_cache.py" in stack for stack in stacks)
+
+
+def test_signed_header_profiles_request_and_admin_endpoints(monkeypatch, tmp_path):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "profiling_enabled", True)
+    monkeypatch.setattr(settings, "profiling_secret", "s3cret")
+    monkeypatch.setattr(settings, "profiling_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "admin_token", "admin-token")
+    client = TestClient(create_app())
+
+    assert "X-Profiled" not in client.get("/health").headers
+    response = client.get(
+        "/health",
+        headers={"X-Profile": sign_profile_token("s3cret", int(time.time()) + 60), "X-Request-ID": "req-123"},
+    )
+    assert response.headers["X-Profiled"] == "header"
+    assert (tmp_path / "req-123.collapsed").exists()
+
+    admin = {"Authorization": "Bearer admin-token"}
+    assert client.get("/admin/profiles").status_code == 401
+    profiles = client.get("/admin/profiles", headers=admin).json()["profiles"]
+    assert profiles[0]["request_id"] == "req-123"
+    assert profiles[0]["path"] == "/health" and profiles[0]["status"] == 200
+
+    assert client.get("/admin/profiles/req-123", headers=admin).status_code == 200
+    assert client.get("/admin/profiles/missing", headers=admin).status_code == 404
+
+    monkeypatch.setattr(settings, "admin_token", None)
+    assert client.get("/admin/profiles", headers=admin).status_code == 404
@@ -0,0 +1,53 @@
+"""
+Tests for per-request SQL query counting, budgets and the N+1 warning.
+"""
+
+import logging
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.core.config import get_settings
+from app.core.query_stats import instrument_engine, track_queries
+from app.main import create_app
+
+
+def test_headers_and_budget_warning(monkeypatch, caplog):
+    client = TestClient(create_app())
+    token = client.post("/auth/login", json={"email": "query-stats@example.com"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = client.get("/billing/status", headers=headers)
+    assert response.headers["X-DB-Queries"] == "1"  # the user load
+    assert float(response.headers["X-DB-Time-ms"]) >= 0
+
+    monkeypatch.setattr(get_settings(), "db_query_budget_overrides", {"/billing/status": 0, "/health": 0})
+    monkeypatch.setattr(get_settings(), "db_query_budget", 1)
+    monkeypatch.setattr(get_settings(), "db_query_headers", False)
+    with caplog.at_level(logging.WARNING, logger="app.core.query_stats"):
+        response = client.get("/billing/status", headers=headers)
+        assert "X-DB-Queries" not in response.headers
+        assert not [r for r in caplog.records if "DB_QUERY_BUDGET_EXCEEDED" in r.message]  # 0 disables
+
+        client.post("/auth/login", json={"email": "query-stats-2@example.com"})
+    assert any("route=/auth/login" in r.message for r in caplog.records if "DB_QUERY_BUDGET_EXCEEDED" in r.message)
+
+    metrics = client.get("/metrics").text
+    assert 'http_request_db_queries_count{route="/billing/status"}' in metrics
+
+
+def test_repeated_statements_flagged():
+    engine = instrument_engine(create_engine("sqlite:///:memory:"))
+    instrument_engine(engine)  # idempotent
+
+    with engine.connect() as conn, track_queries() as stats:
+        for i in range(6):
+            conn.execute(text("SELECT :i"), {"i": i})
+        conn.execute(text("SELECT 42"))
+
+    assert stats.count == 7
+    assert stats.repeated(5) == [("SELECT ?", 6)]
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))  # outside a tracked block: not counted
+    assert stats.count == 7
@@ -0,0 +1,117 @@
+"""
+Tests for read-replica routing with two SQLite databases: the primary
+(DATABASE_URL) and a replica file holding deliberately different rows, so each
+response shows which database served it.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.core.db as db_module
+from app.core.analysis_cache import cache_analysis, get_cached_analysis
+from app.core.config import get_settings
+from app.core.db import (
+    Base,
+    ReplicaRouter,
+    get_replica_engine,
+    get_replica_session_factory,
+    get_session_factory,
+    read_session,
+)
+from app.core.usage import record_usage
+from app.main import create_app
+from app.models.user import User
+
+
+def _clear_replica_engines():
+    for factory in (
+        db_module.get_replica_engine,
+        db_module.get_replica_session_factory,
+        db_module.get_async_replica_engine,
+        db_module.get_async_replica_session_factory,
+    ):
+        factory.cache_clear()
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "database_replica_url", f"sqlite:///{tmp_path / 'replica.db'}")
+    monkeypatch.setattr(settings, "replica_lag_check_seconds", 0.0)  # measure on every read
+    monkeypatch.setattr(db_module, "replica_router", ReplicaRouter())
+    _clear_replica_engines()
+    Base.metadata.create_all(bind=get_replica_engine())
+    yield get_replica_session_factory()
+    db_module.dispose_replica_engine()
+    _clear_replica_engines()
+
+
+def _login(client, email):
+    token = client.post("/auth/login", json={"email": email}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _copy_to_replica(replica, email, **changes) -> int:
+    primary = get_session_factory()()
+    user = primary.query(User).filter(User.email == email).one()
+    session = replica()
+    session.merge(User(id=user.id, email=email, **changes))
+    session.commit()
+    session.close()
+    primary.close()
+    return user.id
+
+
+def test_reads_use_replica_until_usage_is_recorded(replica):
+    with TestClient(create_app()) as client:
+        headers = _login(client, "replica-reads@example.com")
+        user_id = _copy_to_replica(replica, "replica-reads@example.com", plan="pro")
+
+        assert client.get("/billing/status", headers=headers).json()["plan"] == "pro"  # replica row
+        assert client.get("/user", headers=headers).json()["plan"] == "pro"
+        assert client.get("/user/me/usage", headers=headers).json()["limit"] == get_settings().usage_limit_pro
+
+        db = get_session_factory()()
+        record_usage(db.get(User, user_id), db)
+        db.close()
+        assert client.get("/billing/status", headers=headers).json()["plan"] == "free"  # read-your-writes
+
+        metrics = client.get("/metrics").text
+    assert 'db_read_routes_total{reason="ok",target="replica"}' in metrics
+    assert 'db_read_routes_total{reason="read_your_writes",target="primary"}' in metrics
+
+
+def test_stale_or_unreachable_replica_falls_back_to_primary(replica, monkeypatch):
+    with TestClient(create_app()) as client:
+        headers = _login(client, "replica-stale@example.com")
+        _copy_to_replica(replica, "replica-stale@example.com", plan="pro")
+        assert client.get("/billing/status", headers=headers).json()["plan"] == "pro"
+
+        monkeypatch.setattr(db_module, "measure_replica_lag", lambda conn: 60.0)
+        assert client.get("/billing/status", headers=headers).json()["plan"] == "free"
+        assert db_module.replica_router.route(None) == ("primary", "replica_stale")
+
+        def unreachable(conn):
+            raise RuntimeError("replica down")
+
+        monkeypatch.setattr(db_module, "measure_replica_lag", unreachable)
+        assert client.get("/billing/status", headers=headers).json()["plan"] == "free"
+        assert db_module.replica_router.route(None) == ("primary", "replica_unavailable")
+
+
+def test_read_session_for_cache_lookups(replica, monkeypatch):
+    primary = get_session_factory()()
+    Base.metadata.create_all(bind=primary.get_bind())
+    replica_db = replica()
+    cache_analysis(replica_db, profile_hash="replica-only", response_type="linkedin", payload={"score": 1}, user_id=None)
+    replica_db.close()
+
+    with read_session(primary) as db:
+        assert db is not primary
+        assert get_cached_analysis(db, "replica-only", "linkedin") == {"score": 1}
+
+    monkeypatch.setattr(get_settings(), "database_replica_url", None)
+    with read_session(primary) as db:
+        assert db is primary
+        assert get_cached_analysis(db, "replica-only", "linkedin") is None
+    primary.close()
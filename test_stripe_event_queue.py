@@ -0,0 +1,153 @@
+"""
+Tests for the durable Stripe webhook queue (stripe_events + worker pool).
+"""
+
+import hashlib
+import hmac
+import json
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from app.api.routes.billing import get_stripe_service
+from app.core.config import get_settings
+from app.core.db import get_session_factory
+from app.core.stripe_events import StripeEventWorker, list_stripe_events, persist_stripe_event, requeue_stripe_event
+from app.core.stripe_service import StripeService
+from app.main import create_app
+from app.models.stripe_event import StripeEvent
+
+SECRET = "whsec_test_queue"
+
+
+def _event(event_type, customer, created, event_id=None):
+    return {
+        "id": event_id or f"evt_{uuid.uuid4().hex}",
+        "type": event_type,
+        "created": created,
+        "data": {"object": {"id": f"sub_{customer}", "customer": customer}},
+    }
+
+
+def _sign(payload: bytes) -> str:
+    timestamp = int(time.time())
+    signature = hmac.new(SECRET.encode(), f"{timestamp}.".encode() + payload, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+def _status(event_id):
+    db = get_session_factory()()
+    try:
+        return db.get(StripeEvent, event_id).status
+    finally:
+        db.close()
+
+
+class RecordingService:
+    """Stands in for StripeService; fails the first `failures[sub_id]` calls per object."""
+
+    def __init__(self, failures=None, missing=()):
+        self.calls = []
+        self.failures = dict(failures or {})
+        self.missing = set(missing)
+
+    def _handle(self, obj, db):
+        key = obj["customer"]
+        if self.failures.get(key, 0) > 0:
+            self.failures[key] -= 1
+            raise RuntimeError("stripe unavailable")
+        self.calls.append(obj["seq"] if "seq" in obj else key)
+        return None if key in self.missing else object()
+
+    handle_checkout_completed = handle_subscription_created = _handle
+    handle_subscription_updated = handle_subscription_deleted = _handle
+
+
+def test_webhook_is_stored_once_and_acknowledged():
+    app = create_app()
+    app.dependency_overrides[get_stripe_service] = lambda: StripeService(api_key="sk_test", webhook_secret=SECRET)
+    client = TestClient(app)
+
+    event = _event("customer.subscription.updated", f"cus_{uuid.uuid4().hex[:8]}", 100)
+    payload = json.dumps(event).encode()
+    first = client.post("/billing/webhook/stripe", content=payload, headers={"stripe-signature": _sign(payload)})
+    again = client.post("/billing/webhook/stripe", content=payload, headers={"stripe-signature": _sign(payload)})
+    assert first.status_code == 200 and first.json()["queued"] is True
+    assert again.status_code == 200 and again.json()["queued"] is False
+    assert _status(event["id"]) == "pending"
+
+    bad = client.post("/billing/webhook/stripe", content=payload, headers={"stripe-signature": "t=1,v1=deadbeef"})
+    assert bad.status_code == 400
+
+
+def test_events_processed_in_order_per_customer_with_retry(monkeypatch):
+    monkeypatch.setattr(get_settings(), "stripe_webhook_retry_base_seconds", 0.0)
+    customer_a, customer_b = f"cus_a{uuid.uuid4().hex[:6]}", f"cus_b{uuid.uuid4().hex[:6]}"
+    for seq, (customer, created) in enumerate([(customer_a, 1), (customer_b, 2), (customer_a, 3), (customer_a, 4)]):
+        event = _event("customer.subscription.updated", customer, created)
+        event["data"]["object"]["seq"] = seq
+        persist_stripe_event(event, json.dumps(event).encode())
+
+    service = RecordingService(failures={customer_a: 1})
+    worker = StripeEventWorker(lambda: service, workers=0)
+    worker.drain()
+
+    # customer A's first event failed once; its later events waited for it
+    a_calls = [seq for seq in service.calls if seq in (0, 2, 3)]
+    assert a_calls == [0, 2, 3]
+    assert 1 in service.calls
+    assert not [e for e in list_stripe_events(limit=500) if e["customer_id"] in (customer_a, customer_b) and e["status"] != "processed"]
+
+
+def test_blocked_customer_does_not_hold_back_others():
+    blocked, other = f"cus_h{uuid.uuid4().hex[:6]}", f"cus_o{uuid.uuid4().hex[:6]}"
+    backlog = [_event("customer.subscription.updated", blocked, created) for created in range(1, 251)]
+    for event in backlog:
+        persist_stripe_event(event, json.dumps(event).encode())
+    late = _event("customer.subscription.updated", other, 1000)
+    persist_stripe_event(late, json.dumps(late).encode())
+
+    db = get_session_factory()()
+    head = db.get(StripeEvent, backlog[0]["id"])
+    head.status, head.attempts = "failed", 1
+    head.next_attempt_at = datetime.now(timezone.utc) + timedelta(hours=1)  # waiting for its retry
+    db.commit()
+    db.close()
+
+    claimed = StripeEventWorker(lambda: RecordingService(), workers=0).claim_due()
+    assert [row.id for row in claimed] == [late["id"]]
+    assert _status(backlog[1]["id"]) == "pending"  # still behind its customer's failed head
+
+
+def test_dead_letter_and_requeue(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "stripe_webhook_retry_base_seconds", 0.0)
+    monkeypatch.setattr(settings, "stripe_webhook_max_attempts", 2)
+    customer = f"cus_d{uuid.uuid4().hex[:6]}"
+    event = _event("checkout.session.completed", customer, 5)
+    persist_stripe_event(event, json.dumps(event).encode())
+
+    StripeEventWorker(lambda: RecordingService(failures={customer: 10}), workers=0).drain()
+    assert _status(event["id"]) == "dead"
+    assert any(e["id"] == event["id"] for e in list_stripe_events("dead", limit=500))
+
+    assert requeue_stripe_event(event["id"])
+    StripeEventWorker(lambda: RecordingService(missing={customer}), workers=0).drain()
+    assert _status(event["id"]) == "skipped"
+
+
+def test_background_workers_process_queue():
+    customer = f"cus_t{uuid.uuid4().hex[:6]}"
+    event = _event("customer.subscription.deleted", customer, 7)
+    persist_stripe_event(event, json.dumps(event).encode())
+    worker = StripeEventWorker(lambda: RecordingService(), workers=2).start()
+    try:
+        worker.notify()
+        deadline = time.monotonic() + 5
+        while _status(event["id"]) != "processed" and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        worker.stop()
+    assert _status(event["id"]) == "processed"
@@ -0,0 +1,148 @@
+"""
+Tests for app.core.stripe_reconcile against fake_stripe_server.py (real SDK paging over HTTP).
+"""
+
+import time
+
+import pytest
+import stripe
+
+from app.core.db import get_session_factory
+from app.core.stripe_reconcile import (
+    expected_user_state,
+    fetch_stripe_state,
+    load_snapshot,
+    reconcile_users,
+    save_snapshot,
+)
+from app.core.subscription_cache import subscription_snapshot
+from app.models.user import User
+from fake_stripe_server import PLAN_PRICES, FakeStripeServer, generate_fixture, plan_price_id
+
+PRICE_PLANS = {plan_price_id(plan): plan for plan in PLAN_PRICES}
+
+
+@pytest.fixture
+def fake_stripe(monkeypatch):
+    def start(fixture):
+        server = FakeStripeServer(port=0, fixture=fixture).start()
+        monkeypatch.setattr(stripe, "api_key", "sk_test_fake")
+        monkeypatch.setattr(stripe, "api_base", server.base_url)
+        servers.append(server)
+        return server
+
+    servers = []
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def db():
+    session = get_session_factory()()  # per-test database from conftest.py
+    yield session
+    session.close()
+
+
+def _user_in_sync(subscription: dict) -> User:
+    expected = expected_user_state(subscription_snapshot(subscription), PRICE_PLANS)
+    plan, status = expected or ("free", subscription["status"])
+    return User(
+        email=f"{subscription['customer']}@reconcile.test",
+        plan=plan,
+        subscription_status=status,
+        stripe_customer_id=subscription["customer"],
+        stripe_subscription_id=subscription["id"],
+    )
+
+
+def test_fetch_pages_every_list(fake_stripe):
+    fixture = generate_fixture(customers=450, legacy_products=120)
+    server = fake_stripe(fixture)
+
+    state = fetch_stripe_state(stripe, workers=4)
+
+    assert len(state.products) == 123  # more than one page
+    assert len(state.prices) == 123
+    assert len(state.subscriptions) == 450  # canceled included
+    assert server.stats.by_path["GET /v1/products"] == 2
+    assert "GET /v1/prices/{id}" not in server.stats.by_path
+    live = state.prices_by_product(active=True)
+    assert [price.id for price in live["prod_fake_pro"]] == ["price_fake_pro"]
+    assert state.products[0].name.startswith("LinkedIn Lead Checker")  # attribute access like the SDK
+
+
+def test_snapshot_round_trip(fake_stripe, tmp_path):
+    fake_stripe(generate_fixture(customers=20))
+    state = fetch_stripe_state(stripe)
+
+    path = save_snapshot(state, str(tmp_path / "snapshot.json"))
+    loaded = load_snapshot(str(path))
+
+    assert [p.id for p in loaded.products] == [p.id for p in state.products]
+    assert loaded.prices[0].recurring.interval == "month"
+    assert loaded.subscriptions == state.subscriptions
+
+
+def test_reconcile_reports_each_kind_of_drift(fake_stripe, db):
+    fixture = generate_fixture(customers=6, seed=1)
+    subscriptions = fixture["subscriptions"]
+    subscriptions[0].update(status="active")
+    subscriptions[1].update(status="canceled")
+    subscriptions[2].update(status="past_due")
+    fake_stripe(fixture)
+
+    users = [_user_in_sync(subscription) for subscription in subscriptions[:5]]
+    users[0].plan = "free"  # paid in Stripe, free locally
+    users[1].plan, users[1].subscription_status = "pro", "active"  # canceled in Stripe
+    users[2].subscription_status = "active"  # past_due in Stripe
+    users.append(User(email="ghost@reconcile.test", plan="team", subscription_status="active"))
+    db.add_all(users)
+    db.commit()
+    subscriptions[5].update(status="active")  # customer 5 has no user row
+
+    report = reconcile_users(db, fetch_stripe_state(stripe), PRICE_PLANS)
+    issues = {(m["issue"], m["customer_id"]) for m in report.mismatches}
+
+    assert ("plan", subscriptions[0]["customer"]) in issues
+    assert ("plan", subscriptions[1]["customer"]) in issues
+    assert ("status", subscriptions[1]["customer"]) in issues
+    assert ("status", subscriptions[2]["customer"]) in issues
+    assert ("missing_subscription", None) in issues
+    assert ("orphan_subscription", subscriptions[5]["customer"]) in issues
+    assert not any(m["customer_id"] in (subscriptions[3]["customer"], subscriptions[4]["customer"])
+                   for m in report.mismatches)
+
+
+def test_stale_subscription_id_is_flagged(fake_stripe, db):
+    fixture = generate_fixture(customers=2, seed=2)
+    old, new = fixture["subscriptions"]
+    old.update(status="canceled")
+    new.update(status="active", customer=old["customer"])
+    fake_stripe(fixture)
+
+    user = _user_in_sync(old)  # still points at the canceled subscription
+    db.add(user)
+    db.commit()
+
+    report = reconcile_users(db, fetch_stripe_state(stripe), PRICE_PLANS)
+    issues = {m["issue"]: m for m in report.mismatches if m["customer_id"] == old["customer"]}
+
+    assert issues["subscription_id"]["db"] == old["id"]
+    assert issues["subscription_id"]["expected"] == new["id"]
+    assert issues["plan"]["db"] == "free" and issues["status"]["expected"] == "active"
+
+
+def test_thousands_of_customers_reconcile_in_seconds(fake_stripe, db):
+    fixture = generate_fixture(customers=3000, seed=2)
+    fake_stripe(fixture)
+    db.add_all([_user_in_sync(subscription) for subscription in fixture["subscriptions"]])
+    db.commit()
+
+    started = time.perf_counter()
+    report = reconcile_users(db, fetch_stripe_state(stripe, workers=8), PRICE_PLANS)
+    elapsed = time.perf_counter() - started
+
+    assert report.users_checked >= 3000
+    assert [m for m in report.mismatches if m["customer_id"] and m["customer_id"].startswith("cus_fake_")] == []
+    assert elapsed < 15
@@ -0,0 +1,84 @@
+"""
+Tests for the queue-based structured logging pipeline.
+"""
+
+import json
+import logging
+import queue
+
+from fastapi.testclient import TestClient
+
+from app.core.structured_logging import (
+    DroppingQueueHandler,
+    JSONFormatter,
+    RequestContextFilter,
+    SamplingFilter,
+    bind_log_context,
+    record_stage_timing,
+    request_log_context,
+)
+from app.main import create_app
+
+
+def _record(msg, level=logging.INFO, args=None, **extra):
+    record = logging.LogRecord("app.test", level, __file__, 1, msg, args, None)
+    for name, value in extra.items():
+        setattr(record, name, value)
+    return record
+
+
+def test_json_formatter_includes_context_and_extras():
+    record = _record("Cache hit for %s", args=("abc",), request_id="req-1", user_id=7, stages={"auth": 1.5})
+    entry = json.loads(JSONFormatter().format(record))
+    assert entry["msg"] == "Cache hit for abc"
+    assert entry["level"] == "INFO" and entry["logger"] == "app.test"
+    assert entry["request_id"] == "req-1" and entry["user_id"] == 7
+    assert entry["stages_ms"] == {"auth": 1.5}
+    assert entry["ts"].endswith("+00:00")
+
+
+def test_sampling_filter_never_drops_warnings():
+    sampler = SamplingFilter(1.0, {"BILLING_STATUS_CHECKED": 0.0, "BILLING": 1.0})
+    assert not sampler.filter(_record("BILLING_STATUS_CHECKED | user=%s"))
+    assert sampler.filter(_record("BILLING_PORTAL_OPENED"))
+    assert sampler.filter(_record("BILLING_STATUS_CHECKED", level=logging.WARNING))
+    assert SamplingFilter(0.0, {}).filter(_record("anything", level=logging.ERROR))
+    assert not SamplingFilter(0.0, {}).filter(_record("anything"))
+
+
+def test_request_context_is_bound_to_records():
+    context_filter = RequestContextFilter()
+    with request_log_context(request_id="req-9", route="/analyze/profile") as context:
+        bind_log_context(user_id=3)
+        record_stage_timing("auth", 0.002)
+        record_stage_timing("auth", 0.001)
+        record = _record("inside")
+        context_filter.filter(record)
+    assert (record.request_id, record.user_id, record.route) == ("req-9", 3, "/analyze/profile")
+    assert context["stages"] == {"auth": 3.0}
+
+    outside = _record("outside")
+    context_filter.filter(outside)
+    assert not hasattr(outside, "request_id")
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+    before = DroppingQueueHandler.dropped
+    handler.handle(_record("first"))
+    handler.handle(_record("second"))
+    assert DroppingQueueHandler.dropped == before + 1
+    assert handler.queue.get_nowait().msg == "first"
+
+
+def test_request_summary_carries_stages_and_user(caplog):
+    client = TestClient(create_app())
+    token = client.post("/auth/login", json={"email": "structured-logging@example.com"}).json()["access_token"]
+    with caplog.at_level(logging.INFO, logger="app.requests"):
+        client.get("/billing/status", headers={"Authorization": f"Bearer {token}", "X-Request-ID": "log-req-1"})
+    summary = [r for r in caplog.records if r.getMessage().startswith("REQUEST_COMPLETED")][-1]
+    assert summary.request_id == "log-req-1"
+    assert summary.route == "/billing/status"
+    assert isinstance(summary.user_id, int)
+    assert summary.status == 200 and "auth" in summary.stages
+    assert summary.db_queries >= 1
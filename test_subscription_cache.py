@@ -0,0 +1,77 @@
+"""
+Tests for the Stripe subscription cache used by the webhook handlers.
+"""
+
+import time
+import uuid
+
+from app.core.db import get_session_factory
+from app.core.stripe_service import StripeService, load_stripe
+from app.core.subscription_cache import SubscriptionCache, get_subscription_cache, subscription_snapshot
+from app.models.user import User
+
+
+def _subscription(sub_id, customer, price_id="price_pro_test", status="active"):
+    return {
+        "id": sub_id,
+        "object": "subscription",
+        "customer": customer,
+        "status": status,
+        "items": {"data": [{"price": {"id": price_id}, "current_period_end": 1_900_000_000}]},
+    }
+
+
+def test_snapshot_ttl_and_eviction(monkeypatch):
+    snapshot = subscription_snapshot(_subscription("sub_1", "cus_1"))
+    assert snapshot["price_id"] == "price_pro_test"
+    assert snapshot["current_period_end"] == 1_900_000_000  # item-level period (newer API versions)
+
+    cache = SubscriptionCache(ttl_seconds=60, max_entries=2)
+    for sub_id in ("sub_1", "sub_2", "sub_3"):
+        cache.remember(_subscription(sub_id, "cus_1"))
+    assert len(cache) == 2 and cache.get("sub_1") is None
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+    assert cache.get("sub_3") is None
+
+    fetched = []
+    assert cache.get_or_fetch("sub_4", lambda sub_id: fetched.append(sub_id) or _subscription(sub_id, "c"))["id"] == "sub_4"
+    assert cache.get_or_fetch("sub_4", lambda sub_id: fetched.append(sub_id))["id"] == "sub_4"
+    assert fetched == ["sub_4"]
+
+
+def test_checkout_uses_subscription_event_payload_without_retrieve(monkeypatch):
+    stripe = load_stripe()
+    calls = []
+    monkeypatch.setattr(stripe.Subscription, "retrieve", lambda sub_id: calls.append(sub_id))
+    service = StripeService(api_key="sk_test", webhook_secret="whsec", pro_price_id="price_pro_test")
+
+    db = get_session_factory()()
+    try:
+        user = User(email=f"sub-cache-{uuid.uuid4().hex[:8]}@example.com", plan="free")
+        db.add(user)
+        db.commit()
+        sub_id, customer = f"sub_{uuid.uuid4().hex[:10]}", f"cus_{uuid.uuid4().hex[:10]}"
+
+        # customer.subscription.created arrives first (user not linked yet -> skipped, but cached)
+        assert service.handle_subscription_created(_subscription(sub_id, customer), db) is None
+        assert get_subscription_cache().get(sub_id)["price_id"] == "price_pro_test"
+
+        session = {"client_reference_id": str(user.id), "customer": customer, "subscription": sub_id,
+                   "metadata": {"plan": "pro"}}
+        updated = service.handle_checkout_completed(session, db)
+        assert updated.plan == "pro" and updated.subscription_status == "active"
+        assert updated.monthly_analyses_reset_at is not None
+        assert calls == []
+
+        # Unauthorized price in the cached object is still rejected
+        other = f"sub_{uuid.uuid4().hex[:10]}"
+        get_subscription_cache().remember(_subscription(other, customer, price_id="price_evil"))
+        user.plan = "free"
+        db.commit()
+        rejected = service.handle_checkout_completed({**session, "subscription": other}, db)
+        assert rejected.plan == "free" and rejected.subscription_status == "unauthorized"
+        assert calls == []
+    finally:
+        db.close()
@@ -0,0 +1,97 @@
+"""
+Tests for usage_events monthly partitioning helpers and retention.
+
+Postgres DDL is checked as generated SQL; the archival path runs against
+SQLite (single-table fallback).
+"""
+
+import csv
+import gzip
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db import Base
+from app.core.usage_partitions import (
+    _PARENT_INDEXES_SQL,
+    archive_expired_usage_events,
+    partition_ddl,
+    partition_month_key,
+    partition_name,
+    prepare_usage_events_table,
+    supports_partitioning,
+)
+from app.core.utils import get_current_month_key, get_month_bounds, shift_month_key
+from app.models.usage_event import UsageEvent
+from app.models.user import User
+
+
+def test_month_helpers():
+    assert shift_month_key("2026-12", 1) == "2027-01"
+    assert shift_month_key("2026-01", -1) == "2025-12"
+    assert shift_month_key("2026-05", -17) == "2024-12"
+    start, end = get_month_bounds("2026-12")
+    assert start == datetime(2026, 12, 1, tzinfo=timezone.utc)
+    assert end == datetime(2027, 1, 1, tzinfo=timezone.utc)
+
+
+def test_partition_naming_and_ddl():
+    assert partition_name("2026-03") == "usage_events_2026_03"
+    assert partition_month_key("usage_events_2026_03") == "2026-03"
+    assert partition_month_key("usage_events_default") is None
+    ddl = partition_ddl("2026-03")
+    assert "PARTITION OF usage_events" in ddl
+    assert "FROM ('2026-03-01T00:00:00+00:00') TO ('2026-04-01T00:00:00+00:00')" in ddl
+
+
+def test_parent_indexes_cover_orm_indexes():
+    indexed = {column.name for column in UsageEvent.__table__.columns if column.index and column.name != "id"}
+    for name in indexed:
+        assert any(f"ON usage_events ({name})" in statement for statement in _PARENT_INDEXES_SQL), name
+
+
+def test_sqlite_archive_exports_and_deletes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'usage.db'}")
+    assert not supports_partitioning(engine)
+    Base.metadata.create_all(bind=engine, tables=[User.__table__])
+    prepare_usage_events_table(engine)
+
+    current = get_current_month_key()
+    old_month = shift_month_key(current, -3)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        user = User(email="partition@example.com", plan="pro")
+        db.add(user)
+        db.flush()
+        for month_key in (old_month, old_month, current):
+            start, _ = get_month_bounds(month_key)
+            db.add(UsageEvent(
+                user_id=user.id,
+                event_type="profile_analysis",
+                month_key=month_key,
+                cost_usd=Decimal("0.03"),
+                created_at=start.replace(day=2),
+            ))
+        db.commit()
+
+    archived = archive_expired_usage_events(engine, retention_months=1, archive_dir=str(tmp_path / "archive"))
+    assert [item["month_key"] for item in archived] == [old_month]
+    assert archived[0]["rows"] == 2
+
+    with gzip.open(archived[0]["path"], "rt", encoding="utf-8") as handle:
+        rows = list(csv.DictReader(handle))
+    assert len(rows) == 2
+    assert {row["month_key"] for row in rows} == {old_month}
+
+    with engine.connect() as conn:
+        remaining = conn.execute(select(func.count()).select_from(UsageEvent.__table__)).scalar()
+    assert remaining == 1
+
+
+def test_archive_disabled_by_default(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'usage.db'}")
+    Base.metadata.create_all(bind=engine, tables=[User.__table__])
+    prepare_usage_events_table(engine)
+    assert archive_expired_usage_events(engine, retention_months=0, archive_dir=str(tmp_path)) == []
@@ -0,0 +1,34 @@
+"""
+Tests for the lifespan warmup and the /health/ready readiness probe.
+"""
+
+from fastapi.testclient import TestClient
+
+from app.core import warmup
+from app.core.config import get_settings
+from app.main import create_app
+
+
+def test_readiness_reports_warmup_steps():
+    app = create_app()
+    warmup.mark_not_ready("test reset")
+
+    client = TestClient(app)
+    assert client.get("/health/ready").status_code == 503
+    assert client.get("/health").status_code == 200  # liveness is unaffected
+
+    with TestClient(app) as started:  # runs the lifespan hook
+        response = started.get("/health/ready")
+        assert response.status_code == 200
+        body = response.json()
+        assert body["ready"] is True
+        assert {"settings", "prompts", "ai_client", "db_pool"} <= set(body["steps"])
+
+    assert warmup.get_readiness()["ready"] is False  # shutdown flips readiness off
+
+
+def test_synthetic_analysis_step(monkeypatch):
+    monkeypatch.setattr(get_settings(), "warmup_synthetic_analysis", True)
+    state = warmup.run_warmup()
+    assert state["ready"] is True
+    assert state["steps"]["synthetic_analysis"]["ok"] is True
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Aggregate /events/track events from the columnar store (app.core.event_store).
+
+    python tracking_stats.py import --from db                  # tracking_events table -> segments
+    python tracking_stats.py import --from jsonl tracking_events/events-*.jsonl
+    python tracking_stats.py compact                           # merge small segments
+    python tracking_stats.py report                            # summary (totals, pages, referrers, conversion)
+    python tracking_stats.py report --by day,event --since 2026-01-01 --format csv
+    python tracking_stats.py synth --events 5000000 --days 90  # synthetic data for benchmarking
+
+The store defaults to TRACKING_EVENTS_DIR (where TRACKING_SINK=columnar writes).
+Group-bys are vectorized (numpy), so millions of events aggregate in seconds.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Iterator, List, Sequence
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np  # noqa: E402
+
+from app.core.config import get_settings  # noqa: E402
+from app.core.event_store import (  # noqa: E402
+    GROUP_KEYS,
+    EventColumns,
+    compact,
+    count_distinct,
+    group_counts,
+    load_store,
+    segment_paths,
+    write_columns,
+    write_segment,
+)
+
+IMPORT_CHUNK = 100_000
+
+
+def _parse_day(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+
+
+def _chunks(rows: Iterator[dict], size: int) -> Iterator[List[dict]]:
+    chunk: List[dict] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _db_rows(since: datetime = None) -> Iterator[dict]:
+    from sqlalchemy import select
+
+    from app.core.db import get_engine
+    from app.models.tracking_event import TrackingEvent
+
+    table = TrackingEvent.__table__
+    query = select(table.c.event, table.c.page, table.c.referrer, table.c.ip_prefix, table.c.created_at)
+    if since is not None:
+        query = query.where(table.c.created_at >= since)
+    with get_engine().connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=IMPORT_CHUNK).execute(query)
+        for row in result.mappings():
+            yield dict(row)
+
+
+def _jsonl_rows(paths: Sequence[str]) -> Iterator[dict]:
+    for path in paths:
+        with open(path, encoding="utf-8") as handle:
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def cmd_import(args: argparse.Namespace) -> int:
+    if args.source == "db":
+        rows = _db_rows(_parse_day(args.since) if args.since else None)
+    else:
+        if not args.paths:
+            print("❌ import --from jsonl needs at least one file")
+            return 1
+        rows = _jsonl_rows(args.paths)
+    total = segments = 0
+    for chunk in _chunks(rows, IMPORT_CHUNK):
+        write_segment(args.store, chunk)
+        total += len(chunk)
+        segments += 1
+    print(f"✓ Imported {total} events into {segments} segment(s) in {args.store}")
+    return 0
+
+
+def cmd_compact(args: argparse.Namespace) -> int:
+    before = len(segment_paths(args.store))
+    merged = compact(args.store)
+    if merged is None:
+        print(f"ℹ️  No segments in {args.store}")
+    else:
+        print(f"✓ Compacted {before} segment(s) into {merged.name}")
+    return 0
+
+
+def cmd_synth(args: argparse.Namespace) -> int:
+    rng = np.random.default_rng(args.seed)
+    end = int(time.time())
+    vocab = {
+        "event": np.array(["install_extension_click", "waitlist_join"]),
+        "page": np.array(["landing", "pricing", "features", "blog", "docs", "signup"]),
+        "referrer": np.array(["direct"] + [f"https://ref{i}.example.com" for i in range(args.referrers)]),
+        "ip": np.array([f"10.{i // 256}.{i % 256}***" for i in range(args.ips)]),
+    }
+    weights = {"event": np.array([0.8, 0.2]), "page": None, "referrer": None, "ip": None}
+    columns = EventColumns(
+        ts=np.sort(rng.integers(end - args.days * 86_400, end, size=args.events, dtype=np.int64)),
+        codes={
+            name: rng.choice(len(values), size=args.events, p=weights[name]).astype(np.uint32)
+            for name, values in vocab.items()
+        },
+        values=vocab,
+    )
+    path = write_columns(args.store, columns)
+    print(f"✓ Wrote {args.events} synthetic events to {path} ({path.stat().st_size / 1e6:.1f} MB)")
+    return 0
+
+
+def print_summary(columns: EventColumns, top: int) -> None:
+    total = len(columns)
+    print("=" * 70)
+    print("📊 LINKEDIN LEAD CHECKER - EVENT ANALYTICS")
+    print("=" * 70)
+    print(f"\n📈 Total Events: {total}\n")
+    for title, key, limit in (
+        ("🎯 Events by Type:", "event", None),
+        ("📄 Events by Page:", "page", None),
+        ("🔗 Top Referrers:", "referrer", top),
+    ):
+        print(title)
+        for (value,), count in group_counts(columns, [key])[:limit]:
+            display = "(direct)" if key == "referrer" and value == "direct" else value
+            print(f"   • {display}: {count} ({count / total * 100:.1f}%)")
+        print()
+    print(f"🌐 Unique IPs (approx): {count_distinct(columns, 'ip')}\n")
+
+    by_event = dict((key[0], count) for key, count in group_counts(columns, ["event"]))
+    install_clicks = by_event.get("install_extension_click", 0)
+    waitlist_joins = by_event.get("waitlist_join", 0)
+    print("💡 Conversion Metrics:")
+    if install_clicks:
+        print(f"   • Install Clicks: {install_clicks}")
+        print(f"   • Waitlist Joins: {waitlist_joins}")
+        print(f"   • Conversion Rate: {waitlist_joins / install_clicks * 100:.1f}%")
+    else:
+        print("   • Not enough data yet")
+    print()
+    print("=" * 70)
+
+
+def cmd_report(args: argparse.Namespace) -> int:
+    started = time.perf_counter()
+    columns = load_store(
+        args.store,
+        since=_parse_day(args.since) if args.since else None,
+        until=_parse_day(args.until) if args.until else None,
+    )
+    loaded = time.perf_counter()
+    if not len(columns):
+        print(f"📊 No events in {args.store}")
+        return 0
+
+    if not args.by:
+        print_summary(columns, args.top)
+        print(f"⏱  {len(columns)} events: load {loaded - started:.2f}s, aggregate {time.perf_counter() - loaded:.2f}s")
+        return 0
+
+    by = [key.strip() for key in args.by.split(",") if key.strip()]
+    groups = group_counts(columns, by)
+    rows = groups[: args.top or None]
+    elapsed = time.perf_counter() - loaded
+    if args.format == "json":
+        print(json.dumps([{**dict(zip(by, key)), "count": count} for key, count in rows], indent=2))
+    elif args.format == "csv":
+        writer = csv.writer(sys.stdout)
+        writer.writerow([*by, "count"])
+        writer.writerows([*key, count] for key, count in rows)
+    else:
+        for key, count in rows:
+            print(f"{' | '.join(key)} | {count}")
+    print(
+        f"⏱  {len(columns)} events, {len(groups)} groups: load {loaded - started:.2f}s, group-by {elapsed:.2f}s",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--store", default=get_settings().tracking_events_dir, help="Segment directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser("import", help="Load events from the DB or JSONL files into segments")
+    importer.add_argument("--from", dest="source", choices=("db", "jsonl"), default="db")
+    importer.add_argument("--since", help="YYYY-MM-DD (db only)")
+    importer.add_argument("paths", nargs="*", help="JSONL files (TRACKING_SINK=file output)")
+    importer.set_defaults(handler=cmd_import)
+
+    commands.add_parser("compact", help="Merge all segments into one").set_defaults(handler=cmd_compact)
+
+    report = commands.add_parser("report", help="Summary or group-by counts")
+    report.add_argument("--by", help=f"Comma-separated keys: {', '.join(GROUP_KEYS)}")
+    report.add_argument("--since", help="YYYY-MM-DD (inclusive)")
+    report.add_argument("--until", help="YYYY-MM-DD (exclusive)")
+    report.add_argument("--top", type=int, default=10, help="Rows shown (0 = all)")
+    report.add_argument("--format", choices=("table", "json", "csv"), default="table")
+    report.set_defaults(handler=cmd_report)
+
+    synth = commands.add_parser("synth", help="Write a synthetic segment for benchmarking")
+    synth.add_argument("--events", type=int, default=1_000_000)
+    synth.add_argument("--days", type=int, default=30)
+    synth.add_argument("--referrers", type=int, default=200)
+    synth.add_argument("--ips", type=int, default=50_000)
+    synth.add_argument("--seed", type=int, default=1)
+    synth.set_defaults(handler=cmd_synth)
+
+    args = parser.parse_args()
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
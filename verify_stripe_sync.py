@@ -18,6 +18,8 @@ from dotenv import load_dotenv
 import stripe
 from typing import Dict, List, Tuple
 
+from app.core.stripe_reconcile import fetch_stripe_state
+
 # Load environment variables
 load_dotenv()
 
@@ -140,10 +142,10 @@ class StripeVerifier:
             )
     
     def load_stripe_data(self):
-        """Load products and prices from Stripe"""
-        # Load all products
-        products = stripe.Product.list(limit=100)
-        self.stripe_products = products.data
+        """Load products and prices from Stripe (all pages, fetched concurrently)"""
+        state = fetch_stripe_state(stripe, include_subscriptions=False)
+        self.stripe_products = state.products
+        prices_by_product = state.prices_by_product()
         
         active_count = sum(1 for p in self.stripe_products if p.active)
         archived_count = sum(1 for p in self.stripe_products if not p.active)
@@ -152,12 +154,12 @@ class StripeVerifier:
         print(f"     • Active: {active_count}")
         print(f"     • Archived: {archived_count}")
         
-        # Load prices for active products
+        # Group prices for active products
         for product in self.stripe_products:
             if product.active:
-                prices = stripe.Price.list(product=product.id, limit=100)
-                self.stripe_prices[product.id] = prices.data
-                active_prices = [p for p in prices.data if p.active]
+                prices = prices_by_product.get(product.id, [])
+                self.stripe_prices[product.id] = prices
+                active_prices = [p for p in prices if p.active]
                 print(f"   ✓ Product '{product.name}': {len(active_prices)} active price(s)")
     
     def verify_product_count(self):
@@ -91,7 +91,7 @@ def verify_configuration():
         print("  • 3 planes pagos: Starter ($9), Pro ($19), Team ($49)")
         print("  • Límites DUROS (sin rollover)")
         print("\n📝 PRÓXIMOS PASOS:")
-        print("  1. Ejecutar migración: python migrations/add_month_key_to_usage_events.py")
+        print("  1. Ejecutar migración: python migrate.py")
         print("  2. Configurar Stripe Price IDs en .env (si aún no lo hiciste)")
         print("  3. Iniciar servidor: python start_server.py")
         print("  4. Probar límites con usuarios de prueba")